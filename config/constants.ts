@@ -1035,3 +1035,14 @@ export const externalProjectBuckets: Record<AppStage, string[]> = {
     'pipeline-montauk-977251586657-ap-southeast-2',
   ],
 };
+
+/*
+Payload codec - step function payloads too large to inline are offloaded to this bucket
+*/
+export const payloadCodecBucketName: Record<AppStage, string> = {
+  [AppStage.BETA]: `orcabus-payload-codec-${accountIdAlias.beta}-ap-southeast-2`,
+  [AppStage.GAMMA]: `orcabus-payload-codec-${accountIdAlias.gamma}-ap-southeast-2`,
+  [AppStage.PROD]: `orcabus-payload-codec-${accountIdAlias.prod}-ap-southeast-2`,
+};
+export const payloadCodecKeyPrefix = 'payloads/';
+export const payloadCodecExpirationDays = 14;
@@ -8,6 +8,8 @@ import {
   bsshFastqCopyManagerReadyEventSource,
   bsshFastqCopyManagerEventSource,
   bsshFastqCopyManagerEventDetailType,
+  payloadCodecBucketName,
+  payloadCodecKeyPrefix,
 } from '../constants';
 import { BsshIcav2FastqCopyManagerConfig } from '../../lib/workload/stateless/stacks/bssh-icav2-fastq-copy-manager/deploy/interfaces';
 
@@ -23,5 +25,7 @@ export const getBsshIcav2FastqCopyManagerStackProps = (
     workflowName: bsshFastqCopyManagerWorkflowName,
     workflowVersion: bsshFastqCopyManagerWorkflowTypeVersion,
     eventBusName: eventBusName,
+    payloadCodecBucketName: payloadCodecBucketName[stage],
+    payloadCodecKeyPrefix: payloadCodecKeyPrefix,
   };
 };
@@ -20,6 +20,9 @@ import {
   icav2PipelineCacheBucket,
   ntsmBucket,
   oncoanalyserBucket,
+  payloadCodecBucketName,
+  payloadCodecExpirationDays,
+  payloadCodecKeyPrefix,
   rdsMasterSecretName,
   vpcProps,
   externalProjectBuckets,
@@ -33,6 +36,7 @@ import {
 import { ComputeProps } from '../../lib/workload/stateful/stacks/shared/constructs/compute';
 import { EventSourceProps } from '../../lib/workload/stateful/stacks/shared/constructs/event-source';
 import { EventDLQProps } from '../../lib/workload/stateful/stacks/shared/constructs/event-dlq';
+import { PayloadCodecBucketConstructProps } from '../../lib/workload/components/python-payload-codec-layer';
 
 const getEventSchemaRegistryConstructProps = (): SchemaRegistryProps => {
   return {
@@ -250,6 +254,16 @@ const getDatabaseConstructProps = (stage: AppStage): ConfigurableDatabaseProps =
   }
 };
 
+const getPayloadCodecBucketConstructProps = (stage: AppStage): PayloadCodecBucketConstructProps => {
+  return {
+    bucketName: payloadCodecBucketName[stage],
+    keyPrefix: payloadCodecKeyPrefix,
+    expirationDays: payloadCodecExpirationDays,
+    // Only holds temporary payloads, so nothing to retain
+    removalPolicy: RemovalPolicy.DESTROY,
+  };
+};
+
 export const getSharedStackProps = (stage: AppStage): SharedStackProps => {
   return {
     vpcProps,
@@ -260,5 +274,6 @@ export const getSharedStackProps = (stage: AppStage): SharedStackProps => {
     computeProps: getComputeConstructProps(),
     eventSourceProps: getEventSourceConstructProps(stage),
     eventDLQProps: getEventDLQConstructProps(),
+    payloadCodecBucketProps: getPayloadCodecBucketConstructProps(stage),
   };
 };
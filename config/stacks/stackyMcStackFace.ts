@@ -19,6 +19,7 @@ import {
   redcapLambdaFunctionName,
   stackyOncoanalyserGlueTableName,
   stackyOncoanalyserBothSashGlueTableName,
+  payloadCodecBucketName,
 } from '../constants';
 import { GlueStackConfig } from '../../lib/workload/stateless/stacks/stacky-mcstackface/glue-constructs';
 import { StackyStatefulTablesConfig } from '../../lib/workload/stateful/stacks/stacky-mcstackface-dynamodb';
@@ -49,6 +50,9 @@ export const getGlueStackProps = (stage: AppStage): GlueStackConfig => {
     /* Secrets */
     icav2AccessTokenSecretName: icav2AccessTokenSecretName[stage],
 
+    /* Buckets */
+    payloadCodecBucketName: payloadCodecBucketName[stage],
+
     /* BSSH SSM Parameters */
     bsshOutputFastqCopyUriSsmParameterName: stackyPrimaryOutputUriSsmParameterName,
 
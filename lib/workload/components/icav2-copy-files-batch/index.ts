@@ -4,10 +4,15 @@ import * as lambda from 'aws-cdk-lib/aws-lambda';
 import * as iam from 'aws-cdk-lib/aws-iam';
 import * as sfn from 'aws-cdk-lib/aws-stepfunctions';
 import * as secretsManager from 'aws-cdk-lib/aws-secretsmanager';
+import * as s3 from 'aws-cdk-lib/aws-s3';
 import { PythonFunction } from '@aws-cdk/aws-lambda-python-alpha';
 import path from 'path';
 import { ICAv2CopyFilesConstruct } from '../icav2-copy-files';
 import { NagSuppressions } from 'cdk-nag';
+import {
+  grantPayloadCodecDecode,
+  PayloadCodecPythonLambdaLayer,
+} from '../python-payload-codec-layer';
 
 export interface ICAv2CopyFilesBatchConstructProps {
   /* Constructs */
@@ -15,6 +20,9 @@ export interface ICAv2CopyFilesBatchConstructProps {
   /* StateMachine paths */
   stateMachineNameSingle: string; // 'copy_single_state_machine'
   stateMachineNameBatch: string; // 'copy_batch_state_machine'
+  /* Manifests too large to inline are read from this bucket */
+  payloadCodecBucket?: s3.IBucket;
+  payloadCodecKeyPrefix?: string;
 }
 
 export class ICAv2CopyBatchUtilityConstruct extends Construct {
@@ -24,6 +32,11 @@ export class ICAv2CopyBatchUtilityConstruct extends Construct {
   constructor(scope: Construct, id: string, props: ICAv2CopyFilesBatchConstructProps) {
     super(scope, id);
 
+    // Payload codec layer, the manifest may be a b64gz string or a payload reference
+    const payloadCodecLayer = new PayloadCodecPythonLambdaLayer(this, 'payload_codec_layer', {
+      layerPrefix: props.stateMachineNameBatch,
+    }).lambdaLayerVersionObj;
+
     // Manifest inverter lambda
     const manifestInverterLambda = new PythonFunction(this, 'manifest_inverter_lambda', {
       entry: path.join(__dirname, 'manifest_handler_lambda_py'),
@@ -32,8 +45,18 @@ export class ICAv2CopyBatchUtilityConstruct extends Construct {
       index: 'manifest_handler_lambda.py',
       handler: 'handler',
       memorySize: 1024,
+      layers: [payloadCodecLayer],
     });
 
+    // Manifests offloaded by the payload codec are read back from the bucket
+    if (props.payloadCodecBucket) {
+      grantPayloadCodecDecode(
+        props.payloadCodecBucket,
+        manifestInverterLambda,
+        props.payloadCodecKeyPrefix
+      );
+    }
+
     // Generate the single state machine
     this.icav2CopyFilesSfnObj = new ICAv2CopyFilesConstruct(this, 'icav2_copy_files_sfn', {
       icav2JwtSecretParameterObj: props.icav2JwtSecretParameterObj,
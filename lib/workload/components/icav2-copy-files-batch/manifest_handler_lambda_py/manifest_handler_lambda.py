@@ -33,6 +33,9 @@ inxF7nNqJErLMeV5bvM3aHUWvF78r4h3fTP8rYDFe/EBi+cuYYkCAAA=
 "
 }
 
+Either may instead be a payload reference from the payload codec layer,
+large manifests are offloaded to the payload codec bucket by encode_payload and read back here
+
 So we flip this to be
 
 {
@@ -48,7 +51,8 @@ So we flip this to be
   ]
 }
 
-Note the output must be decompressed
+Note the output must be decompressed,
+the inverted manifest is returned inline as it is the items list of the step function map state
 
 Convert to an array as this will help AWS Step Functions deploy the manifest for the copy batch data handler.
 
@@ -78,43 +82,33 @@ that can be done by the lambda that generates the copy job
 ]
 
 """
-from functools import reduce
-import json
-from base64 import b64encode, b64decode
-import gzip
-from typing import Dict, List, Union
-
-
-def compress_dict(input_dict: Union[Dict, List]) -> str:
-    """
-    Given a json input, compress to a base64 encoded string
-
-    param: input_dict: input dictionary to compress
+# Standard imports
+from typing import Dict, List
 
-    Returns: gzipped compressed base64 encoded string
-    """
-
-    # Compress
-    return b64encode(
-        gzip.compress(
-            json.dumps(input_dict).encode('utf-8')
-        )
-    ).decode("utf-8")
+# Layer imports
+from payload_codec import decode_payload, is_payload_reference
 
 
-def decompress_dict(input_compressed_b64gz_str: str) -> Union[Dict, List]:
+def invert_manifest(manifest: Dict[str, List[str]]) -> List[Dict]:
     """
-    Given a base64 encoded string, decompress and return the original dictionary
-    Args:
-        input_compressed_b64gz_str:
-
-    Returns: decompressed dictionary or list
+    Single pass over the manifest, collecting the source uris of each destination uri in a dict used as an ordered set.
+    Destination uris are sorted, source uris keep the order of the manifest keys (and appear once per destination)
+    :param manifest:
+    :return:
     """
+    source_uris_by_dest: Dict[str, Dict[str, None]] = {}
+    for source_uri, dest_uris in manifest.items():
+        for dest_uri in dest_uris:
+            source_uris_by_dest.setdefault(dest_uri, {})[source_uri] = None
 
-    # Decompress
-    return json.loads(
-        gzip.decompress(
-            b64decode(input_compressed_b64gz_str.encode('utf-8'))
+    # Convert the dict to a list where the key is "dest_uri" and "source_uris" represents the value
+    return list(
+        map(
+            lambda dest_uri_iter_: {
+                "dest_uri": dest_uri_iter_,
+                "source_uris": list(source_uris_by_dest[dest_uri_iter_])
+            },
+            sorted(source_uris_by_dest)
         )
     )
 
@@ -128,52 +122,20 @@ def handler(event: Dict, context) -> List[Dict]:
     """
 
     # Check if we have a manifest
-    if event.get("manifest", None) and isinstance(event.get("manifest", None), dict):
+    # The manifest may arrive as a payload reference from the payload codec layer
+    if event.get("manifest", None) and is_payload_reference(event.get("manifest", None)):
+        manifest = decode_payload(event.get("manifest"))
+    elif event.get("manifest", None) and isinstance(event.get("manifest", None), dict):
         manifest = event.get("manifest")
-    elif event.get("manifest_b64gz", None) and isinstance(event.get("manifest_b64gz", None), str):
-        manifest = decompress_dict(event.get("manifest_b64gz"))
+    elif event.get("manifest_b64gz", None) and (
+            isinstance(event.get("manifest_b64gz", None), str) or
+            is_payload_reference(event.get("manifest_b64gz", None))
+    ):
+        manifest = decode_payload(event.get("manifest_b64gz"))
     else:
         raise ValueError("No manifest found in event")
 
-    # Collect all values from all keys
-    all_destination_uris = list(
-        set(
-            reduce(
-                lambda list_1, list_2: list_1 + list_2,
-                map(
-                    lambda dest_uri_iter: dest_uri_iter,
-                    manifest.values()
-                ),
-                []
-            )
-        )
-    )
-
-    # Now invert our manifest by generating a per-destination uri list of source uris
-    source_uris_by_dest = {}
-    for dest_uri in all_destination_uris:
-        source_uris_by_dest[dest_uri] = list(
-            filter(
-                lambda source_uri_iter_filter: dest_uri in manifest[source_uri_iter_filter],
-                manifest.keys()
-            )
-        )
-
-    # Convert the dict to a list where the key is "dest_uri" and "source_uris" represents the value
-    return (
-        sorted(
-            list(
-                map(
-                    lambda dest_uri_iter_kv: {
-                        "dest_uri": dest_uri_iter_kv[0],
-                        "source_uris": dest_uri_iter_kv[1]
-                    },
-                    source_uris_by_dest.items()
-                )
-            ),
-            key=lambda x: x.get("dest_uri")
-        )
-    )
+    return invert_manifest(manifest)
 
 
 # if __name__ == "__main__":
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+
+"""
+Equivalence of the single pass manifest inversion with the previous implementation, on random manifests
+
+Run from the manifest_handler_lambda_py directory, with the payload codec layer on the python path, with
+    PYTHONPATH="../../python-payload-codec-layer/payload_codec_layer/src:." python -m unittest discover tests
+
+Or benchmark on a synthetic 200k entry manifest with
+    python -m tests.test_manifest_handler_lambda
+"""
+
+# Standard imports
+import random
+import time
+import unittest
+from functools import reduce
+from typing import Dict, List
+
+# Layer imports
+from payload_codec import compress_dict, encode_payload
+
+# Local imports
+import manifest_handler_lambda
+
+PROJECT_ID = "7595e8f2-32d3-4c76-a324-c6a85dae87b5"
+
+
+def legacy_invert_manifest(manifest: Dict[str, List[str]]) -> List[Dict]:
+    """
+    Previous implementation, kept as the reference output
+    """
+    all_destination_uris = list(
+        set(
+            reduce(
+                lambda list_1, list_2: list_1 + list_2,
+                map(
+                    lambda dest_uri_iter: dest_uri_iter,
+                    manifest.values()
+                ),
+                []
+            )
+        )
+    )
+
+    source_uris_by_dest = {}
+    for dest_uri in all_destination_uris:
+        source_uris_by_dest[dest_uri] = list(
+            filter(
+                lambda source_uri_iter_filter: dest_uri in manifest[source_uri_iter_filter],
+                manifest.keys()
+            )
+        )
+
+    return (
+        sorted(
+            list(
+                map(
+                    lambda dest_uri_iter_kv: {
+                        "dest_uri": dest_uri_iter_kv[0],
+                        "source_uris": dest_uri_iter_kv[1]
+                    },
+                    source_uris_by_dest.items()
+                )
+            ),
+            key=lambda x: x.get("dest_uri")
+        )
+    )
+
+
+def get_random_manifest(rng: random.Random, num_source_uris: int, num_dest_uris: int) -> Dict[str, List[str]]:
+    """
+    Random manifest, sources map to between zero and three destinations, possibly repeated
+    """
+    dest_uris = [f"icav2://{PROJECT_ID}/dest/folder_{i}/" for i in range(num_dest_uris)]
+    source_uris = rng.sample(
+        [f"icav2://{PROJECT_ID}/src/file_{i}" for i in range(num_source_uris * 2)],
+        num_source_uris
+    )
+    return {
+        source_uri: [rng.choice(dest_uris) for _ in range(rng.randint(0, 3))]
+        for source_uri in source_uris
+    }
+
+
+def get_synthetic_manifest(num_source_uris: int, num_dest_uris: int) -> Dict[str, List[str]]:
+    """
+    Wgs like manifest, each source file is copied to one sample folder and one shared folder
+    """
+    return {
+        f"icav2://{PROJECT_ID}/src/sample_{i % num_dest_uris}/file_{i}.fastq.gz": [
+            f"icav2://{PROJECT_ID}/dest/sample_{i % num_dest_uris}/",
+            f"icav2://{PROJECT_ID}/dest/all/",
+        ]
+        for i in range(num_source_uris)
+    }
+
+
+class TestInvertManifest(unittest.TestCase):
+    def test_docstring_example(self):
+        self.assertEqual(
+            manifest_handler_lambda.handler(
+                {
+                    "manifest_b64gz": compress_dict(
+                        {
+                            "icav2://project_id/path/to/src/file1": [
+                                "icav2://project_id/path/to/dest/folder1/",
+                                "icav2://project_id/path/to/dest/folder2/",
+                            ],
+                            "icav2://project_id/path/to/src/file2": [
+                                "icav2://project_id/path/to/dest/folder2/",
+                                "icav2://project_id/path/to/dest/folder3/",
+                            ]
+                        }
+                    )
+                },
+                None
+            ),
+            [
+                {
+                    "dest_uri": "icav2://project_id/path/to/dest/folder1/",
+                    "source_uris": ["icav2://project_id/path/to/src/file1"]
+                },
+                {
+                    "dest_uri": "icav2://project_id/path/to/dest/folder2/",
+                    "source_uris": ["icav2://project_id/path/to/src/file1", "icav2://project_id/path/to/src/file2"]
+                },
+                {
+                    "dest_uri": "icav2://project_id/path/to/dest/folder3/",
+                    "source_uris": ["icav2://project_id/path/to/src/file2"]
+                },
+            ]
+        )
+
+    def test_random_manifests_match_legacy(self):
+        rng = random.Random(20241031)
+        for _ in range(500):
+            manifest = get_random_manifest(rng, rng.randint(0, 50), rng.randint(1, 10))
+            self.assertEqual(
+                manifest_handler_lambda.invert_manifest(manifest),
+                legacy_invert_manifest(manifest),
+                manifest
+            )
+
+    def test_inline_payload_reference(self):
+        manifest = get_synthetic_manifest(100, 10)
+        expected = manifest_handler_lambda.invert_manifest(manifest)
+        for event_key in ["manifest", "manifest_b64gz"]:
+            self.assertEqual(
+                manifest_handler_lambda.handler(
+                    {event_key: encode_payload(manifest, bucket_name=None)},
+                    None
+                ),
+                expected
+            )
+
+    def test_no_manifest(self):
+        with self.assertRaises(ValueError):
+            manifest_handler_lambda.handler({}, None)
+
+
+if __name__ == "__main__":
+    # The previous implementation is skipped at 200k, it already takes tens of seconds at 50k
+    for num_source_uris, num_dest_uris, run_legacy in [(5000, 100, True), (50000, 1000, True), (200000, 1000, False)]:
+        manifest = get_synthetic_manifest(num_source_uris, num_dest_uris)
+        for name, invert_func in [
+            ("previous", legacy_invert_manifest),
+            ("single pass", manifest_handler_lambda.invert_manifest),
+        ]:
+            if name == "previous" and not run_legacy:
+                continue
+            start_time = time.perf_counter()
+            invert_func(manifest)
+            print(
+                f"{name:<12} {num_source_uris} sources, {num_dest_uris + 1} destinations: "
+                f"{(time.perf_counter() - start_time) * 1000:.1f} ms"
+            )
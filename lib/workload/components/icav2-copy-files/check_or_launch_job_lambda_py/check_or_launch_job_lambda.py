@@ -27,15 +27,18 @@ The event input is
 """
 
 # Standard imports
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from tempfile import NamedTemporaryFile
-from typing import List
+from typing import List, Dict, Optional, TypedDict, Iterator
 from urllib.parse import urlunparse, urlparse
 import boto3
 from os import environ
 import typing
 import logging
+import json
 import re
+import requests
+from requests.adapters import HTTPAdapter
 
 # Wrapica imports
 from wrapica.libica_models import ProjectData
@@ -45,8 +48,8 @@ from wrapica.project_data import (
     convert_uri_to_project_data_obj, project_data_copy_batch_handler,
     delete_project_data,
     list_project_data_non_recursively,
-    write_icav2_file_contents, read_icav2_file_contents,
-    get_project_data_obj_from_project_id_and_path,
+    create_download_url, create_file_in_project,
+    get_project_data_upload_url,
 )
 
 if typing.TYPE_CHECKING:
@@ -76,6 +79,11 @@ RUNNING_STATES = [
 TINY_FILE_SIZE_LIMIT = 8388608  # 8 MiB (8 * 2^20)
 MULTI_PART_ETAG_REGEX = re.compile(r"\w+-\d+")
 
+# Tiny files are streamed from the source download url to the dest upload url, a few at a time
+TINY_FILE_TRANSFER_MAX_WORKERS = 16
+TINY_FILE_TRANSFER_CHUNK_SIZE = 1048576  # 1 MiB (2^20)
+TINY_FILE_TRANSFER_TIMEOUT_SECONDS = 60
+
 # Try a job 10 times before giving up
 MAX_JOB_ATTEMPT_COUNTER = 10
 DEFAULT_WAIT_TIME_SECONDS = 10
@@ -85,6 +93,43 @@ DEFAULT_WAIT_TIME_SECONDS_EXT = 10
 ICAV2_BASE_URL = "https://ica.illumina.com/ica/rest"
 
 
+class CopyVerificationMismatch(TypedDict):
+    source_uri: str
+    dest_uri: str
+    reason: str  # One of MISSING, SIZE_MISMATCH, ETAG_MISMATCH
+    source_file_size_in_bytes: int
+    dest_file_size_in_bytes: Optional[int]
+    source_e_tag: Optional[str]
+    dest_e_tag: Optional[str]
+
+
+class TinyFileTransferResult(TypedDict):
+    source_data_id: str
+    dest_path: str
+    status: str  # One of TRANSFERRED, SKIPPED_EXISTS, FAILED
+    bytes_transferred: int
+    error_message: Optional[str]
+
+
+class ContentLengthStream:
+    """
+    Wraps the chunks of a download as a sized body,
+    so requests sends the upload with a Content-Length header rather than chunked (which presigned urls reject)
+    """
+    def __init__(self, chunks: Iterator[bytes], content_length: int):
+        self.chunks = chunks
+        self.content_length = content_length
+        self.bytes_read = 0
+
+    def __len__(self) -> int:
+        return self.content_length
+
+    def __iter__(self) -> Iterator[bytes]:
+        for chunk in self.chunks:
+            self.bytes_read += len(chunk)
+            yield chunk
+
+
 # AWS things
 def get_ssm_client() -> 'SSMClient':
     """
@@ -128,51 +173,164 @@ def set_icav2_env_vars():
     )
 
 
-def tiny_file_transfer(dest_folder_project_data: ProjectData, source_file_project_data: ProjectData):
+def get_tiny_file_transfer_session(max_workers: int = TINY_FILE_TRANSFER_MAX_WORKERS) -> requests.Session:
+    """
+    One session for the transfer pool, each worker holds a download and an upload connection open at once
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=2, pool_maxsize=2 * max_workers)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def tiny_file_transfer(
+        dest_folder_project_data: ProjectData,
+        source_file_project_data: ProjectData,
+        session: requests.Session
+) -> TinyFileTransferResult:
     """
     For tiny files (that have aws s3 tagging), ICAv2 cannot transfer these
     through jobs due to permission errors
+
+    Stream the source file from its presigned download url straight into the presigned upload url
+    of a new file in the dest folder, nothing is written to local disk
     :param dest_folder_project_data:
     :param source_file_project_data:
+    :param session:
     :return:
     """
-    # Check file does not exist
+    dest_path = Path(dest_folder_project_data.data.details.path) / source_file_project_data.data.details.name
+    dest_file_project_data_obj: Optional[ProjectData] = None
+
     try:
-        get_project_data_obj_from_project_id_and_path(
-            project_id=dest_folder_project_data.project_id,
-            data_path=Path(dest_folder_project_data.data.details.path) / source_file_project_data.data.details.name,
-            data_type=DataType.FILE
+        download_url = create_download_url(
+            project_id=source_file_project_data.project_id,
+            file_id=source_file_project_data.data.id
         )
-    except FileNotFoundError:
-        pass
-    else:
-        # File already exists, no need to rerun
-        return None
-
-    # Download / upload tiny files
-    with NamedTemporaryFile() as temp_file_obj:
-        # Pull down data
-        read_icav2_file_contents(
-            source_file_project_data.project_id,
-            source_file_project_data.data.id,
-            Path(temp_file_obj.name)
-        )
-        # Write file contents
-        write_icav2_file_contents(
+        dest_file_project_data_obj = create_file_in_project(
             project_id=dest_folder_project_data.project_id,
-            data_path=Path(dest_folder_project_data.data.details.path) / source_file_project_data.data.details.name,
-            file_stream_or_path=Path(temp_file_obj.name)
+            file_path=dest_path
         )
-
-        # Get new file object
-        dest_file_project_data_obj = get_project_data_obj_from_project_id_and_path(
+        upload_url = get_project_data_upload_url(
             project_id=dest_folder_project_data.project_id,
-            data_path=Path(dest_folder_project_data.data.details.path) / source_file_project_data.data.details.name,
-            data_type=DataType.FILE
+            data_id=dest_file_project_data_obj.data.id
         )
 
+        with session.get(download_url, stream=True, timeout=TINY_FILE_TRANSFER_TIMEOUT_SECONDS) as download_response:
+            download_response.raise_for_status()
+            content_length = int(
+                download_response.headers.get(
+                    "Content-Length",
+                    source_file_project_data.data.details.file_size_in_bytes
+                )
+            )
+            upload_body = ContentLengthStream(
+                download_response.iter_content(chunk_size=TINY_FILE_TRANSFER_CHUNK_SIZE),
+                content_length
+            )
+            upload_response = session.put(upload_url, data=upload_body, timeout=TINY_FILE_TRANSFER_TIMEOUT_SECONDS)
+            upload_response.raise_for_status()
+
         # Append ilmn tags from old file to new file
         # FIXME
+    except Exception as e:
+        logger.error(f"Could not transfer {source_file_project_data.data.id} to {dest_path}: {e}")
+        # Don't leave an empty or partial file behind in the dest folder
+        if dest_file_project_data_obj is not None:
+            try:
+                delete_project_data(
+                    dest_folder_project_data.project_id,
+                    dest_file_project_data_obj.data.id
+                )
+            except Exception as delete_error:
+                logger.error(f"Could not delete incomplete file {dest_path}: {delete_error}")
+        return {
+            "source_data_id": source_file_project_data.data.id,
+            "dest_path": str(dest_path),
+            "status": "FAILED",
+            "bytes_transferred": 0,
+            "error_message": str(e),
+        }
+
+    return {
+        "source_data_id": source_file_project_data.data.id,
+        "dest_path": str(dest_path),
+        "status": "TRANSFERRED",
+        "bytes_transferred": upload_body.bytes_read,
+        "error_message": None,
+    }
+
+
+def is_complete_copy(dest_file_project_data: ProjectData, source_file_project_data: ProjectData) -> bool:
+    """
+    An existing dest file is only a complete copy of the source file
+    once it is available and the same size as the source file
+    """
+    return (
+        ProjectDataStatusValues(dest_file_project_data.data.details.status) == ProjectDataStatusValues.AVAILABLE and
+        dest_file_project_data.data.details.file_size_in_bytes == source_file_project_data.data.details.file_size_in_bytes
+    )
+
+
+def tiny_file_transfer_batch(
+        dest_folder_project_data: ProjectData,
+        source_file_project_data_objs: List[ProjectData],
+        max_workers: int = TINY_FILE_TRANSFER_MAX_WORKERS
+) -> List[TinyFileTransferResult]:
+    """
+    Transfer the tiny files with a bounded pool of workers.
+    The dest folder is listed once up front, files that already exist as a complete copy are skipped,
+    any other existing file of the same name is deleted and transferred again.
+    Returns one result per source file, in the order of the source files
+    """
+    dest_files_by_name = list_files_in_folder_by_name(dest_folder_project_data)
+
+    transfer_results: List[Optional[TinyFileTransferResult]] = [None] * len(source_file_project_data_objs)
+    files_to_transfer = []
+    for index, source_file_project_data in enumerate(source_file_project_data_objs):
+        dest_file_project_data = dest_files_by_name.get(source_file_project_data.data.details.name)
+        if dest_file_project_data is not None and not is_complete_copy(dest_file_project_data, source_file_project_data):
+            logger.info(
+                f"Deleting incomplete file {dest_file_project_data.data.details.path} before transferring it again"
+            )
+            delete_project_data(
+                dest_file_project_data.project_id,
+                dest_file_project_data.data.id
+            )
+            dest_file_project_data = None
+
+        # File already exists, no need to rerun
+        if dest_file_project_data is not None:
+            transfer_results[index] = {
+                "source_data_id": source_file_project_data.data.id,
+                "dest_path": str(
+                    Path(dest_folder_project_data.data.details.path) / source_file_project_data.data.details.name
+                ),
+                "status": "SKIPPED_EXISTS",
+                "bytes_transferred": 0,
+                "error_message": None,
+            }
+            continue
+        files_to_transfer.append((index, source_file_project_data))
+
+    if len(files_to_transfer) == 0:
+        return transfer_results
+
+    with get_tiny_file_transfer_session(max_workers) as session, ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = list(
+            map(
+                lambda file_to_transfer_iter_: (
+                    file_to_transfer_iter_[0],
+                    executor.submit(tiny_file_transfer, dest_folder_project_data, file_to_transfer_iter_[1], session)
+                ),
+                files_to_transfer
+            )
+        )
+        for index, future in futures:
+            transfer_results[index] = future.result()
+
+    return transfer_results
 
 
 def submit_copy_job(dest_project_data_obj: ProjectData, source_project_data_objs: List[ProjectData]) -> str:
@@ -208,23 +366,145 @@ def delete_existing_partial_data(dest_project_data_obj: ProjectData):
             )
 
 
+def get_parent_folder_uri(uri: str) -> str:
+    """
+    Get the parent folder uri of a file uri, i.e icav2://project/path/to/file.txt -> icav2://project/path/to/
+    """
+    return str(
+        urlunparse(
+            (
+                urlparse(uri).scheme,
+                urlparse(uri).netloc,
+                str(Path(urlparse(uri).path).parent).rstrip("/") + "/",
+                None, None, None
+            )
+        )
+    )
+
+
+def list_files_in_folder_by_name(folder_project_data_obj: ProjectData) -> Dict[str, ProjectData]:
+    """
+    One non-recursive listing of the folder, keyed by file name
+    """
+    return dict(
+        map(
+            lambda file_obj_iter_: (file_obj_iter_.data.details.name, file_obj_iter_),
+            list_project_data_non_recursively(
+                project_id=folder_project_data_obj.project_id,
+                parent_folder_id=folder_project_data_obj.data.id,
+                data_type=DataType.FILE
+            )
+        )
+    )
+
+
+def get_source_uris_as_project_data_objs_by_uri(source_uris: List[str]) -> Dict[str, ProjectData]:
+    """
+    Resolve the source uris in bulk, with one folder lookup and one listing per parent folder
+    (rather than one lookup per source uri)
+    """
+    source_uris_by_parent_folder_uri: Dict[str, List[str]] = {}
+    for source_uri in source_uris:
+        source_uris_by_parent_folder_uri.setdefault(get_parent_folder_uri(source_uri), []).append(source_uri)
+
+    source_project_data_objs_by_uri: Dict[str, ProjectData] = {}
+    for parent_folder_uri, parent_folder_source_uris in source_uris_by_parent_folder_uri.items():
+        files_by_name = list_files_in_folder_by_name(
+            convert_uri_to_project_data_obj(parent_folder_uri)
+        )
+        for source_uri in parent_folder_source_uris:
+            file_name = Path(urlparse(source_uri).path).name
+            if file_name not in files_by_name:
+                raise FileNotFoundError(f"Could not find source file {source_uri}")
+            source_project_data_objs_by_uri[source_uri] = files_by_name[file_name]
+
+    return source_project_data_objs_by_uri
+
+
 def get_source_uris_as_project_data_objs(source_uris: List[str]) -> List[ProjectData]:
     # Get source uris as project data objects
+    source_project_data_objs_by_uri = get_source_uris_as_project_data_objs_by_uri(source_uris)
     return list(
         map(
-            lambda source_uri_iter: convert_uri_to_project_data_obj(
-                source_uri_iter
-            ),
+            lambda source_uri_iter: source_project_data_objs_by_uri[source_uri_iter],
             source_uris
         )
     )
 
 
+def is_e_tag_comparable(source_e_tag: Optional[str], dest_e_tag: Optional[str]) -> bool:
+    """
+    Multipart etags depend on the part size of the upload,
+    only compare etags that are both single part, or both multipart with the same number of parts
+    """
+    if not source_e_tag or not dest_e_tag:
+        return False
+    source_is_multipart = MULTI_PART_ETAG_REGEX.fullmatch(source_e_tag) is not None
+    dest_is_multipart = MULTI_PART_ETAG_REGEX.fullmatch(dest_e_tag) is not None
+    if source_is_multipart != dest_is_multipart:
+        return False
+    if source_is_multipart:
+        return source_e_tag.rsplit("-", 1)[-1] == dest_e_tag.rsplit("-", 1)[-1]
+    return True
+
+
+def get_copy_verification_mismatch_list(
+        dest_uri: str,
+        dest_files_by_name: Dict[str, ProjectData],
+        source_project_data_objs_by_uri: Dict[str, ProjectData]
+) -> List[CopyVerificationMismatch]:
+    """
+    Join the source files against the listing of the destination folder on the file name,
+    and report the files that are missing, or with a different size or etag in the destination
+    """
+    mismatch_list: List[CopyVerificationMismatch] = []
+    for source_uri, source_project_data_obj in source_project_data_objs_by_uri.items():
+        source_details = source_project_data_obj.data.details
+        dest_project_data_file_obj = dest_files_by_name.get(source_details.name, None)
+        dest_details = dest_project_data_file_obj.data.details if dest_project_data_file_obj is not None else None
+
+        if dest_details is None:
+            reason = "MISSING"
+        elif source_details.file_size_in_bytes != dest_details.file_size_in_bytes:
+            reason = "SIZE_MISMATCH"
+        elif (
+            is_e_tag_comparable(source_details.object_e_tag, dest_details.object_e_tag) and
+            source_details.object_e_tag != dest_details.object_e_tag
+        ):
+            reason = "ETAG_MISMATCH"
+        else:
+            continue
+
+        mismatch_list.append(
+            {
+                "source_uri": source_uri,
+                "dest_uri": str(
+                    urlunparse(
+                        (
+                            urlparse(dest_uri).scheme,
+                            urlparse(dest_uri).netloc,
+                            str(Path(urlparse(dest_uri).path) / source_details.name),
+                            None, None, None
+                        )
+                    )
+                ),
+                "reason": reason,
+                "source_file_size_in_bytes": source_details.file_size_in_bytes,
+                "dest_file_size_in_bytes": dest_details.file_size_in_bytes if dest_details is not None else None,
+                "source_e_tag": source_details.object_e_tag,
+                "dest_e_tag": dest_details.object_e_tag if dest_details is not None else None,
+            }
+        )
+
+    return mismatch_list
+
+
 def filter_tiny_files_from_source_project_data_objs(
         source_project_data_objs: List[ProjectData],
         dest_folder_obj: ProjectData
 ) -> List[ProjectData]:
     source_project_data_list_filtered: List[ProjectData] = []
+    tiny_source_project_data_list: List[ProjectData] = []
     for source_project_data_obj in source_project_data_objs:
         # Put all the big files into the job
         if (
@@ -234,14 +514,35 @@ def filter_tiny_files_from_source_project_data_objs(
             source_project_data_list_filtered.append(source_project_data_obj)
             continue
         # We have a tiny file, transfer via download + upload
-        logger.info(
-            f"File {source_project_data_obj.data.id} is too small to transfer via a job, "
-            f"transferring via download+upload"
+        tiny_source_project_data_list.append(source_project_data_obj)
+
+    if len(tiny_source_project_data_list) == 0:
+        return source_project_data_list_filtered
+
+    logger.info(
+        f"{len(tiny_source_project_data_list)} files are too small to transfer via a job, "
+        f"transferring via download+upload"
+    )
+    transfer_results = tiny_file_transfer_batch(
+        dest_folder_obj,
+        tiny_source_project_data_list
+    )
+    logger.info(json.dumps(transfer_results, indent=4))
+
+    # Fail once the whole batch has been attempted, failed transfers leave no file behind,
+    # so a rerun only skips the files that were copied in full
+    failed_transfer_results = list(
+        filter(
+            lambda transfer_result_iter_: transfer_result_iter_["status"] == "FAILED",
+            transfer_results
         )
-        tiny_file_transfer(
-            dest_folder_obj,
-            source_project_data_obj
+    )
+    if len(failed_transfer_results) > 0:
+        raise Exception(
+            f"Failed to transfer {len(failed_transfer_results)} of {len(transfer_results)} tiny files: " +
+            ", ".join(map(lambda transfer_result_iter_: transfer_result_iter_["dest_path"], failed_transfer_results))
         )
+
     return source_project_data_list_filtered
 
 
@@ -372,60 +673,60 @@ def handler(event, context):
     # Handle successful job
     if job_status is True:
         # Confirm source uris have made it to the destination successfully
-        # Get dest folder
-        dest_project_folder_data_obj: ProjectData = convert_uri_to_project_data_obj(dest_uri)
-
-        # Iterate through each source uri
-        has_errors = False
-        for source_uri in source_uris:
-            # Get the source project data object
-            source_project_data_obj: ProjectData = convert_uri_to_project_data_obj(source_uri)
-
-            # Get the dest uri file name
-            dest_file_uri = str(
-                urlunparse(
-                    (
-                        urlparse(dest_uri).scheme,
-                        urlparse(dest_uri).netloc,
-                        str(Path(urlparse(dest_uri).path) / source_project_data_obj.data.details.name),
-                        None, None, None
-                    )
-                )
-            )
-            # Get the dest project data object
-            dest_project_data_file_obj = convert_uri_to_project_data_obj(
-                dest_file_uri
-            )
+        # One bulk resolution of the source uris and one listing of the dest folder, joined on the file name
+        source_project_data_objs_by_uri = get_source_uris_as_project_data_objs_by_uri(source_uris)
+        dest_files_by_name = list_files_in_folder_by_name(dest_project_data_obj)
+        mismatch_list = get_copy_verification_mismatch_list(
+            dest_uri=dest_uri,
+            dest_files_by_name=dest_files_by_name,
+            source_project_data_objs_by_uri=source_project_data_objs_by_uri
+        )
+
+        # If we have errors, we need to rerun the job for the mismatched files only
+        if len(mismatch_list) > 0:
+            logger.error(f"Copy verification failed for {len(mismatch_list)} of {len(source_uris)} files")
+            logger.error(json.dumps(mismatch_list, indent=4))
 
-            # Compare the source and dest project data objects etags
-            if source_project_data_obj.data.details.file_size_in_bytes != dest_project_data_file_obj.data.details.file_size_in_bytes:
-                # Set has errors to true
-                has_errors = True
-                logger.error("Data size mismatch between source and dest project data objects")
-                logger.error(f"Data {source_uri} was transferred to {dest_file_uri} but the file sizes do not match")
-                logger.error(f"Source file size: {source_project_data_obj.data.details.file_size_in_bytes}")
-                logger.error(f"Dest file size: {dest_project_data_file_obj.data.details.file_size_in_bytes}")
-                logger.error("Purging the dest uri file and starting again")
-                # Purge the dest uri file and start again
+            # Add this job id to the failed job list
+            failed_job_list.append(job_id)
+
+            # Purge the mismatched dest files and start again
+            for mismatch in mismatch_list:
+                dest_project_data_file_obj = dest_files_by_name.get(Path(urlparse(mismatch["dest_uri"]).path).name)
+                if dest_project_data_file_obj is None:
+                    continue
+                logger.info(f"Purging {mismatch['dest_uri']} ({mismatch['reason']})")
                 delete_project_data(
                     project_id=dest_project_data_file_obj.project_id,
                     data_id=dest_project_data_file_obj.data.id
                 )
 
-        # If we have errors, we need to rerun the job
-        if has_errors:
-            # Add this job id to the failed job list
-            failed_job_list.append(job_id)
-
             # Delete any existing partial data
             delete_existing_partial_data(dest_project_data_obj)
 
-            # Get source project data list uris
+            # Get the mismatched source project data objects (tiny files are transferred here)
             source_project_data_list = filter_tiny_files_from_source_project_data_objs(
-                get_source_uris_as_project_data_objs(source_uris),
+                list(
+                    map(
+                        lambda mismatch_iter_: source_project_data_objs_by_uri[mismatch_iter_["source_uri"]],
+                        mismatch_list
+                    )
+                ),
                 dest_project_data_obj
             )
 
+            # Only tiny files mismatched, these have been transferred again
+            if len(source_project_data_list) == 0:
+                return {
+                    "dest_uri": dest_uri,
+                    "source_uris": source_uris,
+                    "job_id": job_id,
+                    "failed_job_list": failed_job_list,  # Empty list or list of failed jobs
+                    "job_status": "SUCCEEDED",
+                    "wait_time_seconds": DEFAULT_WAIT_TIME_SECONDS,
+                    "mismatch_list": mismatch_list
+                }
+
             # Resubmit job
             return {
                 "dest_uri": dest_uri,
@@ -436,7 +737,8 @@ def handler(event, context):
                 ),
                 "failed_job_list": failed_job_list,  # Empty list or list of failed jobs
                 "job_status": "RUNNING",
-                "wait_time_seconds": DEFAULT_WAIT_TIME_SECONDS
+                "wait_time_seconds": DEFAULT_WAIT_TIME_SECONDS,
+                "mismatch_list": mismatch_list
             }
 
         # If we don't have errors, we can return the job as successful
@@ -446,7 +748,8 @@ def handler(event, context):
             "job_id": job_id,
             "failed_job_list": failed_job_list,  # Empty list or list of failed jobs
             "job_status": "SUCCEEDED",
-            "wait_time_seconds": DEFAULT_WAIT_TIME_SECONDS
+            "wait_time_seconds": DEFAULT_WAIT_TIME_SECONDS,
+            "mismatch_list": []
         }
 
 
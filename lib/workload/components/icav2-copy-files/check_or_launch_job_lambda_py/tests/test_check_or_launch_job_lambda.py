@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+
+"""
+Post-copy verification tests, with the wrapica / ICAv2 API calls stubbed
+
+Run from the check_or_launch_job_lambda_py directory with
+    python -m unittest discover tests
+"""
+
+# Standard imports
+import unittest
+from pathlib import Path
+from types import SimpleNamespace
+from unittest.mock import patch, MagicMock
+from urllib.parse import urlparse
+
+# Local imports
+import check_or_launch_job_lambda
+
+PROJECT_ID = "ea19a3f5-ec7c-4940-a474-c31cd91dbad4"
+SOURCE_FOLDER_URI = f"icav2://{PROJECT_ID}/primary/241024_A00130_0336_BHW7MVDSXC/Samples/Lane_1/L2401532/"
+DEST_URI = f"icav2://{PROJECT_ID}/cache/cttsov2/20241031d8a13553/L2401532/"
+LARGE_FILE_SIZE = 2 * check_or_launch_job_lambda.TINY_FILE_SIZE_LIMIT
+
+
+def make_project_data_obj(path: str, data_id: str, file_size_in_bytes: int = 0, object_e_tag: str = None):
+    return SimpleNamespace(
+        project_id=PROJECT_ID,
+        data=SimpleNamespace(
+            id=data_id,
+            details=SimpleNamespace(
+                path=path,
+                name=Path(path).name,
+                file_size_in_bytes=file_size_in_bytes,
+                object_e_tag=object_e_tag,
+                status="AVAILABLE",
+            )
+        )
+    )
+
+
+class StubICAv2:
+    """
+    In-memory folders, counting the ICAv2 API calls
+    """
+    def __init__(self, source_files, dest_files):
+        self.folders = {
+            urlparse(SOURCE_FOLDER_URI).path: (make_project_data_obj(urlparse(SOURCE_FOLDER_URI).path, "fol.src"), source_files),
+            urlparse(DEST_URI).path: (make_project_data_obj(urlparse(DEST_URI).path, "fol.dest"), dest_files),
+        }
+        self.call_count = 0
+        self.deleted_data_ids = []
+        self.copy_job_source_data_ids = []
+
+    def convert_uri_to_project_data_obj(self, uri, create_data_if_not_found=False):
+        self.call_count += 1
+        path = urlparse(uri).path
+        if path in self.folders:
+            return self.folders[path][0]
+        parent_path = str(Path(path).parent) + "/"
+        for file_obj in self.folders[parent_path][1]:
+            if file_obj.data.details.name == Path(path).name:
+                return file_obj
+        raise FileNotFoundError(uri)
+
+    def list_project_data_non_recursively(self, project_id, parent_folder_id, data_type=None):
+        self.call_count += 1
+        for folder_obj, files in self.folders.values():
+            if folder_obj.data.id == parent_folder_id:
+                return list(files)
+        return []
+
+    def delete_project_data(self, project_id, data_id):
+        self.call_count += 1
+        self.deleted_data_ids.append(data_id)
+
+    def project_data_copy_batch_handler(self, source_data_ids, destination_project_id, destination_folder_path):
+        self.call_count += 1
+        self.copy_job_source_data_ids = source_data_ids
+        return SimpleNamespace(id="job.new")
+
+    def get_job(self, job_id):
+        self.call_count += 1
+        return SimpleNamespace(status="SUCCEEDED")
+
+
+class TestPostCopyVerification(unittest.TestCase):
+    def run_handler(self, stub: StubICAv2, num_files: int):
+        with patch.multiple(
+            check_or_launch_job_lambda,
+            set_icav2_env_vars=MagicMock(),
+            convert_uri_to_project_data_obj=stub.convert_uri_to_project_data_obj,
+            list_project_data_non_recursively=stub.list_project_data_non_recursively,
+            delete_project_data=stub.delete_project_data,
+            project_data_copy_batch_handler=stub.project_data_copy_batch_handler,
+            get_job=stub.get_job,
+        ):
+            return check_or_launch_job_lambda.handler(
+                {
+                    "dest_uri": DEST_URI,
+                    "source_uris": [f"{SOURCE_FOLDER_URI}file_{i}.fastq.gz" for i in range(num_files)],
+                    "job_id": "job.old",
+                    "failed_job_list": [],
+                    "job_status": "RUNNING",
+                    "wait_time_seconds": 10,
+                },
+                None
+            )
+
+    @staticmethod
+    def make_files(folder_uri: str, num_files: int, prefix: str):
+        return [
+            make_project_data_obj(
+                f"{urlparse(folder_uri).path}file_{i}.fastq.gz",
+                f"fil.{prefix}{i}",
+                LARGE_FILE_SIZE,
+                f"{i:032x}-2"
+            )
+            for i in range(num_files)
+        ]
+
+    def test_verification_call_count_is_constant(self):
+        call_counts = []
+        for num_files in [2, 20, 200]:
+            stub = StubICAv2(
+                source_files=self.make_files(SOURCE_FOLDER_URI, num_files, "src"),
+                dest_files=self.make_files(DEST_URI, num_files, "dest"),
+            )
+            response = self.run_handler(stub, num_files)
+            self.assertEqual(response["job_status"], "SUCCEEDED")
+            self.assertEqual(response["mismatch_list"], [])
+            call_counts.append(stub.call_count)
+
+        self.assertEqual(len(set(call_counts)), 1, f"Call count should not grow with the files {call_counts}")
+
+    def test_mismatch_report_drives_targeted_resubmission(self):
+        source_files = self.make_files(SOURCE_FOLDER_URI, 4, "src")
+        dest_files = self.make_files(DEST_URI, 4, "dest")
+        # file_1 is missing, file_2 is truncated, file_3 has a different etag
+        del dest_files[1]
+        dest_files[1].data.details.file_size_in_bytes -= 1
+        dest_files[2].data.details.object_e_tag = "f" * 32 + "-2"
+
+        stub = StubICAv2(source_files=source_files, dest_files=dest_files)
+        response = self.run_handler(stub, 4)
+
+        self.assertEqual(response["job_status"], "RUNNING")
+        self.assertEqual(response["job_id"], "job.new")
+        self.assertEqual(response["failed_job_list"], ["job.old"])
+        self.assertEqual(
+            [(mismatch["dest_uri"], mismatch["reason"]) for mismatch in response["mismatch_list"]],
+            [
+                (f"{DEST_URI}file_1.fastq.gz", "MISSING"),
+                (f"{DEST_URI}file_2.fastq.gz", "SIZE_MISMATCH"),
+                (f"{DEST_URI}file_3.fastq.gz", "ETAG_MISMATCH"),
+            ]
+        )
+        # Only the mismatched dest files are purged, and only the mismatched source files are copied again
+        self.assertEqual(stub.deleted_data_ids, ["fil.dest2", "fil.dest3"])
+        self.assertEqual(stub.copy_job_source_data_ids, ["fil.src1", "fil.src2", "fil.src3"])
+
+    def test_multipart_etags_with_different_part_counts_are_not_compared(self):
+        self.assertFalse(check_or_launch_job_lambda.is_e_tag_comparable("a" * 32 + "-2", "b" * 32 + "-3"))
+        self.assertFalse(check_or_launch_job_lambda.is_e_tag_comparable("a" * 32, "b" * 32 + "-3"))
+        self.assertTrue(check_or_launch_job_lambda.is_e_tag_comparable("a" * 32, "b" * 32))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+
+"""
+Tiny file transfer tests, streaming between presigned urls served by a local HTTP stub
+
+Run from the check_or_launch_job_lambda_py directory with
+    python -m unittest discover tests
+
+Or benchmark the transfer throughput against the local HTTP stub with
+    python -m tests.test_tiny_file_transfer
+"""
+
+# Standard imports
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+from urllib.parse import urlparse
+
+# Local imports
+import check_or_launch_job_lambda
+from tests.test_check_or_launch_job_lambda import PROJECT_ID, DEST_URI, make_project_data_obj
+
+SOURCE_FOLDER_PATH = "/primary/241024_A00130_0336_BHW7MVDSXC/Reports/"
+DEST_FOLDER_PATH = urlparse(DEST_URI).path
+
+
+class PresignedUrlStubServer(ThreadingHTTPServer):
+    """
+    Serves the source file contents on GET /download/<data_id>,
+    stores the request body on PUT /upload/<data_id>.
+    Like a presigned s3 url, a chunked upload (no Content-Length) is rejected
+    """
+    daemon_threads = True
+
+    def __init__(self, latency_seconds: float = 0.0):
+        self.latency_seconds = latency_seconds
+        self.source_contents = {}
+        self.uploaded_contents = {}
+        super().__init__(("127.0.0.1", 0), PresignedUrlStubRequestHandler)
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+
+class PresignedUrlStubRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def send_empty_response(self, status_code: int):
+        self.send_response(status_code)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def do_GET(self):
+        time.sleep(self.server.latency_seconds)
+        data_id = self.path.rsplit("/", 1)[-1]
+        if data_id not in self.server.source_contents:
+            self.send_empty_response(404)
+            return
+        contents = self.server.source_contents[data_id]
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(contents)))
+        self.end_headers()
+        self.wfile.write(contents)
+
+    def do_PUT(self):
+        time.sleep(self.server.latency_seconds)
+        if "Content-Length" not in self.headers:
+            self.send_empty_response(411)
+            return
+        self.server.uploaded_contents[self.path.rsplit("/", 1)[-1]] = self.rfile.read(int(self.headers["Content-Length"]))
+        self.send_empty_response(200)
+
+
+class StubICAv2Urls:
+    """
+    Presigned urls pointing at the local HTTP stub, counting the ICAv2 API calls
+    """
+    def __init__(self, server: PresignedUrlStubServer, dest_files):
+        self.server = server
+        self.dest_files = dest_files
+        self.call_count = 0
+        self.created_file_paths = []
+        self.deleted_data_ids = []
+
+    def list_project_data_non_recursively(self, project_id, parent_folder_id, data_type=None):
+        self.call_count += 1
+        return list(self.dest_files)
+
+    def create_download_url(self, project_id, file_id):
+        self.call_count += 1
+        return f"{self.server.base_url}/download/{file_id}"
+
+    def create_file_in_project(self, project_id, file_path):
+        self.call_count += 1
+        self.created_file_paths.append(str(file_path))
+        return make_project_data_obj(str(file_path), f"fil.dest.{file_path.name}")
+
+    def get_project_data_upload_url(self, project_id, data_id):
+        self.call_count += 1
+        return f"{self.server.base_url}/upload/{data_id}"
+
+    def delete_project_data(self, project_id, data_id):
+        self.call_count += 1
+        self.deleted_data_ids.append(data_id)
+
+    def patch(self):
+        return patch.multiple(
+            check_or_launch_job_lambda,
+            list_project_data_non_recursively=self.list_project_data_non_recursively,
+            create_download_url=self.create_download_url,
+            create_file_in_project=self.create_file_in_project,
+            get_project_data_upload_url=self.get_project_data_upload_url,
+            delete_project_data=self.delete_project_data,
+        )
+
+
+def get_tiny_source_files(server: PresignedUrlStubServer, num_files: int, file_size_in_bytes: int):
+    source_files = []
+    for i in range(num_files):
+        data_id = f"fil.src{i}"
+        server.source_contents[data_id] = (f"{i:08d}".encode() * (file_size_in_bytes // 8 + 1))[:file_size_in_bytes]
+        source_files.append(
+            make_project_data_obj(f"{SOURCE_FOLDER_PATH}report_{i}.html", data_id, file_size_in_bytes, f"{i:032x}")
+        )
+    return source_files
+
+
+def start_server(latency_seconds: float = 0.0) -> PresignedUrlStubServer:
+    server = PresignedUrlStubServer(latency_seconds)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+class TestTinyFileTransfer(unittest.TestCase):
+    def setUp(self):
+        self.server = start_server()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        self.dest_folder_obj = make_project_data_obj(DEST_FOLDER_PATH, "fol.dest")
+
+    def test_files_are_streamed_to_the_upload_url(self):
+        source_files = get_tiny_source_files(self.server, 20, 100000)
+        stub = StubICAv2Urls(self.server, dest_files=[])
+
+        with stub.patch():
+            transfer_results = check_or_launch_job_lambda.tiny_file_transfer_batch(
+                self.dest_folder_obj, source_files, max_workers=4
+            )
+
+        self.assertEqual([result["status"] for result in transfer_results], ["TRANSFERRED"] * 20)
+        self.assertEqual([result["bytes_transferred"] for result in transfer_results], [100000] * 20)
+        for i in range(20):
+            self.assertEqual(
+                self.server.uploaded_contents[f"fil.dest.report_{i}.html"],
+                self.server.source_contents[f"fil.src{i}"]
+            )
+
+    def test_existing_files_are_skipped_from_one_listing(self):
+        source_files = get_tiny_source_files(self.server, 4, 1000)
+        stub = StubICAv2Urls(
+            self.server,
+            dest_files=[
+                make_project_data_obj(f"{DEST_FOLDER_PATH}report_{i}.html", f"fil.dest{i}", 1000) for i in [0, 2]
+            ]
+        )
+
+        with stub.patch():
+            transfer_results = check_or_launch_job_lambda.tiny_file_transfer_batch(self.dest_folder_obj, source_files)
+
+        self.assertEqual(
+            [result["status"] for result in transfer_results],
+            ["SKIPPED_EXISTS", "TRANSFERRED", "SKIPPED_EXISTS", "TRANSFERRED"]
+        )
+        # One listing, then three calls per transferred file
+        self.assertEqual(stub.call_count, 1 + 3 * 2)
+        self.assertEqual(stub.created_file_paths, [f"{DEST_FOLDER_PATH}report_1.html", f"{DEST_FOLDER_PATH}report_3.html"])
+
+    def test_incomplete_existing_files_are_transferred_again(self):
+        source_files = get_tiny_source_files(self.server, 3, 1000)
+        partial_dest_file = make_project_data_obj(f"{DEST_FOLDER_PATH}report_1.html", "fil.dest1", 1000)
+        partial_dest_file.data.details.status = "PARTIAL"
+        stub = StubICAv2Urls(
+            self.server,
+            dest_files=[
+                make_project_data_obj(f"{DEST_FOLDER_PATH}report_0.html", "fil.dest0", 1000),
+                partial_dest_file,
+                # An empty file left behind by an earlier failed upload
+                make_project_data_obj(f"{DEST_FOLDER_PATH}report_2.html", "fil.dest2", 0),
+            ]
+        )
+
+        with stub.patch():
+            transfer_results = check_or_launch_job_lambda.tiny_file_transfer_batch(self.dest_folder_obj, source_files)
+
+        self.assertEqual(
+            [result["status"] for result in transfer_results],
+            ["SKIPPED_EXISTS", "TRANSFERRED", "TRANSFERRED"]
+        )
+        self.assertEqual(stub.deleted_data_ids, ["fil.dest1", "fil.dest2"])
+        self.assertEqual(stub.created_file_paths, [f"{DEST_FOLDER_PATH}report_1.html", f"{DEST_FOLDER_PATH}report_2.html"])
+
+    def test_failed_transfers_leave_no_file_behind(self):
+        source_files = get_tiny_source_files(self.server, 2, 1000)
+        del self.server.source_contents["fil.src1"]
+        stub = StubICAv2Urls(self.server, dest_files=[])
+
+        with stub.patch():
+            transfer_results = check_or_launch_job_lambda.tiny_file_transfer_batch(self.dest_folder_obj, source_files)
+
+        self.assertEqual([result["status"] for result in transfer_results], ["TRANSFERRED", "FAILED"])
+        # The dest file was created before the download failed, and is deleted again
+        self.assertEqual(stub.deleted_data_ids, ["fil.dest.report_1.html"])
+
+    def test_failures_are_reported_per_file_after_the_batch(self):
+        source_files = get_tiny_source_files(self.server, 3, 1000)
+        del self.server.source_contents["fil.src1"]
+        stub = StubICAv2Urls(self.server, dest_files=[])
+
+        with stub.patch():
+            transfer_results = check_or_launch_job_lambda.tiny_file_transfer_batch(self.dest_folder_obj, source_files)
+            with self.assertRaises(Exception) as context:
+                check_or_launch_job_lambda.filter_tiny_files_from_source_project_data_objs(
+                    source_files, self.dest_folder_obj
+                )
+
+        self.assertEqual([result["status"] for result in transfer_results], ["TRANSFERRED", "FAILED", "TRANSFERRED"])
+        self.assertIn("404", transfer_results[1]["error_message"])
+        self.assertIn(f"{DEST_FOLDER_PATH}report_1.html", str(context.exception))
+
+
+if __name__ == "__main__":
+    # 200 files of 256 KiB, with 20 ms of latency on each request to the stub
+    num_files, file_size_in_bytes = 200, 262144
+    server = start_server(latency_seconds=0.02)
+    source_files = get_tiny_source_files(server, num_files, file_size_in_bytes)
+    dest_folder_obj = make_project_data_obj(DEST_FOLDER_PATH, "fol.dest")
+
+    with StubICAv2Urls(server, dest_files=[]).patch():
+        for max_workers in [1, 4, check_or_launch_job_lambda.TINY_FILE_TRANSFER_MAX_WORKERS]:
+            server.uploaded_contents.clear()
+            start_time = time.perf_counter()
+            transfer_results = check_or_launch_job_lambda.tiny_file_transfer_batch(
+                dest_folder_obj, source_files, max_workers=max_workers
+            )
+            duration = time.perf_counter() - start_time
+            assert all(result["status"] == "TRANSFERRED" for result in transfer_results)
+            print(
+                f"{max_workers:>2} workers: {num_files} files in {duration:.2f} s, "
+                f"{num_files / duration:.1f} files/s, {num_files * file_size_in_bytes / duration / 1048576:.1f} MiB/s"
+            )
+
+    server.shutdown()
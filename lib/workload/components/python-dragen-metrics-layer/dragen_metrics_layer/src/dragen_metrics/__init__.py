@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+
+# Errors
+from .utils.errors import (
+    DragenMetricsError,
+    DragenMetricsNotFoundError,
+)
+
+# Models
+from .utils.models import (
+    DragenMetricKey,
+    DragenMetricRecord,
+    DragenMetricsFormatType,
+    MetricValue,
+)
+
+# Metrics helpers
+from .utils.metrics_helpers import (
+    parse_dragen_metric_value,
+    get_dragen_metrics_format,
+    iter_dragen_metrics,
+    read_dragen_metrics,
+)
+
+# Stream helpers
+from .utils.stream_helpers import (
+    open_dragen_metrics_url,
+    stream_dragen_metrics_from_url,
+    stream_dragen_metrics_sections_from_url,
+)
+
+__all__ = [
+    # Errors
+    "DragenMetricsError",
+    "DragenMetricsNotFoundError",
+    # Models
+    "DragenMetricKey",
+    "DragenMetricRecord",
+    "DragenMetricsFormatType",
+    "MetricValue",
+    # Metrics helpers
+    "parse_dragen_metric_value",
+    "get_dragen_metrics_format",
+    "iter_dragen_metrics",
+    "read_dragen_metrics",
+    # Stream helpers
+    "open_dragen_metrics_url",
+    "stream_dragen_metrics_from_url",
+    "stream_dragen_metrics_sections_from_url",
+]
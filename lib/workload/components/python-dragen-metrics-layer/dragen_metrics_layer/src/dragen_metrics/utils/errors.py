@@ -0,0 +1,17 @@
+#!/usr/bin/env python3
+
+from typing import List
+
+
+class DragenMetricsError(Exception):
+    pass
+
+
+class DragenMetricsNotFoundError(DragenMetricsError, ValueError):
+    def __init__(
+            self,
+            missing_metric_keys: List
+    ):
+        self.missing_metric_keys = missing_metric_keys
+        self.message = f"Could not find the metrics {missing_metric_keys}"
+        super().__init__(self.message)
@@ -0,0 +1,31 @@
+#!/usr/bin/env python3
+
+# Values DRAGEN writes when a metric cannot be computed
+MISSING_VALUES = frozenset({"", "NA", "N/A"})
+
+# Columns of a metrics record
+VALUE_COLUMN = "value"
+PCT_COLUMN = "pct"
+LSL_GUIDELINE_COLUMN = "lsl_guideline"
+USL_GUIDELINE_COLUMN = "usl_guideline"
+
+# Metrics csv, i.e. SECTION,RGID,METRIC,VALUE[,PCT]
+METRICS_CSV_SECTION_INDEX = 0
+METRICS_CSV_RGID_INDEX = 1
+METRICS_CSV_METRIC_INDEX = 2
+METRICS_CSV_COLUMN_INDEX_BY_NAME = {
+    VALUE_COLUMN: 3,
+    PCT_COLUMN: 4,
+}
+
+# Sectioned MetricsOutput.tsv (TSO500 / cttso v2)
+METRICS_OUTPUT_TSV_HEADER_FIRST_CELLS = frozenset({"", "Metric (UOM)"})
+METRICS_OUTPUT_TSV_VALUE_HEADER = "Value"
+METRICS_OUTPUT_TSV_COLUMN_NAME_BY_HEADER = {
+    "LSL Guideline": LSL_GUIDELINE_COLUMN,
+    "USL Guideline": USL_GUIDELINE_COLUMN,
+}
+
+# Streaming
+DOWNLOAD_CHUNK_SIZE = 65536  # 64 KiB (2^16)
+DOWNLOAD_TIMEOUT_SECONDS = 60
@@ -0,0 +1,356 @@
+#!/usr/bin/env python3
+
+"""
+Single pass parsers for DRAGEN metrics files
+
+Two formats are recognised, from the first non-blank line of the file
+
+Metrics csv (mapping_metrics.csv, wgs_coverage_metrics.csv, quant_metrics.csv etc), one metric per line
+
+SECTION,RGID (empty for summary sections),METRIC,VALUE[,PCT]
+
+i.e.
+
+MAPPING/ALIGNING SUMMARY,,Number of duplicate marked reads,61134210,7.63
+MAPPING/ALIGNING PER RG,GTCAAGTCCA.GCGTTCGATA.1,Insert length: mean,372.51
+
+Sectioned MetricsOutput.tsv (TSO500 / cttso v2), a '[Section]' line, a header line, then one metric per line
+with a column per sample (the 'rgid' of the record), and guideline columns shared by the samples
+
+[DNA Library QC Metrics]
+Metric (UOM)    LSL Guideline   USL Guideline   L2401294
+CONTAMINATION_SCORE (NA)        0       1227    NA
+
+Sections without a header line ([Header], [Notes]) are 'METRIC<tab>VALUE' lines, with no rgid.
+
+Both formats are read into (section, rgid, metric) keyed records.
+Only the selected columns of the records that are kept are converted to typed values,
+and a read stops as soon as the requested metrics (or sections) are found,
+so only the head of a multi-MB metrics file (i.e. with a section per read group) is consumed.
+"""
+
+# Standard imports
+import csv
+from itertools import chain
+from typing import Dict, FrozenSet, Iterable, Iterator, List, Optional, Tuple
+
+# Local imports
+from .globals import (
+    MISSING_VALUES,
+    VALUE_COLUMN,
+    METRICS_CSV_SECTION_INDEX,
+    METRICS_CSV_RGID_INDEX,
+    METRICS_CSV_METRIC_INDEX,
+    METRICS_CSV_COLUMN_INDEX_BY_NAME,
+    METRICS_OUTPUT_TSV_HEADER_FIRST_CELLS,
+    METRICS_OUTPUT_TSV_VALUE_HEADER,
+    METRICS_OUTPUT_TSV_COLUMN_NAME_BY_HEADER,
+)
+from .models import (
+    DragenMetricKey,
+    DragenMetricRecord,
+    DragenMetricsFormatType,
+    MetricValue,
+)
+
+# Type hints
+# (column name, cell index) of each selected column
+ColumnIndexes = List[Tuple[str, int]]
+# section, rgid, metric, cells, column indexes, the cells are only converted for the records that are kept
+MetricRow = Tuple[str, Optional[str], str, List[str], ColumnIndexes]
+
+
+def parse_dragen_metric_value(value_str: str) -> MetricValue:
+    """
+    DRAGEN writes counts as integers, ratios and coverages as floats and 'NA' when a metric cannot be computed
+    :param value_str:
+    :return:
+    """
+    value_str = value_str.strip()
+
+    if value_str in MISSING_VALUES:
+        return None
+
+    # Fast path, most values are counts, try/except is only reached by floats and strings
+    if value_str.isdigit():
+        return int(value_str)
+
+    try:
+        return int(value_str)
+    except ValueError:
+        pass
+
+    try:
+        return float(value_str)
+    except ValueError:
+        return value_str
+
+
+def get_dragen_metrics_format(first_line: str) -> DragenMetricsFormatType:
+    """
+    The MetricsOutput.tsv starts with a (comma free) title line, or a section, the metrics csv with a metric
+    :param first_line: The first non-blank line of the file
+    :return:
+    """
+    if "\t" in first_line or first_line.startswith("[") or "," not in first_line:
+        return "metrics_output_tsv"
+    return "metrics_csv"
+
+
+def peek_dragen_metrics_format(lines: Iterable[str]) -> Tuple[DragenMetricsFormatType, Iterator[str]]:
+    """
+    Get the format of the metrics file, and the lines, including those read to find the format
+    :param lines:
+    :return:
+    """
+    lines = iter(lines)
+    peeked_lines = []
+
+    for line in lines:
+        peeked_lines.append(line)
+        if line.strip():
+            return get_dragen_metrics_format(line), chain(peeked_lines, lines)
+
+    return "metrics_csv", iter(peeked_lines)
+
+
+def get_column_indexes(
+        column_index_by_name: Dict[str, int],
+        columns: Optional[FrozenSet[str]]
+) -> ColumnIndexes:
+    """
+    The (column name, cell index) of each selected column, all columns if columns is None
+    :param column_index_by_name:
+    :param columns:
+    :return:
+    """
+    return [
+        (column_name, column_index)
+        for column_name, column_index in column_index_by_name.items()
+        if columns is None or column_name in columns
+    ]
+
+
+def get_metric_values(cells: List[str], column_indexes: ColumnIndexes) -> Dict[str, MetricValue]:
+    """
+    Convert the selected cells of a metric row to typed values, a column missing from the row is None
+    :param cells:
+    :param column_indexes:
+    :return:
+    """
+    return {
+        column_name: parse_dragen_metric_value(cells[column_index]) if column_index < len(cells) else None
+        for column_name, column_index in column_indexes
+    }
+
+
+def split_metrics_csv_line(line: str) -> List[str]:
+    """
+    Fast path, a cell is only quoted when it holds a comma, so most lines are a plain split
+    :param line:
+    :return:
+    """
+    if '"' not in line:
+        return line.rstrip("\r\n").split(",")
+    return next(csv.reader([line]))
+
+
+def iter_metrics_csv_rows(lines: Iterable[str], columns: Optional[FrozenSet[str]]) -> Iterator[MetricRow]:
+    """
+    The rows of a DRAGEN metrics csv
+    :param lines:
+    :param columns:
+    :return:
+    """
+    column_indexes = get_column_indexes(METRICS_CSV_COLUMN_INDEX_BY_NAME, columns)
+
+    for line in lines:
+        cells = split_metrics_csv_line(line)
+        if len(cells) <= METRICS_CSV_COLUMN_INDEX_BY_NAME[VALUE_COLUMN]:
+            continue
+
+        yield (
+            cells[METRICS_CSV_SECTION_INDEX],
+            cells[METRICS_CSV_RGID_INDEX] or None,
+            cells[METRICS_CSV_METRIC_INDEX],
+            cells,
+            column_indexes,
+        )
+
+
+def get_metrics_output_tsv_rgid_column_indexes(
+        header_cells: List[str],
+        columns: Optional[FrozenSet[str]]
+) -> List[Tuple[Optional[str], ColumnIndexes]]:
+    """
+    The column indexes of each sample (rgid) of a MetricsOutput.tsv section,
+    the value column of the sample and the guideline columns shared by all samples
+
+    A 'Value' column (i.e. [Run QC Metrics]) has no rgid
+    :param header_cells:
+    :param columns:
+    :return:
+    """
+    shared_column_index_by_name: Dict[str, int] = {}
+    rgid_column_index_list: List[Tuple[Optional[str], int]] = []
+
+    for column_index, header_cell in enumerate(header_cells):
+        if column_index == 0:
+            continue
+        if header_cell in METRICS_OUTPUT_TSV_COLUMN_NAME_BY_HEADER:
+            shared_column_index_by_name[METRICS_OUTPUT_TSV_COLUMN_NAME_BY_HEADER[header_cell]] = column_index
+        elif header_cell == METRICS_OUTPUT_TSV_VALUE_HEADER:
+            rgid_column_index_list.append((None, column_index))
+        else:
+            rgid_column_index_list.append((header_cell, column_index))
+
+    return [
+        (
+            rgid,
+            get_column_indexes(
+                {VALUE_COLUMN: value_column_index, **shared_column_index_by_name},
+                columns
+            )
+        )
+        for rgid, value_column_index in rgid_column_index_list
+    ]
+
+
+def iter_metrics_output_tsv_rows(lines: Iterable[str], columns: Optional[FrozenSet[str]]) -> Iterator[MetricRow]:
+    """
+    The rows of a sectioned MetricsOutput.tsv, a row for each sample of each metric
+    :param lines:
+    :param columns:
+    :return:
+    """
+    headerless_column_indexes = get_column_indexes({VALUE_COLUMN: 1}, columns)
+
+    section: Optional[str] = None
+    is_first_section_line = False
+    rgid_column_indexes: Optional[List[Tuple[Optional[str], ColumnIndexes]]] = None
+
+    for line in lines:
+        line = line.rstrip("\r\n")
+        if not line.strip():
+            continue
+
+        # New section
+        if line.startswith("[") and line.endswith("]"):
+            section = line[1:-1]
+            is_first_section_line = True
+            rgid_column_indexes = None
+            continue
+
+        # The title lines before the first section
+        if section is None:
+            continue
+
+        cells = line.split("\t")
+
+        if is_first_section_line:
+            is_first_section_line = False
+            if cells[0] in METRICS_OUTPUT_TSV_HEADER_FIRST_CELLS and len(cells) > 1:
+                rgid_column_indexes = get_metrics_output_tsv_rgid_column_indexes(cells, columns)
+                continue
+
+        if rgid_column_indexes is None:
+            # METRIC<tab>VALUE, the value may itself hold a tab (i.e. [Notes])
+            yield section, None, cells[0], [cells[0], "\t".join(cells[1:])], headerless_column_indexes
+            continue
+
+        for rgid, column_indexes in rgid_column_indexes:
+            yield section, rgid, cells[0], cells, column_indexes
+
+
+def iter_dragen_metrics_rows(
+        lines: Iterable[str],
+        columns: Optional[Iterable[str]] = None,
+        metrics_format: Optional[DragenMetricsFormatType] = None
+) -> Iterator[MetricRow]:
+    """
+    The rows of either metrics format, the format is found from the first line if not given
+    :param lines:
+    :param columns:
+    :param metrics_format:
+    :return:
+    """
+    if columns is not None:
+        columns = frozenset(columns)
+
+    if metrics_format is None:
+        metrics_format, lines = peek_dragen_metrics_format(lines)
+
+    if metrics_format == "metrics_output_tsv":
+        return iter_metrics_output_tsv_rows(lines, columns)
+    return iter_metrics_csv_rows(lines, columns)
+
+
+def iter_dragen_metrics(
+        lines: Iterable[str],
+        sections: Optional[Iterable[str]] = None,
+        columns: Optional[Iterable[str]] = None,
+        metrics_format: Optional[DragenMetricsFormatType] = None
+) -> Iterator[DragenMetricRecord]:
+    """
+    Iterate over the metric records of a DRAGEN metrics file
+
+    If sections are given, only records of those sections are returned,
+    and the read stops once every section has been read (the lines of a section are contiguous)
+    :param lines:
+    :param sections:
+    :param columns: The columns to convert to typed values, i.e. ['value'], defaults to all columns
+    :param metrics_format: Found from the first line of the file if not given
+    :return:
+    """
+    sections_remaining = set(sections) if sections is not None else None
+    sections = frozenset(sections_remaining) if sections_remaining is not None else None
+
+    if sections is not None and not sections:
+        return
+
+    for section, rgid, metric, cells, column_indexes in iter_dragen_metrics_rows(lines, columns, metrics_format):
+        if sections is not None:
+            if section not in sections:
+                if not sections_remaining:
+                    return
+                continue
+            sections_remaining.discard(section)
+
+        yield DragenMetricRecord(section, rgid, metric, get_metric_values(cells, column_indexes))
+
+
+def read_dragen_metrics(
+        lines: Iterable[str],
+        metric_keys: Iterable[Tuple[str, Optional[str], str]],
+        columns: Optional[Iterable[str]] = None,
+        metrics_format: Optional[DragenMetricsFormatType] = None
+) -> Dict[DragenMetricKey, DragenMetricRecord]:
+    """
+    Read the requested metrics from the lines of a DRAGEN metrics file, stop reading once all metrics are found
+
+    The first record of a key wins, metrics that are not in the file are not in the returned dict
+    :param lines:
+    :param metric_keys: (section, rgid, metric) tuples, the rgid is None for summary metrics
+    :param columns: The columns to convert to typed values, i.e. ['value'], defaults to all columns
+    :param metrics_format: Found from the first line of the file if not given
+    :return:
+    """
+    metric_keys_remaining = set(map(lambda metric_key_iter: DragenMetricKey(*metric_key_iter), metric_keys))
+    metrics: Dict[DragenMetricKey, DragenMetricRecord] = {}
+
+    if not metric_keys_remaining:
+        return metrics
+
+    for section, rgid, metric, cells, column_indexes in iter_dragen_metrics_rows(lines, columns, metrics_format):
+        # Named tuples hash (and compare) as plain tuples
+        if (section, rgid, metric) not in metric_keys_remaining:
+            continue
+
+        metric_key = DragenMetricKey(section, rgid, metric)
+        metrics[metric_key] = DragenMetricRecord(section, rgid, metric, get_metric_values(cells, column_indexes))
+        metric_keys_remaining.remove(metric_key)
+
+        if not metric_keys_remaining:
+            break
+
+    return metrics
@@ -0,0 +1,33 @@
+#!/usr/bin/env python3
+
+from typing import Dict, Literal, NamedTuple, Optional, Union
+
+DragenMetricsFormatType = Literal["metrics_csv", "metrics_output_tsv"]
+
+# DRAGEN writes counts as integers, ratios and coverages as floats and 'NA' (None) when a metric cannot be computed
+MetricValue = Union[int, float, str, None]
+
+
+class DragenMetricKey(NamedTuple):
+    # i.e. 'MAPPING/ALIGNING SUMMARY' or 'Analysis Status'
+    section: str
+    # The read group (metrics csv) or sample (MetricsOutput.tsv), None for summary metrics
+    rgid: Optional[str]
+    # i.e. 'Number of duplicate marked reads' or 'FAILED_STEPS'
+    metric: str
+
+
+class DragenMetricRecord(NamedTuple):
+    section: str
+    rgid: Optional[str]
+    metric: str
+    # The typed values of the selected columns, i.e. {'value': 61134210, 'pct': 7.63}
+    values: Dict[str, MetricValue]
+
+    @property
+    def key(self) -> DragenMetricKey:
+        return DragenMetricKey(self.section, self.rgid, self.metric)
+
+    @property
+    def value(self) -> MetricValue:
+        return self.values.get("value")
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+
+"""
+Stream DRAGEN metrics files from a (presigned) url, line by line
+
+The connection is closed as soon as the requested metrics (or sections) are read
+"""
+
+# Standard imports
+import logging
+from contextlib import contextmanager
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+# Local imports
+from .errors import DragenMetricsNotFoundError
+from .globals import DOWNLOAD_CHUNK_SIZE, DOWNLOAD_TIMEOUT_SECONDS
+from .import_helpers import lazy_import
+from .metrics_helpers import iter_dragen_metrics, read_dragen_metrics
+from .models import DragenMetricKey, DragenMetricRecord
+
+requests = lazy_import("requests")
+
+# Set logger
+logger = logging.getLogger(__name__)
+
+
+@contextmanager
+def open_dragen_metrics_url(url: str) -> Iterator[Iterator[str]]:
+    """
+    The lines of the metrics file at the url, the connection is closed on exit
+    :param url:
+    :return:
+    """
+    with requests.get(url, stream=True, timeout=DOWNLOAD_TIMEOUT_SECONDS) as download_response:
+        download_response.raise_for_status()
+        download_response.encoding = "utf-8"
+
+        yield download_response.iter_lines(chunk_size=DOWNLOAD_CHUNK_SIZE, decode_unicode=True)
+
+
+def stream_dragen_metrics_from_url(
+        url: str,
+        metric_keys: Iterable[Tuple[str, Optional[str], str]],
+        columns: Optional[Iterable[str]] = None
+) -> Dict[DragenMetricKey, DragenMetricRecord]:
+    """
+    Stream the requested metrics from the DRAGEN metrics file at the url
+
+    :param url:
+    :param metric_keys: (section, rgid, metric) tuples, the rgid is None for summary metrics
+    :param columns: The columns to convert to typed values, defaults to all columns
+    :raises DragenMetricsNotFoundError: if any of the metrics are not in the file
+    :return:
+    """
+    metric_keys = list(map(lambda metric_key_iter: DragenMetricKey(*metric_key_iter), metric_keys))
+
+    with open_dragen_metrics_url(url) as lines:
+        metrics = read_dragen_metrics(lines, metric_keys, columns=columns)
+
+    missing_metric_keys = [metric_key for metric_key in metric_keys if metric_key not in metrics]
+    if missing_metric_keys:
+        logger.error(f"Could not find the metrics {missing_metric_keys}")
+        raise DragenMetricsNotFoundError(missing_metric_keys)
+
+    return metrics
+
+
+def stream_dragen_metrics_sections_from_url(
+        url: str,
+        sections: Iterable[str],
+        columns: Optional[Iterable[str]] = None
+) -> List[DragenMetricRecord]:
+    """
+    Stream every record of the requested sections from the DRAGEN metrics file at the url
+
+    :param url:
+    :param sections: i.e. ['Analysis Status']
+    :param columns: The columns to convert to typed values, defaults to all columns
+    :return:
+    """
+    with open_dragen_metrics_url(url) as lines:
+        return list(iter_dragen_metrics(lines, sections=sections, columns=columns))
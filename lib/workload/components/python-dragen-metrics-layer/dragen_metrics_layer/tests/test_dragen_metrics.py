@@ -0,0 +1,493 @@
+#!/usr/bin/env python3
+
+"""
+The dragen metrics parsers against the pandas queries and string checks they replace,
+over the metrics csv and MetricsOutput.tsv fixtures
+
+Run from the dragen_metrics_layer directory with
+    PYTHONPATH=src python -m unittest discover tests
+
+Or benchmark the parsers against pandas on synthetic multi-MB metrics files with
+    PYTHONPATH=src python -m tests.test_dragen_metrics
+"""
+
+# Standard imports
+import csv
+import io
+import time
+import unittest
+from pathlib import Path
+from typing import Iterator, List
+from unittest.mock import MagicMock, patch
+
+try:
+    import pandas as pd
+except ImportError:
+    pd = None
+
+# Layer imports
+from dragen_metrics import (
+    DragenMetricKey,
+    DragenMetricRecord,
+    DragenMetricsNotFoundError,
+    get_dragen_metrics_format,
+    iter_dragen_metrics,
+    parse_dragen_metric_value,
+    read_dragen_metrics,
+    stream_dragen_metrics_from_url,
+    stream_dragen_metrics_sections_from_url,
+)
+from dragen_metrics.utils import metrics_helpers, stream_helpers
+
+FIXTURES_DIR = Path(__file__).parent / "fixtures"
+MAPPING_METRICS_PATH = FIXTURES_DIR / "L2401544.mapping_metrics.csv"
+WGS_COVERAGE_METRICS_PATH = FIXTURES_DIR / "L2401544.wgs_coverage_metrics.csv"
+QUANT_METRICS_PATH = FIXTURES_DIR / "MDX240202.quant_metrics.csv"
+METRICS_CSV_PATHS = [MAPPING_METRICS_PATH, WGS_COVERAGE_METRICS_PATH, QUANT_METRICS_PATH]
+PASSING_METRICS_OUTPUT_PATH = FIXTURES_DIR / "L2401562.MetricsOutput.tsv"
+FAILED_METRICS_OUTPUT_PATH = FIXTURES_DIR / "L2401294.MetricsOutput.tsv"
+METRICS_OUTPUT_PATHS = [PASSING_METRICS_OUTPUT_PATH, FAILED_METRICS_OUTPUT_PATH]
+METRIC_COLUMNS = ["rgid_group", "rgid_index", "description", "value", "pct"]
+FIRST_RGID = "GTCAAGTCCA.GCGTTCGATA.1"
+
+
+def get_synthetic_mapping_metrics(num_read_groups: int) -> str:
+    """
+    The mapping metrics fixture with a per read group section for each of num_read_groups read groups
+    """
+    fixture_lines = MAPPING_METRICS_PATH.read_text().splitlines()
+    summary_lines = [line for line in fixture_lines if line.startswith("MAPPING/ALIGNING SUMMARY,")]
+    per_rg_lines = [line for line in fixture_lines if line.startswith(f"MAPPING/ALIGNING PER RG,{FIRST_RGID},")]
+
+    lines = list(summary_lines)
+    for rg_iter in range(num_read_groups):
+        rgid = f"GTCAAGTCCA.GCGTTCGATA.{rg_iter}"
+        lines.extend(line.replace(FIRST_RGID, rgid) for line in per_rg_lines)
+        # Pad each read group section out to the length of a full dragen per read group section
+        lines.extend(
+            f"MAPPING/ALIGNING PER RG,{rgid},Reads with MAPQ [{mapq}:{mapq + 1}),{mapq * 1000},0.{mapq:02d}"
+            for mapq in range(60)
+        )
+    return "\n".join(lines) + "\n"
+
+
+def get_synthetic_metrics_output(num_samples: int, num_padding_metrics: int = 0) -> str:
+    """
+    The passing MetricsOutput.tsv fixture with a column for each of num_samples samples,
+    and num_padding_metrics extra metrics in the expanded metrics section
+    """
+    lines = []
+    is_sample_section = False
+    for line in PASSING_METRICS_OUTPUT_PATH.read_text().splitlines():
+        cells = line.split("\t")
+        if line.startswith("["):
+            is_sample_section = False
+        elif cells[-1] == "L2401562":
+            # The header of a section with a column per sample
+            is_sample_section = True
+            cells = cells[:-1] + [f"L24{sample_iter:05d}" for sample_iter in range(num_samples)]
+        elif is_sample_section:
+            cells = cells[:-1] + [cells[-1]] * num_samples
+        lines.append("\t".join(cells))
+
+        if line.startswith("PCT_Q30_BASES"):
+            lines.extend(
+                "\t".join([f"PADDING_METRIC_{metric_iter} (count)", "NA", "NA"] + [str(metric_iter)] * num_samples)
+                for metric_iter in range(num_padding_metrics)
+            )
+    return "\n".join(lines) + "\n"
+
+
+def pandas_query(metrics_file_contents: str, section: str, description: str, column: str):
+    """
+    The (kwik collector) query the metrics csv parser replaces
+    """
+    metrics_df = pd.read_csv(io.StringIO(metrics_file_contents), header=None, names=METRIC_COLUMNS)
+    return metrics_df.loc[
+        (metrics_df["rgid_group"] == section) & (metrics_df["description"] == description),
+        column
+    ].item()
+
+
+class CountingIterator:
+    """
+    Count the lines the parser consumes
+    """
+    def __init__(self, lines: List[str]):
+        self.lines = iter(lines)
+        self.num_lines_consumed = 0
+
+    def __iter__(self) -> Iterator[str]:
+        return self
+
+    def __next__(self) -> str:
+        line = next(self.lines)
+        self.num_lines_consumed += 1
+        return line
+
+
+def mock_requests_get(contents_by_url):
+    """
+    requests.get for presigned urls (the file name), streamed line by line
+    """
+    def requests_get(url, stream, timeout):
+        lines = contents_by_url[url].splitlines()
+        return MagicMock(
+            __enter__=lambda self_: self_,
+            iter_lines=MagicMock(return_value=iter(lines)),
+        )
+    return requests_get
+
+
+class TestParseDragenMetricValue(unittest.TestCase):
+    def test_typed_values(self):
+        self.assertEqual(parse_dragen_metric_value("801234566"), 801234566)
+        self.assertIsInstance(parse_dragen_metric_value("801234566"), int)
+        self.assertEqual(parse_dragen_metric_value("37.06"), 37.06)
+        self.assertEqual(parse_dragen_metric_value("0.0010"), 0.001)
+        self.assertIsNone(parse_dragen_metric_value("NA"))
+        self.assertIsNone(parse_dragen_metric_value(""))
+        self.assertEqual(parse_dragen_metric_value("ISR"), "ISR")
+
+
+class TestDragenMetricsFormat(unittest.TestCase):
+    def test_fixture_formats(self):
+        for metrics_path in METRICS_CSV_PATHS:
+            with self.subTest(metrics_file=metrics_path.name):
+                self.assertEqual(get_dragen_metrics_format(metrics_path.read_text().splitlines()[0]), "metrics_csv")
+        for metrics_path in METRICS_OUTPUT_PATHS:
+            with self.subTest(metrics_file=metrics_path.name):
+                self.assertEqual(
+                    get_dragen_metrics_format(metrics_path.read_text().splitlines()[0]), "metrics_output_tsv"
+                )
+
+
+class TestMetricsCsv(unittest.TestCase):
+    @unittest.skipIf(pd is None, "pandas is not installed")
+    def test_equivalent_to_pandas_query(self):
+        for metrics_path in METRICS_CSV_PATHS:
+            metrics_file_contents = metrics_path.read_text()
+            rows = [line.split(",") for line in metrics_file_contents.splitlines()]
+            metric_keys = [DragenMetricKey(row[0], row[1] or None, row[2]) for row in rows]
+            # Keys that appear once, as .item() requires
+            unique_metric_keys = [
+                metric_key for metric_key in metric_keys
+                if [(key_iter.section, key_iter.metric) for key_iter in metric_keys].count(
+                    (metric_key.section, metric_key.metric)
+                ) == 1
+            ]
+
+            metrics = read_dragen_metrics(metrics_file_contents.splitlines(), unique_metric_keys)
+
+            self.assertEqual(set(metrics.keys()), set(unique_metric_keys))
+            for metric_key in unique_metric_keys:
+                for column in ["value", "pct"]:
+                    with self.subTest(metrics_file=metrics_path.name, metric_key=metric_key, column=column):
+                        metric_value = metrics[metric_key].values[column]
+                        pandas_value = pandas_query(metrics_file_contents, metric_key.section, metric_key.metric, column)
+                        if pd.isna(pandas_value):
+                            self.assertIsNone(metric_value)
+                        elif isinstance(metric_value, str):
+                            self.assertEqual(metric_value, pandas_value)
+                        else:
+                            self.assertEqual(metric_value, float(pandas_value))
+
+    def test_equivalent_to_csv_reader(self):
+        for metrics_path in METRICS_CSV_PATHS:
+            with self.subTest(metrics_file=metrics_path.name):
+                records = list(iter_dragen_metrics(metrics_path.read_text().splitlines()))
+                self.assertEqual(
+                    records,
+                    [
+                        DragenMetricRecord(
+                            row[0], row[1] or None, row[2],
+                            {
+                                "value": parse_dragen_metric_value(row[3]),
+                                "pct": parse_dragen_metric_value(row[4]) if len(row) > 4 else None
+                            }
+                        )
+                        for row in csv.reader(metrics_path.read_text().splitlines())
+                    ]
+                )
+
+    def test_quoted_cells(self):
+        self.assertEqual(
+            list(iter_dragen_metrics(['MAPPING/ALIGNING SUMMARY,,"Reads with indel R1, R2",12,0.01'])),
+            [DragenMetricRecord("MAPPING/ALIGNING SUMMARY", None, "Reads with indel R1, R2", {"value": 12, "pct": 0.01})]
+        )
+
+    def test_stops_once_all_metrics_are_found(self):
+        counting_iterator = CountingIterator(MAPPING_METRICS_PATH.read_text().splitlines())
+
+        metrics = read_dragen_metrics(
+            counting_iterator,
+            [
+                ("MAPPING/ALIGNING SUMMARY", None, "Number of duplicate marked reads"),
+                ("MAPPING/ALIGNING SUMMARY", None, "Mapped reads"),
+            ]
+        )
+
+        self.assertEqual(
+            metrics,
+            {
+                DragenMetricKey("MAPPING/ALIGNING SUMMARY", None, "Number of duplicate marked reads"): DragenMetricRecord(
+                    "MAPPING/ALIGNING SUMMARY", None, "Number of duplicate marked reads", {"value": 61134210, "pct": 7.63}
+                ),
+                DragenMetricKey("MAPPING/ALIGNING SUMMARY", None, "Mapped reads"): DragenMetricRecord(
+                    "MAPPING/ALIGNING SUMMARY", None, "Mapped reads", {"value": 799011822, "pct": 99.72}
+                ),
+            }
+        )
+        # Mapped reads is the eighth line
+        self.assertEqual(counting_iterator.num_lines_consumed, 8)
+
+    def test_rgid_is_part_of_the_key(self):
+        metric_key = DragenMetricKey("MAPPING/ALIGNING PER RG", FIRST_RGID, "Insert length: mean")
+        metrics = read_dragen_metrics(MAPPING_METRICS_PATH.read_text().splitlines(), [metric_key])
+        self.assertEqual(metrics[metric_key].value, 372.51)
+
+        # Not a summary metric
+        self.assertEqual(
+            read_dragen_metrics(
+                MAPPING_METRICS_PATH.read_text().splitlines(),
+                [("MAPPING/ALIGNING PER RG", None, "Insert length: mean")]
+            ),
+            {}
+        )
+
+    def test_column_selection(self):
+        metric_key = DragenMetricKey("MAPPING/ALIGNING SUMMARY", None, "Number of duplicate marked reads")
+        self.assertEqual(
+            read_dragen_metrics(MAPPING_METRICS_PATH.read_text().splitlines(), [metric_key], columns=["pct"]),
+            {metric_key: DragenMetricRecord(*metric_key, {"pct": 7.63})}
+        )
+
+    def test_unselected_columns_are_not_parsed(self):
+        with patch.object(
+            metrics_helpers, "parse_dragen_metric_value",
+            MagicMock(wraps=metrics_helpers.parse_dragen_metric_value)
+        ) as parse_mock:
+            list(iter_dragen_metrics(QUANT_METRICS_PATH.read_text().splitlines(), columns=["value"]))
+            read_dragen_metrics(
+                MAPPING_METRICS_PATH.read_text().splitlines(),
+                [("MAPPING/ALIGNING SUMMARY", None, "Mapped reads")]
+            )
+
+        # One value per quant metric, then the value and pct of the one mapping metric
+        self.assertEqual(parse_mock.call_count, len(QUANT_METRICS_PATH.read_text().splitlines()) + 2)
+
+    def test_missing_metrics_are_not_returned(self):
+        metrics = read_dragen_metrics(
+            QUANT_METRICS_PATH.read_text().splitlines(),
+            [("RNA QUANTIFICATION STATISTICS", None, "Fold coverage of all introns")]
+        )
+        self.assertEqual(metrics, {})
+
+
+class TestMetricsOutputTsv(unittest.TestCase):
+    def test_failed_steps_equivalent_to_string_check(self):
+        for metrics_path in METRICS_OUTPUT_PATHS:
+            with self.subTest(metrics_file=metrics_path.name):
+                metrics_output_tsv_str = metrics_path.read_text()
+                failed_steps_records = [
+                    record for record in iter_dragen_metrics(
+                        metrics_output_tsv_str.splitlines(), sections=["Analysis Status"]
+                    )
+                    if record.metric == "FAILED_STEPS"
+                ]
+                self.assertEqual(len(failed_steps_records), 1)
+                self.assertEqual(
+                    failed_steps_records[0].value is None,
+                    'FAILED_STEPS\tNA' in metrics_output_tsv_str
+                )
+
+    def test_sample_records(self):
+        records = {
+            record.key: record
+            for record in iter_dragen_metrics(FAILED_METRICS_OUTPUT_PATH.read_text().splitlines())
+        }
+
+        self.assertEqual(
+            records[DragenMetricKey("Analysis Status", "L2401294", "FAILED_STEPS")].values,
+            {"value": "DragenCaller"}
+        )
+        self.assertEqual(
+            records[DragenMetricKey("DNA Library QC Metrics for CNV Calling", "L2401294", "GENE_SCALED_MAD (count)")],
+            DragenMetricRecord(
+                "DNA Library QC Metrics for CNV Calling", "L2401294", "GENE_SCALED_MAD (count)",
+                {"value": None, "lsl_guideline": 0, "usl_guideline": 0.059}
+            )
+        )
+        # The run metrics are not of any sample
+        self.assertEqual(
+            records[DragenMetricKey("Run QC Metrics", None, "PCT_Q30_R1 (%)")].values,
+            {"value": None, "lsl_guideline": None, "usl_guideline": None}
+        )
+        # Nor are the headerless sections
+        self.assertEqual(records[DragenMetricKey("Header", None, "Pipeline Version")].value, "2.6.0.22")
+        self.assertEqual(
+            records[DragenMetricKey("Notes", None, "DNA Library QC Metrics")].value,
+            "DNA library QC Metrics are evaluated using contamination score"
+        )
+        # The title lines are not in any section
+        self.assertEqual({record.section for record in records.values()}, {
+            "Header", "Run QC Metrics", "Analysis Status", "DNA Library QC Metrics",
+            "DNA Library QC Metrics for Small Variant Calling and TMB", "DNA Library QC Metrics for MSI and Fusions",
+            "DNA Library QC Metrics for CNV Calling", "Notes",
+        })
+
+    def test_every_sample_column(self):
+        records = list(
+            iter_dragen_metrics(
+                get_synthetic_metrics_output(3).splitlines(),
+                sections=["DNA Expanded Metrics"],
+                columns=["value"]
+            )
+        )
+
+        self.assertEqual(len(records), 20 * 3)
+        self.assertEqual(
+            [record for record in records if record.metric == "MEDIAN_INSERT_SIZE (bp)"],
+            [
+                DragenMetricRecord("DNA Expanded Metrics", f"L24{sample_iter:05d}", "MEDIAN_INSERT_SIZE (bp)", {"value": 168})
+                for sample_iter in range(3)
+            ]
+        )
+
+    def test_stops_once_all_sections_are_read(self):
+        lines = PASSING_METRICS_OUTPUT_PATH.read_text().splitlines()
+        counting_iterator = CountingIterator(lines)
+
+        records = list(iter_dragen_metrics(counting_iterator, sections=["Analysis Status"]))
+
+        self.assertEqual(
+            [record.metric for record in records],
+            ["COMPLETED_ALL_STEPS", "FAILED_STEPS", "STEPS_NOT_EXECUTED"]
+        )
+        # Up to the first metric of the next section
+        self.assertEqual(counting_iterator.num_lines_consumed, lines.index("[DNA Library QC Metrics]") + 3)
+
+    def test_read_metrics(self):
+        metric_key = DragenMetricKey("DNA Library QC Metrics", "L2401562", "CONTAMINATION_SCORE (NA)")
+        self.assertEqual(
+            read_dragen_metrics(PASSING_METRICS_OUTPUT_PATH.read_text().splitlines(), [metric_key], columns=["value"]),
+            {metric_key: DragenMetricRecord(*metric_key, {"value": 114})}
+        )
+
+
+class TestStreamDragenMetrics(unittest.TestCase):
+    def setUp(self):
+        patch.object(
+            stream_helpers.requests, "get",
+            mock_requests_get({
+                metrics_path.name: metrics_path.read_text()
+                for metrics_path in METRICS_CSV_PATHS + METRICS_OUTPUT_PATHS
+            })
+        ).start()
+
+    def tearDown(self):
+        patch.stopall()
+
+    def test_stream_metrics(self):
+        metric_key = DragenMetricKey("COVERAGE SUMMARY", None, "Average alignment coverage over genome")
+        self.assertEqual(
+            stream_dragen_metrics_from_url(WGS_COVERAGE_METRICS_PATH.name, [metric_key])[metric_key].value,
+            37.06
+        )
+
+    def test_stream_raises_on_missing_metrics(self):
+        with self.assertRaises(DragenMetricsNotFoundError) as error_context:
+            stream_dragen_metrics_from_url(
+                QUANT_METRICS_PATH.name,
+                [
+                    ("RNA QUANTIFICATION STATISTICS", None, "Fold coverage of all exons"),
+                    ("RNA QUANTIFICATION STATISTICS", None, "Fold coverage of all introns")
+                ]
+            )
+        self.assertEqual(
+            error_context.exception.missing_metric_keys,
+            [DragenMetricKey("RNA QUANTIFICATION STATISTICS", None, "Fold coverage of all introns")]
+        )
+        # Still a ValueError, as raised by the readers it replaces
+        self.assertIsInstance(error_context.exception, ValueError)
+
+    def test_stream_sections(self):
+        self.assertEqual(
+            stream_dragen_metrics_sections_from_url(
+                FAILED_METRICS_OUTPUT_PATH.name, ["Analysis Status"], columns=["value"]
+            )[1],
+            DragenMetricRecord("Analysis Status", "L2401294", "FAILED_STEPS", {"value": "DragenCaller"})
+        )
+
+
+def benchmark(label: str, num_repeats: int, func):
+    """
+    The best of num_repeats runs, in ms
+    """
+    durations = []
+    for _ in range(num_repeats):
+        start_time = time.perf_counter()
+        func()
+        durations.append(time.perf_counter() - start_time)
+    print(f"{label}: {min(durations) * 1000:.2f} ms")
+
+
+if __name__ == "__main__":
+    # Synthetic mapping metrics with 1000 read groups (around 6 MiB)
+    metrics_file_contents = get_synthetic_mapping_metrics(1000)
+    metrics_file_lines = metrics_file_contents.splitlines()
+    print(f"mapping metrics csv: {len(metrics_file_contents) / 1048576:.1f} MiB, {len(metrics_file_lines)} lines")
+
+    for metric_key, position in [
+        (("MAPPING/ALIGNING SUMMARY", None, "Number of duplicate marked reads"), "summary section"),
+        (("MAPPING/ALIGNING PER RG", "GTCAAGTCCA.GCGTTCGATA.999", "Reads with MAPQ [59:60)"), "last read group section"),
+        (("MAPPING/ALIGNING SUMMARY", None, "Not a metric"), "missing metric, whole file"),
+    ]:
+        counting_iterator = CountingIterator(metrics_file_lines)
+        read_dragen_metrics(counting_iterator, [metric_key])
+        benchmark(
+            f"  read_dragen_metrics, {position} ({counting_iterator.num_lines_consumed} lines)", 5,
+            lambda: read_dragen_metrics(metrics_file_lines, [metric_key], columns=["pct"])
+        )
+
+    benchmark(
+        "  iter_dragen_metrics, every record, value column only", 5,
+        lambda: list(iter_dragen_metrics(metrics_file_lines, columns=["value"]))
+    )
+    benchmark(
+        "  iter_dragen_metrics, every record, every column", 5,
+        lambda: list(iter_dragen_metrics(metrics_file_lines))
+    )
+    benchmark(
+        "  split, with the fast path, whole file", 5,
+        lambda: list(map(metrics_helpers.split_metrics_csv_line, metrics_file_lines))
+    )
+    benchmark(
+        "  split, csv.reader (without the fast path), whole file", 5,
+        lambda: list(csv.reader(metrics_file_lines))
+    )
+    if pd is not None:
+        benchmark(
+            "  pandas read_csv + query, whole file", 5,
+            lambda: pandas_query(
+                metrics_file_contents, "MAPPING/ALIGNING SUMMARY", "Number of duplicate marked reads", "pct"
+            )
+        )
+
+    # Synthetic MetricsOutput.tsv of a 16 sample batch, with 2000 expanded metrics
+    metrics_output_contents = get_synthetic_metrics_output(16, 2000)
+    metrics_output_lines = metrics_output_contents.splitlines()
+    print(f"MetricsOutput.tsv: {len(metrics_output_contents) / 1048576:.1f} MiB, {len(metrics_output_lines)} lines")
+
+    benchmark(
+        "  iter_dragen_metrics, analysis status section", 5,
+        lambda: list(iter_dragen_metrics(metrics_output_lines, sections=["Analysis Status"]))
+    )
+    benchmark(
+        "  iter_dragen_metrics, every record, value column only", 5,
+        lambda: list(iter_dragen_metrics(metrics_output_lines, columns=["value"]))
+    )
+    benchmark(
+        "  'FAILED_STEPS\\tNA' in MetricsOutput.tsv (the previous check)", 5,
+        lambda: "FAILED_STEPS\tNA" in metrics_output_contents
+    )
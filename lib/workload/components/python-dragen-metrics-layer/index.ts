@@ -0,0 +1,26 @@
+#!/usr/bin/env python3
+
+import { Construct } from 'constructs';
+import { PythonLayerVersion } from '@aws-cdk/aws-lambda-python-alpha';
+import path from 'path';
+import { PythonLambdaLayerConstruct } from '../python-lambda-layer';
+
+export interface PythonDragenMetricsLambdaLayerConstructProps {
+  layerPrefix: string;
+}
+
+export class DragenMetricsPythonLambdaLayer extends Construct {
+  public readonly lambdaLayerVersionObj: PythonLayerVersion;
+
+  constructor(scope: Construct, id: string, props: PythonDragenMetricsLambdaLayerConstructProps) {
+    super(scope, id);
+
+    // Generate lambda dragen metrics python layer
+    // Get lambda layer object
+    this.lambdaLayerVersionObj = new PythonLambdaLayerConstruct(this, 'lambda_layer', {
+      layerName: `${props.layerPrefix}-dragen-metrics-py-layer`,
+      layerDescription: 'Lambda Layer for parsing DRAGEN metrics files via Python',
+      layerDirectory: path.join(__dirname, 'dragen_metrics_layer'),
+    }).lambdaLayerVersionObj;
+  }
+}
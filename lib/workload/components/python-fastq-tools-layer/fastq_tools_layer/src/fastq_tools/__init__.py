@@ -10,6 +10,8 @@ from .utils.models import(
     FileStorageObject,
     FastqSet,
     FastqSetCreateParams,
+    FastqSetBatchCreateStatus,
+    FastqSetBatchCreateResult,
     Job,
     JobStatus,
     JobType
@@ -21,6 +23,7 @@ from .utils.query_helpers import (
     get_fastqs_in_instrument_run_id,
     get_fastqs_in_library,
     get_fastqs_in_library_list,
+    get_fastqs_in_fastq_id_list,
     get_fastqs_in_libraries_and_instrument_run_id,
     get_fastqs_in_sample,
     get_fastqs_in_subject,
@@ -28,7 +31,8 @@ from .utils.query_helpers import (
     get_fastqs_in_project,
     get_fastq_set,
     get_fastq_sets,
-    get_fastq_jobs
+    get_fastq_jobs,
+    get_fastq_jobs_in_fastq_id_list,
 )
 
 
@@ -51,6 +55,7 @@ from .utils.update_helpers import (
 
 from .utils.create_helpers import (
     create_fastq_set_object,
+    create_fastq_set_objects,
     create_fastq_list_row_object,
 )
 
@@ -73,6 +78,8 @@ __all__ = [
     "FileStorageObject",
     "FastqSet",
     "FastqSetCreateParams",
+    "FastqSetBatchCreateStatus",
+    "FastqSetBatchCreateResult",
     "Job",
     "JobStatus",
     "JobType",
@@ -83,6 +90,7 @@ __all__ = [
     "get_fastqs_in_instrument_run_id",
     "get_fastqs_in_library",
     "get_fastqs_in_library_list",
+    "get_fastqs_in_fastq_id_list",
     "get_fastqs_in_libraries_and_instrument_run_id",
     "get_fastqs_in_sample",
     "get_fastqs_in_subject",
@@ -95,10 +103,12 @@ __all__ = [
 
     # Job helpers
     "get_fastq_jobs",
+    "get_fastq_jobs_in_fastq_id_list",
 
     # Create helpers,
     "create_fastq_list_row_object",
     "create_fastq_set_object",
+    "create_fastq_set_objects",
 
     # Update helpers
     "add_qc_stats",
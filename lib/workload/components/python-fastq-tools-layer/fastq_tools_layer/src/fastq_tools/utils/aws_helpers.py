@@ -4,12 +4,16 @@
 import typing
 from urllib.parse import urlunparse
 
-import boto3
 import json
 from os import environ
 import urllib3
 from typing import Optional
 
+# Local imports
+from .import_helpers import lazy_import
+
+boto3 = lazy_import("boto3")
+
 http = urllib3.PoolManager()
 
 LOCAL_HTTP_CACHE_PORT = 2773
@@ -11,14 +11,17 @@ Update helpers for the update script.
 - validate
 - invalidate
 """
-from typing import Unpack
+from typing import Unpack, List
 
 # Standard imports
 
 # Local imports
 from .globals import FASTQ_LIST_ROW_ENDPOINT, FASTQ_SET_ENDPOINT
 from .request_helpers import post_request
-from .models import FastqListRow, FastqSet, FastqListRowCreateParams, FastqSetCreateParams
+from .models import (
+    FastqListRow, FastqSet, FastqListRowCreateParams, FastqSetCreateParams,
+    FastqSetBatchCreateResult
+)
 
 
 def create_fastq_list_row_object(**kwargs: Unpack[FastqListRowCreateParams]) -> FastqListRow:
@@ -49,3 +52,17 @@ def create_fastq_set_object(**kwargs: Unpack[FastqSetCreateParams]) -> FastqSet:
             )
         )
     )
+
+
+def create_fastq_set_objects(fastq_set_create_params_list: List[FastqSetCreateParams]) -> List[FastqSetBatchCreateResult]:
+    """
+    Add many fastq set objects (and their fastq list rows) to the database in a single request.
+    Returns a result for each fastq set, in the order of the list,
+    a fastq set that could not be created has the status FAILED and the reason in 'detail'
+    """
+    return post_request(
+        f"{FASTQ_SET_ENDPOINT}/batchCreate",
+        params={
+            "fastqSetList": fastq_set_create_params_list
+        }
+    )['results']
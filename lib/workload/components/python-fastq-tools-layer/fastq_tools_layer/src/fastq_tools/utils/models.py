@@ -131,6 +131,19 @@ class FastqSet(TypedDict):
     isCurrentFastqSet: bool
 
 
+class FastqSetBatchCreateStatus(Enum):
+    CREATED = "CREATED"
+    FAILED = "FAILED"
+
+
+class FastqSetBatchCreateResult(TypedDict):
+    # One result per fastq set, in the order of the fastq set list
+    status: str
+    library: Library
+    fastqSet: Optional[FastqSet]
+    detail: Optional[str]
+
+
 class QcStats(TypedDict):
     insertSizeEstimate: int
     rawWgsCoverageEstimate: int
@@ -17,19 +17,24 @@ get_fastqs_in_project
 
 get_fastq_by_rgid_and_instrument_run_id
 
+get_fastqs_in_fastq_id_list
+
+get_fastq_jobs_in_fastq_id_list
+
 """
 from functools import reduce
 from itertools import batched
 from operator import concat
-from typing import List, Type, Unpack
+from typing import List, Type, Unpack, Optional
 
 from .request_helpers import (
     get_request_response,
     get_request_response_results,
+    post_request,
 )
 
 from .globals import FASTQ_LIST_ROW_ENDPOINT, FASTQ_SET_ENDPOINT
-from .models import FastqListRow, FastqSet, Job, FastqListRowQueryParameters, FastqSetQueryParameters
+from .models import FastqListRow, FastqSet, Job, JobType, JobStatus, FastqListRowQueryParameters, FastqSetQueryParameters
 
 
 def get_fastq(fastq_id: str, **kwargs) -> FastqListRow:
@@ -116,6 +121,50 @@ def get_fastqs_in_library_list(library_id_list: List[str]):
         return []
 
 
+def get_fastqs_in_fastq_id_list(
+        fastq_id_list: List[str],
+        instrument_run_id: Optional[str] = None,
+        **kwargs
+) -> List[FastqListRow]:
+    """
+    Get the fastqs for a list of fastq ids, in the same order as the fastq id list.
+
+    If the instrument run id is known, we make one (paginated) query for the whole run
+    and filter locally, rather than making one request per fastq id.
+    Any fastq ids not found in the run query are fetched individually.
+    :param fastq_id_list:
+    :param instrument_run_id:
+    :param kwargs: Passed through to the fastq endpoint, i.e includeS3Details
+    :return:
+    """
+    fastqs_by_id = {}
+
+    if instrument_run_id is not None:
+        fastq_id_set = set(fastq_id_list)
+        fastqs_by_id = dict(map(
+            lambda fastq_iter_: (fastq_iter_['id'], fastq_iter_),
+            filter(
+                lambda fastq_iter_: fastq_iter_['id'] in fastq_id_set,
+                get_request_response_results(FASTQ_LIST_ROW_ENDPOINT, {
+                    "instrumentRunId": instrument_run_id,
+                    "valid": "ALL",
+                    "rowsPerPage": 1000,
+                    **kwargs
+                })
+            )
+        ))
+
+    # Fall back to individual queries for any fastq ids not in the run
+    for fastq_id in fastq_id_list:
+        if fastq_id not in fastqs_by_id:
+            fastqs_by_id[fastq_id] = get_fastq(fastq_id, **kwargs)
+
+    return list(map(
+        lambda fastq_id_iter_: fastqs_by_id[fastq_id_iter_],
+        fastq_id_list
+    ))
+
+
 def get_fastqs_in_libraries_and_instrument_run_id(library_id_list, instrument_run_id):
     """
     Get all fastqs in a list of libraries and instrument run id
@@ -191,3 +240,38 @@ def get_fastq_jobs(fastq_id: str) -> List[Job]:
     Get all fastqs in a fastq set
     """
     return get_request_response_results(f"{FASTQ_LIST_ROW_ENDPOINT}/{fastq_id}/jobs")
+
+
+def get_fastq_jobs_in_fastq_id_list(
+        fastq_id_list: List[str],
+        job_type_list: Optional[List[JobType]] = None,
+        status_list: Optional[List[JobStatus]] = None
+) -> List[Job]:
+    """
+    Get the jobs of many fastqs in a single request, rather than one request per fastq id,
+    optionally filtered by job type and status
+    :param fastq_id_list:
+    :param job_type_list:
+    :param status_list: i.e. [JobStatus.PENDING, JobStatus.RUNNING] for the jobs in progress
+    :return:
+    """
+    if len(fastq_id_list) == 0:
+        return []
+
+    return post_request(
+        f"{FASTQ_LIST_ROW_ENDPOINT}/jobs/batchQuery",
+        params=dict(filter(
+            lambda kv_iter_: kv_iter_[1] is not None,
+            {
+                "fastqIdList": fastq_id_list,
+                "jobTypeList": (
+                    list(map(lambda job_type_iter_: JobType(job_type_iter_).value, job_type_list))
+                    if job_type_list is not None else None
+                ),
+                "statusList": (
+                    list(map(lambda status_iter_: JobStatus(status_iter_).value, status_list))
+                    if status_list is not None else None
+                ),
+            }.items()
+        ))
+    )['results']
@@ -3,12 +3,9 @@ from typing import Dict, Optional, List, Union
 from urllib.parse import urlunparse, urlparse
 
 # Standard imports
-import requests
 import logging
 from copy import deepcopy
 
-from requests import HTTPError
-
 # Locals
 from .globals import (
     FASTQ_SUBDOMAIN_NAME,
@@ -17,6 +14,9 @@ from .globals import (
 from .aws_helpers import (
     get_orcabus_token, get_hostname
 )
+from .import_helpers import lazy_import
+
+requests = lazy_import("requests")
 
 # Set default request params
 DEFAULT_REQUEST_PARAMS = {}
@@ -174,7 +174,7 @@ def post_request(endpoint: str, params: Optional[Dict] = None) -> Dict:
 
     try:
         response.raise_for_status()
-    except HTTPError as e:
-        raise HTTPError(f"Error {e} - {response.text}") from e
+    except requests.HTTPError as e:
+        raise requests.HTTPError(f"Error {e} - {response.text}") from e
 
     return response.json()
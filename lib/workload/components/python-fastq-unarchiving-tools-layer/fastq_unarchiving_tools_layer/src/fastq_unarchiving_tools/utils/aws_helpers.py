@@ -2,10 +2,14 @@
 
 # Standard imports
 import typing
-import boto3
 import json
 from os import environ
 
+# Local imports
+from .import_helpers import lazy_import
+
+boto3 = lazy_import("boto3")
+
 
 # Type hinting
 if typing.TYPE_CHECKING:
@@ -3,7 +3,6 @@ from typing import Dict, Optional, List, Union
 from urllib.parse import urlunparse, urlparse
 
 # Standard imports
-import requests
 import logging
 from copy import deepcopy
 
@@ -15,6 +14,9 @@ from .globals import (
 from .aws_helpers import (
     get_orcabus_token, get_hostname
 )
+from .import_helpers import lazy_import
+
+requests = lazy_import("requests")
 
 # Set default request params
 DEFAULT_REQUEST_PARAMS = {}
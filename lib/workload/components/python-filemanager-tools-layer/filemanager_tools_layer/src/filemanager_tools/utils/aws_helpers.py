@@ -3,13 +3,17 @@
 # Standard imports
 import typing
 from typing import Optional
-import boto3
 import json
 from os import environ
 from urllib.parse import urlparse, urlunparse
 import urllib3
 from typing import Optional
 
+# Local imports
+from .import_helpers import lazy_import
+
+boto3 = lazy_import("boto3")
+
 # Type hinting
 if typing.TYPE_CHECKING:
     from mypy_boto3_secretsmanager import SecretsManagerClient
@@ -5,7 +5,6 @@ from operator import concat
 from typing import List, Dict, Union, Tuple
 import typing
 
-import boto3
 
 from .errors import S3FileNotFoundError, S3DuplicateFileCopyError
 from .models import FileObject
@@ -21,6 +20,11 @@ from datetime import datetime, timedelta, timezone
 from urllib.parse import urlparse, unquote
 from itertools import batched
 
+# Local imports
+from .import_helpers import lazy_import
+
+boto3 = lazy_import("boto3")
+
 if typing.TYPE_CHECKING:
     from mypy_boto3_sts import STSClient
 
@@ -0,0 +1,11 @@
+#!/usr/bin/env python3
+
+# Output tree helpers
+from .utils.output_tree_helpers import (
+    OutputTreeSnapshot,
+)
+
+__all__ = [
+    # Output tree helpers
+    "OutputTreeSnapshot",
+]
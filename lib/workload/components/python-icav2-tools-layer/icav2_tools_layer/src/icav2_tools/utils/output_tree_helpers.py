@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+
+"""
+Snapshot of an analysis output tree
+
+The set outputs json lambdas look up a handful of files and folders in the analysis output,
+each list_project_data_non_recursively call is its own paginated round trip to icav2.
+
+Instead, list every file and folder under the analysis output once (one bulk find per data type, run side by side)
+and answer the 'data in folder X matching Y' lookups from memory
+"""
+
+# Standard imports
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path, PurePosixPath
+from typing import Dict, List, Optional, Union
+
+# Wrapica imports
+from wrapica.enums import DataType
+from wrapica.libica_models import ProjectData
+from wrapica.project_data import (
+    convert_uri_to_project_data_obj,
+    find_project_data_bulk,
+)
+
+# Logger
+logger = logging.getLogger()
+
+
+def get_parent_folder_path(data_path: str) -> str:
+    """
+    Parent folder of a data path, with a trailing slash, as icav2 stores folder paths
+    :param data_path:
+    :return:
+    """
+    return str(PurePosixPath(data_path.rstrip("/")).parent).rstrip("/") + "/"
+
+
+class OutputTreeSnapshot:
+    """
+    All files and folders under a root folder, indexed by their parent folder path
+    """
+    def __init__(self, root_project_data_obj: ProjectData, project_data_list: List[ProjectData]):
+        self.root_project_data_obj = root_project_data_obj
+        self.root_path = root_project_data_obj.data.details.path.rstrip("/") + "/"
+
+        # Bulk finds match the path prefix case insensitively, and include the root folder itself
+        self.project_data_by_parent_path: Dict[str, List[ProjectData]] = {}
+        for project_data_obj in project_data_list:
+            data_path = project_data_obj.data.details.path
+            if not data_path.startswith(self.root_path) or data_path.rstrip("/") + "/" == self.root_path:
+                continue
+            self.project_data_by_parent_path.setdefault(get_parent_folder_path(data_path), []).append(
+                project_data_obj
+            )
+
+    @classmethod
+    def from_project_data_obj(cls, root_project_data_obj: ProjectData) -> 'OutputTreeSnapshot':
+        """
+        List all files and folders under the root folder
+        :param root_project_data_obj:
+        :return:
+        """
+        def _find_project_data_bulk(data_type: DataType) -> List[ProjectData]:
+            # Use the path of the root folder, as the folder id would cost another round trip to get its path
+            return find_project_data_bulk(
+                project_id=root_project_data_obj.project_id,
+                parent_folder_path=Path(root_project_data_obj.data.details.path),
+                data_type=data_type
+            )
+
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            folder_list, file_list = executor.map(_find_project_data_bulk, [DataType.FOLDER, DataType.FILE])
+
+        logger.info(
+            f"Found {len(folder_list)} folders and {len(file_list)} files "
+            f"under {root_project_data_obj.data.details.path}"
+        )
+
+        return cls(root_project_data_obj, folder_list + file_list)
+
+    @classmethod
+    def from_uri(cls, root_uri: str) -> 'OutputTreeSnapshot':
+        return cls.from_project_data_obj(convert_uri_to_project_data_obj(root_uri))
+
+    def get_folder_path(self, parent_folder: Optional[Union[ProjectData, str]] = None) -> str:
+        """
+        Folder path of a project data object, or of a path relative to the root folder
+        :param parent_folder:
+        :return:
+        """
+        if parent_folder is None:
+            return self.root_path
+        if isinstance(parent_folder, str):
+            return (self.root_path + parent_folder.strip("/") + "/").replace("//", "/")
+        return parent_folder.data.details.path.rstrip("/") + "/"
+
+    def list_project_data_non_recursively(
+            self,
+            parent_folder: Optional[Union[ProjectData, str]] = None,
+            data_type: Optional[DataType] = None,
+            name_prefix: Optional[str] = None,
+            name_suffix: Optional[str] = None,
+    ) -> List[ProjectData]:
+        """
+        Data directly under the parent folder (a project data object or a path relative to the root folder),
+        in the order icav2 returned them
+        :param parent_folder: Defaults to the root folder
+        :param data_type: Only return files or folders
+        :param name_prefix: Only return data whose name starts with the prefix
+        :param name_suffix: Only return data whose name ends with the suffix
+        :return:
+        """
+        return list(
+            filter(
+                lambda project_data_iter: (
+                    (data_type is None or DataType(project_data_iter.data.details.data_type) == data_type) and
+                    (name_prefix is None or project_data_iter.data.details.name.startswith(name_prefix)) and
+                    (name_suffix is None or project_data_iter.data.details.name.endswith(name_suffix))
+                ),
+                self.project_data_by_parent_path.get(self.get_folder_path(parent_folder), [])
+            )
+        )
+
+    def get_project_data_obj_by_name(
+            self,
+            parent_folder: Optional[Union[ProjectData, str]],
+            name: str,
+            data_type: Optional[DataType] = None,
+    ) -> ProjectData:
+        """
+        The data with this name directly under the parent folder
+        :param parent_folder:
+        :param name:
+        :param data_type:
+        :return:
+        :raises: StopIteration if no data has this name
+        """
+        return next(
+            filter(
+                lambda project_data_iter: project_data_iter.data.details.name == name,
+                self.list_project_data_non_recursively(parent_folder, data_type=data_type)
+            )
+        )
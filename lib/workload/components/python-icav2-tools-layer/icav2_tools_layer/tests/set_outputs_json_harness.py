@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+
+"""
+Shared harness for the set_outputs_json lambda tests of the pipeline managers.
+
+The outputs json from the output tree snapshot should match the outputs json recorded
+from the previous per folder listings, on a recorded listing of an analysis output.
+
+Each lambda test only sets the lambda module, its fixtures directory and its event, i.e.
+
+    class TestSetOutputsJson(SetOutputsJsonTestMixin, unittest.TestCase):
+        set_outputs_json_module = set_outputs_json
+        fixtures_dir = Path(__file__).parent / "fixtures"
+        event = {...}
+
+with the fixtures directory holding the recorded 'analysis_output_listing.json' and 'outputs.json'.
+
+Run the lambda tests with this directory (and the layer src) on the python path
+"""
+
+# Standard imports
+import json
+from pathlib import Path, PurePosixPath
+from types import ModuleType, SimpleNamespace
+from typing import Dict
+from unittest import mock
+from urllib.parse import urlparse
+
+# Layer imports
+from icav2_tools.utils import output_tree_helpers
+
+
+def get_project_data_obj(project_id: str, data_dict: dict) -> SimpleNamespace:
+    """
+    Stand in for the wrapica ProjectData model, with only the attributes read by the lambdas
+    """
+    return SimpleNamespace(
+        project_id=project_id,
+        data=SimpleNamespace(
+            id=data_dict["id"],
+            details=SimpleNamespace(
+                name=PurePosixPath(data_dict["path"]).name,
+                path=data_dict["path"],
+                data_type=data_dict["data_type"],
+                owning_project_id=project_id,
+            )
+        )
+    )
+
+
+class SetOutputsJsonTestMixin:
+    set_outputs_json_module: ModuleType
+    fixtures_dir: Path
+    event: Dict
+
+    def setUp(self):
+        listing = json.loads((self.fixtures_dir / "analysis_output_listing.json").read_text())
+        self.project_data_list = [
+            get_project_data_obj(listing["project_id"], data_dict)
+            for data_dict in listing["data"]
+        ]
+        self.contents_by_id = {
+            data_dict["id"]: data_dict.get("contents")
+            for data_dict in listing["data"]
+        }
+        self.find_project_data_bulk_calls = []
+
+    def find_project_data_bulk(self, project_id, parent_folder_path, data_type):
+        self.find_project_data_bulk_calls.append(data_type)
+        # Prefix match like icav2, so the root folder itself is included
+        return list(
+            filter(
+                lambda project_data_iter: (
+                    project_data_iter.data.details.path.startswith(str(parent_folder_path) + "/") and
+                    project_data_iter.data.details.data_type == data_type.value
+                ),
+                self.project_data_list
+            )
+        )
+
+    def convert_uri_to_project_data_obj(self, uri):
+        return next(
+            filter(
+                lambda project_data_iter: project_data_iter.data.details.path == urlparse(uri).path,
+                self.project_data_list
+            )
+        )
+
+    def test_outputs_json_matches_recorded(self):
+        with (
+            mock.patch.object(self.set_outputs_json_module, "set_icav2_env_vars"),
+            mock.patch.object(
+                self.set_outputs_json_module, "convert_uri_to_project_data_obj", self.convert_uri_to_project_data_obj
+            ),
+            mock.patch.object(
+                self.set_outputs_json_module, "convert_project_data_obj_to_uri",
+                lambda project_data_obj, uri_type=None: (
+                    "s3://pipeline-cache/byob-icav2/development" + project_data_obj.data.details.path
+                )
+            ),
+            mock.patch.object(
+                self.set_outputs_json_module, "read_icav2_file_contents_to_string",
+                lambda project_id, data_id: self.contents_by_id[data_id],
+                create=True
+            ),
+            mock.patch.object(output_tree_helpers, "find_project_data_bulk", self.find_project_data_bulk),
+        ):
+            outputs_json = self.set_outputs_json_module.handler(self.event, None)
+
+        self.assertEqual(
+            json.dumps(outputs_json, indent=2),
+            (self.fixtures_dir / "outputs.json").read_text().rstrip("\n")
+        )
+        # One bulk find for folders, one for files
+        self.assertEqual(len(self.find_project_data_bulk_calls), 2)
@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+
+"""
+Lookups on an output tree snapshot match the per folder listings they replace
+
+Run from the icav2_tools_layer directory with
+    PYTHONPATH=src python -m unittest discover tests
+"""
+
+# Standard imports
+import random
+import unittest
+from pathlib import PurePosixPath
+from types import SimpleNamespace
+from unittest import mock
+
+# Wrapica imports
+from wrapica.enums import DataType
+
+# Layer imports
+from icav2_tools import OutputTreeSnapshot
+from icav2_tools.utils import output_tree_helpers
+
+PROJECT_ID = "ea19a3f5-ec7c-4940-a474-c31cd91dbad4"
+ROOT_PATH = "/analysis/tumor_normal/202407237e0fd947/"
+
+
+def get_project_data_obj(data_path: str) -> SimpleNamespace:
+    """
+    Stand in for the wrapica ProjectData model
+    """
+    return SimpleNamespace(
+        project_id=PROJECT_ID,
+        data=SimpleNamespace(
+            id=("fol." if data_path.endswith("/") else "fil.") + str(abs(hash(data_path))),
+            details=SimpleNamespace(
+                name=PurePosixPath(data_path).name,
+                path=data_path,
+                data_type=DataType.FOLDER.value if data_path.endswith("/") else DataType.FILE.value,
+            )
+        )
+    )
+
+
+def get_random_tree(rng: random.Random, num_files: int):
+    """
+    Random files (and their parent folders) under the root folder
+    """
+    data_paths = {ROOT_PATH}
+    for file_iter in range(num_files):
+        folder_path = ROOT_PATH + "".join(
+            f"folder_{rng.randint(0, 3)}/"
+            for _ in range(rng.randint(0, 3))
+        )
+        for parent_iter in PurePosixPath(folder_path).parents:
+            if (str(parent_iter) + "/").startswith(ROOT_PATH):
+                data_paths.add(str(parent_iter) + "/")
+        data_paths.add(folder_path)
+        data_paths.add(folder_path + f"file_{file_iter}.{rng.choice(['bam', 'vcf.gz', 'html', 'csv'])}")
+    return list(map(get_project_data_obj, sorted(data_paths)))
+
+
+def list_children(project_data_list, parent_folder_path, data_type=None):
+    """
+    What list_project_data_non_recursively returns for the folder
+    """
+    return list(
+        filter(
+            lambda project_data_iter: (
+                project_data_iter.data.details.path != parent_folder_path and
+                str(PurePosixPath(project_data_iter.data.details.path).parent).rstrip("/") + "/" == parent_folder_path and
+                (data_type is None or project_data_iter.data.details.data_type == data_type.value)
+            ),
+            project_data_list
+        )
+    )
+
+
+class TestOutputTreeSnapshot(unittest.TestCase):
+    def test_matches_non_recursive_listings(self):
+        rng = random.Random(20241102)
+        for _ in range(50):
+            project_data_list = get_random_tree(rng, rng.randint(0, 40))
+            output_tree_snapshot = OutputTreeSnapshot(project_data_list[0], project_data_list)
+            for folder_obj in filter(
+                lambda project_data_iter: project_data_iter.data.details.data_type == DataType.FOLDER.value,
+                project_data_list
+            ):
+                for data_type in [None, DataType.FILE, DataType.FOLDER]:
+                    self.assertEqual(
+                        output_tree_snapshot.list_project_data_non_recursively(folder_obj, data_type=data_type),
+                        list_children(project_data_list, folder_obj.data.details.path, data_type=data_type)
+                    )
+
+    def test_relative_paths_and_name_filters(self):
+        project_data_list = list(map(get_project_data_obj, [
+            ROOT_PATH,
+            ROOT_PATH + "L2400191_dragen_germline/",
+            ROOT_PATH + "L2400191_dragen_germline/L2400191.vcf.gz",
+            ROOT_PATH + "L2400191_dragen_germline/L2400191.hard-filtered.vcf.gz",
+            ROOT_PATH + "L2400191_dragen_germline/L2400191.mapping_metrics.csv",
+        ]))
+        output_tree_snapshot = OutputTreeSnapshot(project_data_list[0], project_data_list)
+
+        self.assertEqual(
+            output_tree_snapshot.list_project_data_non_recursively(data_type=DataType.FOLDER),
+            [project_data_list[1]]
+        )
+        self.assertEqual(
+            output_tree_snapshot.list_project_data_non_recursively(
+                "L2400191_dragen_germline", name_prefix="L2400191.", name_suffix=".vcf.gz"
+            ),
+            project_data_list[2:4]
+        )
+        self.assertEqual(
+            output_tree_snapshot.get_project_data_obj_by_name("L2400191_dragen_germline/", "L2400191.vcf.gz"),
+            project_data_list[2]
+        )
+        with self.assertRaises(StopIteration):
+            output_tree_snapshot.get_project_data_obj_by_name(None, "L2400191.vcf.gz")
+
+    def test_case_insensitive_prefix_matches_are_dropped(self):
+        # The bulk find matches the root path case insensitively
+        project_data_list = list(map(get_project_data_obj, [
+            ROOT_PATH,
+            ROOT_PATH + "multiqc/",
+            ROOT_PATH.upper() + "multiqc/",
+            ROOT_PATH.upper() + "multiqc/report.html",
+        ]))
+        output_tree_snapshot = OutputTreeSnapshot(project_data_list[0], project_data_list)
+
+        self.assertEqual(output_tree_snapshot.list_project_data_non_recursively(), [project_data_list[1]])
+        self.assertEqual(output_tree_snapshot.list_project_data_non_recursively("multiqc"), [])
+
+    def test_from_project_data_obj(self):
+        project_data_list = get_random_tree(random.Random(1), 20)
+        find_project_data_bulk_calls = []
+
+        def find_project_data_bulk(project_id, parent_folder_path, data_type):
+            find_project_data_bulk_calls.append((project_id, str(parent_folder_path), data_type))
+            return list(
+                filter(
+                    lambda project_data_iter: project_data_iter.data.details.data_type == data_type.value,
+                    project_data_list
+                )
+            )
+
+        with mock.patch.object(output_tree_helpers, "find_project_data_bulk", find_project_data_bulk):
+            output_tree_snapshot = OutputTreeSnapshot.from_project_data_obj(project_data_list[0])
+
+        self.assertEqual(
+            sorted(find_project_data_bulk_calls, key=lambda call_iter: call_iter[2].value),
+            [
+                (PROJECT_ID, ROOT_PATH.rstrip("/"), DataType.FILE),
+                (PROJECT_ID, ROOT_PATH.rstrip("/"), DataType.FOLDER),
+            ]
+        )
+        self.assertEqual(
+            sorted(
+                output_tree_snapshot.list_project_data_non_recursively(),
+                key=lambda project_data_iter: project_data_iter.data.details.path
+            ),
+            list_children(project_data_list, ROOT_PATH)
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,26 @@
+#!/usr/bin/env python3
+
+import { Construct } from 'constructs';
+import { PythonLayerVersion } from '@aws-cdk/aws-lambda-python-alpha';
+import path from 'path';
+import { PythonLambdaLayerConstruct } from '../python-lambda-layer';
+
+export interface PythonIcav2ToolsLambdaLayerConstructProps {
+  layerPrefix: string;
+}
+
+export class Icav2ToolsPythonLambdaLayer extends Construct {
+  public readonly lambdaLayerVersionObj: PythonLayerVersion;
+
+  constructor(scope: Construct, id: string, props: PythonIcav2ToolsLambdaLayerConstructProps) {
+    super(scope, id);
+
+    // Generate lambda icav2 tools python layer
+    // Get lambda layer object
+    this.lambdaLayerVersionObj = new PythonLambdaLayerConstruct(this, 'lambda_layer', {
+      layerName: `${props.layerPrefix}-icav2-tools-py-layer`,
+      layerDescription: 'Lambda Layer for reading icav2 analysis outputs via Python',
+      layerDirectory: path.join(__dirname, 'icav2_tools_layer'),
+    }).lambdaLayerVersionObj;
+  }
+}
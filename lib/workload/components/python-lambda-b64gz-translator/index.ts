@@ -1,10 +1,18 @@
 import { Construct } from 'constructs';
 import * as lambda from 'aws-cdk-lib/aws-lambda';
+import * as s3 from 'aws-cdk-lib/aws-s3';
 import { PythonFunction } from '@aws-cdk/aws-lambda-python-alpha';
 import path from 'path';
+import {
+  grantPayloadCodecEncode,
+  PayloadCodecPythonLambdaLayer,
+} from '../python-payload-codec-layer';
 
 interface LambdaB64GzTranslatorProps {
   functionNamePrefix: string;
+  /* Payloads over the inline size limit are written to / read from this bucket */
+  payloadCodecBucket?: s3.IBucket;
+  payloadCodecKeyPrefix?: string;
 }
 
 export class LambdaB64GzTranslatorConstruct extends Construct {
@@ -13,6 +21,11 @@ export class LambdaB64GzTranslatorConstruct extends Construct {
   constructor(scope: Construct, id: string, props: LambdaB64GzTranslatorProps) {
     super(scope, id);
 
+    // Payload codec layer
+    const payloadCodecLayer = new PayloadCodecPythonLambdaLayer(this, 'payload_codec_layer', {
+      layerPrefix: props.functionNamePrefix,
+    }).lambdaLayerVersionObj;
+
     // UUID 7 Generator lambda
     this.lambdaObj = new PythonFunction(this, 'b64_gzip_translator_obj', {
       functionName: `${props.functionNamePrefix}-b64gz-t`,
@@ -22,6 +35,16 @@ export class LambdaB64GzTranslatorConstruct extends Construct {
       index: 'b64gz_translator.py',
       handler: 'handler',
       memorySize: 1024,
+      layers: [payloadCodecLayer],
     });
+
+    // Without a bucket, every payload is inlined
+    if (props.payloadCodecBucket) {
+      grantPayloadCodecEncode(
+        props.payloadCodecBucket,
+        this.lambdaObj,
+        props.payloadCodecKeyPrefix
+      );
+    }
   }
 }
@@ -40,6 +40,7 @@ from .utils.models import (
 # Library Helpers
 from .utils.library_helpers import (
     get_library_from_library_id,
+    get_libraries_from_library_id_list,
     get_library_id_from_library_orcabus_id,
     get_library_orcabus_id_from_library_id,
     get_library_from_library_orcabus_id,
@@ -141,6 +142,7 @@ __all__ = [
     'get_orcabus_token',
     # Library Funcs
     'get_library_from_library_id',
+    'get_libraries_from_library_id_list',
     'get_library_orcabus_id_from_library_id',
     'get_library_id_from_library_orcabus_id',
     'get_library_from_library_orcabus_id',
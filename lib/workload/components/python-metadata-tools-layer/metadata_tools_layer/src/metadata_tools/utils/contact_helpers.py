@@ -7,7 +7,6 @@ Helpers for using the contact API endpoint
 # Standard imports
 from typing import List, Dict
 
-from requests import HTTPError
 
 from .globals import CONTACT_ENDPOINT, ORCABUS_ULID_REGEX_MATCH
 from .models import Contact
@@ -15,6 +14,9 @@ from .models import Contact
 # Local imports
 from .requests_helpers import get_request_response_results
 from .. import ContactNotFoundError
+from .import_helpers import lazy_import
+
+requests = lazy_import("requests")
 
 
 def get_contact_from_contact_id(contact_id: str) -> Contact:
@@ -33,7 +35,7 @@ def get_contact_from_contact_id(contact_id: str) -> Contact:
         query_list = get_request_response_results(CONTACT_ENDPOINT, params)
         assert len(query_list) == 1
         return query_list[0]
-    except (HTTPError, AssertionError):
+    except (requests.HTTPError, AssertionError):
         raise ContactNotFoundError(
             contact_id=contact_id,
         )
@@ -58,7 +60,7 @@ def get_contact_from_contact_orcabus_id(contact_orcabus_id: str) -> Dict:
         query_result = get_request_response_results(CONTACT_ENDPOINT, params)
         assert len(query_result) == 1
         return query_result[0]
-    except (HTTPError, AssertionError):
+    except (requests.HTTPError, AssertionError):
         raise ContactNotFoundError(
             contact_orcabus_id=contact_orcabus_id,
         )
@@ -13,4 +13,7 @@ PROJECT_ENDPOINT = "api/v1/project"
 INDIVIDUAL_ENDPOINT = "api/v1/individual"
 CONTACT_ENDPOINT = "api/v1/contact"
 
+# Number of ids in a single list query, keeps the query string well under the request line limit
+ID_LIST_QUERY_CHUNK_SIZE = 200
+
 ORCABUS_ULID_REGEX_MATCH = re.compile(r'^(?:[a-z0-9]{3}\.)?[A-Z0-9]{26}$')
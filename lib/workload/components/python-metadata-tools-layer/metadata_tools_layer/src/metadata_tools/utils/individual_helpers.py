@@ -6,7 +6,6 @@ This module contains helper functions for the individual class.
 
 # Standard imports
 from typing import List
-from requests import HTTPError
 from functools import reduce
 from operator import concat
 
@@ -15,6 +14,9 @@ from .models import Individual
 from .. import list_libraries_in_subject, IndividualNotFoundError
 from .globals import INDIVIDUAL_ENDPOINT, ORCABUS_ULID_REGEX_MATCH
 from .requests_helpers import get_request_response_results
+from .import_helpers import lazy_import
+
+requests = lazy_import("requests")
 
 
 def get_individual_from_individual_id(individual_id: str) -> Individual:
@@ -33,7 +35,7 @@ def get_individual_from_individual_id(individual_id: str) -> Individual:
         query_results = get_request_response_results(INDIVIDUAL_ENDPOINT, params)
         assert len(query_results) == 1
         return query_results[0]
-    except (HTTPError, AssertionError):
+    except (requests.HTTPError, AssertionError):
         raise IndividualNotFoundError(
             individual_id=individual_id
         )
@@ -59,7 +61,7 @@ def get_individual_from_individual_orcabus_id(individual_orcabus_id: str) -> Ind
         query_results = get_request_response_results(INDIVIDUAL_ENDPOINT, params)
         assert len(query_results) == 1
         return query_results[0]
-    except (HTTPError, AssertionError):
+    except (requests.HTTPError, AssertionError):
         raise IndividualNotFoundError(
             individual_orcabus_id=individual_orcabus_id
         )
@@ -1,12 +1,14 @@
 #!/usr/bin/env python
 from typing import Union, Dict, List
 
-from requests import HTTPError
 
-from .globals import LIBRARY_ENDPOINT, ORCABUS_ULID_REGEX_MATCH
+from .globals import LIBRARY_ENDPOINT, ORCABUS_ULID_REGEX_MATCH, ID_LIST_QUERY_CHUNK_SIZE
 from .models import Library, Subject
 from .requests_helpers import get_request_response_results
 from .. import LibraryNotFoundError
+from .import_helpers import lazy_import
+
+requests = lazy_import("requests")
 
 
 def get_library_from_library_id(library_id: str) -> Library:
@@ -26,12 +28,39 @@ def get_library_from_library_id(library_id: str) -> Library:
         query_results = get_request_response_results(LIBRARY_ENDPOINT, params)
         assert len(query_results) == 1
         return query_results[0]
-    except (HTTPError, AssertionError) as e:
+    except (requests.HTTPError, AssertionError) as e:
         raise LibraryNotFoundError(
             library_id=library_id,
         )
 
 
+def get_libraries_from_library_id_list(library_id_list: List[str]) -> List[Library]:
+    """
+    Get the libraries of a list of library ids, in as few requests as possible.
+    Libraries are returned in the order of the library id list
+    :param library_id_list:
+    :return:
+    """
+    library_id_list = list(dict.fromkeys(library_id_list))
+
+    libraries_by_library_id = {}
+    for chunk_start in range(0, len(library_id_list), ID_LIST_QUERY_CHUNK_SIZE):
+        params = {
+            "library_id": library_id_list[chunk_start:chunk_start + ID_LIST_QUERY_CHUNK_SIZE]
+        }
+        for library_obj in get_request_response_results(LIBRARY_ENDPOINT, params):
+            libraries_by_library_id[library_obj['libraryId']] = library_obj
+
+    # Every library id must be found
+    for library_id in library_id_list:
+        if library_id not in libraries_by_library_id:
+            raise LibraryNotFoundError(
+                library_id=library_id,
+            )
+
+    return list(map(lambda library_id_iter_: libraries_by_library_id[library_id_iter_], library_id_list))
+
+
 def get_library_orcabus_id_from_library_id(library_id: str) -> str:
     """
     Get library from the library id
@@ -76,7 +105,7 @@ def get_library_from_library_orcabus_id(library_orcabus_id: str) -> Library:
         query_list = get_request_response_results(LIBRARY_ENDPOINT, params)
         assert len(query_list) == 1
         return query_list[0]
-    except (HTTPError, AssertionError) as e:
+    except (requests.HTTPError, AssertionError) as e:
         raise LibraryNotFoundError(
             library_orcabus_id=library_orcabus_id,
         )
@@ -7,7 +7,6 @@ Helpers for using the project API endpoint
 # Standard imports
 from typing import List, Dict
 
-from requests import HTTPError
 
 from .errors import ProjectNotFoundError
 from .globals import PROJECT_ENDPOINT, LIBRARY_ENDPOINT, ORCABUS_ULID_REGEX_MATCH
@@ -15,6 +14,9 @@ from .models import Project, Library
 
 # Local imports
 from .requests_helpers import get_request_response_results
+from .import_helpers import lazy_import
+
+requests = lazy_import("requests")
 
 
 def get_project_from_project_id(project_id: str) -> Project:
@@ -33,7 +35,7 @@ def get_project_from_project_id(project_id: str) -> Project:
         query_results = get_request_response_results(PROJECT_ENDPOINT, params)
         assert len(query_results) == 1
         return query_results[0]
-    except (HTTPError, AssertionError) as e:
+    except (requests.HTTPError, AssertionError) as e:
         raise ProjectNotFoundError(
             project_id=project_id,
         )
@@ -65,7 +67,7 @@ def get_project_from_project_orcabus_id(project_orcabus_id: str) -> Project:
         query_results = get_request_response_results(PROJECT_ENDPOINT, params)
         assert len(query_results) == 1
         return query_results[0]
-    except (HTTPError, AssertionError) as e:
+    except (requests.HTTPError, AssertionError) as e:
         raise ProjectNotFoundError(
             project_id=project_orcabus_id,
         )
@@ -14,10 +14,12 @@ from typing import List, Dict
 # Local imports
 from .errors import SampleNotFoundError
 from .globals import SAMPLE_ENDPOINT, ORCABUS_ULID_REGEX_MATCH
-from requests.exceptions import HTTPError
 
 from .models import Sample, LibraryDetail
 from .requests_helpers import get_request_response_results
+from .import_helpers import lazy_import
+
+requests = lazy_import("requests")
 
 
 def get_sample_from_sample_id(sample_id: str) -> Sample:
@@ -36,7 +38,7 @@ def get_sample_from_sample_id(sample_id: str) -> Sample:
         query_results = get_request_response_results(SAMPLE_ENDPOINT, params)
         assert len(query_results) == 1
         return query_results[0]
-    except (HTTPError, AssertionError):
+    except (requests.HTTPError, AssertionError):
         raise SampleNotFoundError(
             sample_id=sample_id
         )
@@ -62,7 +64,7 @@ def get_sample_from_sample_orcabus_id(sample_orcabus_id: str) -> Sample:
         query_results = get_request_response_results(SAMPLE_ENDPOINT, params)
         assert len(query_results) == 1
         return query_results[0]
-    except (HTTPError, AssertionError):
+    except (requests.HTTPError, AssertionError):
         raise SampleNotFoundError(
             sample_orcabus_id=sample_orcabus_id
         )
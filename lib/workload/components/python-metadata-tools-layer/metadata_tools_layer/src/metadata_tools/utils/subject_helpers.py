@@ -7,13 +7,15 @@ Helper functions for a subject
 
 # Standard imports
 from typing import List
-from requests import HTTPError
 
 # Local imports
 from .errors import SubjectNotFoundError
 from .globals import SUBJECT_ENDPOINT, ORCABUS_ULID_REGEX_MATCH
 from .models import Subject, Sample, LibraryDetail
 from .requests_helpers import get_request_response_results
+from .import_helpers import lazy_import
+
+requests = lazy_import("requests")
 
 
 def get_subject_from_subject_id(subject_id: str) -> Subject:
@@ -32,7 +34,7 @@ def get_subject_from_subject_id(subject_id: str) -> Subject:
         query_results = get_request_response_results(SUBJECT_ENDPOINT, params)
         assert len(query_results) == 1
         return query_results[0]
-    except (HTTPError, AssertionError):
+    except (requests.HTTPError, AssertionError):
         raise SubjectNotFoundError(
             subject_id=subject_id
         )
@@ -71,7 +73,7 @@ def get_subject_from_subject_orcabus_id(subject_orcabus_id: str) -> Subject:
         query_results = get_request_response_results(SUBJECT_ENDPOINT, params)
         assert len(query_results) == 1
         return query_results[0]
-    except (HTTPError, AssertionError):
+    except (requests.HTTPError, AssertionError):
         raise SubjectNotFoundError(
             subject_orcabus_id=subject_orcabus_id
         )
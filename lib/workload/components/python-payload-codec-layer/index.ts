@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+
+import { Construct } from 'constructs';
+import { Duration, RemovalPolicy } from 'aws-cdk-lib';
+import * as lambda from 'aws-cdk-lib/aws-lambda';
+import * as s3 from 'aws-cdk-lib/aws-s3';
+import { PythonLayerVersion } from '@aws-cdk/aws-lambda-python-alpha';
+import path from 'path';
+import { NagSuppressions } from 'cdk-nag';
+import { PythonLambdaLayerConstruct } from '../python-lambda-layer';
+
+export const DEFAULT_PAYLOAD_CODEC_KEY_PREFIX = 'payloads/';
+
+export interface PythonPayloadCodecLambdaLayerConstructProps {
+  layerPrefix: string;
+}
+
+export class PayloadCodecPythonLambdaLayer extends Construct {
+  public readonly lambdaLayerVersionObj: PythonLayerVersion;
+
+  constructor(scope: Construct, id: string, props: PythonPayloadCodecLambdaLayerConstructProps) {
+    super(scope, id);
+
+    // Generate lambda payload codec python layer
+    // Get lambda layer object
+    this.lambdaLayerVersionObj = new PythonLambdaLayerConstruct(this, 'lambda_layer', {
+      layerName: `${props.layerPrefix}-payload-codec-py-layer`,
+      layerDescription: 'Lambda Layer for encoding and decoding step function payloads via Python',
+      layerDirectory: path.join(__dirname, 'payload_codec_layer'),
+    }).lambdaLayerVersionObj;
+  }
+}
+
+export interface PayloadCodecBucketConstructProps {
+  bucketName: string;
+  /* Payloads are written under this prefix, defaults to 'payloads/' */
+  keyPrefix?: string;
+  /* Payloads are deleted this many days after they were last written, defaults to 14 */
+  expirationDays?: number;
+  removalPolicy?: RemovalPolicy;
+}
+
+export class PayloadCodecBucketConstruct extends Construct {
+  public readonly bucket: s3.Bucket;
+  public readonly keyPrefix: string;
+
+  constructor(scope: Construct, id: string, props: PayloadCodecBucketConstructProps) {
+    super(scope, id);
+
+    this.keyPrefix = props.keyPrefix ?? DEFAULT_PAYLOAD_CODEC_KEY_PREFIX;
+
+    const removalPolicy = props.removalPolicy ?? RemovalPolicy.RETAIN_ON_UPDATE_OR_DELETE;
+
+    // Payloads are only needed while the step functions and events that carry them are in flight
+    this.bucket = new s3.Bucket(this, 'payload_codec_bucket', {
+      bucketName: props.bucketName,
+      removalPolicy: removalPolicy,
+      autoDeleteObjects: removalPolicy === RemovalPolicy.DESTROY,
+      enforceSSL: true,
+      lifecycleRules: [
+        {
+          prefix: this.keyPrefix,
+          expiration: Duration.days(props.expirationDays ?? 14),
+        },
+      ],
+    });
+
+    NagSuppressions.addResourceSuppressions(this.bucket, [
+      {
+        id: 'AwsSolutions-S1',
+        reason: 'Temporary payloads only, no server access logs required',
+      },
+    ]);
+  }
+}
+
+/* Lambdas that encode payloads offload those over the inline size limit to the bucket */
+export function grantPayloadCodecEncode(
+  bucket: s3.IBucket,
+  lambdaFunction: lambda.Function,
+  keyPrefix: string = DEFAULT_PAYLOAD_CODEC_KEY_PREFIX
+) {
+  lambdaFunction.addEnvironment('PAYLOAD_CODEC_BUCKET_NAME', bucket.bucketName);
+  lambdaFunction.addEnvironment('PAYLOAD_CODEC_KEY_PREFIX', keyPrefix);
+  bucket.grantReadWrite(lambdaFunction.currentVersion, `${keyPrefix}*`);
+}
+
+/* Lambdas that decode payloads only need to read the bucket */
+export function grantPayloadCodecDecode(
+  bucket: s3.IBucket,
+  lambdaFunction: lambda.Function,
+  keyPrefix: string = DEFAULT_PAYLOAD_CODEC_KEY_PREFIX
+) {
+  bucket.grantRead(lambdaFunction.currentVersion, `${keyPrefix}*`);
+}
@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+
+# Errors
+from .utils.errors import (
+    PayloadCodecError,
+    PayloadIntegrityError,
+    PayloadCompressionNotAvailableError,
+)
+
+# Models
+from .utils.models import (
+    PayloadReference,
+    PayloadCompressionType,
+    PayloadStorageType,
+)
+
+# Payload helpers
+from .utils.payload_helpers import (
+    encode_payload,
+    decode_payload,
+    is_payload_reference,
+    compress_dict,
+    decompress_dict,
+)
+
+__all__ = [
+    # Errors
+    "PayloadCodecError",
+    "PayloadIntegrityError",
+    "PayloadCompressionNotAvailableError",
+    # Models
+    "PayloadReference",
+    "PayloadCompressionType",
+    "PayloadStorageType",
+    # Payload helpers
+    "encode_payload",
+    "decode_payload",
+    "is_payload_reference",
+    "compress_dict",
+    "decompress_dict",
+]
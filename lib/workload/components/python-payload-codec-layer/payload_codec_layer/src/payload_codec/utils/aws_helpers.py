@@ -0,0 +1,20 @@
+#!/usr/bin/env python3
+
+# Standard imports
+import typing
+from functools import lru_cache
+
+# Local imports
+from .import_helpers import lazy_import
+
+boto3 = lazy_import("boto3")
+
+
+# Type hinting
+if typing.TYPE_CHECKING:
+    from mypy_boto3_s3 import S3Client
+
+
+@lru_cache(maxsize=1)
+def get_s3_client() -> 'S3Client':
+    return boto3.client('s3')
@@ -0,0 +1,35 @@
+#!/usr/bin/env python3
+
+from typing import Optional
+
+
+class PayloadCodecError(Exception):
+    pass
+
+
+class PayloadIntegrityError(PayloadCodecError):
+    def __init__(
+            self,
+            payload_s3_uri: str,
+            expected_sha256: str,
+            actual_sha256: str
+    ):
+        self.payload_s3_uri = payload_s3_uri
+        self.message = (
+            f"Payload at '{payload_s3_uri}' has sha256 '{actual_sha256}', expected '{expected_sha256}'"
+        )
+        super().__init__(self.message)
+
+
+class PayloadCompressionNotAvailableError(PayloadCodecError):
+    def __init__(
+            self,
+            compression: str,
+            module_name: Optional[str] = None
+    ):
+        self.compression = compression
+        if module_name is not None:
+            self.message = f"Payload compression '{compression}' requires the '{module_name}' package"
+        else:
+            self.message = f"Unknown payload compression '{compression}'"
+        super().__init__(self.message)
@@ -0,0 +1,12 @@
+#!/usr/bin/env python3
+
+# Environment variables, without a payload codec bucket name every payload is inlined
+PAYLOAD_CODEC_BUCKET_NAME_ENV_VAR = "PAYLOAD_CODEC_BUCKET_NAME"
+PAYLOAD_CODEC_KEY_PREFIX_ENV_VAR = "PAYLOAD_CODEC_KEY_PREFIX"
+PAYLOAD_CODEC_COMPRESSION_ENV_VAR = "PAYLOAD_CODEC_COMPRESSION"
+PAYLOAD_CODEC_INLINE_SIZE_LIMIT_ENV_VAR = "PAYLOAD_CODEC_INLINE_SIZE_LIMIT"
+
+# Step Functions states are limited to 256 KiB, leave room for the rest of the state
+DEFAULT_INLINE_SIZE_LIMIT = 65536  # 64 KiB (2^16), of base64 characters
+DEFAULT_KEY_PREFIX = "payloads/"
+ZSTD_COMPRESSION_LEVEL = 3
@@ -0,0 +1,37 @@
+#!/usr/bin/env python3
+
+"""
+Defer heavy imports to first use
+
+boto3 takes a few hundred milliseconds to import, which every lambda using this layer
+would otherwise pay on a cold start, even though payloads under the inline size limit never reach s3.
+
+A lazily imported module is executed on first attribute access, i.e. the first boto3.client() call
+"""
+
+# Standard imports
+import importlib.util
+import sys
+from types import ModuleType
+
+
+def lazy_import(module_name: str) -> ModuleType:
+    """
+    Import a top level module on first attribute access
+    :param module_name:
+    :return:
+    """
+    # Already imported (lazily or otherwise)
+    if module_name in sys.modules:
+        return sys.modules[module_name]
+
+    module_spec = importlib.util.find_spec(module_name)
+    if module_spec is None:
+        raise ModuleNotFoundError(f"No module named '{module_name}'", name=module_name)
+
+    module_spec.loader = importlib.util.LazyLoader(module_spec.loader)
+    module = importlib.util.module_from_spec(module_spec)
+    sys.modules[module_name] = module
+    module_spec.loader.exec_module(module)
+
+    return module
@@ -0,0 +1,22 @@
+#!/usr/bin/env python3
+
+from typing import TypedDict, Literal, NotRequired
+
+PayloadCompressionType = Literal["gzip", "zstd"]
+PayloadStorageType = Literal["inline", "s3"]
+
+
+class PayloadReference(TypedDict):
+    """
+    A json payload, either inline (base64 encoded) or offloaded to s3 (claim check)
+    """
+    payload_compression: PayloadCompressionType
+    payload_storage: PayloadStorageType
+    # sha256 of the compressed payload
+    payload_sha256: str
+    # Size of the compressed payload in bytes
+    payload_size: int
+    # Inline payloads only
+    payload_b64: NotRequired[str]
+    # S3 payloads only
+    payload_s3_uri: NotRequired[str]
@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+
+"""
+Encode json payloads for Step Functions states and events.
+
+Small payloads are compressed and inlined as base64,
+payloads over the inline size limit are written to s3 under a content-addressed key (the claim check),
+the returned reference is resolved by decode_payload wherever the payload is consumed.
+
+Objects are expired by the lifecycle rule on the payload codec bucket (PayloadCodecBucketConstruct in the shared stack),
+as the key is content-addressed, re-encoding a payload rewrites the object and restarts its expiry
+"""
+
+# Standard imports
+import gzip
+import hashlib
+import json
+import logging
+from base64 import b64encode, b64decode
+from os import environ
+from typing import Dict, List, Optional, Union
+from urllib.parse import urlparse
+
+# Local imports
+from .aws_helpers import get_s3_client
+from .errors import PayloadIntegrityError, PayloadCompressionNotAvailableError
+from .globals import (
+    PAYLOAD_CODEC_BUCKET_NAME_ENV_VAR,
+    PAYLOAD_CODEC_KEY_PREFIX_ENV_VAR,
+    PAYLOAD_CODEC_COMPRESSION_ENV_VAR,
+    PAYLOAD_CODEC_INLINE_SIZE_LIMIT_ENV_VAR,
+    DEFAULT_INLINE_SIZE_LIMIT,
+    DEFAULT_KEY_PREFIX,
+    ZSTD_COMPRESSION_LEVEL,
+)
+from .models import PayloadReference, PayloadCompressionType
+
+logger = logging.getLogger(__name__)
+
+PAYLOAD_OBJECT_EXTENSIONS = {
+    "gzip": "json.gz",
+    "zstd": "json.zst",
+}
+
+
+def compress_bytes(data: bytes, compression: PayloadCompressionType) -> bytes:
+    if compression == "gzip":
+        # No timestamp in the header, so the same payload always gives the same bytes
+        return gzip.compress(data, mtime=0)
+    if compression == "zstd":
+        try:
+            import zstandard
+        except ImportError:
+            raise PayloadCompressionNotAvailableError(compression, "zstandard")
+        return zstandard.ZstdCompressor(level=ZSTD_COMPRESSION_LEVEL).compress(data)
+    raise PayloadCompressionNotAvailableError(compression)
+
+
+def decompress_bytes(data: bytes, compression: PayloadCompressionType) -> bytes:
+    if compression == "gzip":
+        return gzip.decompress(data)
+    if compression == "zstd":
+        try:
+            import zstandard
+        except ImportError:
+            raise PayloadCompressionNotAvailableError(compression, "zstandard")
+        return zstandard.ZstdDecompressor().decompress(data)
+    raise PayloadCompressionNotAvailableError(compression)
+
+
+def is_payload_reference(payload: Union[PayloadReference, Dict, List, str]) -> bool:
+    return (
+        isinstance(payload, dict) and
+        "payload_storage" in payload and
+        "payload_compression" in payload
+    )
+
+
+def encode_payload(
+        payload: Union[Dict, List],
+        compression: Optional[PayloadCompressionType] = None,
+        inline_size_limit: Optional[int] = None,
+        bucket_name: Optional[str] = None,
+        key_prefix: Optional[str] = None,
+) -> PayloadReference:
+    """
+    Compress a json payload, inlined if its base64 encoding is within the inline size limit, otherwise written to s3.
+
+    Defaults are read from the environment,
+    without a payload codec bucket, every payload is inlined
+    :param payload:
+    :param compression: gzip (default) or zstd
+    :param inline_size_limit:
+    :param bucket_name:
+    :param key_prefix:
+    :return:
+    """
+    # Get defaults
+    if compression is None:
+        compression = environ.get(PAYLOAD_CODEC_COMPRESSION_ENV_VAR, "gzip")
+    if inline_size_limit is None:
+        inline_size_limit = int(environ.get(PAYLOAD_CODEC_INLINE_SIZE_LIMIT_ENV_VAR, DEFAULT_INLINE_SIZE_LIMIT))
+    if bucket_name is None:
+        bucket_name = environ.get(PAYLOAD_CODEC_BUCKET_NAME_ENV_VAR, None)
+    if key_prefix is None:
+        key_prefix = environ.get(PAYLOAD_CODEC_KEY_PREFIX_ENV_VAR, DEFAULT_KEY_PREFIX)
+
+    compressed_payload = compress_bytes(json.dumps(payload).encode('utf-8'), compression)
+    payload_sha256 = hashlib.sha256(compressed_payload).hexdigest()
+
+    # Base64 is 4 characters for every 3 bytes
+    inline_size = 4 * ((len(compressed_payload) + 2) // 3)
+    if inline_size <= inline_size_limit or bucket_name is None:
+        if inline_size > inline_size_limit:
+            logger.warning(
+                f"Payload of {inline_size} base64 characters is over the inline size limit of {inline_size_limit}, "
+                f"but no payload codec bucket is configured, inlining the payload"
+            )
+        return {
+            "payload_compression": compression,
+            "payload_storage": "inline",
+            "payload_sha256": payload_sha256,
+            "payload_size": len(compressed_payload),
+            "payload_b64": b64encode(compressed_payload).decode("utf-8"),
+        }
+
+    # Content-addressed key, the same payload is always written to the same key
+    payload_key = f"{key_prefix}{payload_sha256}.{PAYLOAD_OBJECT_EXTENSIONS[compression]}"
+    get_s3_client().put_object(
+        Bucket=bucket_name,
+        Key=payload_key,
+        Body=compressed_payload,
+        ServerSideEncryption='AES256',
+    )
+
+    return {
+        "payload_compression": compression,
+        "payload_storage": "s3",
+        "payload_sha256": payload_sha256,
+        "payload_size": len(compressed_payload),
+        "payload_s3_uri": f"s3://{bucket_name}/{payload_key}",
+    }
+
+
+def decode_payload(payload: Union[PayloadReference, str]) -> Union[Dict, List]:
+    """
+    Resolve a payload reference (or a legacy base64 gzipped string) to the original json payload
+    :param payload:
+    :return:
+    """
+    # Legacy b64gz strings
+    if isinstance(payload, str):
+        return json.loads(decompress_bytes(b64decode(payload.encode('utf-8')), "gzip"))
+
+    if payload["payload_storage"] == "inline":
+        return json.loads(
+            decompress_bytes(b64decode(payload["payload_b64"].encode('utf-8')), payload["payload_compression"])
+        )
+
+    payload_s3_uri = urlparse(payload["payload_s3_uri"])
+    compressed_payload = get_s3_client().get_object(
+        Bucket=payload_s3_uri.netloc,
+        Key=payload_s3_uri.path.lstrip("/"),
+    )["Body"].read()
+
+    payload_sha256 = hashlib.sha256(compressed_payload).hexdigest()
+    if payload_sha256 != payload["payload_sha256"]:
+        raise PayloadIntegrityError(payload["payload_s3_uri"], payload["payload_sha256"], payload_sha256)
+
+    return json.loads(decompress_bytes(compressed_payload, payload["payload_compression"]))
+
+
+def compress_dict(input_dict: Union[Dict, List]) -> str:
+    """
+    Given a json input, compress to a base64 encoded string
+
+    param: input_dict: input dictionary to compress
+
+    Returns: gzipped compressed base64 encoded string
+    """
+    return b64encode(
+        gzip.compress(
+            json.dumps(input_dict).encode('utf-8')
+        )
+    ).decode("utf-8")
+
+
+def decompress_dict(input_compressed_b64gz_str: Union[str, PayloadReference]) -> Union[Dict, List]:
+    """
+    Given a base64 encoded string (or a payload reference), decompress and return the original dictionary
+    Args:
+        input_compressed_b64gz_str:
+
+    Returns: decompressed dictionary or list
+    """
+    return decode_payload(input_compressed_b64gz_str)
@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+
+"""
+Round trips of the payload codec, inline and offloaded to a (moto) s3 bucket
+
+Run from the payload_codec_layer directory with
+    PYTHONPATH=src python -m unittest discover tests
+"""
+
+# Standard imports
+import gzip
+import json
+import os
+import random
+import string
+import subprocess
+import sys
+import unittest
+from base64 import b64encode
+from pathlib import Path
+from unittest import mock
+from urllib.parse import urlparse
+
+import boto3
+from moto import mock_aws
+
+# Layer imports
+from payload_codec import (
+    PayloadIntegrityError,
+    PayloadCompressionNotAvailableError,
+    encode_payload,
+    decode_payload,
+    is_payload_reference,
+    compress_dict,
+    decompress_dict,
+)
+from payload_codec.utils.aws_helpers import get_s3_client
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+BUCKET_NAME = "payload-codec-test-bucket"
+INLINE_SIZE_LIMIT = 1024
+
+
+def get_random_payload(rng: random.Random, num_rows: int):
+    """
+    Fastq list row like payload, the random ids keep the payload from compressing away to nothing
+    """
+    return {
+        "fastq_list_rows": [
+            {
+                "rgid": "".join(rng.choices(string.ascii_uppercase, k=8)) + f".{i % 4 + 1}",
+                "rgsm": f"L{rng.randint(2000000, 2499999)}",
+                "lane": i % 4 + 1,
+                "read_1": f"s3://bucket/{''.join(rng.choices(string.ascii_lowercase, k=16))}_R1_001.fastq.gz",
+                "read_2": f"s3://bucket/{''.join(rng.choices(string.ascii_lowercase, k=16))}_R2_001.fastq.gz",
+            }
+            for i in range(num_rows)
+        ]
+    }
+
+
+@mock_aws
+class TestPayloadCodec(unittest.TestCase):
+    def setUp(self):
+        get_s3_client.cache_clear()
+        os.environ["AWS_DEFAULT_REGION"] = "ap-southeast-2"
+        self.s3_client = boto3.client("s3")
+        self.s3_client.create_bucket(
+            Bucket=BUCKET_NAME,
+            CreateBucketConfiguration={"LocationConstraint": "ap-southeast-2"}
+        )
+
+    def tearDown(self):
+        get_s3_client.cache_clear()
+
+    def list_payload_keys(self):
+        return [
+            s3_obj["Key"]
+            for s3_obj in self.s3_client.list_objects_v2(Bucket=BUCKET_NAME).get("Contents", [])
+        ]
+
+    def test_round_trip(self):
+        rng = random.Random(20241101)
+        storage_types = set()
+        for num_rows in [0, 1, 2, 5, 10, 50, 100, 500, 1000]:
+            payload = get_random_payload(rng, num_rows)
+            payload_reference = encode_payload(
+                payload, inline_size_limit=INLINE_SIZE_LIMIT, bucket_name=BUCKET_NAME, key_prefix="payloads/"
+            )
+            storage_types.add(payload_reference["payload_storage"])
+
+            self.assertTrue(is_payload_reference(payload_reference))
+            self.assertEqual(payload_reference["payload_storage"] == "s3", "payload_b64" not in payload_reference)
+            # The reference itself must always be small enough for the state machine
+            self.assertLessEqual(len(json.dumps(payload_reference)), INLINE_SIZE_LIMIT + 256)
+            self.assertEqual(decode_payload(payload_reference), payload)
+
+        # Sizes on both sides of the inline size limit
+        self.assertEqual(storage_types, {"inline", "s3"})
+
+    def test_offloaded_payload_is_content_addressed(self):
+        payload = get_random_payload(random.Random(1), 500)
+        payload_references = [
+            encode_payload(payload, inline_size_limit=INLINE_SIZE_LIMIT, bucket_name=BUCKET_NAME, key_prefix="payloads/")
+            for _ in range(3)
+        ]
+
+        self.assertEqual(len({payload_reference["payload_s3_uri"] for payload_reference in payload_references}), 1)
+        self.assertEqual(
+            self.list_payload_keys(),
+            [f"payloads/{payload_references[0]['payload_sha256']}.json.gz"]
+        )
+
+    def test_env_defaults(self):
+        payload = get_random_payload(random.Random(2), 500)
+        with mock.patch.dict(
+                os.environ,
+                {
+                    "PAYLOAD_CODEC_BUCKET_NAME": BUCKET_NAME,
+                    "PAYLOAD_CODEC_KEY_PREFIX": "sfn/",
+                    "PAYLOAD_CODEC_INLINE_SIZE_LIMIT": str(INLINE_SIZE_LIMIT),
+                }
+        ):
+            payload_reference = encode_payload(payload)
+
+        self.assertEqual(urlparse(payload_reference["payload_s3_uri"]).netloc, BUCKET_NAME)
+        self.assertTrue(self.list_payload_keys()[0].startswith("sfn/"))
+        self.assertEqual(decode_payload(payload_reference), payload)
+
+    def test_inline_without_bucket(self):
+        payload = get_random_payload(random.Random(3), 500)
+        payload_reference = encode_payload(payload, inline_size_limit=INLINE_SIZE_LIMIT)
+
+        self.assertEqual(payload_reference["payload_storage"], "inline")
+        self.assertEqual(self.list_payload_keys(), [])
+        self.assertEqual(decode_payload(payload_reference), payload)
+
+    def test_inline_does_not_import_boto3(self):
+        # boto3 is deferred until an s3 client is needed, so a fresh interpreter is required
+        inline_round_trip = subprocess.run(
+            [
+                sys.executable, "-c",
+                "import sys\n"
+                "from payload_codec import encode_payload, decode_payload\n"
+                "assert decode_payload(encode_payload({'a': 1}, inline_size_limit=1024)) == {'a': 1}\n"
+                "print('botocore' in sys.modules)\n"
+            ],
+            capture_output=True,
+            text=True,
+            cwd=Path(__file__).absolute().parent.parent / "src",
+        )
+
+        self.assertEqual(inline_round_trip.returncode, 0, inline_round_trip.stderr)
+        self.assertEqual(inline_round_trip.stdout.strip(), "False")
+
+    def test_legacy_b64gz(self):
+        payload = get_random_payload(random.Random(4), 10)
+        legacy_b64gz_str = b64encode(gzip.compress(json.dumps(payload).encode("utf-8"))).decode("utf-8")
+
+        self.assertEqual(decode_payload(legacy_b64gz_str), payload)
+        self.assertEqual(decompress_dict(legacy_b64gz_str), payload)
+        self.assertEqual(decompress_dict(compress_dict(payload)), payload)
+
+    def test_tampered_payload(self):
+        payload_reference = encode_payload(
+            get_random_payload(random.Random(5), 500),
+            inline_size_limit=INLINE_SIZE_LIMIT, bucket_name=BUCKET_NAME, key_prefix="payloads/"
+        )
+        self.s3_client.put_object(
+            Bucket=BUCKET_NAME,
+            Key=urlparse(payload_reference["payload_s3_uri"]).path.lstrip("/"),
+            Body=gzip.compress(json.dumps({"fastq_list_rows": []}).encode("utf-8"))
+        )
+
+        with self.assertRaises(PayloadIntegrityError):
+            decode_payload(payload_reference)
+
+    def test_unknown_compression(self):
+        with self.assertRaises(PayloadCompressionNotAvailableError):
+            encode_payload({}, compression="brotli")
+
+    @unittest.skipUnless(zstandard is not None, "zstandard is not installed")
+    def test_zstd_round_trip(self):
+        rng = random.Random(6)
+        for num_rows in [1, 500]:
+            payload = get_random_payload(rng, num_rows)
+            payload_reference = encode_payload(
+                payload, compression="zstd",
+                inline_size_limit=INLINE_SIZE_LIMIT, bucket_name=BUCKET_NAME, key_prefix="payloads/"
+            )
+            self.assertEqual(payload_reference["payload_compression"], "zstd")
+            self.assertEqual(decode_payload(payload_reference), payload)
+
+        self.assertTrue(all(key.endswith(".json.zst") for key in self.list_payload_keys()))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -3,12 +3,16 @@
 # Standard imports
 import typing
 from typing import Optional
-import boto3
 import json
 from os import environ
 import urllib3
 from urllib.parse import urlunparse
 
+# Local imports
+from .import_helpers import lazy_import
+
+boto3 = lazy_import("boto3")
+
 # Type hinting
 if typing.TYPE_CHECKING:
     from mypy_boto3_secretsmanager import SecretsManagerClient
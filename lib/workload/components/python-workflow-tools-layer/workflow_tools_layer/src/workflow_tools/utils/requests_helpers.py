@@ -3,7 +3,6 @@ from typing import Dict, Optional, List, Union
 from urllib.parse import urlunparse, urlparse
 
 # Standard imports
-import requests
 import logging
 from copy import deepcopy
 
@@ -16,6 +15,9 @@ from .globals import (
 from .aws_helpers import (
     get_orcabus_token, get_hostname
 )
+from .import_helpers import lazy_import
+
+requests = lazy_import("requests")
 
 # Globals
 DEFAULT_REQUEST_PARAMS = {
@@ -6,13 +6,15 @@ Helpers for using the contact API endpoint
 
 # Standard imports
 from typing import Dict
-from requests import HTTPError
 
 # Local imports
 from .globals import WORKFLOW_RUN_ENDPOINT
 from .requests_helpers import get_request_response_results, get_request_results_ext, get_request_results
 from .models import WorkflowRun, State
 from .. import WorkflowRunNotFoundError
+from .import_helpers import lazy_import
+
+requests = lazy_import("requests")
 
 
 def get_workflow_run(workflow_run_orcabus_id: str) -> WorkflowRun:
@@ -24,7 +26,7 @@ def get_workflow_run(workflow_run_orcabus_id: str) -> WorkflowRun:
     # Get workflow run
     try:
         return get_request_results(WORKFLOW_RUN_ENDPOINT, workflow_run_orcabus_id)
-    except HTTPError as e:
+    except requests.HTTPError as e:
         from .errors import WorkflowRunNotFoundError
         raise WorkflowRunNotFoundError(workflow_run_id=workflow_run_orcabus_id) from e
 
@@ -52,7 +54,7 @@ def get_workflow_run_from_portal_run_id(portal_run_id: str) -> WorkflowRun:
             WORKFLOW_RUN_ENDPOINT,
             workflow_runs_list[0]["orcabusId"],
         )
-    except HTTPError as e:
+    except requests.HTTPError as e:
         raise WorkflowRunNotFoundError(portal_run_id=portal_run_id) from e
 
 
@@ -71,7 +73,7 @@ def get_workflow_run_state(workflow_run_orcabus_id: str, status: str) -> State:
                 get_request_results_ext(WORKFLOW_RUN_ENDPOINT, workflow_run_orcabus_id, "state")
             )
         )
-    except HTTPError as e:
+    except requests.HTTPError as e:
         from .errors import WorkflowRunStateNotFoundError
         raise WorkflowRunStateNotFoundError(
             workflow_run_id=workflow_run_orcabus_id,
@@ -7,6 +7,10 @@ import { ComputeProps, ComputeConstruct } from './constructs/compute';
 import { SchemaRegistryConstruct, SchemaRegistryProps } from './constructs/schema-registry';
 import { EventSourceConstruct, EventSourceProps } from './constructs/event-source';
 import { EventDLQConstruct, EventDLQProps } from './constructs/event-dlq';
+import {
+  PayloadCodecBucketConstruct,
+  PayloadCodecBucketConstructProps,
+} from '../../../components/python-payload-codec-layer';
 
 export interface SharedStackProps {
   /**
@@ -34,6 +38,10 @@ export interface SharedStackProps {
    * Any configuration related to event DLQs
    */
   eventDLQProps?: EventDLQProps[];
+  /**
+   * Any configuration related to the bucket that holds offloaded step function payloads
+   */
+  payloadCodecBucketProps?: PayloadCodecBucketConstructProps;
   /**
    * VPC (lookup props) that will be used by resources
    */
@@ -79,5 +87,13 @@ export class SharedStack extends Stack {
         .replace(/(^.)|(-[a-z])/g, (group) => group.toUpperCase().replace('-', ''));
       new EventDLQConstruct(this, `${name}`, `${name}Alarm`, prop);
     }
+
+    if (props.payloadCodecBucketProps) {
+      new PayloadCodecBucketConstruct(
+        this,
+        'PayloadCodecBucketConstruct',
+        props.payloadCodecBucketProps
+      );
+    }
   }
 }
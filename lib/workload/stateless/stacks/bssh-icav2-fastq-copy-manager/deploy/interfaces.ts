@@ -2,6 +2,7 @@ import { ISecret } from 'aws-cdk-lib/aws-secretsmanager';
 import { PythonFunction } from '@aws-cdk/aws-lambda-python-alpha';
 import { IEventBus } from 'aws-cdk-lib/aws-events';
 import { IStateMachine } from 'aws-cdk-lib/aws-stepfunctions';
+import { IBucket } from 'aws-cdk-lib/aws-s3';
 
 export interface BsshIcav2FastqCopyManagerConfig {
   /* Required external properties */
@@ -14,10 +15,15 @@ export interface BsshIcav2FastqCopyManagerConfig {
   triggerLaunchSource: string; // orcabus.workflowmanager
   internalEventSource: string; // orcabus.bsshFastqCopy
   detailType: string; // WorkflowRunStateChange
+  /* Payload codec bucket, fastq list rows too large to inline are offloaded here */
+  payloadCodecBucketName: string;
+  payloadCodecKeyPrefix: string;
 }
 
 export interface CreateManifestLambdaFunctionProps {
   icav2AccessToken: ISecret;
+  payloadCodecBucket: IBucket;
+  payloadCodecKeyPrefix: string;
 }
 
 export interface EventBusProps {
@@ -8,6 +8,7 @@ import * as events from 'aws-cdk-lib/aws-events';
 import * as lambda from 'aws-cdk-lib/aws-lambda';
 import * as eventsTargets from 'aws-cdk-lib/aws-events-targets';
 import * as sfn from 'aws-cdk-lib/aws-stepfunctions';
+import * as s3 from 'aws-cdk-lib/aws-s3';
 import { Duration } from 'aws-cdk-lib';
 import { DefinitionBody } from 'aws-cdk-lib/aws-stepfunctions';
 
@@ -15,6 +16,10 @@ import { DefinitionBody } from 'aws-cdk-lib/aws-stepfunctions';
 import path from 'path';
 import { PythonLambdaLayerConstruct } from '../../../../components/python-lambda-layer';
 import { PythonUvFunction } from '../../../../components/uv-python-lambda-image-builder';
+import {
+  grantPayloadCodecEncode,
+  PayloadCodecPythonLambdaLayer,
+} from '../../../../components/python-payload-codec-layer';
 import { PythonFunction } from '@aws-cdk/aws-lambda-python-alpha';
 
 // **Interfaces and Constants Imports**
@@ -51,8 +56,17 @@ export class BsshIcav2FastqCopyManagerStack extends cdk.Stack {
     // Get eventbus object
     const eventBusObject = events.EventBus.fromEventBusName(this, 'event_bus', props.eventBusName);
 
+    // Get the payload codec bucket
+    const payloadCodecBucket = s3.Bucket.fromBucketName(
+      this,
+      'payload_codec_bucket',
+      props.payloadCodecBucketName
+    );
+
     const bclconvertSuccessEventLambdaFunction = this.createManifestLambdaFunction({
       icav2AccessToken: icav2AccessToken,
+      payloadCodecBucket: payloadCodecBucket,
+      payloadCodecKeyPrefix: props.payloadCodecKeyPrefix,
     });
 
     const bsshCopyStateMachine = this.createBsshFastqCopyStateMachine({
@@ -96,6 +110,15 @@ export class BsshIcav2FastqCopyManagerStack extends cdk.Stack {
       }
     ).lambdaLayerVersionObj;
 
+    // Get the payload codec layer
+    const payloadCodecLayerObject = new PayloadCodecPythonLambdaLayer(
+      this,
+      'payload_codec_lambda_layer',
+      {
+        layerPrefix: 'bssh-icav2-fastq-copy',
+      }
+    ).lambdaLayerVersionObj;
+
     const bclconvertSuccessEventHandler = new PythonUvFunction(
       this,
       'bclconvert_success_event_lambda_python_function',
@@ -111,13 +134,20 @@ export class BsshIcav2FastqCopyManagerStack extends cdk.Stack {
           ICAV2_BASE_URL: 'https://ica.illumina.com/ica/rest',
           ICAV2_ACCESS_TOKEN_SECRET_ID: props.icav2AccessToken.secretName,
         },
-        layers: [lambdaLayerObject],
+        layers: [lambdaLayerObject, payloadCodecLayerObject],
       }
     );
 
     // Add permissions to the lambda function
     props.icav2AccessToken.grantRead(bclconvertSuccessEventHandler.currentVersion);
 
+    // Allow the fastq list rows to be offloaded to the payload codec bucket
+    grantPayloadCodecEncode(
+      props.payloadCodecBucket,
+      bclconvertSuccessEventHandler,
+      props.payloadCodecKeyPrefix
+    );
+
     // Return success event handler
     return bclconvertSuccessEventHandler;
   }
@@ -43,7 +43,7 @@ from wrapica.project_data import (
 )
 
 # Local imports
-from bssh_manager_tools.utils.manifest_helper import generate_run_manifest, get_dest_uri_from_src_uri
+from bssh_manager_tools.utils.manifest_helper import generate_run_manifest, get_dest_file_uri_series_from_src_uri_series
 from bssh_manager_tools.utils.sample_helper import get_fastq_list_paths_from_bssh_output_and_fastq_list_csv
 from bssh_manager_tools.utils.aws_ssm_helpers import set_icav2_env_vars
 from bssh_manager_tools.utils.icav2_analysis_helpers import (
@@ -51,9 +51,11 @@ from bssh_manager_tools.utils.icav2_analysis_helpers import (
     get_fastq_list_csv_file_id_from_analysis_output_list, get_run_folder_obj_from_analysis_id,
     get_interop_files_from_run_folder, get_bclconvert_outputs_from_analysis_id,
 )
-from bssh_manager_tools.utils.compression_helpers import compress_dict
 from bssh_manager_tools.utils.logger import set_basic_logger
 
+# Layer imports
+from payload_codec import encode_payload
+
 # Set logger
 logger = set_basic_logger()
 logger.setLevel(logging.INFO)
@@ -185,13 +187,11 @@ def handler(event, context):
         )
 
     for read_num in [1, 2]:
-        fastq_list_rows_df[f"Read{read_num}FileUriDest"] = fastq_list_rows_df[f"Read{read_num}FileUriSrc"].apply(
-            lambda src_uri: get_dest_uri_from_src_uri(
-                src_uri,
-                bcl_convert_output_path,
-                dest_project_id,
-                dest_folder_path
-            ) + Path(urlparse(src_uri).path).name
+        fastq_list_rows_df[f"Read{read_num}FileUriDest"] = get_dest_file_uri_series_from_src_uri_series(
+            fastq_list_rows_df[f"Read{read_num}FileUriSrc"],
+            bcl_convert_output_path,
+            dest_project_id,
+            dest_folder_path
         )
 
     # Get the fastq list rows data frame
@@ -288,7 +288,8 @@ def handler(event, context):
                 )
             }
         ],
-        "fastqListRowsB64gz": compress_dict(fastq_list_rows_df_list),
+        # Large runs are offloaded to the payload codec bucket, consumers resolve the reference with decode_payload
+        "fastqListRowsB64gz": encode_payload(fastq_list_rows_df_list),
     }
 
 # if __name__ == "__main__":
@@ -9,6 +9,9 @@ from pathlib import Path
 from typing import List, Dict
 from urllib.parse import urlparse, urlunparse
 
+# Pandas imports
+import pandas as pd
+
 # Wrapica imports
 from wrapica.libica_models import ProjectData
 from wrapica.project_data import convert_project_data_obj_to_uri
@@ -78,6 +81,45 @@ def get_dest_uri_from_src_uri(
     return convert_icav2_uri_to_s3_uri(dest_uri_path)
 
 
+def get_dest_file_uri_series_from_src_uri_series(
+        src_uri_series: pd.Series,
+        root_output_path: Path,
+        dest_project_id: str,
+        dest_folder_path: Path
+) -> pd.Series:
+    """
+    Vectorised equivalent of get_dest_uri_from_src_uri (plus the file name) for a series of icav2 source file uris.
+
+    The destination root is converted to an s3 uri once,
+    each destination file uri is then the root plus the source path relative to the root output path.
+
+    :param src_uri_series: The source file uris, all under the root output path
+    :param root_output_path: The root output path
+    :param dest_project_id: The output project id to extend the path to
+    :param dest_folder_path: The output folder path
+    :return: The destination file uris
+    """
+    # Get the source path relative to the root output path
+    src_path_series = src_uri_series.str.replace(r"^[a-z0-9]+://[^/]*", "", regex=True)
+    root_output_path_prefix = str(root_output_path).rstrip("/") + "/"
+    if not src_path_series.str.startswith(root_output_path_prefix).all():
+        raise ValueError(f"Not all source uris are under the root output path '{root_output_path}'")
+    relative_file_path_series = src_path_series.str.slice(len(root_output_path_prefix))
+
+    dest_root_uri = convert_icav2_uri_to_s3_uri(
+        str(
+            urlunparse((
+                UriType.ICAV2.value,
+                dest_project_id,
+                str(dest_folder_path.absolute()).rstrip("/") + "/",
+                None, None, None
+            ))
+        )
+    )
+
+    return dest_root_uri.rstrip("/") + "/" + relative_file_path_series
+
+
 def generate_run_manifest(
     root_run_uri: str,
     project_data_list: List[ProjectData],
@@ -2,14 +2,12 @@
 
 # Standard imports
 from typing import Dict
+from urllib.parse import urlunparse
 import pandas as pd
 from pathlib import Path
 
 # Wrapica imports
-from wrapica.enums import DataType, UriType
-from wrapica.project_data import (
-    convert_project_id_and_data_path_to_uri
-)
+from wrapica.enums import UriType
 
 
 def get_sample_id_path_prefix_from_bssh_datasets_dict(
@@ -29,6 +27,34 @@ def get_sample_id_path_prefix_from_bssh_datasets_dict(
     return Path(datasets_dict.get(sample_id + f"_L{lane}").get('Path'))
 
 
+def get_sample_id_path_prefix_df_from_bssh_datasets_dict(
+    datasets_dict: Dict
+) -> pd.DataFrame:
+    """
+    Convert the DataSets dict into a lookup table of dataset name (<sample_id>_L<lane>) to the dataset path
+
+    :param datasets_dict:
+
+    :return: DataFrame with the columns dataset_name, sample_prefix (Path) and sample_prefix_str
+    """
+    datasets_df = pd.DataFrame(
+        [
+            {
+                "dataset_name": dataset_name,
+                "sample_prefix": Path(dataset_dict.get("Path"))
+            }
+            for dataset_name, dataset_dict in datasets_dict.items()
+            if dataset_dict.get("Path", None) is not None
+        ],
+        columns=["dataset_name", "sample_prefix"]
+    )
+
+    # Path normalised once per dataset, rows then only need string concatenation
+    datasets_df["sample_prefix_str"] = datasets_df["sample_prefix"].astype(str)
+
+    return datasets_df
+
+
 def get_fastq_list_paths_from_bssh_output_and_fastq_list_csv(
     fastq_list_pd: pd.DataFrame,
     bssh_output_dict: Dict,
@@ -239,35 +265,44 @@ def get_fastq_list_paths_from_bssh_output_and_fastq_list_csv(
     :return Returns the paths to the fastq files for each sample id and lane
     """
 
-    fastq_list_pd["sample_prefix"] = fastq_list_pd.apply(
-        lambda row: get_sample_id_path_prefix_from_bssh_datasets_dict(
-                sample_id=row["RGSM"],
-                lane=row["Lane"],
-                datasets_dict=bssh_output_dict.get("Datasets")
-        ),
-        axis="columns"
+    # Join the fastq list rows against the datasets on <RGSM>_L<Lane>
+    datasets_df = get_sample_id_path_prefix_df_from_bssh_datasets_dict(bssh_output_dict.get("Datasets"))
+    dataset_name_series = fastq_list_pd["RGSM"].astype(str) + "_L" + fastq_list_pd["Lane"].astype(str)
+    merged_df = pd.DataFrame(
+        {"dataset_name": dataset_name_series}
+    ).merge(
+        datasets_df,
+        how="left",
+        on="dataset_name",
+        validate="many_to_one"
     )
 
+    missing_dataset_names = merged_df.loc[merged_df["sample_prefix"].isna(), "dataset_name"].unique().tolist()
+    if len(missing_dataset_names) > 0:
+        raise ValueError(f"Could not find the datasets {', '.join(missing_dataset_names)} in the bssh output")
+
+    # The merge resets the index, keep the index of the fastq list rows
+    merged_df.index = fastq_list_pd.index
+
+    fastq_list_pd["sample_prefix"] = merged_df["sample_prefix"]
+
     # Update the fastqs to contain the full path
-    fastq_list_pd["Read1FileUriSrc"] = fastq_list_pd.apply(
-        lambda row: convert_project_id_and_data_path_to_uri(
-            project_id=project_id,
-            data_path=run_output_path / row["sample_prefix"] / row["Read1File"],
-            data_type=DataType.FILE,
-            uri_type=UriType.ICAV2
-        ),
-        axis="columns"
-    )
+    # We parse the project / run output path once, then build each uri with vectorised string operations
+    uri_base = str(
+        urlunparse((
+            UriType.ICAV2.value,
+            project_id,
+            str(run_output_path),
+            None, None, None
+        ))
+    ).rstrip("/") + "/"
+    sample_prefix_uri_series = uri_base + merged_df["sample_prefix_str"] + "/"
 
-    fastq_list_pd["Read2FileUriSrc"] = fastq_list_pd.apply(
-        lambda row: convert_project_id_and_data_path_to_uri(
-            project_id=project_id,
-            data_path=run_output_path / row["sample_prefix"] / row["Read2File"],
-            data_type=DataType.FILE,
-            uri_type=UriType.ICAV2
-        ),
-        axis="columns"
-    )
+    for read_num in [1, 2]:
+        fastq_list_pd[f"Read{read_num}FileUriSrc"] = (
+            sample_prefix_uri_series +
+            # Strip the leading './' of the fastq list csv file paths
+            fastq_list_pd[f"Read{read_num}File"].astype(str).str.replace(r"^(\./)+", "", regex=True)
+        )
 
     return fastq_list_pd
-
@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+
+"""
+Golden output tests of the vectorised fastq list row resolution against the previous row-wise implementation
+
+Run with
+    pytest tests/test_sample_helper.py
+
+Or benchmark on a synthetic 10k fastq list row run with
+    python tests/test_sample_helper.py
+"""
+
+# Standard imports
+import time
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+from urllib.parse import urlparse
+
+import pandas as pd
+
+# Wrapica imports
+from wrapica.enums import DataType, UriType
+from wrapica.project_data import convert_project_id_and_data_path_to_uri
+
+# Local imports
+from bssh_manager_tools.utils.manifest_helper import (
+    get_dest_uri_from_src_uri,
+    get_dest_file_uri_series_from_src_uri_series
+)
+from bssh_manager_tools.utils.sample_helper import (
+    get_sample_id_path_prefix_from_bssh_datasets_dict,
+    get_fastq_list_paths_from_bssh_output_and_fastq_list_csv
+)
+
+SRC_PROJECT_ID = "a1234567-1234-1234-1234-1234567890ab"
+DEST_PROJECT_ID = "b1234567-1234-1234-1234-1234567890ab"
+RUN_OUTPUT_PATH = Path("/ilmn-analyses/231116_A01052_0172_BHVLM5DSX7_abcd12-1234-5678/")
+DEST_FOLDER_PATH = Path("/primary_data/231116_A01052_0172_BHVLM5DSX7/20240207abcduuid/")
+DEST_S3_KEY_PREFIX = "s3://pipeline-dev-cache-503977275616-ap-southeast-2/byob-icav2/development/"
+
+# get_s3_key_prefix_by_project_id would otherwise query the ICAv2 storage configuration
+S3_KEY_PREFIX_PATCH_TARGET = (
+    "wrapica.storage_configuration.functions.storage_configuration_functions.get_s3_key_prefix_by_project_id"
+)
+
+
+def get_synthetic_run(num_samples: int, num_lanes: int):
+    """
+    Synthetic fastq list csv and bssh output dict, num_samples * num_lanes fastq list rows
+    """
+    fastq_list_rows = []
+    datasets_dict = {
+        "BCL Convert Reports": {"Name": "BCL Convert Reports", "Path": "output/Reports"},
+        "BCL Convert Logs": {"Name": "BCL Convert Logs", "Path": "logs"},
+    }
+
+    for lane in range(1, num_lanes + 1):
+        for sample_num in range(1, num_samples + 1):
+            sample_id = f"L24{sample_num:05d}"
+            fastq_list_rows.append({
+                "RGID": f"CCGCGGTT.CTAGCGCT.{lane}",
+                "RGSM": sample_id,
+                "RGLB": "UnknownLibrary",
+                "Lane": lane,
+                "Read1File": f"./{sample_id}_S{sample_num}_L00{lane}_R1_001.fastq.gz",
+                "Read2File": f"./{sample_id}_S{sample_num}_L00{lane}_R2_001.fastq.gz",
+            })
+            datasets_dict[f"{sample_id}_L{lane}"] = {
+                "Name": f"{sample_id}_L{lane}",
+                "Path": f"output/Samples/Lane_{lane}/{sample_id}",
+                "Type": "common.fastq",
+            }
+
+    return pd.DataFrame(fastq_list_rows), {"Datasets": datasets_dict}
+
+
+def legacy_get_fastq_list_paths_from_bssh_output_and_fastq_list_csv(
+    fastq_list_pd: pd.DataFrame,
+    bssh_output_dict,
+    project_id: str,
+    run_output_path: Path
+) -> pd.DataFrame:
+    """
+    Previous row-wise implementation, kept as the golden output
+    """
+    fastq_list_pd["sample_prefix"] = fastq_list_pd.apply(
+        lambda row: get_sample_id_path_prefix_from_bssh_datasets_dict(
+            sample_id=row["RGSM"],
+            lane=row["Lane"],
+            datasets_dict=bssh_output_dict.get("Datasets")
+        ),
+        axis="columns"
+    )
+
+    for read_num in [1, 2]:
+        fastq_list_pd[f"Read{read_num}FileUriSrc"] = fastq_list_pd.apply(
+            lambda row: convert_project_id_and_data_path_to_uri(
+                project_id=project_id,
+                data_path=run_output_path / row["sample_prefix"] / row[f"Read{read_num}File"],
+                data_type=DataType.FILE,
+                uri_type=UriType.ICAV2
+            ),
+            axis="columns"
+        )
+
+    return fastq_list_pd
+
+
+def legacy_get_dest_file_uri_series(src_uri_series: pd.Series) -> pd.Series:
+    """
+    Previous row-wise implementation of the query_bclconvert_outputs_handler destination uris
+    """
+    return src_uri_series.apply(
+        lambda src_uri: get_dest_uri_from_src_uri(
+            src_uri,
+            RUN_OUTPUT_PATH / "output",
+            DEST_PROJECT_ID,
+            DEST_FOLDER_PATH
+        ) + Path(urlparse(src_uri).path).name
+    )
+
+
+class TestFastqListRowResolution(unittest.TestCase):
+    def setUp(self):
+        patcher = patch(S3_KEY_PREFIX_PATCH_TARGET, return_value=DEST_S3_KEY_PREFIX)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_src_uris_match_legacy(self):
+        fastq_list_pd, bssh_output_dict = get_synthetic_run(num_samples=50, num_lanes=4)
+
+        expected_df = legacy_get_fastq_list_paths_from_bssh_output_and_fastq_list_csv(
+            fastq_list_pd.copy(), bssh_output_dict, SRC_PROJECT_ID, RUN_OUTPUT_PATH
+        )
+        actual_df = get_fastq_list_paths_from_bssh_output_and_fastq_list_csv(
+            fastq_list_pd.copy(), bssh_output_dict, SRC_PROJECT_ID, RUN_OUTPUT_PATH
+        )
+
+        pd.testing.assert_frame_equal(actual_df, expected_df)
+
+    def test_dest_uris_match_legacy(self):
+        fastq_list_pd, bssh_output_dict = get_synthetic_run(num_samples=50, num_lanes=4)
+        fastq_list_pd = get_fastq_list_paths_from_bssh_output_and_fastq_list_csv(
+            fastq_list_pd, bssh_output_dict, SRC_PROJECT_ID, RUN_OUTPUT_PATH
+        )
+
+        for read_num in [1, 2]:
+            pd.testing.assert_series_equal(
+                get_dest_file_uri_series_from_src_uri_series(
+                    fastq_list_pd[f"Read{read_num}FileUriSrc"],
+                    RUN_OUTPUT_PATH / "output",
+                    DEST_PROJECT_ID,
+                    DEST_FOLDER_PATH
+                ),
+                legacy_get_dest_file_uri_series(fastq_list_pd[f"Read{read_num}FileUriSrc"])
+            )
+
+        self.assertEqual(
+            fastq_list_pd["Read1FileUriSrc"].iloc[0],
+            f"icav2://{SRC_PROJECT_ID}{RUN_OUTPUT_PATH}/output/Samples/Lane_1/L2400001/L2400001_S1_L001_R1_001.fastq.gz"
+        )
+
+    def test_missing_dataset(self):
+        fastq_list_pd, bssh_output_dict = get_synthetic_run(num_samples=2, num_lanes=1)
+        del bssh_output_dict["Datasets"]["L2400002_L1"]
+
+        with self.assertRaises(ValueError):
+            get_fastq_list_paths_from_bssh_output_and_fastq_list_csv(
+                fastq_list_pd, bssh_output_dict, SRC_PROJECT_ID, RUN_OUTPUT_PATH
+            )
+
+
+if __name__ == "__main__":
+    # Benchmark on a synthetic 10k fastq list row run (2500 samples over 4 lanes)
+    with patch(S3_KEY_PREFIX_PATCH_TARGET, return_value=DEST_S3_KEY_PREFIX):
+        fastq_list_pd, bssh_output_dict = get_synthetic_run(num_samples=2500, num_lanes=4)
+
+        for name, src_func, dest_func in [
+            (
+                "row-wise",
+                legacy_get_fastq_list_paths_from_bssh_output_and_fastq_list_csv,
+                legacy_get_dest_file_uri_series
+            ),
+            (
+                "vectorised",
+                get_fastq_list_paths_from_bssh_output_and_fastq_list_csv,
+                lambda src_uri_series: get_dest_file_uri_series_from_src_uri_series(
+                    src_uri_series, RUN_OUTPUT_PATH / "output", DEST_PROJECT_ID, DEST_FOLDER_PATH
+                )
+            ),
+        ]:
+            start_time = time.perf_counter()
+            fastq_list_rows_df = src_func(fastq_list_pd.copy(), bssh_output_dict, SRC_PROJECT_ID, RUN_OUTPUT_PATH)
+            src_time = time.perf_counter() - start_time
+            start_time = time.perf_counter()
+            for read_num in [1, 2]:
+                dest_func(fastq_list_rows_df[f"Read{read_num}FileUriSrc"])
+            dest_time = time.perf_counter() - start_time
+            print(f"{name:<12} {len(fastq_list_rows_df)} rows: src uris {src_time * 1000:.1f} ms, dest uris {dest_time * 1000:.1f} ms")
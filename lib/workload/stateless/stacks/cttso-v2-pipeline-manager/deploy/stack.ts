@@ -12,6 +12,8 @@ import * as lambda from 'aws-cdk-lib/aws-lambda';
 import { Duration } from 'aws-cdk-lib';
 import { DockerImageCode, DockerImageFunction } from 'aws-cdk-lib/aws-lambda';
 import { OraDecompressionConstruct } from '../../../../components/ora-file-decompression-fq-pair-sfn';
+import { Icav2ToolsPythonLambdaLayer } from '../../../../components/python-icav2-tools-layer';
+import { DragenMetricsPythonLambdaLayer } from '../../../../components/python-dragen-metrics-layer';
 
 export interface Cttsov2Icav2PipelineManagerConfig {
   /* ICAv2 Pipeline analysis essentials */
@@ -218,6 +220,11 @@ export class Cttsov2Icav2PipelineManagerStack extends cdk.Stack {
       }
     );
 
+    // Icav2 tools layer, for the output tree snapshot
+    const icav2ToolsLayer = new Icav2ToolsPythonLambdaLayer(this, 'icav2_tools_layer', {
+      layerPrefix: props.stateMachinePrefix,
+    }).lambdaLayerVersionObj;
+
     // Set the output json lambda
     const setOutputJsonLambdaFunction = new PythonFunction(
       this,
@@ -230,6 +237,7 @@ export class Cttsov2Icav2PipelineManagerStack extends cdk.Stack {
         handler: 'handler',
         memorySize: 1024,
         timeout: Duration.seconds(60),
+        layers: [icav2ToolsLayer],
         environment: {
           ICAV2_ACCESS_TOKEN_SECRET_ID: icav2AccessTokenSecretObj.secretName,
         },
@@ -260,16 +268,21 @@ export class Cttsov2Icav2PipelineManagerStack extends cdk.Stack {
           platform: architecture.dockerPlatform,
         },
       }),
-      // GVCF test took about two minutes
+      // Compresses up to four vcfs of a folder per invocation, concurrently
       timeout: Duration.seconds(900), // Maximum length of lambda duration is 15 minutes
       retryAttempts: 0, // Never perform a retry if it fails
-      memorySize: 2048, // Don't want pandas to kill the lambda
+      memorySize: 4096, // More vCPUs for the BGZF compression threads
       architecture: architecture,
       environment: {
         ICAV2_ACCESS_TOKEN_SECRET_ID: icav2AccessTokenSecretObj.secretName,
       },
     });
 
+    // Dragen metrics layer, for the MetricsOutput.tsv analysis status
+    const dragenMetricsLayer = new DragenMetricsPythonLambdaLayer(this, 'dragen_metrics_layer', {
+      layerPrefix: props.stateMachinePrefix,
+    }).lambdaLayerVersionObj;
+
     // Check success lambda
     const checkSuccessLambdaFunction = new PythonFunction(this, 'check_success_lambda_function', {
       entry: path.join(__dirname, '../lambdas/check_success_py'),
@@ -279,6 +292,7 @@ export class Cttsov2Icav2PipelineManagerStack extends cdk.Stack {
       handler: 'handler',
       memorySize: 1024,
       timeout: Duration.seconds(60),
+      layers: [dragenMetricsLayer],
       environment: {
         ICAV2_ACCESS_TOKEN_SECRET_ID: icav2AccessTokenSecretObj.secretName,
       },
@@ -5,13 +5,15 @@ Check success analysis results
 
 Success if:
 1* Errors folder does not exist besides Logs_Intermediates and Results directories
-2* If Results/MetricsOutput.tsv
+2* If Results/MetricsOutput.tsv has no failed steps for any sample (FAILED_STEPS is NA in the [Analysis Status] section)
+
+The MetricsOutput.tsv is streamed through the dragen metrics layer, up to the end of the [Analysis Status] section
 """
 
 # Standard imports
 import json
 import typing
-from typing import Union
+from typing import Dict, Optional, Union
 import logging
 from pathlib import Path
 from os import environ
@@ -23,10 +25,14 @@ from wrapica.project_data import (
     read_icav2_file_contents_to_string,
     list_project_data_non_recursively,
     convert_uri_to_project_data_obj,
+    create_download_url,
     ProjectData
 )
 from wrapica.enums import DataType
 
+# Layer imports
+from dragen_metrics import stream_dragen_metrics_sections_from_url
+
 # Set logger
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -38,6 +44,8 @@ if typing.TYPE_CHECKING:
 
 # Globals
 ICAV2_BASE_URL = "https://ica.illumina.com/ica/rest"
+METRICS_OUTPUT_ANALYSIS_STATUS_SECTION = "Analysis Status"
+METRICS_OUTPUT_FAILED_STEPS_METRIC = "FAILED_STEPS"
 
 
 # AWS things
@@ -84,9 +92,9 @@ def set_icav2_env_vars():
 
 
 # Functions related to this script
-def get_metrics_output_tsv(output_obj: ProjectData) -> str:
+def get_failed_steps_from_metrics_output_tsv(output_obj: ProjectData) -> Dict[str, Optional[str]]:
     """
-    Convert the following to a json
+    Get the failed steps of each sample from the [Analysis Status] section of the following
 
     DRAGEN TruSight Oncology 500 ctDNA v2.6.0 Analysis Software - Metrics Output
     For Research Use Only. Not for use in diagnostic procedures.
@@ -154,6 +162,7 @@ def get_metrics_output_tsv(output_obj: ProjectData) -> str:
     DNA Library QC Metrics for CNV Calling  GENE_SCALED_MAD LSL guideline only applies to real cell free DNA.
     DNA Library QC Metrics for Small Variant Calling and TMB        MEDIAN_EXON_COVERAGE is a Fusion QC Metric.
 
+    i.e. {"L2401294": "DragenCaller"}, the failed steps of a sample are None if no steps failed (NA)
     :return:
     """
 
@@ -164,13 +173,21 @@ def get_metrics_output_tsv(output_obj: ProjectData) -> str:
         data_type=DataType.FILE
     )
 
-    # Read the contents of the MetricsOutput.tsv
-    metrics_output_tsv = read_icav2_file_contents_to_string(
-        metrics_output_project_data_obj.project_id,
-        metrics_output_project_data_obj.data.id
+    # Stream the analysis status section of the MetricsOutput.tsv
+    analysis_status_records = stream_dragen_metrics_sections_from_url(
+        create_download_url(
+            metrics_output_project_data_obj.project_id,
+            metrics_output_project_data_obj.data.id
+        ),
+        sections=[METRICS_OUTPUT_ANALYSIS_STATUS_SECTION],
+        columns=['value']
     )
 
-    return metrics_output_tsv
+    return {
+        record_iter.rgid: record_iter.value
+        for record_iter in analysis_status_records
+        if record_iter.metric == METRICS_OUTPUT_FAILED_STEPS_METRIC
+    }
 
 
 def check_failed_steps(output_obj: ProjectData) -> bool:
@@ -179,11 +196,16 @@ def check_failed_steps(output_obj: ProjectData) -> bool:
     :param output_obj:
     :return:
     """
-    metrics_output_tsv_str = get_metrics_output_tsv(output_obj)
+    failed_steps_by_sample = get_failed_steps_from_metrics_output_tsv(output_obj)
 
-    if 'FAILED_STEPS\tNA' in metrics_output_tsv_str:
-        return False
-    return True
+    # No analysis status is a failure too
+    if not failed_steps_by_sample:
+        return True
+
+    return any(
+        failed_steps_iter is not None
+        for failed_steps_iter in failed_steps_by_sample.values()
+    )
 
 
 def check_errors_folder(output_obj: ProjectData) -> Union[ProjectData, bool]:
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+
+"""
+The failed steps of the MetricsOutput.tsv, streamed through the dragen metrics layer,
+against the string check they replace, with wrapica stubbed
+
+Run from the check_success_py directory, with the dragen metrics layer on the python path, with
+    PYTHONPATH="../../../../../components/python-dragen-metrics-layer/dragen_metrics_layer/src:." python -m unittest discover tests
+"""
+
+# Standard imports
+import unittest
+from pathlib import Path
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+# Layer imports
+from dragen_metrics.utils import stream_helpers
+
+# Local imports
+import check_success
+
+FIXTURES_DIR = Path(__file__).parent / "fixtures"
+PASSING_METRICS_OUTPUT_PATH = FIXTURES_DIR / "L2401562.MetricsOutput.tsv"
+FAILED_METRICS_OUTPUT_PATH = FIXTURES_DIR / "L2401294.MetricsOutput.tsv"
+PROJECT_ID = "eba5c946-1677-441d-bbce-6a11baadecbb"
+
+
+OUTPUT_OBJ = SimpleNamespace(
+    project_id=PROJECT_ID,
+    data=SimpleNamespace(details=SimpleNamespace(path="/analysis/cttsov2/20240915d1a2b3c4/"))
+)
+
+
+class CheckFailedStepsUnitTest(unittest.TestCase):
+    def setUp(self):
+        patch.multiple(
+            check_success,
+            get_project_data_obj_from_project_id_and_path=MagicMock(
+                return_value=SimpleNamespace(project_id=PROJECT_ID, data=SimpleNamespace(id="fil.1234"))
+            ),
+            create_download_url=lambda project_id, data_id: data_id,
+        ).start()
+
+    def tearDown(self):
+        patch.stopall()
+
+    def set_metrics_output_tsv(self, metrics_output_tsv_str: str):
+        """
+        The MetricsOutput.tsv at the presigned url, streamed line by line
+        """
+        patch.object(
+            stream_helpers.requests, "get",
+            MagicMock(return_value=MagicMock(
+                __enter__=lambda self_: self_,
+                iter_lines=MagicMock(return_value=iter(metrics_output_tsv_str.splitlines())),
+            ))
+        ).start()
+
+    def check_failed_steps(self, metrics_output_tsv_str: str) -> bool:
+        self.set_metrics_output_tsv(metrics_output_tsv_str)
+        return check_success.check_failed_steps(OUTPUT_OBJ)
+
+    def test_equivalent_to_string_check(self):
+        for metrics_output_path in [PASSING_METRICS_OUTPUT_PATH, FAILED_METRICS_OUTPUT_PATH]:
+            with self.subTest(metrics_output=metrics_output_path.name):
+                metrics_output_tsv_str = metrics_output_path.read_text()
+                self.assertEqual(
+                    self.check_failed_steps(metrics_output_tsv_str),
+                    'FAILED_STEPS\tNA' not in metrics_output_tsv_str
+                )
+
+    def test_failed_steps(self):
+        self.assertFalse(self.check_failed_steps(PASSING_METRICS_OUTPUT_PATH.read_text()))
+        self.assertTrue(self.check_failed_steps(FAILED_METRICS_OUTPUT_PATH.read_text()))
+
+    def test_no_analysis_status(self):
+        self.assertTrue(
+            self.check_failed_steps(
+                PASSING_METRICS_OUTPUT_PATH.read_text().replace("[Analysis Status]", "[Not Analysis Status]")
+            )
+        )
+
+    def test_failed_steps_by_sample(self):
+        self.set_metrics_output_tsv(FAILED_METRICS_OUTPUT_PATH.read_text())
+        self.assertEqual(
+            check_success.get_failed_steps_from_metrics_output_tsv(OUTPUT_OBJ),
+            {"L2401294": "DragenCaller"}
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
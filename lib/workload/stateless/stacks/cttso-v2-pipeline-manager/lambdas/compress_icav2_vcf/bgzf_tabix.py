@@ -0,0 +1,492 @@
+#!/usr/bin/env python
+
+"""
+Compress a (g)vcf stream to BGZF and build its tabix (.tbi) index in the same pass
+
+The BGZF blocks are deflated on a thread pool (zlib releases the GIL),
+while the records are parsed as they stream past, so the index can be written once the last block is out.
+
+The index follows htslib (tbx_index / hts_idx_push / hts_idx_finish, as of htslib 1.24)
+so the index is equivalent to 'tabix -p vcf' run on the compressed output.
+
+Usage:
+
+bgzf_tabix_writer = BgzfTabixWriter()
+for bgzf_bytes in bgzf_tabix_writer.compress(vcf_chunks_iter):
+    output_fh.write(bgzf_bytes)
+index_fh.write(bgzf_tabix_writer.get_tbi_index())
+"""
+
+# Standard imports
+import re
+import struct
+import zlib
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, Future
+from typing import Iterable, Iterator, List, Dict, Optional, Tuple, Deque
+
+# Globals
+BGZF_BLOCK_SIZE = 0xff00  # Uncompressed bytes per block, as htslib
+BGZF_EOF = bytes.fromhex("1f8b08040000000000ff0600424302001b0003000000000000000000")
+DEFAULT_COMPRESS_LEVEL = -1  # zlib default (6), as bgzip / tabix
+DEFAULT_NUM_THREADS = 2
+DEFAULT_MAX_PENDING_BLOCKS_PER_THREAD = 8
+
+# Tabix vcf preset, i.e. tbx_conf_vcf = { TBX_VCF, 1, 2, 0, '#', 0 }
+TBX_VCF = 2
+TBX_VCF_CONF = (TBX_VCF, 1, 2, 0, ord("#"), 0)
+
+# Binning scheme of a tbi index
+TBI_MIN_SHIFT = 14
+TBI_N_LVLS = 5
+TBI_N_BINS = ((1 << (3 * TBI_N_LVLS + 3)) - 1) // 7
+TBI_META_BIN = TBI_N_BINS + 1
+TBI_MAX_POS = 1 << (TBI_MIN_SHIFT + 3 * TBI_N_LVLS)
+HTS_MIN_MARKER_DIST = 0x10000
+
+SYMBOLIC_SV_ALLELE_PREFIXES = (b"<CNV", b"<DEL", b"<DUP", b"<INV")
+GVCF_ALLELES = (b"<*>", b"<NON_REF>")
+
+STRTOLL_REGEX = re.compile(rb"\s*([+-]?)(0[xX][0-9a-fA-F]+|0[0-7]*|[1-9][0-9]*)")
+ATOLL_REGEX = re.compile(rb"\s*([+-]?[0-9]+)")
+
+
+def compress_bgzf_block(data: bytes, compress_level: int = DEFAULT_COMPRESS_LEVEL) -> bytes:
+    """
+    One BGZF block, a gzip member with the BC extra subfield holding the block size
+    """
+    compressed_data = zlib.compress(data, compress_level, wbits=-15)
+    block_size = 18 + len(compressed_data) + 8
+    return (
+        struct.pack("<4BI2BH2BHH", 31, 139, 8, 4, 0, 0, 255, 6, 66, 67, 2, block_size - 1) +
+        compressed_data +
+        struct.pack("<II", zlib.crc32(data), len(data))
+    )
+
+
+def compress_bgzf(data: bytes, compress_level: int = DEFAULT_COMPRESS_LEVEL) -> bytes:
+    """
+    Compress a small payload (i.e an index) to BGZF, with the EOF marker
+    """
+    return b"".join(
+        map(
+            lambda offset_iter_: compress_bgzf_block(data[offset_iter_:offset_iter_ + BGZF_BLOCK_SIZE], compress_level),
+            range(0, len(data), BGZF_BLOCK_SIZE)
+        )
+    ) + BGZF_EOF
+
+
+def strtoll(value: bytes) -> Optional[int]:
+    """
+    C strtoll with base 0, None if no digits were parsed
+    """
+    # Fast path for plain decimals
+    if value.isdigit() and (value[:1] != b"0" or len(value) == 1):
+        return int(value)
+    match = STRTOLL_REGEX.match(value)
+    if match is None:
+        return None
+    sign, digits = match.groups()
+    if digits[:2] in (b"0x", b"0X"):
+        number = int(digits[2:], 16)
+    elif len(digits) > 1 and digits.startswith(b"0"):
+        number = int(digits, 8)
+    else:
+        number = int(digits)
+    return -number if sign == b"-" else number
+
+
+def atoll(value: bytes) -> int:
+    """
+    C atoll, zero if no digits were parsed
+    """
+    match = ATOLL_REGEX.match(value)
+    return int(match.group(1)) if match is not None else 0
+
+
+def get_info_value(info: bytes, key: bytes) -> Optional[bytes]:
+    """
+    The value of an INFO key, as tbx_parse1 finds it
+    (the first match at the start of the INFO column, else the first match after a ';')
+    """
+    key_index = info.find(key + b"=")
+    if key_index == 0:
+        return info[len(key) + 1:]
+    if key_index > 0:
+        key_index = info.find(b";" + key + b"=")
+        if key_index >= 0:
+            return info[key_index + len(key) + 2:]
+    return None
+
+
+def is_symbolic_sv_allele(allele: bytes) -> bool:
+    """
+    <DEL>, <DUP>, <CNV> or <INV> (optionally with a ':' subtype), these span SVLEN bases of the reference
+    """
+    return (
+        len(allele) >= 5 and
+        allele[4:5] in (b">", b":") and
+        allele[:4] in SYMBOLIC_SV_ALLELE_PREFIXES and
+        allele.endswith(b">")
+    )
+
+
+def parse_vcf_record(line: bytes) -> Tuple[bytes, int, int]:
+    """
+    Get the chromosome, and the 0-based, half-open interval of a vcf record (tbx_parse1 with the vcf preset).
+
+    The end is the longest of the REF allele, the SVLEN of symbolic deletions / duplications,
+    and the FORMAT/LEN of gvcf blocks, or INFO/END if that is further along
+    """
+    fields = line.split(b"\t", 8)
+    if len(fields) < 2:
+        raise ValueError(f"Could not parse vcf record '{line[:100]!r}'")
+
+    chrom = fields[0]
+    beg = strtoll(fields[1])
+    if beg is None:
+        raise ValueError(f"Could not parse vcf record position '{line[:100]!r}'")
+    beg = max(beg - 1, 0)
+    end = 1
+
+    reflen = svlen = fmtlen = 0
+    num_alleles = 0
+    svlen_allele_indexes = set()
+    is_gvcf = False
+
+    if len(fields) > 3:
+        reflen = len(fields[3])
+        if reflen > 0:
+            end = beg + reflen
+        num_alleles = 1
+
+    if len(fields) > 4:
+        for allele in fields[4].split(b",")[:65535]:
+            if is_symbolic_sv_allele(allele):
+                svlen_allele_indexes.add(num_alleles)
+            elif allele in GVCF_ALLELES:
+                is_gvcf = True
+            num_alleles += 1
+
+    if len(fields) > 7:
+        info = fields[7]
+
+        # INFO/END
+        info_end_value = get_info_value(info, b"END") if b"END=" in info else None
+        if info_end_value is not None and not info_end_value.startswith(b"."):
+            info_end = strtoll(info_end_value) or 0
+            if info_end > beg:
+                end = info_end
+
+        # INFO/SVLEN, one per alt allele
+        info_svlen_value = get_info_value(info, b"SVLEN") if b"SVLEN=" in info else None
+        if info_svlen_value is not None:
+            for allele_index, svlen_value in enumerate(info_svlen_value.split(b",")[:max(num_alleles - 1, 0)], start=1):
+                svlen = max(svlen, abs(atoll(svlen_value)) if allele_index in svlen_allele_indexes else 1)
+
+    # FORMAT/LEN of gvcf blocks, the longest over the samples
+    if is_gvcf and len(fields) > 8:
+        format_and_samples = fields[8].split(b"\t")
+        format_keys = format_and_samples[0].split(b":")
+        if b"LEN" in format_keys:
+            len_index = format_keys.index(b"LEN")
+            for sample in format_and_samples[1:]:
+                sample_values = sample.split(b":")
+                if len(sample_values) > len_index:
+                    fmtlen = max(fmtlen, atoll(sample_values[len_index]))
+
+    return chrom, beg, max(end, beg + max(reflen, svlen, fmtlen))
+
+
+def reg2bin(beg: int, end: int) -> int:
+    """
+    hts_reg2bin for a tbi index
+    """
+    end -= 1
+    shift, first_bin = TBI_MIN_SHIFT, TBI_N_BINS - (1 << (3 * TBI_N_LVLS))
+    for level in range(TBI_N_LVLS, 0, -1):
+        if beg >> shift == end >> shift:
+            return first_bin + (beg >> shift)
+        shift += 3
+        first_bin -= 1 << (3 * (level - 1))
+    return 0
+
+
+def bin_first(level: int) -> int:
+    return ((1 << (3 * level)) - 1) // 7
+
+
+def bin_parent(bin_: int) -> int:
+    return (bin_ - 1) >> 3
+
+
+class TabixIndexer:
+    """
+    Tabix index of a vcf, pushed one line at a time (tbx_index with the vcf preset).
+
+    Offsets are kept as uncompressed offsets while streaming,
+    and are only converted to BGZF virtual offsets in finish, once every block has been compressed
+    """
+    def __init__(self):
+        self.names: Dict[bytes, int] = {}
+        self.bins: List[Dict[int, List[List[int]]]] = []
+        self.linear_index: List[List[Optional[int]]] = []
+        self.meta: List[Tuple[int, int, int, int]] = []
+        self.is_initialised = False
+
+        self.header_end_offset = 0
+        self.save_tid = self.last_tid = -1
+        self.save_bin = self.last_bin = None
+        self.save_off = self.last_off = self.off_beg = 0
+        self.last_coor = None
+        self.n_mapped = 0
+
+    def push_line(self, line: bytes, end_offset: int):
+        """
+        Push a line (without the newline) that ends at end_offset of the uncompressed stream
+        """
+        if line.endswith(b"\r"):
+            line = line[:-1]
+
+        # Header lines
+        if line.startswith(b"#"):
+            if not self.is_initialised:
+                self.header_end_offset = end_offset
+            return
+
+        if not self.is_initialised:
+            self.save_off = self.last_off = self.off_beg = self.header_end_offset
+            self.is_initialised = True
+
+        chrom, beg, end = parse_vcf_record(line)
+        self.push(self.names.setdefault(chrom, len(self.names)), beg, end, end_offset)
+
+    def push(self, tid: int, beg: int, end: int, end_offset: int):
+        """
+        hts_idx_push
+        """
+        if beg > TBI_MAX_POS or end > TBI_MAX_POS:
+            raise ValueError(f"Region {beg}..{end} cannot be stored in a tbi index")
+
+        if tid != self.last_tid:
+            # Change of chromosome
+            if tid < len(self.bins):
+                raise ValueError("Chromosome blocks not continuous")
+            self.bins.append({})
+            self.linear_index.append([])
+            self.meta.append((0, 0, 0, 0))
+            self.last_tid = tid
+            self.last_bin = None
+        elif self.last_coor > beg:
+            raise ValueError(f"Unsorted positions on sequence #{tid + 1}: {self.last_coor + 1} followed by {beg + 1}")
+
+        if end < beg:
+            raise ValueError(f"Invalid record on sequence #{tid + 1}: end {end} < begin {beg + 1}")
+
+        # Linear index, the first record overlapping each 16 kb window
+        linear_index = self.linear_index[tid]
+        window_end = (end - 1) >> TBI_MIN_SHIFT
+        if len(linear_index) < window_end + 1:
+            linear_index.extend([None] * (window_end + 1 - len(linear_index)))
+        for window in range(beg >> TBI_MIN_SHIFT, window_end + 1):
+            if linear_index[window] is None:
+                linear_index[window] = self.last_off
+
+        # Binning index, a chunk per run of consecutive records in the same bin
+        bin_ = reg2bin(beg, end)
+        if self.last_bin != bin_:
+            if self.save_bin is not None:
+                self.bins[self.save_tid].setdefault(self.save_bin, []).append([self.save_off, self.last_off])
+            if self.last_bin is None and self.save_bin is not None:
+                # Change of chromosome, keep the meta information of the previous chromosome
+                self.meta[self.save_tid] = (self.off_beg, self.last_off, self.n_mapped, 0)
+                self.n_mapped = 0
+                self.off_beg = self.last_off
+            self.save_off = self.last_off
+            self.save_bin = self.last_bin = bin_
+            self.save_tid = tid
+
+        self.n_mapped += 1
+        self.last_off = end_offset
+        self.last_coor = beg
+
+    def finish(self, final_offset: int, get_virtual_offset) -> bytes:
+        """
+        hts_idx_finish, then the (uncompressed) tbi index.
+
+        get_virtual_offset converts an uncompressed offset to a BGZF virtual offset
+        """
+        if self.save_tid >= 0:
+            self.bins[self.save_tid].setdefault(self.save_bin, []).append([self.save_off, final_offset])
+            self.meta[self.save_tid] = (self.off_beg, final_offset, self.n_mapped, 0)
+
+        names_bytes = b"".join(map(lambda name_iter_: name_iter_ + b"\0", self.names))
+        tbi_index = bytearray(b"TBI\1")
+        tbi_index += struct.pack("<i", len(self.names))
+        tbi_index += struct.pack("<7i", *TBX_VCF_CONF, len(names_bytes))
+        tbi_index += names_bytes
+
+        for tid in range(len(self.names)):
+            bins = {
+                bin_: [[get_virtual_offset(chunk_beg), get_virtual_offset(chunk_end)] for chunk_beg, chunk_end in chunks]
+                for bin_, chunks in self.bins[tid].items()
+            }
+            self.compress_binning(bins)
+            off_beg, off_end, n_mapped, n_unmapped = self.meta[tid]
+            bins[TBI_META_BIN] = [[get_virtual_offset(off_beg), get_virtual_offset(off_end)], [n_mapped, n_unmapped]]
+
+            # Fill the windows without a record from the window after them (update_loff)
+            linear_index = list(
+                map(
+                    lambda offset_iter_: get_virtual_offset(offset_iter_) if offset_iter_ is not None else None,
+                    self.linear_index[tid]
+                )
+            )
+            for window in range(len(linear_index) - 2, -1, -1):
+                if linear_index[window] is None:
+                    linear_index[window] = linear_index[window + 1]
+
+            tbi_index += struct.pack("<i", len(bins))
+            for bin_ in sorted(bins):
+                tbi_index += struct.pack("<Ii", bin_, len(bins[bin_]))
+                for chunk_beg, chunk_end in bins[bin_]:
+                    tbi_index += struct.pack("<QQ", chunk_beg, chunk_end)
+            tbi_index += struct.pack("<i", len(linear_index))
+            tbi_index += struct.pack(f"<{len(linear_index)}Q", *linear_index)
+
+        # No unplaced records in a vcf
+        tbi_index += struct.pack("<Q", 0)
+
+        return bytes(tbi_index)
+
+    @staticmethod
+    def compress_binning(bins: Dict[int, List[List[int]]]):
+        """
+        Merge bins spanning less than a BGZF block into their parent bin,
+        then merge the chunks of a bin that start in the same BGZF block
+        """
+        for level in range(TBI_N_LVLS, 0, -1):
+            first_bin_of_level = bin_first(level)
+            for bin_ in sorted(bins):
+                if bin_ < first_bin_of_level:
+                    continue
+                chunks = bins[bin_]
+                if level < TBI_N_LVLS:
+                    chunks.sort(key=lambda chunk_iter_: chunk_iter_[0])
+                if (chunks[-1][1] >> 16) - (chunks[0][0] >> 16) < HTS_MIN_MARKER_DIST:
+                    parent_bin = bin_parent(bin_)
+                    if parent_bin not in bins:
+                        continue
+                    bins[parent_bin].extend(chunks)
+                    del bins[bin_]
+
+        if 0 in bins:
+            bins[0].sort(key=lambda chunk_iter_: chunk_iter_[0])
+
+        for bin_, chunks in bins.items():
+            merged_chunks = [chunks[0]]
+            for chunk_beg, chunk_end in chunks[1:]:
+                if merged_chunks[-1][1] >> 16 >= chunk_beg >> 16:
+                    merged_chunks[-1][1] = max(merged_chunks[-1][1], chunk_end)
+                else:
+                    merged_chunks.append([chunk_beg, chunk_end])
+            bins[bin_] = merged_chunks
+
+
+class BgzfTabixWriter:
+    """
+    Multi-threaded BGZF compression of a vcf stream, with the tabix index built from the same pass
+    """
+    def __init__(
+            self,
+            num_threads: int = DEFAULT_NUM_THREADS,
+            compress_level: int = DEFAULT_COMPRESS_LEVEL,
+            max_pending_blocks_per_thread: int = DEFAULT_MAX_PENDING_BLOCKS_PER_THREAD
+    ):
+        self.num_threads = num_threads
+        self.compress_level = compress_level
+        self.max_pending_blocks = num_threads * max_pending_blocks_per_thread
+        self.indexer = TabixIndexer()
+
+        # Compressed offset of the start of each block
+        self.block_offsets: List[int] = []
+        self.compressed_size = 0
+        self.uncompressed_size = 0
+        self.tbi_index: Optional[bytes] = None
+
+    def get_virtual_offset(self, uncompressed_offset: int) -> int:
+        """
+        Virtual offset of an uncompressed offset, as bgzf_tell after reading up to that offset
+        (the end of a block is the start of the next block)
+        """
+        if uncompressed_offset == self.uncompressed_size:
+            return self.compressed_size << 16
+        block_index, block_offset = divmod(uncompressed_offset, BGZF_BLOCK_SIZE)
+        return (self.block_offsets[block_index] << 16) | block_offset
+
+    def compress(self, chunks: Iterable[bytes]) -> Iterator[bytes]:
+        """
+        Yield the BGZF blocks of the chunks of a vcf, in order, ending with the BGZF EOF marker
+        """
+        buffer = bytearray()
+        line_remainder = b""
+        pending_blocks: Deque[Future] = deque()
+
+        with ThreadPoolExecutor(max_workers=self.num_threads) as executor:
+            for chunk in chunks:
+                # Index the complete lines of this chunk
+                line_end_offset = self.uncompressed_size - len(line_remainder)
+                lines = (line_remainder + chunk).split(b"\n")
+                line_remainder = lines.pop()
+                for line in lines:
+                    line_end_offset += len(line) + 1
+                    self.indexer.push_line(line, line_end_offset)
+                self.uncompressed_size += len(chunk)
+
+                # Compress the full blocks
+                buffer += chunk
+                num_full_blocks = len(buffer) // BGZF_BLOCK_SIZE
+                for block_index in range(num_full_blocks):
+                    pending_blocks.append(
+                        executor.submit(
+                            compress_bgzf_block,
+                            bytes(buffer[block_index * BGZF_BLOCK_SIZE:(block_index + 1) * BGZF_BLOCK_SIZE]),
+                            self.compress_level
+                        )
+                    )
+                del buffer[:num_full_blocks * BGZF_BLOCK_SIZE]
+
+                while len(pending_blocks) > self.max_pending_blocks:
+                    yield self._add_block(pending_blocks.popleft().result())
+
+            # Last line without a newline
+            if len(line_remainder) > 0:
+                self.indexer.push_line(line_remainder, self.uncompressed_size)
+
+            # Last partial block
+            if len(buffer) > 0:
+                pending_blocks.append(executor.submit(compress_bgzf_block, bytes(buffer), self.compress_level))
+
+            while len(pending_blocks) > 0:
+                yield self._add_block(pending_blocks.popleft().result())
+
+        yield BGZF_EOF
+
+    def _add_block(self, block: bytes) -> bytes:
+        self.block_offsets.append(self.compressed_size)
+        self.compressed_size += len(block)
+        return block
+
+    def get_tbi_index(self) -> bytes:
+        """
+        The BGZF compressed tbi index, once the stream has been compressed
+        """
+        if self.tbi_index is None:
+            self.tbi_index = compress_bgzf(
+                self.indexer.finish(
+                    final_offset=self.uncompressed_size,
+                    get_virtual_offset=self.get_virtual_offset
+                ),
+                self.compress_level
+            )
+        return self.tbi_index
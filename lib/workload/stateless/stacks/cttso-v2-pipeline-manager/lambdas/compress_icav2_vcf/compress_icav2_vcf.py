@@ -2,28 +2,40 @@
 
 
 """
-Given an icav2 uri, convert from vcf to compressed vcf
+Given a list of icav2 vcf uris (i.e all the vcfs of an output folder), convert each vcf to a compressed vcf
 
 Then generate an index file for the compressed vcf
 
-Rather than download + upload, we can stream a vcf through bzip2
+Rather than download + upload, each vcf is streamed from its presigned url through a multi-threaded BGZF writer,
+the tabix index is built from the same pass, and the compressed vcf is uploaded with a multipart upload
 """
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from threading import Lock
+from typing import Dict, Iterator, List, Optional, Tuple, TypedDict
+import io
 import boto3
-import subprocess
-from tempfile import TemporaryDirectory
+from boto3.s3.transfer import TransferConfig
+import requests
 import logging
 import typing
 from os import environ
+from urllib.parse import urlparse
 
+from wrapica.enums import UriType
+from wrapica.libica_models import AwsTempCredentials, ProjectData
 from wrapica.project_data import (
-    write_icav2_file_contents, read_icav2_file_contents,
-    convert_uri_to_project_data_obj, delete_project_data
+    convert_uri_to_project_data_obj, delete_project_data,
+    convert_project_data_obj_to_uri, create_download_url,
+    get_aws_credentials_access_for_project_folder
 )
 
+from bgzf_tabix import BgzfTabixWriter
+
 if typing.TYPE_CHECKING:
     from mypy_boto3_ssm import SSMClient
     from mypy_boto3_secretsmanager import SecretsManagerClient
+    from mypy_boto3_s3 import S3Client
 
 logger = logging.getLogger(__name__)
 
@@ -31,6 +43,56 @@ logging.basicConfig(level=logging.INFO)
 
 ICAV2_BASE_URL = "https://ica.illumina.com/ica/rest"
 
+# Number of vcfs compressed at once, and number of BGZF compression threads per vcf
+VCF_COMPRESSION_MAX_CONCURRENCY = 4
+BGZF_COMPRESSION_THREADS = 2
+DOWNLOAD_CHUNK_SIZE = 1048576  # 1 MiB (2^20)
+DOWNLOAD_TIMEOUT_SECONDS = 60
+MULTIPART_TRANSFER_CONFIG = TransferConfig(
+    multipart_threshold=8388608,  # 8 MiB (8 * 2^20)
+    multipart_chunksize=16777216,  # 16 MiB (16 * 2^20)
+    max_concurrency=4,
+)
+
+
+class VcfCompressionResult(TypedDict):
+    vcf_icav2_uri: str
+    compressed_vcf_s3_uri: Optional[str]
+    status: str  # One of COMPRESSED, SKIPPED, FAILED
+    uncompressed_size_in_bytes: int
+    compressed_size_in_bytes: int
+    error_message: Optional[str]
+
+
+class IterStream(io.RawIOBase):
+    """
+    A read-only file object over an iterator of bytes, for upload_fileobj.
+
+    Each read is filled as far as the iterator allows, as s3transfer uploads each read of a
+    non-seekable file object as one part (and every part but the last must be at least 5 MiB)
+    """
+    def __init__(self, bytes_iter: Iterator[bytes]):
+        self.bytes_iter = bytes_iter
+        self.leftover = b""
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        bytes_read = 0
+        while bytes_read < len(buffer):
+            if len(self.leftover) == 0:
+                try:
+                    self.leftover = next(self.bytes_iter)
+                except StopIteration:
+                    break
+            output = self.leftover[:len(buffer) - bytes_read]
+            self.leftover = self.leftover[len(output):]
+            buffer[bytes_read:bytes_read + len(output)] = output
+            bytes_read += len(output)
+        return bytes_read
+
+
 # AWS things
 def get_ssm_client() -> 'SSMClient':
     """
@@ -74,84 +136,126 @@ def set_icav2_env_vars():
     )
 
 
-def write_icav2_vcf_file_to_compressed_output(icav2_uri: str, output_path: Path):
+def get_s3_client(aws_temp_credentials: AwsTempCredentials) -> 'S3Client':
     """
-    ICAv2 VCF File
-    :param icav2_uri:
-    :param output_path:
-    :return:
+    S3 client with the temporary credentials of an icav2 folder
     """
-    # Download decompressed file
-    project_data_obj = convert_uri_to_project_data_obj(icav2_uri)
+    return boto3.client(
+        "s3",
+        aws_access_key_id=aws_temp_credentials.access_key,
+        aws_secret_access_key=aws_temp_credentials.secret_key,
+        aws_session_token=aws_temp_credentials.session_token,
+        region_name=aws_temp_credentials.region
+    )
 
-    # Write to output file
-    read_icav2_file_contents(project_data_obj.project_id, project_data_obj.data.id, output_path.with_suffix(''))
 
-    # Bgzip the file
-    bgzip_proc = subprocess.run(
-        [
-            "bgzip", output_path.with_suffix('')
-        ],
-        capture_output=True
-    )
+_s3_clients_by_folder: Dict[Tuple[str, str], 'S3Client'] = {}
+_s3_clients_by_folder_lock = Lock()
 
-    if bgzip_proc.returncode != 0:
-        logger.error(f"Error bgzipping file: {bgzip_proc.stderr.decode()}")
-        raise ChildProcessError
 
-    # Check the output path is a file
-    if not output_path.is_file():
-        raise FileNotFoundError(f"File not found: {output_path}")
+def get_s3_client_for_project_folder(project_id: str, folder_path: Path) -> 'S3Client':
+    """
+    One set of temporary credentials per output folder, shared by the vcfs in that folder
+    """
+    with _s3_clients_by_folder_lock:
+        if (project_id, str(folder_path)) not in _s3_clients_by_folder:
+            _s3_clients_by_folder[(project_id, str(folder_path))] = get_s3_client(
+                get_aws_credentials_access_for_project_folder(
+                    project_id=project_id,
+                    folder_path=folder_path
+                )
+            )
+        return _s3_clients_by_folder[(project_id, str(folder_path))]
+
+
+def get_compressed_vcf_index_project_data_obj(vcf_icav2_uri: str) -> Optional[ProjectData]:
+    """
+    The index is uploaded after the compressed vcf,
+    so an existing index means an earlier attempt has already compressed the vcf
+    """
+    try:
+        return convert_uri_to_project_data_obj(vcf_icav2_uri + ".gz.tbi")
+    except FileNotFoundError:
+        return None
 
 
-def generate_index_file_for_compressed_vcf(output_path: Path):
-    tabix_proc = subprocess.run(
-        [
-            "tabix",
-            "-p", "vcf",
-            output_path
-        ],
-        capture_output=True
-    )
+def skip_compressed_icav2_vcf(vcf_icav2_uri: str, compressed_vcf_index_project_data_obj: ProjectData) -> VcfCompressionResult:
+    """
+    The vcf was compressed by an earlier attempt, delete the uncompressed vcf if that attempt did not get to it
+    """
+    try:
+        project_data_obj: ProjectData = convert_uri_to_project_data_obj(vcf_icav2_uri)
+    except FileNotFoundError:
+        pass
+    else:
+        delete_project_data(
+            project_id=project_data_obj.project_id,
+            data_id=project_data_obj.data.id
+        )
 
-    if tabix_proc.returncode != 0:
-        logger.error(f"Error generating tabix index: {tabix_proc.stderr.decode()}")
-        raise ChildProcessError
+    return {
+        "vcf_icav2_uri": vcf_icav2_uri,
+        "compressed_vcf_s3_uri": convert_project_data_obj_to_uri(
+            compressed_vcf_index_project_data_obj, uri_type=UriType.S3
+        ).removesuffix(".tbi"),
+        "status": "SKIPPED",
+        "uncompressed_size_in_bytes": 0,
+        "compressed_size_in_bytes": 0,
+        "error_message": None,
+    }
 
 
-def compress_icav2_vcf_and_upload(icav2_uri):
+def compress_icav2_vcf_and_upload(vcf_icav2_uri: str) -> VcfCompressionResult:
     """
-    Compress ICAv2 VCF File and index
+    Stream the ICAv2 VCF File through the BGZF writer, uploading the compressed vcf as it is written,
+    then upload the index.
 
     Delete the original decompressed vcf file.
-    :param icav2_uri:
+
+    Vcfs already compressed by an earlier attempt are skipped, so the same list can be retried
+    :param vcf_icav2_uri:
     :return:
     """
-    project_data_obj = convert_uri_to_project_data_obj(icav2_uri)
+    try:
+        compressed_vcf_index_project_data_obj = get_compressed_vcf_index_project_data_obj(vcf_icav2_uri)
+        if compressed_vcf_index_project_data_obj is not None:
+            return skip_compressed_icav2_vcf(vcf_icav2_uri, compressed_vcf_index_project_data_obj)
 
-    with TemporaryDirectory() as temp_dir:
-        # Initialise parameters
+        project_data_obj: ProjectData = convert_uri_to_project_data_obj(vcf_icav2_uri)
         vcf_icav2_file_path = Path(project_data_obj.data.details.path)
-        temp_vcf_output_path = Path(temp_dir) / vcf_icav2_file_path.name
-        temp_vcf_compressed_output_path = temp_vcf_output_path.with_suffix(".gz").with_stem(temp_vcf_output_path.name)
-        temp_vcf_compressed_output_index_path = temp_vcf_output_path.with_suffix(".tbi").with_stem(temp_vcf_compressed_output_path.name)
-
-        # Download index and tabix
-        write_icav2_vcf_file_to_compressed_output(icav2_uri, temp_vcf_compressed_output_path)
-        generate_index_file_for_compressed_vcf(temp_vcf_compressed_output_path)
 
-        # Upload compressed and index file
-        write_icav2_file_contents(
-            project_id=project_data_obj.project_id,
-            data_path=vcf_icav2_file_path.parent / temp_vcf_compressed_output_path.name,
-            file_stream_or_path=temp_vcf_compressed_output_path
-        )
+        # The compressed vcf and index are written next to the vcf
+        vcf_s3_uri = urlparse(convert_project_data_obj_to_uri(project_data_obj, uri_type=UriType.S3))
+        compressed_vcf_s3_key = vcf_s3_uri.path.lstrip("/") + ".gz"
+        s3_client = get_s3_client_for_project_folder(project_data_obj.project_id, vcf_icav2_file_path.parent)
+
+        bgzf_tabix_writer = BgzfTabixWriter(num_threads=BGZF_COMPRESSION_THREADS)
+        with requests.get(
+            create_download_url(project_data_obj.project_id, project_data_obj.data.id),
+            stream=True,
+            timeout=DOWNLOAD_TIMEOUT_SECONDS
+        ) as download_response:
+            download_response.raise_for_status()
+
+            # Upload compressed vcf
+            s3_client.upload_fileobj(
+                IterStream(
+                    bgzf_tabix_writer.compress(
+                        download_response.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE)
+                    )
+                ),
+                Bucket=vcf_s3_uri.netloc,
+                Key=compressed_vcf_s3_key,
+                ExtraArgs={"ServerSideEncryption": "AES256"},
+                Config=MULTIPART_TRANSFER_CONFIG
+            )
 
         # Upload index
-        write_icav2_file_contents(
-            project_id=project_data_obj.project_id,
-            data_path=vcf_icav2_file_path.parent / temp_vcf_compressed_output_index_path.name,
-            file_stream_or_path=temp_vcf_compressed_output_index_path
+        s3_client.put_object(
+            Bucket=vcf_s3_uri.netloc,
+            Key=compressed_vcf_s3_key + ".tbi",
+            Body=bgzf_tabix_writer.get_tbi_index(),
+            ServerSideEncryption="AES256"
         )
 
         # Delete uncompressed vcf from icav2
@@ -159,22 +263,79 @@ def compress_icav2_vcf_and_upload(icav2_uri):
             project_id=project_data_obj.project_id,
             data_id=project_data_obj.data.id
         )
+    except Exception as e:
+        logger.error(f"Could not compress {vcf_icav2_uri}: {e}")
+        return {
+            "vcf_icav2_uri": vcf_icav2_uri,
+            "compressed_vcf_s3_uri": None,
+            "status": "FAILED",
+            "uncompressed_size_in_bytes": 0,
+            "compressed_size_in_bytes": 0,
+            "error_message": str(e),
+        }
+
+    return {
+        "vcf_icav2_uri": vcf_icav2_uri,
+        "compressed_vcf_s3_uri": f"s3://{vcf_s3_uri.netloc}/{compressed_vcf_s3_key}",
+        "status": "COMPRESSED",
+        "uncompressed_size_in_bytes": bgzf_tabix_writer.uncompressed_size,
+        "compressed_size_in_bytes": bgzf_tabix_writer.compressed_size,
+        "error_message": None,
+    }
+
+
+def compress_icav2_vcfs_and_upload(
+        vcf_icav2_uri_list: List[str],
+        max_concurrency: int = VCF_COMPRESSION_MAX_CONCURRENCY
+) -> List[VcfCompressionResult]:
+    """
+    Compress the vcfs of a folder, a few at a time, returning one result per vcf in the order of the list
+    """
+    with ThreadPoolExecutor(max_workers=max_concurrency) as executor:
+        return list(executor.map(compress_icav2_vcf_and_upload, vcf_icav2_uri_list))
 
 
 def handler(event, context):
     """
-    Given a vcf uri, download, compress and re-upload to icav2
+    Given a list of vcf uris, stream, compress and re-upload to icav2
+
+    All vcfs of the list share the one invocation (and its 15 minute limit),
+    the step function sends the vcfs of a folder in lists of VCF_COMPRESSION_MAX_CONCURRENCY
     :param event:
     :param context:
     :return:
     """
     set_icav2_env_vars()
 
-    # Get the vcf uri
-    vcf_icav2_uri = event.get("vcf_icav2_uri")
+    # Get the vcf uris (a single vcf_icav2_uri is still accepted)
+    vcf_icav2_uri_list = event.get("vcf_icav2_uri_list", None)
+    if vcf_icav2_uri_list is None:
+        vcf_icav2_uri_list = [event.get("vcf_icav2_uri")]
+
+    # Compress icav2 vcfs then upload compressed back to icav2
+    compression_results = compress_icav2_vcfs_and_upload(vcf_icav2_uri_list)
+
+    # Fail once every vcf has been attempted, a retry of the same list skips the vcfs that were compressed
+    failed_compression_results = list(
+        filter(
+            lambda compression_result_iter_: compression_result_iter_["status"] == "FAILED",
+            compression_results
+        )
+    )
+    if len(failed_compression_results) > 0:
+        raise Exception(
+            f"Failed to compress {len(failed_compression_results)} of {len(compression_results)} vcfs: " +
+            ", ".join(
+                map(
+                    lambda compression_result_iter_: compression_result_iter_["vcf_icav2_uri"],
+                    failed_compression_results
+                )
+            )
+        )
 
-    # Compress icav2 vcf then upload compressed back to icav2
-    compress_icav2_vcf_and_upload(vcf_icav2_uri)
+    return {
+        "compression_results": compression_results
+    }
 
 
 # if __name__ == "__main__":
@@ -187,7 +348,9 @@ def handler(event, context):
 #         json.dumps(
 #             handler(
 #                 {
-#                     "vcf_icav2_uri": "icav2://ea19a3f5-ec7c-4940-a474-c31cd91dbad4/analysis/cttsov2/20240718ff7a0cbc/Results/L2400161/L2400161.hard-filtered.gvcf"
+#                     "vcf_icav2_uri_list": [
+#                         "icav2://ea19a3f5-ec7c-4940-a474-c31cd91dbad4/analysis/cttsov2/20240718ff7a0cbc/Results/L2400161/L2400161.hard-filtered.gvcf"
+#                     ]
 #                 },
 #                 None
 #             )
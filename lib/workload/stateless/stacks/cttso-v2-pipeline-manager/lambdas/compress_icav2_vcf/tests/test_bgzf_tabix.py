@@ -0,0 +1,386 @@
+#!/usr/bin/env python3
+
+"""
+BGZF validity of the streamed compression, and equivalence of the compressed vcf and tabix index with htslib
+
+The htslib comparisons run when pysam is installed.
+
+Run from the compress_icav2_vcf directory with
+    python -m unittest discover tests
+
+Or benchmark the compression of a synthetic gvcf with
+    python -m tests.test_bgzf_tabix
+"""
+
+# Standard imports
+import gzip
+import random
+import shutil
+import struct
+import tempfile
+import time
+import unittest
+import zlib
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Iterator, List, Tuple
+from unittest.mock import patch, MagicMock
+from urllib.parse import urlparse
+
+try:
+    import pysam
+except ImportError:
+    pysam = None
+
+# Local imports
+import bgzf_tabix
+import compress_icav2_vcf
+
+FIXTURES_DIR = Path(__file__).parent / "fixtures"
+FIXTURE_VCFS = sorted(FIXTURES_DIR.glob("*.*vcf"))
+PROJECT_ID = "ea19a3f5-ec7c-4940-a474-c31cd91dbad4"
+RESULTS_PATH = "/analysis/cttsov2/20240718ff7a0cbc/Results/L2400161/"
+BUCKET = "pipeline-prod-cache-503977275616-ap-southeast-2"
+KEY_PREFIX = "byob-icav2/production"
+
+
+def get_synthetic_gvcf(num_records_per_contig: int, seed: int = 20240718) -> bytes:
+    """
+    Synthetic gvcf spanning many BGZF blocks, with snvs, reference blocks, symbolic deletions and gvcf LEN records
+    """
+    rng = random.Random(seed)
+    lines = [
+        "##fileformat=VCFv4.2",
+        "#CHROM\tPOS\tID\tREF\tALT\tQUAL\tFILTER\tINFO\tFORMAT\tL2400161",
+    ]
+    for chrom in ["chr1", "chr2", "chrX"]:
+        pos = 1
+        for _ in range(num_records_per_contig):
+            pos += rng.choice([0, 1, 3, 50, 2000])
+            record_type = rng.random()
+            if record_type < 0.6:
+                lines.append(f"{chrom}\t{pos}\t.\tA\tG\t50\tPASS\tDP=10\tGT:DP\t0/1:10")
+            elif record_type < 0.8:
+                lines.append(f"{chrom}\t{pos}\t.\tA\t<NON_REF>\t.\t.\tEND={pos + rng.randint(0, 500)}\tGT:DP\t0/0:10")
+            elif record_type < 0.9:
+                lines.append(f"{chrom}\t{pos}\t.\tN\t<DEL>\t.\tPASS\tSVTYPE=DEL;SVLEN=-{rng.randint(1, 100000)}\tGT\t0/1")
+            else:
+                lines.append(f"{chrom}\t{pos}\t.\tACGTACGT\tA,<*>\t.\tPASS\tDP=3\tGT:LEN\t0/1:{rng.randint(1, 900)}")
+    return ("\n".join(lines) + "\n").encode()
+
+
+def get_chunks(data: bytes, chunk_size: int) -> Iterator[bytes]:
+    """
+    Chunks of a download, chunk boundaries fall anywhere within a record
+    """
+    for i in range(0, len(data), chunk_size):
+        yield data[i:i + chunk_size]
+
+
+def get_bgzf_blocks(bgzf_data: bytes) -> List[bytes]:
+    """
+    Split a BGZF file into its blocks, asserting the header, BSIZE, CRC32 and ISIZE of each block
+    """
+    blocks = []
+    offset = 0
+    while offset < len(bgzf_data):
+        id1, id2, cm, flg, _, xfl, os_, xlen, si1, si2, slen, bsize = struct.unpack_from(
+            "<4BI2BH2BHH", bgzf_data, offset
+        )
+        assert (id1, id2, cm, flg, xfl, os_, xlen) == (31, 139, 8, 4, 0, 255, 6), f"Bad header at {offset}"
+        assert (si1, si2, slen) == (66, 67, 2), f"Bad BC extra subfield at {offset}"
+        block_end = offset + bsize + 1
+        crc32, isize = struct.unpack_from("<2I", bgzf_data, block_end - 8)
+        block = zlib.decompress(bgzf_data[offset + 18:block_end - 8], -15)
+        assert len(block) == isize, f"Bad ISIZE at {offset}"
+        assert zlib.crc32(block) == crc32, f"Bad CRC32 at {offset}"
+        assert isize <= bgzf_tabix.BGZF_BLOCK_SIZE
+        blocks.append(block)
+        offset = block_end
+    return blocks
+
+
+def parse_tbi_index(tbi_index: bytes) -> Tuple:
+    """
+    Header, names, bins and linear index of each sequence, and the unplaced record count of a tbi index.
+
+    The bins of a sequence are returned as a dict, htslib writes them in hash table order which readers ignore
+    """
+    tbi_index = gzip.decompress(tbi_index)
+    assert tbi_index[:4] == b"TBI\1"
+    n_ref, *conf, l_nm = struct.unpack_from("<8i", tbi_index, 4)
+    offset = 36
+    names = tbi_index[offset:offset + l_nm].split(b"\0")[:-1]
+    offset += l_nm
+    sequences = []
+    for _ in range(n_ref):
+        (n_bin,) = struct.unpack_from("<i", tbi_index, offset)
+        offset += 4
+        bins = {}
+        for _ in range(n_bin):
+            bin_, n_chunk = struct.unpack_from("<Ii", tbi_index, offset)
+            offset += 8
+            bins[bin_] = struct.unpack_from(f"<{2 * n_chunk}Q", tbi_index, offset)
+            offset += 16 * n_chunk
+        (n_intv,) = struct.unpack_from("<i", tbi_index, offset)
+        offset += 4
+        sequences.append((bins, struct.unpack_from(f"<{n_intv}Q", tbi_index, offset)))
+        offset += 8 * n_intv
+    (n_no_coor,) = struct.unpack_from("<Q", tbi_index, offset)
+    assert offset + 8 == len(tbi_index)
+    return conf, names, sequences, n_no_coor
+
+
+def compress(data: bytes, chunk_size: int = 100003, num_threads: int = 4) -> bgzf_tabix.BgzfTabixWriter:
+    bgzf_tabix_writer = bgzf_tabix.BgzfTabixWriter(num_threads=num_threads)
+    bgzf_tabix_writer.output = b"".join(bgzf_tabix_writer.compress(get_chunks(data, chunk_size)))
+    return bgzf_tabix_writer
+
+
+class TestBgzfValidity(unittest.TestCase):
+    def test_fixture_vcfs_are_valid_bgzf(self):
+        for vcf_path in FIXTURE_VCFS:
+            with self.subTest(vcf_path.name):
+                data = vcf_path.read_bytes()
+                # Tiny chunks so records are split across chunks
+                bgzf_data = compress(data, chunk_size=7).output
+                self.assertTrue(bgzf_data.endswith(bgzf_tabix.BGZF_EOF))
+                self.assertEqual(b"".join(get_bgzf_blocks(bgzf_data)), data)
+                self.assertEqual(gzip.decompress(bgzf_data), data)
+
+    def test_multi_block_vcf_is_valid_bgzf(self):
+        data = get_synthetic_gvcf(5000)
+        bgzf_data = compress(data).output
+        blocks = get_bgzf_blocks(bgzf_data)
+
+        # Every block is full but the data block before the EOF marker
+        self.assertGreater(len(blocks), 10)
+        self.assertEqual(
+            [len(block) for block in blocks[:-2]],
+            [bgzf_tabix.BGZF_BLOCK_SIZE] * (len(blocks) - 2)
+        )
+        self.assertEqual(blocks[-1], b"")
+        self.assertEqual(b"".join(blocks), data)
+
+    def test_output_does_not_depend_on_chunks_or_threads(self):
+        data = get_synthetic_gvcf(2000)
+        reference_writer = compress(data, chunk_size=len(data), num_threads=1)
+        for chunk_size, num_threads in [(1, 2), (65279, 3), (65280, 4), (1048576, 8)]:
+            with self.subTest(chunk_size=chunk_size, num_threads=num_threads):
+                bgzf_tabix_writer = compress(data, chunk_size, num_threads)
+                self.assertEqual(bgzf_tabix_writer.output, reference_writer.output)
+                self.assertEqual(bgzf_tabix_writer.get_tbi_index(), reference_writer.get_tbi_index())
+
+    def test_records_after_index_sorted_order_are_rejected(self):
+        data = FIXTURE_VCFS[0].read_bytes() + b"chr1\t1\t.\tA\tG\t50\tPASS\t.\tGT\t0/1\n"
+        with self.assertRaises(ValueError):
+            compress(data)
+
+
+@unittest.skipUnless(pysam, "pysam (htslib) is not installed")
+class TestHtslibEquivalence(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.tmp_dir)
+
+    def assert_equivalent_to_htslib(self, data: bytes):
+        bgzf_tabix_writer = compress(data)
+
+        # Compressed vcf is byte-identical to bgzip
+        (self.tmp_dir / "input.vcf").write_bytes(data)
+        pysam.tabix_compress(str(self.tmp_dir / "input.vcf"), str(self.tmp_dir / "htslib.vcf.gz"), force=True)
+        self.assertEqual(bgzf_tabix_writer.output, (self.tmp_dir / "htslib.vcf.gz").read_bytes())
+
+        # Index is equivalent to 'tabix -p vcf'
+        (self.tmp_dir / "output.vcf.gz").write_bytes(bgzf_tabix_writer.output)
+        pysam.tabix_index(str(self.tmp_dir / "output.vcf.gz"), preset="vcf", force=True)
+        self.assertEqual(
+            parse_tbi_index(bgzf_tabix_writer.get_tbi_index()),
+            parse_tbi_index((self.tmp_dir / "output.vcf.gz.tbi").read_bytes())
+        )
+
+        # And can be queried by htslib
+        with pysam.TabixFile(str(self.tmp_dir / "output.vcf.gz")) as tabix_file:
+            for contig in tabix_file.contigs:
+                self.assertEqual(
+                    list(tabix_file.fetch(contig)),
+                    [
+                        line.decode().rstrip("\r")
+                        for line in data.splitlines()
+                        if line.split(b"\t", 1)[0] == contig.encode()
+                    ]
+                )
+
+    def test_fixture_vcfs(self):
+        for vcf_path in FIXTURE_VCFS:
+            with self.subTest(vcf_path.name):
+                self.assert_equivalent_to_htslib(vcf_path.read_bytes())
+
+    def test_multi_block_gvcf(self):
+        self.assert_equivalent_to_htslib(get_synthetic_gvcf(20000))
+
+    def test_crlf_line_endings(self):
+        self.assert_equivalent_to_htslib(FIXTURE_VCFS[0].read_bytes().replace(b"\n", b"\r\n"))
+
+    def test_header_only_vcf(self):
+        self.assert_equivalent_to_htslib(b"##fileformat=VCFv4.2\n#CHROM\tPOS\tID\tREF\tALT\tQUAL\tFILTER\tINFO\n")
+
+
+class TestCompressIcav2Vcfs(unittest.TestCase):
+    """
+    Batch handler, with the wrapica calls, the download and the S3 client stubbed
+    """
+    def setUp(self):
+        self.vcf_contents = {
+            f"fil.{i}": vcf_path.read_bytes()
+            for i, vcf_path in enumerate(FIXTURE_VCFS)
+        }
+        self.vcf_icav2_uris = [
+            f"icav2://{PROJECT_ID}{RESULTS_PATH}{vcf_path.name}"
+            for vcf_path in FIXTURE_VCFS
+        ]
+        self.uploaded_objects = {}
+        self.deleted_data_ids = []
+        self.part_size = 100
+
+    def convert_uri_to_project_data_obj(self, uri):
+        # Vcfs not yet deleted, and the compressed vcf indexes uploaded so far
+        if uri in self.vcf_icav2_uris and f"fil.{self.vcf_icav2_uris.index(uri)}" not in self.deleted_data_ids:
+            return SimpleNamespace(
+                project_id=PROJECT_ID,
+                data=SimpleNamespace(
+                    id=f"fil.{self.vcf_icav2_uris.index(uri)}",
+                    details=SimpleNamespace(path=f"{RESULTS_PATH}{FIXTURE_VCFS[self.vcf_icav2_uris.index(uri)].name}")
+                )
+            )
+        if self.convert_project_data_path_to_s3_uri(urlparse(uri).path) in self.uploaded_objects:
+            return SimpleNamespace(
+                project_id=PROJECT_ID,
+                data=SimpleNamespace(id=f"fil.{Path(uri).name}", details=SimpleNamespace(path=urlparse(uri).path))
+            )
+        raise FileNotFoundError(uri)
+
+    def convert_project_data_path_to_s3_uri(self, path):
+        return f"s3://{BUCKET}/{KEY_PREFIX}/{PROJECT_ID}{path}"
+
+    def convert_project_data_obj_to_uri(self, project_data_obj, uri_type):
+        return self.convert_project_data_path_to_s3_uri(project_data_obj.data.details.path)
+
+    def requests_get(self, url, stream, timeout):
+        if url not in self.vcf_contents:
+            raise ConnectionError(f"Could not download {url}")
+        return MagicMock(
+            __enter__=lambda self_: self_,
+            iter_content=lambda chunk_size: get_chunks(self.vcf_contents[url], 11),
+        )
+
+    def upload_fileobj(self, fileobj, Bucket, Key, ExtraArgs, Config):
+        self.assertEqual(ExtraArgs, {"ServerSideEncryption": "AES256"})
+        # Read in parts as s3transfer does, every part but the last must be full
+        parts = list(iter(lambda: fileobj.read(self.part_size), b""))
+        self.assertTrue(all(len(part) == self.part_size for part in parts[:-1]))
+        self.uploaded_objects[f"s3://{Bucket}/{Key}"] = b"".join(parts)
+
+    def put_object(self, Bucket, Key, Body, ServerSideEncryption):
+        self.uploaded_objects[f"s3://{Bucket}/{Key}"] = Body
+
+    def run_handler(self, vcf_icav2_uri_list):
+        s3_client = SimpleNamespace(upload_fileobj=self.upload_fileobj, put_object=self.put_object)
+        with patch.multiple(
+            compress_icav2_vcf,
+            set_icav2_env_vars=MagicMock(),
+            convert_uri_to_project_data_obj=self.convert_uri_to_project_data_obj,
+            convert_project_data_obj_to_uri=self.convert_project_data_obj_to_uri,
+            create_download_url=lambda project_id, file_id: file_id,
+            get_s3_client_for_project_folder=MagicMock(return_value=s3_client),
+            delete_project_data=lambda project_id, data_id: self.deleted_data_ids.append(data_id),
+        ), patch.object(compress_icav2_vcf.requests, "get", self.requests_get):
+            return compress_icav2_vcf.handler({"vcf_icav2_uri_list": vcf_icav2_uri_list}, None)
+
+    def test_vcfs_are_compressed_indexed_and_removed(self):
+        response = self.run_handler(self.vcf_icav2_uris)
+
+        self.assertEqual(
+            [result["status"] for result in response["compression_results"]],
+            ["COMPRESSED"] * len(FIXTURE_VCFS)
+        )
+        for vcf_path, result in zip(FIXTURE_VCFS, response["compression_results"]):
+            compressed_vcf_s3_uri = f"s3://{BUCKET}/{KEY_PREFIX}/{PROJECT_ID}{RESULTS_PATH}{vcf_path.name}.gz"
+            self.assertEqual(result["compressed_vcf_s3_uri"], compressed_vcf_s3_uri)
+            self.assertEqual(gzip.decompress(self.uploaded_objects[compressed_vcf_s3_uri]), vcf_path.read_bytes())
+            self.assertEqual(
+                self.uploaded_objects[compressed_vcf_s3_uri + ".tbi"],
+                compress(vcf_path.read_bytes()).get_tbi_index()
+            )
+        self.assertEqual(sorted(self.deleted_data_ids), sorted(self.vcf_contents.keys()))
+
+    def test_failed_vcfs_are_kept_and_reported_after_the_batch(self):
+        del self.vcf_contents["fil.1"]
+
+        with self.assertRaises(Exception) as context:
+            self.run_handler(self.vcf_icav2_uris)
+
+        self.assertIn(self.vcf_icav2_uris[1], str(context.exception))
+        self.assertNotIn(self.vcf_icav2_uris[0], str(context.exception))
+        # The other vcfs are still compressed, only the failed vcf is left in place
+        self.assertEqual(sorted(self.deleted_data_ids), ["fil.0", "fil.2"])
+
+    def test_retry_skips_the_vcfs_already_compressed(self):
+        vcf_contents = self.vcf_contents.pop("fil.1")
+        with self.assertRaises(Exception):
+            self.run_handler(self.vcf_icav2_uris)
+
+        # The step function retries the same list
+        self.vcf_contents["fil.1"] = vcf_contents
+        uploaded_objects = dict(self.uploaded_objects)
+        response = self.run_handler(self.vcf_icav2_uris)
+
+        self.assertEqual(
+            [result["status"] for result in response["compression_results"]],
+            ["SKIPPED", "COMPRESSED", "SKIPPED"]
+        )
+        self.assertEqual(
+            [result["compressed_vcf_s3_uri"] for result in response["compression_results"]],
+            [
+                f"s3://{BUCKET}/{KEY_PREFIX}/{PROJECT_ID}{RESULTS_PATH}{vcf_path.name}.gz"
+                for vcf_path in FIXTURE_VCFS
+            ]
+        )
+        # The vcfs compressed by the first attempt are not uploaded again
+        for uri, contents in uploaded_objects.items():
+            self.assertIs(self.uploaded_objects[uri], contents)
+        self.assertEqual(sorted(self.deleted_data_ids), ["fil.0", "fil.1", "fil.2"])
+
+    def test_compressed_vcf_not_yet_deleted_is_deleted(self):
+        # An earlier attempt uploaded the compressed vcf and index, but did not delete the vcf
+        compressed_vcf_s3_uri = f"s3://{BUCKET}/{KEY_PREFIX}/{PROJECT_ID}{RESULTS_PATH}{FIXTURE_VCFS[0].name}.gz"
+        self.uploaded_objects[compressed_vcf_s3_uri] = b"compressed"
+        self.uploaded_objects[compressed_vcf_s3_uri + ".tbi"] = b"index"
+
+        response = self.run_handler(self.vcf_icav2_uris[:1])
+
+        self.assertEqual(response["compression_results"][0]["status"], "SKIPPED")
+        self.assertEqual(self.uploaded_objects[compressed_vcf_s3_uri], b"compressed")
+        self.assertEqual(self.deleted_data_ids, ["fil.0"])
+
+
+if __name__ == "__main__":
+    # Synthetic gvcf of 180k records (around 10 MiB)
+    data = get_synthetic_gvcf(60000)
+    for num_threads in [1, 2, 4]:
+        start_time = time.perf_counter()
+        bgzf_tabix_writer = compress(data, chunk_size=compress_icav2_vcf.DOWNLOAD_CHUNK_SIZE, num_threads=num_threads)
+        bgzf_tabix_writer.get_tbi_index()
+        duration = time.perf_counter() - start_time
+        print(
+            f"{num_threads} threads: {len(data) / 1048576:.1f} MiB compressed and indexed in {duration:.2f} s, "
+            f"{len(data) / duration / 1048576:.1f} MiB/s"
+        )
+
+    if pysam is not None:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            Path(tmp_dir, "input.vcf").write_bytes(data)
+            start_time = time.perf_counter()
+            pysam.tabix_compress(str(Path(tmp_dir, "input.vcf")), str(Path(tmp_dir, "input.vcf.gz")))
+            pysam.tabix_index(str(Path(tmp_dir, "input.vcf.gz")), preset="vcf")
+            print(f"htslib bgzip + tabix: {time.perf_counter() - start_time:.2f} s")
@@ -93,6 +93,14 @@ def handler(event, context):
         data_type=DataType.FILE
     )
 
+    # Paths of every file in the directory, so the .vcf.gz check is a set lookup
+    all_project_data_paths = set(
+        map(
+            lambda project_data_iter: project_data_iter.data.details.path,
+            all_project_data
+        )
+    )
+
     return {
         "vcf_icav2_uri_list": list(
             map(
@@ -108,14 +116,7 @@ def handler(event, context):
                             DataType[project_data_iter.data.details.data_type] == DataType.FILE
                         )
                         and not  # .vcf.gz does not exist
-                        any(
-                            map(
-                                lambda project_data_gzip_iter: (
-                                    project_data_gzip_iter.data.details.path == (project_data_iter.data.details.path + ".gz")
-                                ),
-                                all_project_data
-                            )
-                        )
+                        (project_data_iter.data.details.path + ".gz") in all_project_data_paths
                     ),
                     all_project_data
                 )
@@ -35,10 +35,13 @@ from wrapica.enums import DataType, UriType
 from wrapica.libica_models import ProjectData
 from wrapica.project_data import (
     convert_uri_to_project_data_obj,
-    list_project_data_non_recursively, read_icav2_file_contents_to_string,
+    read_icav2_file_contents_to_string,
     convert_project_data_obj_to_uri
 )
 
+# Layer imports
+from icav2_tools import OutputTreeSnapshot
+
 if typing.TYPE_CHECKING:
     from mypy_boto3_secretsmanager import SecretsManagerClient
 
@@ -86,10 +89,11 @@ def handler(events, context):
     # Get analysis uri as an object
     analysis_project_data_obj = convert_uri_to_project_data_obj(analysis_output_uri)
 
+    # List the analysis output once, every lookup below is answered from this snapshot
+    output_tree_snapshot = OutputTreeSnapshot.from_project_data_obj(analysis_project_data_obj)
+
     # Top level list
-    analysis_output_list = list_project_data_non_recursively(
-        project_id=analysis_project_data_obj.project_id,
-        parent_folder_id=analysis_project_data_obj.data.id,
+    analysis_output_list = output_tree_snapshot.list_project_data_non_recursively(
         data_type=DataType.FOLDER
     )
 
@@ -138,9 +142,8 @@ def handler(events, context):
         passing_sample_steps_file = next(
             filter(
                 lambda project_data_obj_iter: project_data_obj_iter.data.details.name == "passing_sample_steps.json",
-                list_project_data_non_recursively(
-                    project_id=logs_intermediates_dir_data_obj.project_id,
-                    parent_folder_id=logs_intermediates_dir_data_obj.data.id,
+                output_tree_snapshot.list_project_data_non_recursively(
+                    logs_intermediates_dir_data_obj
                 )
             )
         )
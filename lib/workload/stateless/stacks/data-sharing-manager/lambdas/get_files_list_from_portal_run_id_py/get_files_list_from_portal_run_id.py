@@ -9,10 +9,15 @@ Given a portal run id, this script will return a list of all files associated wi
 
 # FIXME - also need to filter out files that should not be shared
 # FIXME - but this will take some time to sort. For now, just return all files
+
+The per-workflow regexes are compiled once per container into a FileSelector,
+which uses a single literal prefilter so that most files are rejected in one pass,
+and only the candidate files are run against the individual rules.
 """
 
 import typing
-from typing import List, Dict, Any
+from functools import lru_cache
+from typing import List, Dict, Any, Optional
 
 from filemanager_tools import (
     FileObject,
@@ -87,6 +92,128 @@ REGEX_FILES_BY_WORKFLOW_NAME = {
 }
 
 
+def get_required_literal_from_pattern(pattern: str) -> str:
+    """
+    Get the longest run of literal characters in a regex pattern.
+    Any string the pattern matches must contain this literal.
+
+    We're conservative here, patterns with alternations, groups, character classes or quantifiers
+    return an empty literal (i.e no prefilter), any other metacharacter ends the run.
+    :param pattern:
+    :return:
+    """
+    if re.search(r"[|()\[\]*+?{}]", pattern):
+        return ""
+
+    literal_runs = []
+    current_run = ""
+    char_iter = 0
+    while char_iter < len(pattern):
+        char = pattern[char_iter]
+        if char == "\\" and char_iter + 1 < len(pattern) and not pattern[char_iter + 1].isalnum():
+            # Escaped metacharacter, i.e '\.'
+            current_run += pattern[char_iter + 1]
+            char_iter += 2
+            continue
+        if char == "\\":
+            # Escaped character class, i.e '\d'
+            literal_runs.append(current_run)
+            current_run = ""
+            char_iter += 2
+            continue
+        if char in ".^$":
+            literal_runs.append(current_run)
+            current_run = ""
+            char_iter += 1
+            continue
+        current_run += char
+        char_iter += 1
+    literal_runs.append(current_run)
+
+    return max(literal_runs, key=len)
+
+
+class FileSelector:
+    """
+    Select files by a list of regex rules in a single pass
+
+    The required literals of each rule are compiled into one alternation,
+    files without any of these literals cannot match any rule and are rejected with one search.
+    The remaining candidate files are checked against the rules whose literal they contain.
+
+    The selector is chosen for its worst case across the workflows rather than for raw speed,
+    a single alternation of the rules is a little faster on the rule lists with literal suffixes (i.e. umccrise),
+    but degrades on rule lists such as wts, where the selector is more than twice as fast.
+    """
+    def __init__(self, regex_list: List[re.Pattern]):
+        self.rules = list(map(
+            lambda regex_iter_: (get_required_literal_from_pattern(regex_iter_.pattern), regex_iter_),
+            regex_list
+        ))
+
+        # If any rule has no required literal, we cannot prefilter
+        if any(map(lambda rule_iter_: rule_iter_[0] == "", self.rules)):
+            self.prefilter = None
+        else:
+            self.prefilter = re.compile(
+                "|".join(map(
+                    re.escape,
+                    # Longest first so that the alternation doesn't short circuit on a substring
+                    sorted(set(map(lambda rule_iter_: rule_iter_[0], self.rules)), key=len, reverse=True)
+                ))
+            )
+
+    def get_matching_rule(self, key: str) -> Optional[re.Pattern]:
+        """
+        Return the first rule (in list order) that matches the key, or None
+        :param key:
+        :return:
+        """
+        if self.prefilter is not None and self.prefilter.search(key) is None:
+            return None
+
+        for literal_iter_, regex_iter_ in self.rules:
+            if literal_iter_ in key and regex_iter_.search(key):
+                return regex_iter_
+
+        return None
+
+    def is_selected(self, key: str) -> bool:
+        return self.get_matching_rule(key) is not None
+
+
+@lru_cache(maxsize=None)
+def get_file_selector(workflow_name: str) -> FileSelector:
+    """
+    Compile the file selector once per container per workflow
+    :param workflow_name:
+    :return:
+    """
+    return FileSelector(REGEX_FILES_BY_WORKFLOW_NAME[workflow_name])
+
+
+def filter_file_objects_by_workflow_name(
+        file_obj_list: List[FileObject],
+        workflow_name: str
+) -> List[FileObject]:
+    """
+    Filter the file objects to those we want to share for this workflow type.
+    Workflows without rules return all files.
+    :param file_obj_list:
+    :param workflow_name:
+    :return:
+    """
+    if workflow_name not in REGEX_FILES_BY_WORKFLOW_NAME:
+        return file_obj_list
+
+    file_selector = get_file_selector(workflow_name)
+
+    return list(filter(
+        lambda file_object_iter_: file_selector.is_selected(file_object_iter_['key']),
+        file_obj_list
+    ))
+
+
 def handler(event: Dict, context: Any) -> Dict[str, List[str]]:
     """
     Given a portal run id, this script will return a list of all files associated with that run id.
@@ -108,63 +235,34 @@ def handler(event: Dict, context: Any) -> Dict[str, List[str]]:
     )
 
     # Filter files by workflow type
-    if workflow_object['workflowName'] in REGEX_FILES_BY_WORKFLOW_NAME:
-        file_object_list_filtered = []
-        for file_object_iter_ in file_obj_list:
-            for regex_iter_ in REGEX_FILES_BY_WORKFLOW_NAME[workflow_object['workflowName']]:
-                if regex_iter_.search(file_object_iter_['key']):
-                    file_object_list_filtered.append(file_object_iter_)
-                    break
-    else:
-        file_object_list_filtered = file_obj_list
-
-    # Sort by relative paths
-    relative_paths = list(set(list(map(
-        lambda file_obj_iter_: re.match(f'.*/{portal_run_id}/(.*)', file_obj_iter_['key']).group(1),
-        file_object_list_filtered
-    ))))
-
-    # If we have more than one file in the relative path
+    file_object_list_filtered = filter_file_objects_by_workflow_name(
+        file_obj_list,
+        workflow_object['workflowName']
+    )
+
+    # Group by key, we may have multiple copies (events) of this file
+    file_objects_by_key: Dict[str, List[FileObject]] = {}
+    for file_object_iter_ in file_object_list_filtered:
+        file_objects_by_key.setdefault(file_object_iter_['key'], []).append(file_object_iter_)
+
+    # Filter out any keys that are marked as deleted
     file_object_list_filtered_with_no_deleted_marker = []
-    for rel_path in relative_paths:
-        files_matching_rel_path = sorted(
-            list(filter(
-                lambda file_object_iter_: re.match(f'.*/{portal_run_id}/{rel_path}$', file_object_iter_['key']),
-                file_object_list_filtered
-            )),
-            key=lambda file_object_iter_: file_object_iter_['eventTime'], reverse=True
-        )
-        # Now we need to group by the full uri path, we may have multiple copies of this file
-        # Filter out any copies that are marked as deleted
-        key_list = list(set(list(map(
-            lambda file_object_iter_: file_object_iter_['key'],
-            files_matching_rel_path
-        ))))
+    for key_iter_, file_objects_matching_key in file_objects_by_key.items():
+        if "Deleted" in map(lambda file_object_iter_: file_object_iter_['eventType'], file_objects_matching_key):
+            # This file has been deleted
+            continue
 
-        for key_iter_ in key_list:
-            try:
-                _ = list(map(
-                    lambda file_object_iter_: file_object_iter_['eventType'],
-                    list(filter(
-                        lambda file_object_iter_: file_object_iter_['key'] == key_iter_,
-                        files_matching_rel_path
-                    ))
-                )).index("Deleted")
-            except ValueError:
-                # This file has not been deleted
-                # Take the object with an ingest id
-                file_object_list_filtered_with_no_deleted_marker.append(
-                    next(filter(
-                        lambda file_object_iter_: (
-                                file_object_iter_['key'] == key_iter_ and
-                                file_object_iter_['ingestId'] is not None
-                        ),
-                        files_matching_rel_path
-                    ))
+        # This file has not been deleted
+        # Take the latest object with an ingest id
+        file_object_list_filtered_with_no_deleted_marker.append(
+            next(filter(
+                lambda file_object_iter_: file_object_iter_['ingestId'] is not None,
+                sorted(
+                    file_objects_matching_key,
+                    key=lambda file_object_iter_: file_object_iter_['eventTime'], reverse=True
                 )
-            else:
-                # This file has been deleted
-                continue
+            ))
+        )
 
     return {
         "ingestIdList": list(set(list(map(
@@ -0,0 +1,129 @@
+import random
+import re
+import time
+import unittest
+from os import environ
+from unittest.mock import patch
+
+from get_files_list_from_portal_run_id import (
+    REGEX_FILES_BY_WORKFLOW_NAME,
+    FileSelector,
+    get_required_literal_from_pattern,
+    handler,
+)
+
+PORTAL_RUN_ID = "2024111463c05a04"
+
+FILE_NAME_SUFFIXES = [
+    "multiqc_report.html", "somatic.pcgr.html", "somatic-PASS.vcf.gz", "somatic-PASS.vcf.gz.tbi",
+    "manta.vcf.gz", "purple.cnv.gene.tsv", "tumor.amber.baf.pcf", "tumor.cobalt.ratio.tsv",
+    "tumor.bam", "tumor.bam.bai", "normal.bam.md5sum", "quant.genes.sf", "quant.sf.gz",
+    "fusion_candidates.final", "random.json", "random.txt", "other.vcf", "indel.tsv.gz",
+    "sample-indel.tsv.gz", "sample.chr.len", "Xbam", "amber_version",
+]
+
+
+def generate_file_objects(count: int, seed: int = 0):
+    random_generator = random.Random(seed)
+    file_objects = []
+    for file_iter in range(count):
+        key = (
+            f"analysis/workflow/{PORTAL_RUN_ID}/"
+            f"dir_{random_generator.randint(0, 20)}/"
+            f"file_{file_iter}.{random_generator.choice(FILE_NAME_SUFFIXES)}"
+        )
+        file_objects.append({
+            "key": key,
+            "ingestId": f"ingest-{file_iter}",
+            "eventTime": f"2024-11-14T00:00:{file_iter % 60:02d}Z",
+            "eventType": "Created",
+        })
+    return file_objects
+
+
+def select_with_regex_loop(regex_list, key):
+    for regex_iter_ in regex_list:
+        if regex_iter_.search(key):
+            return regex_iter_
+    return None
+
+
+class FileSelectorUnitTest(unittest.TestCase):
+    def test_required_literal(self):
+        self.assertEqual(get_required_literal_from_pattern(r"somatic-PASS\.vcf\.gz$"), "somatic-PASS.vcf.gz")
+        self.assertEqual(get_required_literal_from_pattern(r".bam.md5sum$"), "md5sum")
+        self.assertEqual(get_required_literal_from_pattern(r"L\d_R1\.fastq"), "_R1.fastq")
+        self.assertEqual(get_required_literal_from_pattern(r"L\d+_R1\.fastq"), "")
+        self.assertEqual(get_required_literal_from_pattern(r"(tumor|normal)\.bam$"), "")
+
+    def test_equivalent_to_regex_loop(self):
+        """
+        The selector must pick the same rule as running each regex in turn
+        """
+        file_objects = generate_file_objects(20000)
+        for workflow_name, regex_list in REGEX_FILES_BY_WORKFLOW_NAME.items():
+            file_selector = FileSelector(regex_list)
+            for file_object in file_objects:
+                self.assertIs(
+                    file_selector.get_matching_rule(file_object['key']),
+                    select_with_regex_loop(regex_list, file_object['key']),
+                    msg=f"{workflow_name}: {file_object['key']}"
+                )
+
+    def test_no_prefilter_for_complex_patterns(self):
+        file_selector = FileSelector([re.compile(r"(tumor|normal)\.bam$"), re.compile(r"\.html$")])
+        self.assertIsNone(file_selector.prefilter)
+        self.assertTrue(file_selector.is_selected("a/b/tumor.bam"))
+        self.assertFalse(file_selector.is_selected("a/b/other.bam"))
+
+    def test_handler_skips_deleted_files(self):
+        file_objects = [
+            {"key": f"a/{PORTAL_RUN_ID}/x/tumor.bam", "ingestId": "1", "eventTime": "2024-01-01", "eventType": "Created"},
+            {"key": f"a/{PORTAL_RUN_ID}/x/tumor.bam", "ingestId": "2", "eventTime": "2024-01-02", "eventType": "Created"},
+            {"key": f"a/{PORTAL_RUN_ID}/y/tumor.bam", "ingestId": "3", "eventTime": "2024-01-01", "eventType": "Created"},
+            {"key": f"a/{PORTAL_RUN_ID}/y/tumor.bam", "ingestId": "3", "eventTime": "2024-01-02", "eventType": "Deleted"},
+            {"key": f"a/{PORTAL_RUN_ID}/x/random.txt", "ingestId": "4", "eventTime": "2024-01-01", "eventType": "Created"},
+        ]
+        with patch("get_files_list_from_portal_run_id.list_files_from_portal_run_id", return_value=file_objects):
+            response = handler(
+                {
+                    "workflowRunObject": {
+                        "portalRunId": PORTAL_RUN_ID,
+                        "workflowName": "tumor-normal",
+                    }
+                },
+                None
+            )
+
+        self.assertEqual(response["ingestIdList"], ["2"])
+
+
+@unittest.skipUnless(environ.get("RUN_BENCHMARKS"), "set RUN_BENCHMARKS to run the benchmarks")
+class FileSelectorBenchmark(unittest.TestCase):
+    def test_benchmark(self):
+        """
+        Time each selection method on a synthetic 100k file listing, run with
+            RUN_BENCHMARKS=1 python -m unittest tests.test_get_files_list_from_portal_run_id
+        """
+        benchmark_file_objects = generate_file_objects(100000)
+        for workflow_name, regex_list in REGEX_FILES_BY_WORKFLOW_NAME.items():
+            alternation_regex = re.compile("|".join(map(lambda regex_iter_: f"(?:{regex_iter_.pattern})", regex_list)))
+            file_selector = FileSelector(regex_list)
+
+            selected_counts = set()
+            for name, is_selected in [
+                ("regex loop", lambda key: select_with_regex_loop(regex_list, key) is not None),
+                ("alternation", lambda key: alternation_regex.search(key) is not None),
+                ("file selector", file_selector.is_selected),
+            ]:
+                start_time = time.perf_counter()
+                selected_count = sum(map(lambda file_object_iter_: is_selected(file_object_iter_["key"]), benchmark_file_objects))
+                print(f"{workflow_name:<16} {name:<14} {selected_count} of {len(benchmark_file_objects)} files selected in {time.perf_counter() - start_time:.2f} s")
+                selected_counts.add(selected_count)
+
+            # Each method selects the same files
+            self.assertEqual(len(selected_counts), 1, msg=workflow_name)
+
+
+if __name__ == "__main__":
+    unittest.main()
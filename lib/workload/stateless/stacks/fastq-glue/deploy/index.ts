@@ -187,57 +187,6 @@ export class FastqGlueStack extends Stack {
     // Grant permissions for the state machine to write to the event bus
     props.eventBus.grantPutEventsTo(fastqSetGenerationStateMachine);
 
-    // Because this steps execution uses a distributed map running an express step function, we
-    // have to wire up some extra permissions
-    // Grant the state machine's role to execute itself
-    // However we cannot just grant permission to the role as this will result in a circular dependency
-    // between the state machine and the role
-    // Instead we use the workaround here - https://github.com/aws/aws-cdk/issues/28820#issuecomment-1936010520
-    // fastqSetGenerationStateMachine.grantStartExecution(fastqSetGenerationStateMachine.role);
-    const distributedMapPolicy = new iam.Policy(this, 'fastq-set-sfn-distributed-map-policy', {
-      document: new iam.PolicyDocument({
-        statements: [
-          new iam.PolicyStatement({
-            resources: [fastqSetGenerationStateMachine.stateMachineArn],
-            actions: ['states:StartExecution'],
-          }),
-          new iam.PolicyStatement({
-            resources: [
-              `arn:aws:states:${cdk.Aws.REGION}:${cdk.Aws.ACCOUNT_ID}:execution:${fastqSetGenerationStateMachine.stateMachineName}/*:*`,
-            ],
-            actions: ['states:RedriveExecution'],
-          }),
-        ],
-      }),
-    });
-
-    // Add the policy to the state machine role
-    fastqSetGenerationStateMachine.role.attachInlinePolicy(distributedMapPolicy);
-
-    // Treat the state machine as if it's running a nested statemachine
-    // See https://stackoverflow.com/questions/60612853/nested-step-function-in-a-step-function-unknown-error-not-authorized-to-cr
-    fastqSetGenerationStateMachine.addToRolePolicy(
-      new iam.PolicyStatement({
-        resources: [
-          `arn:aws:events:${cdk.Aws.REGION}:${cdk.Aws.ACCOUNT_ID}:rule/StepFunctionsGetEventsForStepFunctionsExecutionRule`,
-        ],
-        actions: ['events:PutTargets', 'events:PutRule', 'events:DescribeRule'],
-      })
-    );
-
-    // Redrive execution requires permissions to list state machine executions
-    NagSuppressions.addResourceSuppressions(
-      [fastqSetGenerationStateMachine, distributedMapPolicy],
-      [
-        {
-          id: 'AwsSolutions-IAM5',
-          reason:
-            'grantRead uses asterisk at the end of executions, as we need permissions for all execution invocations',
-        },
-      ],
-      true
-    );
-
     return fastqSetGenerationStateMachine;
   }
 
@@ -345,7 +294,9 @@ export class FastqGlueStack extends Stack {
       architecture: lambda.Architecture.ARM_64,
       index: lambdaNameToSnakeCase + '.py',
       handler: 'handler',
-      timeout: Duration.seconds(60),
+      // The fastq sets of a whole run are created in a single invocation
+      timeout:
+        props.lambdaName == 'createFastqSetObject' ? Duration.seconds(300) : Duration.seconds(60),
       memorySize: 2048,
       layers: layers,
     });
@@ -429,6 +380,58 @@ export class FastqGlueStack extends Stack {
         props.gDriveAuthJsonSsmParameterObject.grantRead(
           this.lambdaObjects[lambdaName].currentVersion
         );
+
+        // Tracking sheet snapshots are stored in the cache bucket, keyed by sheet revision
+        const trackingSheetSnapshotPrefix = `${props.cacheBucketProps.prefix}tracking-sheet-snapshots/`;
+        this.lambdaObjects[lambdaName].addEnvironment(
+          'TRACKING_SHEET_SNAPSHOT_BUCKET_NAME',
+          props.cacheBucketProps.bucket.bucketName
+        );
+        this.lambdaObjects[lambdaName].addEnvironment(
+          'TRACKING_SHEET_SNAPSHOT_PREFIX',
+          trackingSheetSnapshotPrefix
+        );
+        props.cacheBucketProps.bucket.grantReadWrite(
+          this.lambdaObjects[lambdaName].currentVersion,
+          `${trackingSheetSnapshotPrefix}*`
+        );
+        NagSuppressions.addResourceSuppressions(
+          this.lambdaObjects[lambdaName],
+          [
+            {
+              id: 'AwsSolutions-IAM5',
+              reason: 'Added permissions to the lambda function to read/write tracking sheet snapshots',
+            },
+          ],
+          true
+        );
+      }
+
+      if (lambdaName == 'indexDemultiplexStats') {
+        // Demux stats indexes are stored in the cache bucket, keyed by instrument run id and ETag
+        const demultiplexStatsIndexPrefix = `${props.cacheBucketProps.prefix}demultiplex-stats-index/`;
+        this.lambdaObjects[lambdaName].addEnvironment(
+          'DEMULTIPLEX_STATS_INDEX_BUCKET_NAME',
+          props.cacheBucketProps.bucket.bucketName
+        );
+        this.lambdaObjects[lambdaName].addEnvironment(
+          'DEMULTIPLEX_STATS_INDEX_PREFIX',
+          demultiplexStatsIndexPrefix
+        );
+        props.cacheBucketProps.bucket.grantReadWrite(
+          this.lambdaObjects[lambdaName].currentVersion,
+          `${demultiplexStatsIndexPrefix}*`
+        );
+        NagSuppressions.addResourceSuppressions(
+          this.lambdaObjects[lambdaName],
+          [
+            {
+              id: 'AwsSolutions-IAM5',
+              reason: 'Added permissions to the lambda function to read/write demux stats indexes',
+            },
+          ],
+          true
+        );
       }
     }
   }
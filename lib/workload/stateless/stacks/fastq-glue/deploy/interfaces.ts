@@ -18,7 +18,8 @@ export type LambdaNameList =
   | 'getFastqObjects' // Needs fastq_tools layer
   | 'getFileNamesFromFastqListCsv' // Needs read access to cache bucket
   | 'getLibraryIdListFromSamplesheet' // Needs sequence_tools layer
-  | 'getSampleDemultiplexStats'; // Needs read access to cache bucket
+  | 'getSampleDemultiplexStats' // Needs read access to cache bucket
+  | 'indexDemultiplexStats'; // Needs read access to cache bucket and sequence_tools layer
 
 export interface lambdaObjectProps {
   needsCacheBucketReadPermissions: boolean;
@@ -60,6 +61,11 @@ export const lambdaToRequirementsMapping: LambdaToRequirementsMappingType = {
     needsSequenceToolsLayer: true,
   },
   getSampleDemultiplexStats: {
+    needsCacheBucketReadPermissions: true,
+    needsFastqToolsLayer: false,
+    needsSequenceToolsLayer: false,
+  },
+  indexDemultiplexStats: {
     needsCacheBucketReadPermissions: true,
     needsFastqToolsLayer: false,
     needsSequenceToolsLayer: true,
@@ -1,14 +1,16 @@
 #!/usr/bin/env python3
 
 """
-Given inputs for a fastq set object, create the fastq set object
+Given inputs for the fastq set objects of an instrument run, create the fastq set objects
 
 * instrumentRunId
-* sampleBclConvertData:
+* bclConvertDataByLibrary:
   * libraryId
-  * index
-  * lane
-  * cycleCount
+  * bclConvertData:
+    * libraryId
+    * index
+    * lane
+    * cycleCount
 * sampleFileNames
   * libraryId
   * lane
@@ -56,9 +58,22 @@ The fastq set object has the following structure:
   ]
 }
 
+The fastq set objects of all libraries are created in a single request to the fastq manager.
+Libraries that already have a fastq set on this run are skipped,
+and libraries whose fastq set cannot be created (i.e. a topup or rerun of a library with a current fastq set)
+are then handled one by one.
+
+The fastq sets of a run can be well over the 256 KiB step function state limit,
+so only their ids are returned, along with the libraries that were skipped
+
+{
+  "fastqSetIdList": ["<fastqSetId>", ...],
+  "existingLibraryIdList": ["<libraryId>", ...]
+}
 """
 import typing
-from typing import Optional, List
+from io import BytesIO
+from typing import Optional, List, Set, Dict, Tuple
 from pathlib import Path
 from tempfile import TemporaryDirectory
 import boto3
@@ -70,11 +85,13 @@ import json
 import pandas as pd
 from datetime import datetime
 
-from gspread_pandas import Spread
+from gspread.urls import DRIVE_FILES_API_V3_URL
+from gspread_pandas import Spread, Client
 
 # Layer imports
 from fastq_tools import (
     create_fastq_set_object, FastqSet,
+    create_fastq_set_objects, FastqSetCreateParams, FastqSetBatchCreateStatus,
     create_fastq_list_row_object, allow_additional_fastqs_to_fastq_set,
     disallow_additional_fastqs_to_fastq_set,
     link_fastq_list_row_to_fastq_set,
@@ -84,6 +101,7 @@ from fastq_tools.utils.query_helpers import get_fastq_sets
 
 if typing.TYPE_CHECKING:
     from mypy_boto3_ssm import SSMClient
+    from mypy_boto3_s3 import S3Client
 
 # Globals
 DEFAULT_PLATFORM = "Illumina"
@@ -96,6 +114,18 @@ GDRIVE_AUTH_JSON_SSM_PARAMETER_PATH_ENV_VAR = "GDRIVE_AUTH_JSON_SSM_PARAMETER_PA
 METADATA_TRACKING_SHEET_ID_SSM_PARAMETER_PATH_ENV_VAR = "METADATA_TRACKING_SHEET_ID_SSM_PARAMETER_PATH"
 GET_YEAR_FROM_LIBRARY_ID_REGEX = re.compile(r"L(?:PRJ)?(\d{2})(?:\d{5})?")
 
+# Tracking sheet snapshots
+# The parsed sheet for a given year is stored as parquet in the cache bucket
+# keyed by the drive revision of the sheet, so we only ever download a revision once
+TRACKING_SHEET_SNAPSHOT_BUCKET_NAME_ENV_VAR = "TRACKING_SHEET_SNAPSHOT_BUCKET_NAME"
+TRACKING_SHEET_SNAPSHOT_PREFIX_ENV_VAR = "TRACKING_SHEET_SNAPSHOT_PREFIX"
+
+# Container-level caches
+# Reused across invocations for the lifetime of the lambda container
+GSPREAD_CLIENT: Optional[Client] = None
+TRACKING_SHEET_ID: Optional[str] = None
+LIBRARY_ID_INDEX_CACHE: Dict[Tuple[int, str], Set[str]] = {}
+
 
 
 def merge_dataframes(
@@ -166,23 +196,23 @@ def generate_fastq_list_row_list_from_inputs(
     ))
 
 
-def create_fastq_set_from_df(
+def get_fastq_set_create_params_from_df(
         bclconvert_data_df: pd.DataFrame,
         instrument_run_id: str,
-) -> FastqSet:
+) -> FastqSetCreateParams:
     """
-    From the merged dataframe, create the fastq set object
+    From the merged dataframe, get the fastq set create parameters
     :param instrument_run_id:
     :param bclconvert_data_df:
     :return:
     """
-    return create_fastq_set_object(
-        library={
+    return {
+        "library": {
             "libraryId": bclconvert_data_df["libraryId"].unique().item(),
         },
-        allowAdditionalFastq=False,
-        isCurrentFastqSet=True,
-        fastqSet=list(map(
+        "allowAdditionalFastq": False,
+        "isCurrentFastqSet": True,
+        "fastqSet": list(map(
             lambda index_row_iter_: FastqListRow(**dict({
                 "index": index_row_iter_[1]["index"],
                 "lane": index_row_iter_[1]["lane"],
@@ -206,6 +236,24 @@ def create_fastq_set_from_df(
             })),
             bclconvert_data_df.iterrows()
         ))
+    }
+
+
+def create_fastq_set_from_df(
+        bclconvert_data_df: pd.DataFrame,
+        instrument_run_id: str,
+) -> FastqSet:
+    """
+    From the merged dataframe, create the fastq set object
+    :param instrument_run_id:
+    :param bclconvert_data_df:
+    :return:
+    """
+    return create_fastq_set_object(
+        **get_fastq_set_create_params_from_df(
+            bclconvert_data_df=bclconvert_data_df,
+            instrument_run_id=instrument_run_id,
+        )
     )
 
 
@@ -268,15 +316,194 @@ def get_tracking_sheet_id() -> str:
     ).get("Parameter").get("Value")
 
 
-def get_metadata_sheet_for_library_year(year: int) -> pd.DataFrame:
-    metadata_sheet_df: pd.DataFrame = Spread(
-        spread=get_tracking_sheet_id(),
-        sheet=f"{year}"
+def get_s3_client() -> 'S3Client':
+    return boto3.client('s3')
+
+
+def get_gspread_client() -> Client:
+    """
+    Get the gspread client, authorised once per container
+    :return:
+    """
+    global GSPREAD_CLIENT
+
+    if GSPREAD_CLIENT is None:
+        set_google_secrets()
+        GSPREAD_CLIENT = Client()
+
+    return GSPREAD_CLIENT
+
+
+def get_cached_tracking_sheet_id() -> str:
+    """
+    The sheet id does not change over the lifetime of the container
+    :return:
+    """
+    global TRACKING_SHEET_ID
+
+    if TRACKING_SHEET_ID is None:
+        TRACKING_SHEET_ID = get_tracking_sheet_id()
+
+    return TRACKING_SHEET_ID
+
+
+def get_tracking_sheet_revision(client: Client, sheet_id: str) -> str:
+    """
+    Get the current revision of the tracking sheet from the drive api.
+    This is a metadata-only request, much cheaper than downloading the sheet itself.
+
+    We use the drive 'version' field (monotonically increasing on every change to the file)
+    and fall back to the modified time if the version is not available.
+    :param client:
+    :param sheet_id:
+    :return:
+    """
+    file_metadata = client.request(
+        "get",
+        f"{DRIVE_FILES_API_V3_URL}/{sheet_id}",
+        params={
+            "fields": "version,modifiedTime",
+            "supportsAllDrives": True,
+        }
+    ).json()
+
+    revision = file_metadata.get("version", file_metadata.get("modifiedTime"))
+
+    if revision is None:
+        raise ValueError(f"Could not get the revision of the tracking sheet {sheet_id}")
+
+    return str(revision)
+
+
+def get_tracking_sheet_snapshot_key(sheet_id: str, year: int, revision: str) -> str:
+    """
+    Content key for a snapshot of a year's tab at a given revision
+    :param sheet_id:
+    :param year:
+    :param revision:
+    :return:
+    """
+    return str(
+        Path(environ.get(TRACKING_SHEET_SNAPSHOT_PREFIX_ENV_VAR, "")) /
+        sheet_id /
+        f"{year}" /
+        f"{re.sub(r'[^A-Za-z0-9._-]', '_', revision)}.parquet"
+    )
+
+
+def download_metadata_sheet_for_library_year(client: Client, sheet_id: str, year: int) -> pd.DataFrame:
+    """
+    Download a year's tab of the tracking sheet through gspread
+    :param client:
+    :param sheet_id:
+    :param year:
+    :return:
+    """
+    return Spread(
+        spread=sheet_id,
+        sheet=f"{year}",
+        client=client
     ).sheet_to_df(index=0)
 
+
+def read_tracking_sheet_snapshot(bucket: str, key: str) -> Optional[pd.DataFrame]:
+    """
+    Read the tracking sheet snapshot from s3, returns None if the snapshot does not exist
+    :param bucket:
+    :param key:
+    :return:
+    """
+    s3_client = get_s3_client()
+
+    try:
+        response = s3_client.get_object(
+            Bucket=bucket,
+            Key=key
+        )
+    except s3_client.exceptions.NoSuchKey:
+        return None
+
+    return pd.read_parquet(BytesIO(response['Body'].read()))
+
+
+def write_tracking_sheet_snapshot(metadata_sheet_df: pd.DataFrame, bucket: str, key: str):
+    """
+    Write the tracking sheet snapshot to s3 as parquet
+    :param metadata_sheet_df:
+    :param bucket:
+    :param key:
+    :return:
+    """
+    parquet_buffer = BytesIO()
+    metadata_sheet_df.to_parquet(parquet_buffer, index=False)
+
+    get_s3_client().put_object(
+        Bucket=bucket,
+        Key=key,
+        Body=parquet_buffer.getvalue()
+    )
+
+
+def get_metadata_sheet_for_library_year(year: int, revision: Optional[str] = None) -> pd.DataFrame:
+    """
+    Get a year's tab of the tracking sheet.
+
+    If a snapshot bucket is configured, we load the snapshot for the current revision of the sheet,
+    and only download (and store) the sheet if no snapshot exists for this revision.
+    :param year:
+    :param revision:
+    :return:
+    """
+    client = get_gspread_client()
+    sheet_id = get_cached_tracking_sheet_id()
+    snapshot_bucket = environ.get(TRACKING_SHEET_SNAPSHOT_BUCKET_NAME_ENV_VAR, None)
+
+    # No snapshot bucket, just download the sheet
+    if snapshot_bucket is None:
+        return download_metadata_sheet_for_library_year(
+            client=client,
+            sheet_id=sheet_id,
+            year=year
+        ).replace("", pd.NA)
+
+    if revision is None:
+        revision = get_tracking_sheet_revision(client, sheet_id)
+
+    snapshot_key = get_tracking_sheet_snapshot_key(sheet_id, year, revision)
+
+    metadata_sheet_df = read_tracking_sheet_snapshot(snapshot_bucket, snapshot_key)
+
+    if metadata_sheet_df is None:
+        metadata_sheet_df = download_metadata_sheet_for_library_year(
+            client=client,
+            sheet_id=sheet_id,
+            year=year
+        )
+        write_tracking_sheet_snapshot(metadata_sheet_df, snapshot_bucket, snapshot_key)
+
     return metadata_sheet_df.replace("", pd.NA)
 
 
+def get_library_id_index_for_library_year(year: int) -> Set[str]:
+    """
+    Get the set of library ids in a year's tab of the tracking sheet.
+    The index is cached in the container against the sheet revision,
+    so we re-read the sheet only when the revision changes.
+    :param year:
+    :return:
+    """
+    revision = get_tracking_sheet_revision(get_gspread_client(), get_cached_tracking_sheet_id())
+
+    if (year, revision) not in LIBRARY_ID_INDEX_CACHE:
+        LIBRARY_ID_INDEX_CACHE[(year, revision)] = set(
+            get_metadata_sheet_for_library_year(
+                year, revision=revision
+            )['LibraryID'].dropna().unique().tolist()
+        )
+
+    return LIBRARY_ID_INDEX_CACHE[(year, revision)]
+
+
 def get_year_from_library_id(library_id: str):
     """
     Regex to get the year from the library id
@@ -332,11 +559,11 @@ def has_existing_fastq_set(
 def is_topup(
         library_id: str,
 ) -> bool:
-    library_id_list = get_metadata_sheet_for_library_year(
+    library_id_index = get_library_id_index_for_library_year(
         get_year_from_library_id(library_id)
-    )['LibraryID'].dropna().unique().tolist()
+    )
 
-    if f"{library_id}_topup" in library_id_list:
+    if f"{library_id}_topup" in library_id_index:
         return True
     return False
 
@@ -344,11 +571,11 @@ def is_topup(
 def is_rerun(
         library_id: str,
 ) -> bool:
-    library_id_list=get_metadata_sheet_for_library_year(
+    library_id_index = get_library_id_index_for_library_year(
         get_year_from_library_id(library_id)
-    )['LibraryID'].dropna().unique().tolist()
+    )
 
-    if f"{library_id}_rerun" in library_id_list:
+    if f"{library_id}_rerun" in library_id_index:
         return True
     return False
 
@@ -459,18 +686,20 @@ def generate_fastq_set_from_inputs(
     )
 
 
-def handler(event, context):
+def create_fastq_set_for_library(
+        instrument_run_id: str,
+        bclconvert_data_df: pd.DataFrame
+) -> FastqSet:
     """
-    Given the
-    :param event:
-    :param context:
+    Create the fastq set of a single library.
+
+    If the library already has a fastq set for this instrument run id, we just return it.
+    If the library has a current fastq set from another run, we look up the metadata tracking sheet
+    to find out if this is a topup or a rerun of the library.
+    :param instrument_run_id:
+    :param bclconvert_data_df:
     :return:
     """
-    # Get the inputs from the event
-    instrument_run_id = event["instrumentRunId"]
-    bclconvert_data_df = pd.DataFrame(event["bclConvertData"])
-    library_id = event['libraryId']
-
     # Check if has existing fastq set
     # If has existing fastq set for this instrument run id, we just return
     # Chances are we've already created the fastq set
@@ -482,7 +711,7 @@ def handler(event, context):
         return get_fastq_sets(
             library=library_id,
             instrumentRunId=instrument_run_id,
-        )
+        )[0]
 
     # If has existing fastq set for this library id
     # But not on this run
@@ -521,6 +750,86 @@ def handler(event, context):
     )
 
 
+def handler(event, context):
+    """
+    Given the instrument run id and the bclconvert data of each library on the run,
+    create the fastq set objects of the run
+    :param event:
+    :param context:
+    :return: The ids of the fastq sets created, and the libraries that already had a fastq set on this run
+    """
+    # Get the inputs from the event
+    instrument_run_id = event["instrumentRunId"]
+    bclconvert_data_df_list = list(map(
+        lambda bclconvert_data_by_library_iter_: pd.DataFrame(bclconvert_data_by_library_iter_["bclConvertData"]),
+        event["bclConvertDataByLibrary"]
+    ))
+
+    # Libraries that already have a fastq set on this run, a single query for the run
+    # Chances are we've already created these fastq sets
+    existing_library_ids = set(map(
+        lambda fastq_set_iter_: fastq_set_iter_['library']['libraryId'],
+        get_fastq_sets(
+            instrumentRunId=instrument_run_id,
+        )
+    ))
+
+    # The libraries that are skipped, listed in the output
+    existing_library_id_list = list(filter(
+        lambda library_id_iter_: library_id_iter_ in existing_library_ids,
+        map(
+            lambda bclconvert_data_df_iter_: bclconvert_data_df_iter_["libraryId"].unique().item(),
+            bclconvert_data_df_list
+        )
+    ))
+
+    bclconvert_data_df_list = list(filter(
+        lambda bclconvert_data_df_iter_: (
+            bclconvert_data_df_iter_["libraryId"].unique().item() not in existing_library_ids
+        ),
+        bclconvert_data_df_list
+    ))
+
+    if len(bclconvert_data_df_list) == 0:
+        return {
+            "fastqSetIdList": [],
+            "existingLibraryIdList": existing_library_id_list
+        }
+
+    # Create the fastq set objects of all libraries in a single request
+    fastq_set_batch_create_results = create_fastq_set_objects(
+        list(map(
+            lambda bclconvert_data_df_iter_: get_fastq_set_create_params_from_df(
+                bclconvert_data_df=bclconvert_data_df_iter_,
+                instrument_run_id=instrument_run_id,
+            ),
+            bclconvert_data_df_list
+        ))
+    )
+
+    # The fastq sets that could not be created in the batch are handled one by one
+    # i.e. a topup or a rerun of a library that already has a current fastq set
+    fastq_set_id_list = []
+    for bclconvert_data_df, fastq_set_batch_create_result in zip(
+        bclconvert_data_df_list, fastq_set_batch_create_results
+    ):
+        if fastq_set_batch_create_result['status'] == FastqSetBatchCreateStatus.CREATED.value:
+            fastq_set_id_list.append(fastq_set_batch_create_result['fastqSet']['id'])
+            continue
+
+        fastq_set_id_list.append(
+            create_fastq_set_for_library(
+                instrument_run_id=instrument_run_id,
+                bclconvert_data_df=bclconvert_data_df
+            )['id']
+        )
+
+    return {
+        "fastqSetIdList": fastq_set_id_list,
+        "existingLibraryIdList": existing_library_id_list
+    }
+
+
 # if __name__ == "__main__":
 #     import json
 #     from os import environ
@@ -533,22 +842,25 @@ def handler(event, context):
 #     print(json.dumps(
 #         handler(
 #              {
-#                  "libraryId": "L2500175",
-#                  "bclConvertData": [
-#                      {
-#                          "libraryId": "L2500175",
-#                          "index": "AACTGTAG+TGCGGCGT",
-#                          "lane": 3,
-#                          "cycleCount": 302
-#                      },
+#                  "bclConvertDataByLibrary": [
 #                      {
 #                          "libraryId": "L2500175",
-#                          "index": "AACTGTAG+TGCGGCGT",
-#                          "lane": 4,
-#                          "cycleCount": 302
+#                          "bclConvertData": [
+#                              {
+#                                  "libraryId": "L2500175",
+#                                  "index": "AACTGTAG+TGCGGCGT",
+#                                  "lane": 3,
+#                                  "cycleCount": 302
+#                              },
+#                              {
+#                                  "libraryId": "L2500175",
+#                                  "index": "AACTGTAG+TGCGGCGT",
+#                                  "lane": 4,
+#                                  "cycleCount": 302
+#                              }
+#                          ]
 #                      }
-#                  ]
-#              },
+#                  ],
 #             None
 #         ),
 #         indent=4
@@ -0,0 +1,159 @@
+import unittest
+from unittest.mock import patch
+
+import create_fastq_set_object
+
+TEST_INSTRUMENT_RUN_ID = "250320_A01052_0256_BHFCFCDSXF"
+
+
+def get_bclconvert_data_by_library(library_id: str, index: str):
+    return {
+        "libraryId": library_id,
+        "bclConvertData": [
+            {
+                "libraryId": library_id,
+                "index": index,
+                "lane": lane,
+                "cycleCount": 302
+            }
+            for lane in [3, 4]
+        ]
+    }
+
+
+class CreateFastqSetObjectsUnitTest(unittest.TestCase):
+    def setUp(self):
+        self.event = {
+            "instrumentRunId": TEST_INSTRUMENT_RUN_ID,
+            "bclConvertDataByLibrary": [
+                get_bclconvert_data_by_library("L2500001", "AACTGTAG+TGCGGCGT"),
+                get_bclconvert_data_by_library("L2500002", "CCGTAGTA+GGTACCAA"),
+                get_bclconvert_data_by_library("L2500003", "TTGACCAG+ACCTTGGA"),
+            ]
+        }
+
+        self.get_fastq_sets_patch = patch.object(create_fastq_set_object, "get_fastq_sets")
+        self.create_fastq_set_objects_patch = patch.object(create_fastq_set_object, "create_fastq_set_objects")
+        self.create_fastq_set_for_library_patch = patch.object(create_fastq_set_object, "create_fastq_set_for_library")
+
+        self.get_fastq_sets_mock = self.get_fastq_sets_patch.start()
+        self.create_fastq_set_objects_mock = self.create_fastq_set_objects_patch.start()
+        self.create_fastq_set_for_library_mock = self.create_fastq_set_for_library_patch.start()
+
+        self.get_fastq_sets_mock.return_value = []
+        self.create_fastq_set_for_library_mock.side_effect = lambda instrument_run_id, bclconvert_data_df: {
+            "id": "fqs.FALLBACK." + bclconvert_data_df["libraryId"].unique().item()
+        }
+
+    def tearDown(self):
+        patch.stopall()
+
+    def test_single_batch_create_request(self):
+        """
+        All fastq sets of the run are created in a single request
+        """
+        self.create_fastq_set_objects_mock.side_effect = lambda fastq_set_create_params_list: [
+            {
+                "status": "CREATED",
+                "library": fastq_set_create_params_iter_["library"],
+                "fastqSet": {"id": "fqs." + fastq_set_create_params_iter_["library"]["libraryId"]},
+                "detail": None,
+            }
+            for fastq_set_create_params_iter_ in fastq_set_create_params_list
+        ]
+
+        response = create_fastq_set_object.handler(self.event, None)
+
+        self.get_fastq_sets_mock.assert_called_once_with(instrumentRunId=TEST_INSTRUMENT_RUN_ID)
+        self.create_fastq_set_objects_mock.assert_called_once()
+        self.create_fastq_set_for_library_mock.assert_not_called()
+
+        fastq_set_create_params_list = self.create_fastq_set_objects_mock.call_args.args[0]
+        self.assertEqual(
+            ["L2500001", "L2500002", "L2500003"],
+            [fastq_set_create_params_iter_["library"]["libraryId"] for fastq_set_create_params_iter_ in fastq_set_create_params_list]
+        )
+        self.assertEqual(
+            [2, 2, 2],
+            [len(fastq_set_create_params_iter_["fastqSet"]) for fastq_set_create_params_iter_ in fastq_set_create_params_list]
+        )
+        # Only the ids of the fastq sets are returned
+        self.assertEqual(
+            {
+                "fastqSetIdList": ["fqs.L2500001", "fqs.L2500002", "fqs.L2500003"],
+                "existingLibraryIdList": [],
+            },
+            response
+        )
+
+    def test_existing_fastq_sets_on_run_are_skipped(self):
+        """
+        Libraries that already have a fastq set on this run are not created again
+        """
+        self.get_fastq_sets_mock.return_value = [
+            {"id": "fqs.L2500002", "library": {"libraryId": "L2500002"}},
+        ]
+        self.create_fastq_set_objects_mock.side_effect = lambda fastq_set_create_params_list: [
+            {
+                "status": "CREATED",
+                "library": fastq_set_create_params_iter_["library"],
+                "fastqSet": {"id": "fqs." + fastq_set_create_params_iter_["library"]["libraryId"]},
+                "detail": None,
+            }
+            for fastq_set_create_params_iter_ in fastq_set_create_params_list
+        ]
+
+        response = create_fastq_set_object.handler(self.event, None)
+
+        self.assertEqual(
+            {
+                "fastqSetIdList": ["fqs.L2500001", "fqs.L2500003"],
+                "existingLibraryIdList": ["L2500002"],
+            },
+            response
+        )
+
+        self.get_fastq_sets_mock.return_value = [
+            {"id": "fqs." + library_id, "library": {"libraryId": library_id}}
+            for library_id in ["L2500001", "L2500002", "L2500003"]
+        ]
+        self.create_fastq_set_objects_mock.reset_mock()
+
+        self.assertEqual(
+            {
+                "fastqSetIdList": [],
+                "existingLibraryIdList": ["L2500001", "L2500002", "L2500003"],
+            },
+            create_fastq_set_object.handler(self.event, None)
+        )
+        self.create_fastq_set_objects_mock.assert_not_called()
+
+    def test_failed_fastq_sets_fall_back_to_single_library(self):
+        """
+        Only the fastq sets that could not be created in the batch (i.e. topups or reruns) are handled one by one
+        """
+        self.create_fastq_set_objects_mock.side_effect = lambda fastq_set_create_params_list: [
+            {
+                "status": "FAILED" if fastq_set_create_params_iter_["library"]["libraryId"] == "L2500002" else "CREATED",
+                "library": fastq_set_create_params_iter_["library"],
+                "fastqSet": (
+                    None
+                    if fastq_set_create_params_iter_["library"]["libraryId"] == "L2500002"
+                    else {"id": "fqs." + fastq_set_create_params_iter_["library"]["libraryId"]}
+                ),
+                "detail": None,
+            }
+            for fastq_set_create_params_iter_ in fastq_set_create_params_list
+        ]
+
+        response = create_fastq_set_object.handler(self.event, None)
+
+        self.create_fastq_set_for_library_mock.assert_called_once()
+        self.assertEqual(
+            ["fqs.L2500001", "fqs.FALLBACK.L2500002", "fqs.L2500003"],
+            response["fastqSetIdList"]
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,122 @@
+import os
+import unittest
+from unittest.mock import patch
+
+import boto3
+import pandas as pd
+from moto import mock_aws
+
+import create_fastq_set_object
+
+TEST_BUCKET_NAME = "test-cache-bucket"
+TEST_SNAPSHOT_PREFIX = "byob-icav2/development/tracking-sheet-snapshots/"
+TEST_SHEET_ID = "test-sheet-id"
+
+
+class FakeDriveResponse:
+    def __init__(self, body: dict):
+        self.body = body
+
+    def json(self):
+        return self.body
+
+
+class FakeGspreadClient:
+    """
+    Stands in for the gspread client, only the drive metadata request is used directly
+    """
+    def __init__(self, version: str):
+        self.version = version
+
+    def request(self, method, endpoint, params=None, **kwargs):
+        return FakeDriveResponse({"version": self.version, "modifiedTime": "2025-01-01T00:00:00.000Z"})
+
+
+class FakeSpread:
+    """
+    Stands in for the gspread_pandas Spread, counts the number of downloads
+    """
+    download_count = 0
+    library_ids = []
+
+    def __init__(self, spread, sheet, client):
+        self.spread = spread
+        self.sheet = sheet
+
+    def sheet_to_df(self, index=0):
+        FakeSpread.download_count += 1
+        return pd.DataFrame({
+            "LibraryID": FakeSpread.library_ids,
+            "SubjectID": ["SBJ00001"] * len(FakeSpread.library_ids),
+        })
+
+
+@mock_aws
+class TrackingSheetSnapshotUnitTest(unittest.TestCase):
+    def setUp(self):
+        os.environ["AWS_DEFAULT_REGION"] = "ap-southeast-2"
+        os.environ[create_fastq_set_object.TRACKING_SHEET_SNAPSHOT_BUCKET_NAME_ENV_VAR] = TEST_BUCKET_NAME
+        os.environ[create_fastq_set_object.TRACKING_SHEET_SNAPSHOT_PREFIX_ENV_VAR] = TEST_SNAPSHOT_PREFIX
+
+        boto3.client("s3", region_name="ap-southeast-2").create_bucket(
+            Bucket=TEST_BUCKET_NAME,
+            CreateBucketConfiguration={"LocationConstraint": "ap-southeast-2"},
+        )
+
+        self.client = FakeGspreadClient(version="1")
+        FakeSpread.download_count = 0
+        FakeSpread.library_ids = ["L2500001", "L2500002", "L2500001_topup", ""]
+        create_fastq_set_object.LIBRARY_ID_INDEX_CACHE.clear()
+
+        patch.object(create_fastq_set_object, "GSPREAD_CLIENT", self.client).start()
+        patch.object(create_fastq_set_object, "TRACKING_SHEET_ID", TEST_SHEET_ID).start()
+        patch.object(create_fastq_set_object, "Spread", FakeSpread).start()
+
+    def tearDown(self):
+        patch.stopall()
+        del os.environ[create_fastq_set_object.TRACKING_SHEET_SNAPSHOT_BUCKET_NAME_ENV_VAR]
+        del os.environ[create_fastq_set_object.TRACKING_SHEET_SNAPSHOT_PREFIX_ENV_VAR]
+
+    def test_one_download_per_revision(self):
+        """
+        Repeated lookups against the same revision should only download the sheet once
+        """
+        for _ in range(10):
+            self.assertTrue(create_fastq_set_object.is_topup("L2500001"))
+            self.assertFalse(create_fastq_set_object.is_rerun("L2500001"))
+            self.assertFalse(create_fastq_set_object.is_topup("L2500002"))
+
+        self.assertEqual(FakeSpread.download_count, 1)
+
+        # A new container (empty in-memory index) should load the snapshot from s3 rather than download
+        create_fastq_set_object.LIBRARY_ID_INDEX_CACHE.clear()
+        self.assertTrue(create_fastq_set_object.is_topup("L2500001"))
+        self.assertEqual(FakeSpread.download_count, 1)
+
+        # New revision, new download
+        self.client.version = "2"
+        FakeSpread.library_ids = ["L2500001", "L2500002", "L2500002_rerun"]
+        self.assertTrue(create_fastq_set_object.is_rerun("L2500002"))
+        self.assertFalse(create_fastq_set_object.is_topup("L2500001"))
+        self.assertEqual(FakeSpread.download_count, 2)
+
+    def test_snapshot_stored_by_revision(self):
+        create_fastq_set_object.get_library_id_index_for_library_year(2025)
+
+        objects = boto3.client("s3", region_name="ap-southeast-2").list_objects_v2(
+            Bucket=TEST_BUCKET_NAME
+        )["Contents"]
+
+        self.assertEqual(
+            [s3_obj["Key"] for s3_obj in objects],
+            [f"{TEST_SNAPSHOT_PREFIX}{TEST_SHEET_ID}/2025/1.parquet"]
+        )
+
+    def test_empty_cells_are_dropped_from_index(self):
+        library_id_index = create_fastq_set_object.get_library_id_index_for_library_year(2025)
+
+        self.assertEqual(library_id_index, {"L2500001", "L2500002", "L2500001_topup"})
+
+
+if __name__ == "__main__":
+    unittest.main()
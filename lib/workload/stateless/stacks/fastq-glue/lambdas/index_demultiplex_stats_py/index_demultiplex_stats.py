@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+
+"""
+Index the demux stats of an instrument run
+
+Run once per instrument run (before the libraries are batched),
+stream the demux stats csv, and index the demux data of each sample by lane, in the following format:
+
+{
+    "L2401544": [
+        {
+            "sampleId": "L2401544",
+            "lane": 2,
+            "readCount": 56913395,
+            "baseCountEst": 17187845290
+        },
+        ...
+    ],
+    ...
+}
+
+The index is written as json to the cache bucket, keyed by the instrument run id and the ETag of the demux stats file,
+so a rerun of the same instrument run does not parse the demux stats (or fetch the samplesheet) again.
+
+Demux stats file has the following columns:
+Lane,SampleID,Index,# Reads,# Perfect Index Reads,# One Mismatch Index Reads,# Two Mismatch Index Reads,% Reads,% Perfect Index Reads,% One Mismatch Index Reads,% Two Mismatch Index Reads
+"""
+
+# Imports
+import csv
+import json
+import re
+import typing
+import boto3
+from os import environ
+from pathlib import Path
+from urllib.parse import urlparse
+from typing import Tuple, Dict, List, Union, Any, Optional, Iterable
+
+from sequence_tools import (
+    get_sequence_object_from_instrument_run_id,
+    get_sample_sheet_from_orcabus_id
+)
+
+# Type hints
+if typing.TYPE_CHECKING:
+    from mypy_boto3_s3 import S3Client
+
+# Globals
+# The demux stats index of each instrument run is stored as json in the cache bucket
+DEMULTIPLEX_STATS_INDEX_BUCKET_NAME_ENV_VAR = "DEMULTIPLEX_STATS_INDEX_BUCKET_NAME"
+DEMULTIPLEX_STATS_INDEX_PREFIX_ENV_VAR = "DEMULTIPLEX_STATS_INDEX_PREFIX"
+
+
+# Quick funcs
+def get_s3_client() -> 'S3Client':
+    return boto3.client('s3')
+
+
+def get_bucket_key_from_s3_uri(url: str) -> Tuple[str, str]:
+    url_obj = urlparse(url)
+    return url_obj.netloc, url_obj.path.lstrip("/")
+
+
+def get_s3_etag(bucket: str, key: str) -> str:
+    """
+    Get the ETag of the demux stats file (without the surrounding quotes)
+    :param bucket:
+    :param key:
+    :return:
+    """
+    return get_s3_client().head_object(
+        Bucket=bucket,
+        Key=key
+    )['ETag'].strip('"')
+
+
+def get_demultiplex_stats_index_key(instrument_run_id: str, etag: str) -> str:
+    """
+    Content key for the demux stats index of an instrument run at a given version of the demux stats file
+    :param instrument_run_id:
+    :param etag:
+    :return:
+    """
+    return str(
+        Path(environ.get(DEMULTIPLEX_STATS_INDEX_PREFIX_ENV_VAR, "")) /
+        instrument_run_id /
+        f"{re.sub(r'[^A-Za-z0-9._-]', '_', etag)}.json"
+    )
+
+
+def demultiplex_stats_index_exists(bucket: str, key: str) -> bool:
+    s3_client = get_s3_client()
+
+    try:
+        s3_client.head_object(
+            Bucket=bucket,
+            Key=key
+        )
+    except s3_client.exceptions.ClientError as e:
+        if e.response['Error']['Code'] in ['404', 'NoSuchKey']:
+            return False
+        raise
+
+    return True
+
+
+def stream_demux_stats_csv(demux_stats_uri: str) -> Iterable[Dict[str, str]]:
+    """
+    Stream the rows of the demux stats csv, the file is never written to disk
+    Rows have the following keys:
+    Lane,SampleID,Index,# Reads,# Perfect Index Reads,# One Mismatch Index Reads,# Two Mismatch Index Reads,% Reads,% Perfect Index Reads,% One Mismatch Index Reads,% Two Mismatch Index Reads
+    :param demux_stats_uri:
+    :return:
+    """
+    bucket, key = get_bucket_key_from_s3_uri(demux_stats_uri)
+
+    response_body = get_s3_client().get_object(
+        Bucket=bucket,
+        Key=key
+    )['Body']
+
+    yield from csv.DictReader(
+        map(
+            lambda line_iter_: line_iter_.decode(),
+            response_body.iter_lines()
+        )
+    )
+
+
+def get_cycle_count_from_override_cycles(override_cycles: str) -> int:
+    read_cycle_regex_match = re.findall("(?:[yY])([0-9]+)", override_cycles)
+    if read_cycle_regex_match is None or len(read_cycle_regex_match) == 0:
+        raise ValueError("Invalid override_cycles format")
+    if len(read_cycle_regex_match) == 1:
+        return int(read_cycle_regex_match[0])
+    return int(read_cycle_regex_match[0]) + int(read_cycle_regex_match[1])
+
+
+def get_global_cycle_count(samplesheet: Dict) -> int:
+    if samplesheet['bclconvertSettings'].get("overrideCycles") is not None:
+        override_cycles = samplesheet['bclconvertSettings']['overrideCycles']
+        return get_cycle_count_from_override_cycles(override_cycles)
+    return samplesheet['reads']['read1Cycles'] + samplesheet['reads'].get('read2Cycles', None)
+
+
+def get_cycle_count_from_bclconvert_data_row(bclconvert_data_row: Dict[str, str]) -> Optional[int]:
+    if "overrideCycles" in bclconvert_data_row:
+        override_cycles = bclconvert_data_row['overrideCycles']
+        return get_cycle_count_from_override_cycles(override_cycles)
+    return None
+
+
+def get_est_count_from_samplesheet(
+        demux_stats_row: Dict[str, str],
+        samplesheet_dict: Dict[str, Dict[str, Any]],
+        global_cycle_count: int
+) -> int:
+    """
+    Get the estimated base count of a demux stats row from the samplesheet
+    :param demux_stats_row:
+    :param samplesheet_dict:
+    :param global_cycle_count:
+    :return:
+    """
+    return (
+        (
+            get_cycle_count_from_bclconvert_data_row(next(filter(
+                lambda bclconvert_data_iter_: bclconvert_data_iter_['sampleId'] == demux_stats_row['SampleID'],
+                samplesheet_dict['bclconvertData']
+            )))
+            if get_cycle_count_from_bclconvert_data_row(samplesheet_dict['bclconvertData']) is not None
+            else global_cycle_count
+        ) * int(demux_stats_row['# Reads'])
+    )
+
+
+def build_demultiplex_stats_index(
+        demux_stats_rows: Iterable[Dict[str, str]],
+        samplesheet_dict: Dict[str, Dict[str, Any]]
+) -> Dict[str, List[Dict[str, Union[str, int]]]]:
+    """
+    Index the demux data of each sample by lane, in the order of the demux stats file
+    :param demux_stats_rows:
+    :param samplesheet_dict:
+    :return:
+    """
+    global_cycle_count = get_global_cycle_count(samplesheet_dict)
+
+    demultiplex_stats_index: Dict[str, List[Dict[str, Union[str, int]]]] = {}
+
+    for demux_stats_row in demux_stats_rows:
+        demultiplex_stats_index.setdefault(demux_stats_row['SampleID'], []).append(
+            {
+                "sampleId": demux_stats_row['SampleID'],
+                "lane": int(demux_stats_row['Lane']),
+                "readCount": int(demux_stats_row['# Reads']),
+                "baseCountEst": get_est_count_from_samplesheet(
+                    demux_stats_row,
+                    samplesheet_dict,
+                    global_cycle_count
+                )
+            }
+        )
+
+    return demultiplex_stats_index
+
+
+def handler(event, context) -> Dict[str, str]:
+    """
+    Index the demux stats file of the instrument run, return the s3 uri of the index
+    :param event:
+    :param context:
+    :return:
+    """
+    # Get the demux stats uri and the instrument run id from the event
+    demux_stats_uri = event['demuxStatsUri']
+    instrument_run_id = event['instrumentRunId']
+
+    # Get the index key from the version of the demux stats file
+    index_bucket = environ[DEMULTIPLEX_STATS_INDEX_BUCKET_NAME_ENV_VAR]
+    index_key = get_demultiplex_stats_index_key(
+        instrument_run_id,
+        get_s3_etag(*get_bucket_key_from_s3_uri(demux_stats_uri))
+    )
+
+    # Only parse the demux stats file if we haven't indexed this version of it yet
+    if not demultiplex_stats_index_exists(index_bucket, index_key):
+        # Get the sequence id from the instrument run id
+        sequence_id = get_sequence_object_from_instrument_run_id(
+            instrument_run_id
+        )['orcabusId']
+
+        # Get the samplesheet from the sequence id
+        samplesheet_dict = get_sample_sheet_from_orcabus_id(
+            sequence_id
+        )['sampleSheetContent']
+
+        demultiplex_stats_index = build_demultiplex_stats_index(
+            stream_demux_stats_csv(demux_stats_uri),
+            samplesheet_dict
+        )
+
+        get_s3_client().put_object(
+            Bucket=index_bucket,
+            Key=index_key,
+            Body=json.dumps(demultiplex_stats_index).encode()
+        )
+
+    return {
+        "demuxStatsIndexUri": f"s3://{index_bucket}/{index_key}"
+    }
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+
+"""
+The demux stats index of an instrument run, and the per batch lookups against it, with moto standing in for s3
+
+Run from the index_demultiplex_stats_py directory with
+    python -m unittest discover tests
+"""
+
+import json
+import os
+import sys
+import unittest
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+import boto3
+from moto import mock_aws
+
+import index_demultiplex_stats
+
+# The lookup lambda sits next to this one
+sys.path.append(str(Path(__file__).parents[2] / "get_sample_demultiplex_stats_py"))
+import get_sample_demultiplex_stats  # noqa: E402
+
+FIXTURES_DIR = Path(__file__).parent / "fixtures"
+TEST_BUCKET_NAME = "test-cache-bucket"
+TEST_INDEX_PREFIX = "byob-icav2/development/demultiplex-stats-index/"
+TEST_INSTRUMENT_RUN_ID = "241024_A00130_0336_BHW7MVDSXC"
+TEST_DEMUX_STATS_KEY = f"byob-icav2/development/primary/{TEST_INSTRUMENT_RUN_ID}/20250324abcd1234/Reports/Demultiplex_Stats.csv"
+TEST_DEMUX_STATS_URI = f"s3://{TEST_BUCKET_NAME}/{TEST_DEMUX_STATS_KEY}"
+
+
+@mock_aws
+class IndexDemultiplexStatsUnitTest(unittest.TestCase):
+    def setUp(self):
+        os.environ["AWS_DEFAULT_REGION"] = "ap-southeast-2"
+        os.environ[index_demultiplex_stats.DEMULTIPLEX_STATS_INDEX_BUCKET_NAME_ENV_VAR] = TEST_BUCKET_NAME
+        os.environ[index_demultiplex_stats.DEMULTIPLEX_STATS_INDEX_PREFIX_ENV_VAR] = TEST_INDEX_PREFIX
+
+        self.s3_client = boto3.client("s3", region_name="ap-southeast-2")
+        self.s3_client.create_bucket(
+            Bucket=TEST_BUCKET_NAME,
+            CreateBucketConfiguration={"LocationConstraint": "ap-southeast-2"},
+        )
+        self.s3_client.put_object(
+            Bucket=TEST_BUCKET_NAME,
+            Key=TEST_DEMUX_STATS_KEY,
+            Body=(FIXTURES_DIR / "Demultiplex_Stats.csv").read_bytes()
+        )
+
+        get_sample_demultiplex_stats.DEMULTIPLEX_STATS_INDEX_CACHE.clear()
+
+        # Count the number of times the demux stats file is parsed
+        self.stream_demux_stats_csv = MagicMock(wraps=index_demultiplex_stats.stream_demux_stats_csv)
+        patch.object(index_demultiplex_stats, "stream_demux_stats_csv", self.stream_demux_stats_csv).start()
+        patch.object(
+            index_demultiplex_stats, "get_sequence_object_from_instrument_run_id",
+            MagicMock(return_value={"orcabusId": "seq.01JB8GQ6K5WZ0QJ7C6Q3ZB6VQ4"})
+        ).start()
+        patch.object(
+            index_demultiplex_stats, "get_sample_sheet_from_orcabus_id",
+            MagicMock(return_value={"sampleSheetContent": json.loads((FIXTURES_DIR / "samplesheet.json").read_text())})
+        ).start()
+
+        # Count the number of times the index is read
+        self.lookup_s3_client = MagicMock(wraps=get_sample_demultiplex_stats.get_s3_client)
+        patch.object(get_sample_demultiplex_stats, "get_s3_client", self.lookup_s3_client).start()
+
+    def tearDown(self):
+        patch.stopall()
+        del os.environ[index_demultiplex_stats.DEMULTIPLEX_STATS_INDEX_BUCKET_NAME_ENV_VAR]
+        del os.environ[index_demultiplex_stats.DEMULTIPLEX_STATS_INDEX_PREFIX_ENV_VAR]
+
+    def index_demultiplex_stats(self) -> str:
+        return index_demultiplex_stats.handler(
+            {"demuxStatsUri": TEST_DEMUX_STATS_URI, "instrumentRunId": TEST_INSTRUMENT_RUN_ID},
+            None
+        )["demuxStatsIndexUri"]
+
+    def test_lookup(self):
+        demux_stats_index_uri = self.index_demultiplex_stats()
+
+        self.assertEqual(
+            get_sample_demultiplex_stats.handler(
+                {"sampleIdList": ["L2401544", "L2401999"], "demuxStatsIndexUri": demux_stats_index_uri},
+                None
+            ),
+            {
+                "demuxDataBySample": [
+                    {
+                        "sampleId": "L2401544",
+                        "demuxData": [
+                            {"sampleId": "L2401544", "lane": 2, "readCount": 56913395, "baseCountEst": 17187845290},
+                            {"sampleId": "L2401544", "lane": 3, "readCount": 62441372, "baseCountEst": 18857294344},
+                        ]
+                    },
+                    # Not in the demux stats
+                    {
+                        "sampleId": "L2401999",
+                        "demuxData": []
+                    }
+                ]
+            }
+        )
+
+    def test_one_parse_per_run(self):
+        demux_stats_index_uri = self.index_demultiplex_stats()
+
+        # Every batch of the run looks up the same index
+        for sample_id_list in [["L2401540", "L2401541"], ["L2401544"], ["L2401545"]]:
+            demux_data_by_sample = get_sample_demultiplex_stats.handler(
+                {"sampleIdList": sample_id_list, "demuxStatsIndexUri": demux_stats_index_uri},
+                None
+            )["demuxDataBySample"]
+            self.assertEqual(
+                [demux_data_iter["sampleId"] for demux_data_iter in demux_data_by_sample],
+                sample_id_list
+            )
+
+        # A rerun of the same instrument run reuses the index
+        self.assertEqual(self.index_demultiplex_stats(), demux_stats_index_uri)
+
+        self.assertEqual(self.stream_demux_stats_csv.call_count, 1)
+        index_demultiplex_stats.get_sample_sheet_from_orcabus_id.assert_called_once()
+        self.assertEqual(self.lookup_s3_client.call_count, 1)
+
+    def test_index_key(self):
+        etag = self.s3_client.head_object(Bucket=TEST_BUCKET_NAME, Key=TEST_DEMUX_STATS_KEY)["ETag"].strip('"')
+
+        self.assertEqual(
+            self.index_demultiplex_stats(),
+            f"s3://{TEST_BUCKET_NAME}/{TEST_INDEX_PREFIX}{TEST_INSTRUMENT_RUN_ID}/{etag}.json"
+        )
+
+    def test_new_demux_stats_are_reindexed(self):
+        demux_stats_index_uri = self.index_demultiplex_stats()
+
+        # Demux stats are regenerated, i.e. the run is demultiplexed again
+        self.s3_client.put_object(
+            Bucket=TEST_BUCKET_NAME,
+            Key=TEST_DEMUX_STATS_KEY,
+            Body=(FIXTURES_DIR / "Demultiplex_Stats.csv").read_text().replace("56913395", "56913396").encode()
+        )
+
+        new_demux_stats_index_uri = self.index_demultiplex_stats()
+
+        self.assertNotEqual(new_demux_stats_index_uri, demux_stats_index_uri)
+        self.assertEqual(self.stream_demux_stats_csv.call_count, 2)
+        self.assertEqual(
+            get_sample_demultiplex_stats.handler(
+                {"sampleIdList": ["L2401544"], "demuxStatsIndexUri": new_demux_stats_index_uri},
+                None
+            )["demuxDataBySample"][0]["demuxData"][0]["readCount"],
+            56913396
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
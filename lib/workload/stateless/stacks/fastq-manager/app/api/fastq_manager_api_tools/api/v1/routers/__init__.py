@@ -3,11 +3,13 @@ import json
 from functools import reduce
 from operator import concat
 from os import environ
-from typing import List, Optional, Dict
+from typing import List, Optional, Dict, Tuple
 
 from dyntastic import A
 from fastapi import HTTPException, Query
 
+from metadata_tools import get_libraries_from_library_id_list, LibraryNotFoundError
+
 from ....events.events import put_fastq_set_update_event
 from ....models.fastq_list_row import FastqListRowData
 from ....models.fastq_set import FastqSetData, FastqSetCreate
@@ -18,41 +20,242 @@ from ....models.job import JobType, JobResponse, JobCreate, JobData
 from ....globals import RUN_QC_STATS_AWS_STEP_FUNCTION_ARN_ENV_VAR, \
     RUN_FILE_COMPRESSION_AWS_STEP_FUNCTION_ARN_ENV_VAR, \
     RUN_NTSM_COUNT_AWS_STEP_FUNCTION_ARN_ENV_VAR, RUN_NTSM_EVAL_X_Y_AWS_STEP_FUNCTION_ARN_ENV_VAR, \
-    RUN_NTSM_EVAL_X_AWS_STEP_FUNCTION_ARN_ENV_VAR, FastqSetStateChangeStatusEventsEnum
+    RUN_NTSM_EVAL_X_AWS_STEP_FUNCTION_ARN_ENV_VAR, FastqSetStateChangeStatusEventsEnum, \
+    DYNAMODB_BATCH_GET_MAX_KEYS
 
 from ....utils import get_sfn_client
 
 from ....models import JobStatus, QueryPagination
 
 
-def fastq_set_create_obj_to_fastq_set_data_obj(fastq_create_obj: FastqSetCreate) -> FastqSetData:
+def batch_get_fastq_list_rows(fastq_list_row_ids: List[str]) -> Dict[str, FastqListRowData]:
     """
-    Convert a fastq set create object to a fastq set data object
-    :param fastq_create_obj:
+    Get the fastq list rows of the ids in as few requests as possible,
+    ids that do not exist are not in the returned dict
+    :param fastq_list_row_ids:
     :return:
     """
-    # Collect each of the fastq_set objects in the fastq_create_obj
-    fastq_create_obj_dict = dict(**fastq_create_obj.model_dump(by_alias=True))
-
-    # For each of the fastq_set objects, convert them from string to FastqListRowData objects
-    fastq_set_ids: List[str] = list(map(
-        lambda fastq_list_row_id_or_obj_iter_: (
-            FastqListRowData.get(fastq_list_row_id_or_obj_iter_).id
-            if isinstance(fastq_list_row_id_or_obj_iter_, str)
-            else fastq_list_row_id_or_obj_iter_
-        ),
-        fastq_create_obj_dict['fastqSet']
+    fastq_list_row_ids = list(dict.fromkeys(fastq_list_row_ids))
+
+    fastq_list_row_obj_by_id: Dict[str, FastqListRowData] = {}
+    for chunk_start in range(0, len(fastq_list_row_ids), DYNAMODB_BATCH_GET_MAX_KEYS):
+        for fastq_list_row_obj in FastqListRowData.batch_get(
+            fastq_list_row_ids[chunk_start:chunk_start + DYNAMODB_BATCH_GET_MAX_KEYS]
+        ):
+            fastq_list_row_obj_by_id[fastq_list_row_obj.id] = fastq_list_row_obj
+
+    return fastq_list_row_obj_by_id
+
+
+def batch_query_jobs(
+        fastq_id_list: List[str],
+        job_type_list: Optional[List[JobType]] = None,
+        status_list: Optional[List[JobStatus]] = None
+) -> List[JobData]:
+    """
+    Get the jobs of many fastqs, filtered by job type and status.
+
+    Pending and running jobs are few, so when only these statuses are requested,
+    the status index is queried once per status and the jobs are filtered down to the fastq ids,
+    otherwise the fastq id index is queried once per fastq id.
+
+    Only the matching jobs are then read in full, in as few requests as possible.
+    :param fastq_id_list:
+    :param job_type_list:
+    :param status_list:
+    :return: The jobs, ordered by fastq id (as given) and then by job id
+    """
+    fastq_id_list = list(dict.fromkeys(fastq_id_list))
+    fastq_id_set = set(fastq_id_list)
+
+    if status_list is not None and 0 < len(status_list) and set(status_list).issubset({JobStatus.PENDING, JobStatus.RUNNING}):
+        job_index_objs = list(filter(
+            lambda job_index_obj_iter_: job_index_obj_iter_.fastq_id in fastq_id_set,
+            list(reduce(
+                concat,
+                list(map(
+                    lambda status_iter_: list(JobData.query(
+                        A.status == status_iter_,
+                        index="status-index",
+                    )),
+                    list(dict.fromkeys(status_list))
+                )),
+                []
+            ))
+        ))
+    else:
+        job_index_objs = list(reduce(
+            concat,
+            list(map(
+                lambda fastq_id_iter_: list(JobData.query(
+                    A.fastq_id == fastq_id_iter_,
+                    index="fastq_id-index",
+                )),
+                fastq_id_list
+            )),
+            []
+        ))
+        if status_list is not None:
+            job_index_objs = list(filter(
+                lambda job_index_obj_iter_: JobStatus(job_index_obj_iter_.status) in status_list,
+                job_index_objs
+            ))
+
+    if job_type_list is not None:
+        job_index_objs = list(filter(
+            lambda job_index_obj_iter_: JobType(job_index_obj_iter_.job_type) in job_type_list,
+            job_index_objs
+        ))
+
+    # Read the matching jobs in full
+    job_ids = list(map(lambda job_index_obj_iter_: job_index_obj_iter_.id, job_index_objs))
+    job_objs: List[JobData] = []
+    for chunk_start in range(0, len(job_ids), DYNAMODB_BATCH_GET_MAX_KEYS):
+        job_objs.extend(JobData.batch_get(job_ids[chunk_start:chunk_start + DYNAMODB_BATCH_GET_MAX_KEYS]))
+
+    fastq_id_order = dict(map(lambda fastq_id_iter_: (fastq_id_iter_[1], fastq_id_iter_[0]), enumerate(fastq_id_list)))
+
+    return sorted(
+        job_objs,
+        key=lambda job_obj_iter_: (fastq_id_order[job_obj_iter_.fastq_id], job_obj_iter_.id)
+    )
+
+
+def set_library_orcabus_ids(fastq_create_obj_list: List[FastqSetCreate]):
+    """
+    Fill in the orcabus id of each library given by library id only, in a single metadata query,
+    rather than a metadata query for every fastq set and fastq list row as each library object is validated.
+
+    If any library cannot be found, the libraries are left as is,
+    and the missing library is raised for its own fastq set only, as its library object is validated
+    :param fastq_create_obj_list:
+    :return:
+    """
+    library_objs = list(filter(
+        lambda library_obj_iter_: library_obj_iter_.orcabus_id == "" and library_obj_iter_.library_id != "",
+        list(reduce(
+            concat,
+            list(map(
+                lambda fastq_create_obj_iter_: [fastq_create_obj_iter_.library] + list(map(
+                    lambda fastq_obj_iter_: fastq_obj_iter_.library,
+                    list(filter(
+                        lambda fastq_obj_iter_: not isinstance(fastq_obj_iter_, str),
+                        fastq_create_obj_iter_.fastq_set
+                    ))
+                )),
+                fastq_create_obj_list
+            )),
+            []
+        ))
     ))
 
+    if len(library_objs) == 0:
+        return
+
+    try:
+        orcabus_id_by_library_id = dict(map(
+            lambda library_iter_: (library_iter_['libraryId'], library_iter_['orcabusId']),
+            get_libraries_from_library_id_list(
+                list(map(lambda library_obj_iter_: library_obj_iter_.library_id, library_objs))
+            )
+        ))
+    except LibraryNotFoundError:
+        return
+
+    for library_obj in library_objs:
+        library_obj.orcabus_id = orcabus_id_by_library_id[library_obj.library_id]
+
+
+def fastq_set_create_obj_to_fastq_set_data_obj(
+        fastq_create_obj: FastqSetCreate,
+        fastq_list_row_obj_by_id: Optional[Dict[str, FastqListRowData]] = None
+) -> Tuple[FastqSetData, List[FastqListRowData]]:
+    """
+    Convert a fastq set create object to a fastq set data object, and the fastq list row data objects of the set
+
+    Existing fastq list rows (given by id) are taken from fastq_list_row_obj_by_id (see batch_get_fastq_list_rows),
+    rather than a get per id
+    :param fastq_create_obj:
+    :param fastq_list_row_obj_by_id:
+    :return:
+    """
+    # Get the existing fastq list rows in the fastq set
+    if fastq_list_row_obj_by_id is None:
+        fastq_list_row_obj_by_id = batch_get_fastq_list_rows(
+            list(filter(
+                lambda fastq_obj_iter_: isinstance(fastq_obj_iter_, str),
+                fastq_create_obj.fastq_set
+            ))
+        )
+
+    # For each of the fastq_set objects, convert them from string or create objects to FastqListRowData objects
+    fastq_data_objs: List[FastqListRowData] = []
+    for fastq_obj_iter_ in fastq_create_obj.fastq_set:
+        if not isinstance(fastq_obj_iter_, str):
+            fastq_data_objs.append(FastqListRowData(**dict(fastq_obj_iter_.model_dump(by_alias=True))))
+            continue
+        if fastq_obj_iter_ not in fastq_list_row_obj_by_id:
+            raise HTTPException(
+                status_code=404,
+                detail=f"Fastq list row '{fastq_obj_iter_}' does not exist"
+            )
+        fastq_data_objs.append(fastq_list_row_obj_by_id[fastq_obj_iter_])
+
     # Create the FastqSetData object
-    return FastqSetData(
-        library=LibraryData(**dict(fastq_create_obj.library)),
-        allow_additional_fastq=fastq_create_obj.allow_additional_fastq,
-        is_current_fastq_set=fastq_create_obj.is_current_fastq_set,
-        fastq_set_ids=fastq_set_ids
+    return (
+        FastqSetData(
+            library=LibraryData(**dict(fastq_create_obj.library)),
+            allow_additional_fastq=fastq_create_obj.allow_additional_fastq,
+            is_current_fastq_set=fastq_create_obj.is_current_fastq_set,
+            fastq_set_ids=list(map(lambda fastq_data_obj_iter_: fastq_data_obj_iter_.id, fastq_data_objs))
+        ),
+        fastq_data_objs
     )
 
 
+def validate_fastq_set_data_obj(fastq_set_data_obj: FastqSetData, fastq_data_objs: List[FastqListRowData]):
+    """
+    The checks of a new fastq set that do not need the database
+
+    * The fastq set is not empty
+    * All fastq list rows are of the library of the fastq set
+    * The rgid_exts of the fastq list rows are unique
+    * All fastq list rows are valid
+    :param fastq_set_data_obj:
+    :param fastq_data_objs:
+    :return:
+    """
+    if len(fastq_data_objs) == 0:
+        raise HTTPException(
+            status_code=400,
+            detail="Fastq set contains no fastqs"
+        )
+
+    if len(set(map(lambda fastq_data_obj_iter_: fastq_data_obj_iter_.library.orcabus_id, fastq_data_objs))) > 1:
+        raise HTTPException(
+            status_code=409,
+            detail="Got multiple different library ids in the fastq objects"
+        )
+
+    if fastq_set_data_obj.library.orcabus_id != fastq_data_objs[0].library.orcabus_id:
+        raise HTTPException(
+            status_code=409,
+            detail=f"Fastq set library id does not match those of the fastq objects, "
+                   f"{fastq_set_data_obj.library.orcabus_id} != {fastq_data_objs[0].library.orcabus_id}"
+        )
+
+    if len(set(map(lambda fastq_data_obj_iter_: fastq_data_obj_iter_.rgid_ext, fastq_data_objs))) != len(fastq_data_objs):
+        raise HTTPException(
+            status_code=409,
+            detail="Fastq set contains duplicate rgid_exts"
+        )
+
+    if not all(map(lambda fastq_data_obj_iter_: fastq_data_obj_iter_.is_valid, fastq_data_objs)):
+        raise HTTPException(
+            status_code=409,
+            detail="Fastq set contains invalid fastqs"
+        )
+
 
 # Unlink a fastq set from a file cleanup
 def unlink_with_cleanup(fastq_set_obj: FastqSetData, fastq_list_row_obj: FastqListRowData):
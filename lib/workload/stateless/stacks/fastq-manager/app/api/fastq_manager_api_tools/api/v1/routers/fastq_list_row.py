@@ -17,6 +17,7 @@ This is the list of routes available
 - PATCH /fastq/{fastq_id}:runNtsm
 - PATCH /fastq/{fastq_id}:runFileCompressionInfo
 - GET /fastq/{fastq_id}/jobs
+- POST /fastq/jobs/batchQuery  Get the jobs of many fastqs, filtered by job type and status
 
 # Manual updates
 - PATCH /fastq/{fastq_id}/addQcStats
@@ -45,7 +46,7 @@ from itertools import product
 from metadata_tools import (
     get_library_orcabus_id_from_library_id
 )
-from . import run_and_save_fastq_list_row_job, get_pagination_params
+from . import run_and_save_fastq_list_row_job, get_pagination_params, batch_query_jobs
 from ....events.events import put_fastq_list_row_update_event
 from ....globals import FastqListRowStateChangeStatusEventsEnum
 
@@ -58,7 +59,10 @@ from ....models.fastq_list_row import (
 from ....models.fastq_pair import FastqPairStorageObjectPatch, FastqPairStorageObjectData
 from ....models.fastq_set import FastqSetData
 from ....models.file_compression_info import FileCompressionInfoPatch, FileCompressionInfoData
-from ....models.job import JobType, JobData, JobResponse, JobQueryPaginatedResponse
+from ....models.job import (
+    JobType, JobData, JobResponse, JobQueryPaginatedResponse,
+    JobBatchQuery, JobBatchQueryResponse
+)
 from ....models.library import LibraryData, LibraryPatch
 from ....models.ntsm import NtsmUriUpdate, NtsmUriData
 from ....models.qc import QcInformationPatch, QcInformationData
@@ -66,7 +70,8 @@ from ....models.query import LabMetadataQueryParameters, InstrumentQueryParamete
 from ....models.read_count_info import ReadCountInfoPatch, ReadCountInfoData
 from ....utils import (
     is_orcabus_ulid,
-    sanitise_fqr_orcabus_id
+    sanitise_fqr_orcabus_id,
+    sanitise_fqr_orcabus_id_sync
 )
 
 router = APIRouter()
@@ -514,6 +519,33 @@ async def get_jobs(
     )
 
 
+# - Post /jobs/batchQuery endpoint for many fastq list row ids
+@router.post(
+    "/jobs/batchQuery",
+    tags=["fastq workflow"],
+    description=dedent("""
+    Get the jobs of many fastq list row objects in a single request, optionally filtered by job type and status.<br>
+    Use <code>statusList: ["PENDING", "RUNNING"]</code> to find the fastqs that already have jobs in progress.
+    """)
+)
+async def batch_query_fastq_jobs(job_batch_query: JobBatchQuery) -> JobBatchQueryResponse:
+    try:
+        fastq_id_list = list(map(sanitise_fqr_orcabus_id_sync, job_batch_query.fastq_id_list))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return JobBatchQueryResponse(
+        results=list(map(
+            lambda job_iter_: job_iter_.to_dict(),
+            batch_query_jobs(
+                fastq_id_list=fastq_id_list,
+                job_type_list=job_batch_query.job_type_list,
+                status_list=job_batch_query.status_list,
+            )
+        ))
+    )
+
+
 # PATCHES
 @router.patch(
     "/{fastq_id}/addQcStats",
@@ -9,6 +9,7 @@ This is the list of routes available
   * allowAdditionalFastqs which can be set to TRUE, FALSE or ALL
 - GET /fastqSet/{fastqSetId} - Get a fastq set object by its orcabus id
 - CREATE /fastqSet - Create a list of fastq objects all belonging to the same fastq set id / library
+- CREATE /fastqSet/batchCreate - Create many fastq sets (i.e. every library of an instrument run) in a single request
 - GET /fastqSet/{fastqSetId}/toFastqListRows - Get fastq list rows for a given fastq set id
 - PATCH /fastqSet/{fastqSetId} - Link Fastq add a fastq object to this fastq set
 - PATCH /fastqSet/{fastqSetId} - Unlink Fastq remove a fastq object from this fastq set
@@ -26,7 +27,7 @@ This is the list of routes available
 import json
 from operator import concat
 from textwrap import dedent
-from typing import List, Optional, Union, Dict
+from typing import List, Optional, Union, Dict, Set, Tuple
 from fastapi import Depends, Query
 from fastapi.routing import APIRouter, HTTPException
 from dyntastic import A, DoesNotExist
@@ -34,11 +35,17 @@ from functools import reduce
 
 # Import metadata tools
 from metadata_tools import (
-    get_library_orcabus_id_from_library_id
+    get_library_orcabus_id_from_library_id,
+    LibraryNotFoundError
+)
+from . import (
+    unlink_with_cleanup, run_ntsm_eval, get_pagination_params,
+    batch_get_fastq_list_rows, set_library_orcabus_ids,
+    fastq_set_create_obj_to_fastq_set_data_obj, validate_fastq_set_data_obj
 )
-from . import unlink_with_cleanup, run_ntsm_eval, get_pagination_params
 from ....events.events import (
-    put_fastq_list_row_update_event, put_fastq_set_update_event
+    put_fastq_list_row_update_event, put_fastq_set_update_event,
+    put_fastq_list_row_update_events, put_fastq_set_update_events
 )
 from ....globals import FastqListRowStateChangeStatusEventsEnum, FastqSetStateChangeStatusEventsEnum
 
@@ -47,7 +54,8 @@ from ....models import BoolQueryEnum, FastqListRowDict, EmptyDict, QueryPaginati
 from ....models.fastq_list_row import FastqListRowData
 from ....models.fastq_set import (
     FastqSetData, FastqSetResponse, FastqSetListResponse, FastqSetCreate,
-    FastqSetQueryPaginatedResponse, FastqSetResponseDict
+    FastqSetQueryPaginatedResponse, FastqSetResponseDict,
+    FastqSetBatchCreate, FastqSetBatchCreateStatusEnum, FastqSetBatchCreateResponseDict
 )
 from ....models.library import LibraryData
 from ....models.merge_fastq_sets import MergePatch
@@ -454,6 +462,232 @@ async def create_fastq(fastq_set_obj_create: FastqSetCreate) -> FastqSetResponse
     # Return the fastq as a dictionary
     return fastq_set_dict
 
+
+# Create many fastq set objects
+@router.post(
+    "/batchCreate",
+    tags=["fastqset create"],
+    description=dedent("""
+    Create many Fastq List Sets in a single request, i.e. every library of an instrument run.<br>
+    Each fastq set follows the same rules as creating a single fastq set.<br>
+    All fastq sets are validated before any are written, a fastq set that fails validation is not created
+    but does not prevent the other fastq sets from being created.<br>
+    Returns a result for each fastq set, in the order of the fastq set list.
+    """)
+)
+async def batch_create_fastq_sets(fastq_set_batch_create: FastqSetBatchCreate) -> FastqSetBatchCreateResponseDict:
+    fastq_set_obj_create_list = fastq_set_batch_create.fastq_set_list
+
+    # Get the existing fastq list rows of all fastq sets at once
+    fastq_list_row_obj_by_id = batch_get_fastq_list_rows(
+        list(filter(
+            lambda fastq_obj_iter_: isinstance(fastq_obj_iter_, str),
+            list(reduce(
+                concat,
+                list(map(
+                    lambda fastq_set_obj_create_iter_: fastq_set_obj_create_iter_.fastq_set,
+                    fastq_set_obj_create_list
+                )),
+                []
+            ))
+        ))
+    )
+
+    # Get the orcabus ids of all libraries at once
+    set_library_orcabus_ids(fastq_set_obj_create_list)
+
+    # Errors by position in the fastq set list
+    error_detail_list: List[Optional[str]] = [None] * len(fastq_set_obj_create_list)
+
+    # Convert each of the fastq set create objects, and run the checks that do not need the database
+    fastq_set_data_obj_list: List[Optional[Tuple[FastqSetData, List[FastqListRowData]]]] = []
+    for idx, fastq_set_obj_create in enumerate(fastq_set_obj_create_list):
+        try:
+            fastq_set_data_obj, fastq_data_objs = fastq_set_create_obj_to_fastq_set_data_obj(
+                fastq_set_obj_create,
+                fastq_list_row_obj_by_id=fastq_list_row_obj_by_id
+            )
+            validate_fastq_set_data_obj(fastq_set_data_obj, fastq_data_objs)
+        except HTTPException as e:
+            error_detail_list[idx] = str(e.detail)
+            fastq_set_data_obj_list.append(None)
+            continue
+        except LibraryNotFoundError as e:
+            error_detail_list[idx] = e.message
+            fastq_set_data_obj_list.append(None)
+            continue
+        fastq_set_data_obj_list.append((fastq_set_data_obj, fastq_data_objs))
+
+    fastq_set_data_obj_candidates = list(filter(
+        lambda fastq_set_data_obj_iter_: fastq_set_data_obj_iter_ is not None,
+        fastq_set_data_obj_list
+    ))
+
+    # Existing fastq list rows by rgid_ext, a single index query per instrument run
+    # The rgid_ext contains the instrument run id, so the index projection is all we need
+    existing_fqr_orcabus_ids_by_rgid_ext: Dict[str, Set[str]] = {}
+    for instrument_run_id_iter_ in sorted(set(map(
+        lambda fastq_data_obj_iter_: fastq_data_obj_iter_.instrument_run_id,
+        list(reduce(
+            concat,
+            list(map(lambda fastq_set_data_obj_iter_: fastq_set_data_obj_iter_[1], fastq_set_data_obj_candidates)),
+            []
+        ))
+    ))):
+        for existing_iter in FastqListRowData.query(
+            A.instrument_run_id == instrument_run_id_iter_,
+            index="instrument_run_id-index"
+        ):
+            existing_fqr_orcabus_ids_by_rgid_ext.setdefault(existing_iter.rgid_ext, set()).add(existing_iter.id)
+
+    # Existing fastq sets by library, a single index query per library
+    # The is_current_fastq_set and allow_additional_fastq attributes are in the index projection
+    existing_fastq_sets_by_library_orcabus_id: Dict[str, List[FastqSetData]] = {}
+    for library_orcabus_id_iter_ in sorted(set(map(
+        lambda fastq_set_data_obj_iter_: fastq_set_data_obj_iter_[0].library.orcabus_id,
+        list(filter(
+            lambda fastq_set_data_obj_iter_: (
+                fastq_set_data_obj_iter_[0].is_current_fastq_set or
+                fastq_set_data_obj_iter_[0].allow_additional_fastq
+            ),
+            fastq_set_data_obj_candidates
+        ))
+    ))):
+        existing_fastq_sets_by_library_orcabus_id[library_orcabus_id_iter_] = list(FastqSetData.query(
+            A.library_orcabus_id == library_orcabus_id_iter_,
+            index="library_orcabus_id-index"
+        ))
+
+    # Check each fastq set against the database, and against the fastq sets before it in the batch
+    batch_rgid_exts: Set[str] = set()
+    batch_current_library_orcabus_ids: Set[str] = set()
+    batch_allow_additional_library_orcabus_ids: Set[str] = set()
+    for idx, fastq_set_data_obj_iter_ in enumerate(fastq_set_data_obj_list):
+        if fastq_set_data_obj_iter_ is None:
+            continue
+        fastq_set_data_obj, fastq_data_objs = fastq_set_data_obj_iter_
+        library_orcabus_id = fastq_set_data_obj.library.orcabus_id
+        rgid_exts = list(map(lambda fastq_data_obj_iter_: fastq_data_obj_iter_.rgid_ext, fastq_data_objs))
+
+        # Confirm that the fastq objects do not already exist
+        errors = []
+        for rgid_ext_iter_ in rgid_exts:
+            if len(
+                existing_fqr_orcabus_ids_by_rgid_ext.get(rgid_ext_iter_, set()).difference(
+                    fastq_set_data_obj.fastq_set_ids
+                )
+            ) > 0:
+                errors.append(f"Fastq with rgid_ext '{rgid_ext_iter_}' already exists")
+            elif rgid_ext_iter_ in batch_rgid_exts:
+                errors.append(f"Fastq with rgid_ext '{rgid_ext_iter_}' is in another fastq set of this batch")
+        if len(errors) > 0:
+            error_detail_list[idx] = "; ".join(map(str, errors))
+            continue
+
+        # Check for this library if there is a current fastq set
+        if fastq_set_data_obj.is_current_fastq_set and (
+            library_orcabus_id in batch_current_library_orcabus_ids or
+            any(map(
+                lambda fastq_set_iter_: fastq_set_iter_.is_current_fastq_set,
+                existing_fastq_sets_by_library_orcabus_id[library_orcabus_id]
+            ))
+        ):
+            error_detail_list[idx] = (
+                f"Cannot create fastq set. Another fastq set in library '{fastq_set_data_obj.library.library_id}' "
+                f"is already the current fastq set"
+            )
+            continue
+
+        # Check for this library if there is a fastq set accepting additional fastqs
+        if fastq_set_data_obj.allow_additional_fastq and (
+            library_orcabus_id in batch_allow_additional_library_orcabus_ids or
+            any(map(
+                lambda fastq_set_iter_: fastq_set_iter_.allow_additional_fastq,
+                existing_fastq_sets_by_library_orcabus_id[library_orcabus_id]
+            ))
+        ):
+            error_detail_list[idx] = (
+                f"Cannot create fastq set. Another fastq set in library '{library_orcabus_id}' "
+                f"is already accepting additional fastqs."
+            )
+            continue
+
+        batch_rgid_exts.update(rgid_exts)
+        if fastq_set_data_obj.is_current_fastq_set:
+            batch_current_library_orcabus_ids.add(library_orcabus_id)
+        if fastq_set_data_obj.allow_additional_fastq:
+            batch_allow_additional_library_orcabus_ids.add(library_orcabus_id)
+
+    # The fastq sets that passed all checks
+    fastq_set_data_obj_create_list = list(map(
+        lambda idx_iter_: fastq_set_data_obj_list[idx_iter_],
+        list(filter(
+            lambda idx_iter_: error_detail_list[idx_iter_] is None,
+            range(len(fastq_set_data_obj_list))
+        ))
+    ))
+
+    # Add the fastq_set_id to the fastq objects, and write all fastq objects in batches
+    with FastqListRowData.batch_writer():
+        for fastq_set_data_obj, fastq_data_objs in fastq_set_data_obj_create_list:
+            for fastq_obj in fastq_data_objs:
+                fastq_obj.fastq_set_id = fastq_set_data_obj.id
+                fastq_obj.save()
+
+    # Write all fastq sets in batches
+    with FastqSetData.batch_writer():
+        for fastq_set_data_obj, _ in fastq_set_data_obj_create_list:
+            fastq_set_data_obj.save()
+
+    # Generate the fastq set dictionaries from the fastq list rows we already have
+    fastq_set_dict_by_id: Dict[str, FastqSetResponseDict] = dict(map(
+        lambda fastq_set_data_obj_iter_: (
+            fastq_set_data_obj_iter_[0].id,
+            fastq_set_data_obj_iter_[0].to_dict(fastq_list_row_list=fastq_set_data_obj_iter_[1])
+        ),
+        fastq_set_data_obj_create_list
+    ))
+
+    # Add in the create events
+    put_fastq_list_row_update_events(
+        fastq_list_row_response_object_list=list(reduce(
+            concat,
+            list(map(
+                lambda fastq_set_dict_iter_: fastq_set_dict_iter_['fastqSet'],
+                fastq_set_dict_by_id.values()
+            )),
+            []
+        )),
+        event_status=FastqListRowStateChangeStatusEventsEnum.FASTQ_LIST_ROW_CREATED
+    )
+
+    # Add in the fastq set created events
+    put_fastq_set_update_events(
+        fastq_set_response_object_list=list(fastq_set_dict_by_id.values()),
+        event_status=FastqSetStateChangeStatusEventsEnum.FASTQ_SET_CREATED,
+    )
+
+    # Return a result for each fastq set
+    return {
+        "results": list(map(
+            lambda idx_iter_: {
+                "status": (
+                    FastqSetBatchCreateStatusEnum.CREATED
+                    if error_detail_list[idx_iter_] is None
+                    else FastqSetBatchCreateStatusEnum.FAILED
+                ),
+                "library": fastq_set_obj_create_list[idx_iter_].library.model_dump(by_alias=True),
+                "fastqSet": (
+                    fastq_set_dict_by_id[fastq_set_data_obj_list[idx_iter_][0].id]
+                    if error_detail_list[idx_iter_] is None
+                    else None
+                ),
+                "detail": error_detail_list[idx_iter_],
+            },
+            range(len(fastq_set_obj_create_list))
+        ))
+    }
+
 # Special 'Gets' need to go above the direct get to prevent conflicts
 # Where fastapi thinks that fqs.12345:validateNtsmInternal is a fastq set id
 # GET /fastqSet/{fastqSetId}:validateNtsmInternal
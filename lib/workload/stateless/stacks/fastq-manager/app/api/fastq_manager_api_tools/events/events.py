@@ -11,7 +11,7 @@ from ..globals import (
     EVENT_SOURCE_ENV_VAR,
     EVENT_DETAIL_TYPE_FASTQ_LIST_ROW_STATE_CHANGE_ENV_VAR,
     EVENT_DETAIL_TYPE_FASTQ_SET_STATE_CHANGE_ENV_VAR, FastqListRowStateChangeStatusEventsEnum,
-    FastqSetStateChangeStatusEventsEnum
+    FastqSetStateChangeStatusEventsEnum, EVENT_BRIDGE_PUT_EVENTS_MAX_ENTRIES
 )
 from ..models.fastq_list_row import FastqListRowResponseDict
 from ..models.fastq_set import FastqSetResponseDict
@@ -33,24 +33,44 @@ def put_event(
         event_status: str,
         event_detail: Dict
 ):
+    put_events(
+        event_detail_type=event_detail_type,
+        event_status=event_status,
+        event_detail_list=[event_detail]
+    )
+
+
+def put_events(
+        event_detail_type: str,
+        event_status: str,
+        event_detail_list: List[Dict]
+):
+    """
+    Put the events to the event bus, in as few requests as possible
+    """
     # DEBUG
     if environ.get(EVENT_BUS_NAME_ENV_VAR) == 'local':
         return
-    get_event_client().put_events(
-        Entries=[
-            {
-                'EventBusName': environ[EVENT_BUS_NAME_ENV_VAR],
-                'Source': environ[EVENT_SOURCE_ENV_VAR],
-                'DetailType': event_detail_type,
-                'Detail': json.dumps(
-                    dict(
-                        status=event_status,
-                        **event_detail,
-                    ),
+
+    entries = list(map(
+        lambda event_detail_iter_: {
+            'EventBusName': environ[EVENT_BUS_NAME_ENV_VAR],
+            'Source': environ[EVENT_SOURCE_ENV_VAR],
+            'DetailType': event_detail_type,
+            'Detail': json.dumps(
+                dict(
+                    status=event_status,
+                    **event_detail_iter_,
                 ),
-            },
-        ]
-    )
+            ),
+        },
+        event_detail_list
+    ))
+
+    for entries_start in range(0, len(entries), EVENT_BRIDGE_PUT_EVENTS_MAX_ENTRIES):
+        get_event_client().put_events(
+            Entries=entries[entries_start:entries_start + EVENT_BRIDGE_PUT_EVENTS_MAX_ENTRIES]
+        )
 
 # Update events
 def put_fastq_list_row_update_event(
@@ -79,3 +99,31 @@ def put_fastq_set_update_event(
         event_status=event_status.value,
         event_detail=fastq_set_response_object
     )
+
+
+def put_fastq_list_row_update_events(
+        fastq_list_row_response_object_list: List[Union[FastqListRowResponseDict, Dict]],
+        event_status: FastqListRowStateChangeStatusEventsEnum
+):
+    """
+    Put an update event for each of the fastq list rows to the event bus.
+    """
+    put_events(
+        event_detail_type=environ[EVENT_DETAIL_TYPE_FASTQ_LIST_ROW_STATE_CHANGE_ENV_VAR],
+        event_status=event_status.value,
+        event_detail_list=fastq_list_row_response_object_list,
+    )
+
+
+def put_fastq_set_update_events(
+        fastq_set_response_object_list: List[Union[FastqSetResponseDict, Dict]],
+        event_status: FastqSetStateChangeStatusEventsEnum
+):
+    """
+    Put an update event for each of the fastq sets to the event bus.
+    """
+    put_events(
+        event_detail_type=environ[EVENT_DETAIL_TYPE_FASTQ_SET_STATE_CHANGE_ENV_VAR],
+        event_status=event_status.value,
+        event_detail_list=fastq_set_response_object_list
+    )
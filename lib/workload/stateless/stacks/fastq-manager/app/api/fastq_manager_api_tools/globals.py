@@ -19,6 +19,10 @@ RUN_FILE_COMPRESSION_AWS_STEP_FUNCTION_ARN_ENV_VAR = "FILE_COMPRESSION_AWS_STEP_
 
 DEFAULT_ROWS_PER_PAGE = 100
 
+# Batch limits
+DYNAMODB_BATCH_GET_MAX_KEYS = 100
+EVENT_BRIDGE_PUT_EVENTS_MAX_ENTRIES = 10
+
 # Envs
 EVENT_BUS_NAME_ENV_VAR = "EVENT_BUS_NAME"
 EVENT_SOURCE_ENV_VAR = "EVENT_SOURCE"
@@ -1,6 +1,7 @@
 #!/usr/bin/env python3
 
 # Standard imports
+from enum import Enum
 from time import sleep
 from functools import reduce
 from operator import concat
@@ -123,6 +124,34 @@ class FastqSetCreate(FastqSetBase):
     fastq_set: List[Union[FastqListRowCreate, str]]
 
 
+class FastqSetBatchCreate(BaseModel):
+    # Set the model configuration
+    model_config = ConfigDict(
+        alias_generator=to_camel,
+        populate_by_name=True
+    )
+
+    # The fastq sets to create, each may be of a different library
+    fastq_set_list: List[FastqSetCreate]
+
+
+class FastqSetBatchCreateStatusEnum(Enum):
+    CREATED = "CREATED"
+    FAILED = "FAILED"
+
+
+class FastqSetBatchCreateResultDict(TypedDict):
+    # One result per fastq set, in the order of the fastq set list
+    status: FastqSetBatchCreateStatusEnum
+    library: LibraryResponseDict
+    fastqSet: Optional[FastqSetResponseDict]
+    detail: Optional[str]
+
+
+class FastqSetBatchCreateResponseDict(TypedDict):
+    results: List[FastqSetBatchCreateResultDict]
+
+
 class FastqSetData(FastqListSetWithId, Dyntastic):
     # We don't use aliases, instead we convert all keys to snake case first
     # And then we convert them back to camel case in the to_dict method.
@@ -162,9 +191,15 @@ class FastqSetData(FastqListSetWithId, Dyntastic):
             self.fastq_set_ids
         ))
 
-    def to_dict(self, include_s3_details: Optional[bool] = False) -> FastqSetResponseDict:
+    def to_dict(
+            self,
+            include_s3_details: Optional[bool] = False,
+            fastq_list_row_list: Optional[List[FastqListRowData]] = None
+    ) -> FastqSetResponseDict:
         """
         Alternative serialization path to return objects by camel case
+        :param include_s3_details:
+        :param fastq_list_row_list: The fastq list rows of the set, if already in hand, saves a get per fastq list row
         :return:
         """
         # Generate as a dict
@@ -175,7 +210,13 @@ class FastqSetData(FastqListSetWithId, Dyntastic):
         )
 
         # Generate fastq set data
-        fastq_set_dict['fastq_set'] = self._get_fastq_set_from_ids()
+        if fastq_list_row_list is not None:
+            fastq_set_dict['fastq_set'] = list(map(
+                lambda fastq_list_row_iter_: fastq_list_row_iter_.to_dict(),
+                fastq_list_row_list
+            ))
+        else:
+            fastq_set_dict['fastq_set'] = self._get_fastq_set_from_ids()
 
         # Remove the fastq set ids
         del fastq_set_dict['fastq_set_ids']
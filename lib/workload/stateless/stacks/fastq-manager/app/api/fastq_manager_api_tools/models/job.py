@@ -79,6 +79,20 @@ class JobCreate(JobBase):
         )
 
 
+class JobBatchQuery(BaseModel):
+    """
+    Query the jobs of many fastqs in a single request
+    """
+    model_config = ConfigDict(
+        alias_generator=to_camel,
+        populate_by_name=True
+    )
+
+    fastq_id_list: List[str]
+    job_type_list: Optional[List[JobType]] = None
+    status_list: Optional[List[JobStatus]] = None
+
+
 class JobData(JobWithId, Dyntastic):
     """
     The job data object
@@ -114,8 +128,8 @@ class JobQueryPaginatedResponse(QueryPaginatedResponse):
         return cls.url_placeholder.format(fastq_id=fastq_id)
 
 
-
-
-
-
-
+class JobBatchQueryResponse(BaseModel):
+    """
+    Job Batch Query Response, the jobs of all fastqs in the query
+    """
+    results: List[JobResponse]
@@ -40,7 +40,7 @@ def is_orcabus_ulid(query: str) -> bool:
     return ORCABUS_ULID_REGEX_MATCH.match(query) is not None
 
 
-async def sanitise_fqr_orcabus_id(fastq_id: str) -> str:
+def sanitise_fqr_orcabus_id_sync(fastq_id: str) -> str:
     if ORCABUS_ULID_REGEX_MATCH.match(fastq_id):
         return fastq_id
     elif ORCABUS_ULID_REGEX_MATCH.match(f"{FQLR_CONTEXT_PREFIX}.{fastq_id}"):
@@ -48,6 +48,10 @@ async def sanitise_fqr_orcabus_id(fastq_id: str) -> str:
     raise ValueError(f"Invalid fastq list row id '{fastq_id}'")
 
 
+async def sanitise_fqr_orcabus_id(fastq_id: str) -> str:
+    return sanitise_fqr_orcabus_id_sync(fastq_id)
+
+
 def sanitise_fqs_orcabus_id_sync(fastq_set_id: str) -> str:
     if ORCABUS_ULID_REGEX_MATCH.match(fastq_set_id):
         return fastq_set_id
@@ -0,0 +1,352 @@
+#!/usr/bin/env python3
+
+"""
+Batch creation of fastq sets against (moto) fastq list row and fastq set tables,
+comparing the dynamodb (and eventbridge) requests of a batch create with those of a create per fastq set
+
+Run from the api directory with
+    PYTHONPATH="../../../../../components/python-metadata-tools-layer/metadata_tools_layer/src:../../../../../components/python-filemanager-tools-layer/filemanager_tools_layer/src:." \\
+    python -m unittest discover tests
+"""
+
+import os
+import unittest
+from collections import Counter
+from typing import Dict, List, Optional
+from unittest.mock import MagicMock, patch
+
+ENV = {
+    "AWS_DEFAULT_REGION": "ap-southeast-2",
+    "AWS_ACCESS_KEY_ID": "testing",
+    "AWS_SECRET_ACCESS_KEY": "testing",
+    "DYNAMODB_HOST": "",
+    "DYNAMODB_FASTQ_LIST_ROW_TABLE_NAME": "fastq_list_row",
+    "DYNAMODB_FASTQ_SET_TABLE_NAME": "fastq_set",
+    "DYNAMODB_FASTQ_JOB_TABLE_NAME": "fastq_job",
+    "EVENT_BUS_NAME": "default",
+    "EVENT_SOURCE": "orcabus.fastqmanager",
+    "EVENT_DETAIL_TYPE_FASTQ_LIST_ROW_STATE_CHANGE": "FastqListRowStateChange",
+    "EVENT_DETAIL_TYPE_FASTQ_SET_ROW_STATE_CHANGE": "FastqSetStateChange",
+    "FASTQ_BASE_URL": "http://localhost:8457/",
+}
+
+# The models read the table names on import
+os.environ.update(ENV)
+
+import boto3
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from moto import mock_aws
+
+from fastq_manager_api_tools.api.v1.routers import fastq_set
+from fastq_manager_api_tools.models.fastq_list_row import FastqListRowData
+from fastq_manager_api_tools.models.fastq_set import FastqSetData
+
+FASTQ_SET_ENDPOINT = "/api/v1/fastqSet"
+
+INSTRUMENT_RUN_ID = "250320_A01052_0256_BHFCFCDSXF"
+RERUN_INSTRUMENT_RUN_ID = "250401_A01052_0260_AHFCFCDSXF"
+LIBRARY_ID_LIST = ["L2500175", "L2500176", "L2500177", "L2500178"]
+INDEX_BY_LIBRARY_ID = {
+    "L2500175": "AACTGTAG+TGCGGCGT",
+    "L2500176": "GTCAAGTC+GCGTTCGA",
+    "L2500177": "CTTGTCGA+CGATGTTC",
+    "L2500178": "TTGCAGAC+AGTCTCGT",
+}
+LANES = [3, 4]
+
+
+def get_library_orcabus_id(library_id: str) -> str:
+    return f"lib.01JBMVHM2D5GCDCAHEKTZ{library_id[-5:]}"
+
+
+def get_libraries_from_library_id_list(library_id_list: List[str]) -> List[Dict]:
+    return list(map(
+        lambda library_id_iter_: {
+            "libraryId": library_id_iter_,
+            "orcabusId": get_library_orcabus_id(library_id_iter_),
+        },
+        library_id_list
+    ))
+
+
+def get_fastq_set_create(
+        library_id: str,
+        instrument_run_id: str = INSTRUMENT_RUN_ID,
+        lanes: Optional[List[int]] = None,
+        is_valid: bool = True
+) -> Dict:
+    """
+    A fastq set create object, as sent by the fastq glue, the library is given by library id only
+    """
+    return {
+        "library": {
+            "libraryId": library_id,
+        },
+        "allowAdditionalFastq": False,
+        "isCurrentFastqSet": True,
+        "fastqSet": list(map(
+            lambda lane_iter_: {
+                "index": INDEX_BY_LIBRARY_ID[library_id],
+                "lane": lane_iter_,
+                "instrumentRunId": instrument_run_id,
+                "library": {
+                    "libraryId": library_id,
+                },
+                "platform": "Illumina",
+                "center": "UMCCR",
+                "date": "2025-03-20",
+                "isValid": is_valid,
+            },
+            lanes if lanes is not None else LANES
+        ))
+    }
+
+
+@mock_aws
+class FastqSetBatchCreateUnitTest(unittest.TestCase):
+    def setUp(self):
+        patch.dict(os.environ, ENV).start()
+
+        FastqListRowData._clear_boto3_state()
+        FastqSetData._clear_boto3_state()
+
+        self.create_tables()
+
+        # Count the requests of the table clients and the event client
+        self.request_counts = Counter()
+        event_client = boto3.client("events")
+        for client in [
+            FastqListRowData._dynamodb_resource().meta.client,
+            FastqSetData._dynamodb_resource().meta.client,
+            event_client
+        ]:
+            client.meta.events.register("before-call", self.count_request)
+        patch("fastq_manager_api_tools.events.events.get_event_client", lambda: event_client).start()
+
+        # Libraries are resolved in bulk by the batch create, and one by one by the single create
+        self.get_libraries_from_library_id_list_mock = MagicMock(wraps=get_libraries_from_library_id_list)
+        patch(
+            "fastq_manager_api_tools.api.v1.routers.get_libraries_from_library_id_list",
+            self.get_libraries_from_library_id_list_mock
+        ).start()
+        patch(
+            "fastq_manager_api_tools.models.library.get_library_orcabus_id_from_library_id",
+            get_library_orcabus_id
+        ).start()
+
+        app = FastAPI()
+        app.include_router(fastq_set.router, prefix=FASTQ_SET_ENDPOINT)
+        self.client = TestClient(app)
+
+    def count_request(self, model, **kwargs):
+        self.request_counts.update([f"{model.service_model.service_name}.{model.name}"])
+
+    def tearDown(self):
+        patch.stopall()
+        FastqListRowData._clear_boto3_state()
+        FastqSetData._clear_boto3_state()
+
+    def create_tables(self):
+        """
+        The tables and indexes of create-tables.sh
+        """
+        dynamodb_client = boto3.client("dynamodb")
+
+        dynamodb_client.create_table(
+            TableName=ENV["DYNAMODB_FASTQ_LIST_ROW_TABLE_NAME"],
+            KeySchema=[{"AttributeName": "id", "KeyType": "HASH"}],
+            AttributeDefinitions=list(map(
+                lambda attribute_iter_: {"AttributeName": attribute_iter_, "AttributeType": "S"},
+                ["id", "rgid_ext", "library_orcabus_id", "instrument_run_id", "fastq_set_id"]
+            )),
+            GlobalSecondaryIndexes=[
+                {
+                    "IndexName": f"{index_hash_key}-index",
+                    "KeySchema": [
+                        {"AttributeName": index_hash_key, "KeyType": "HASH"},
+                        {"AttributeName": "id", "KeyType": "RANGE"},
+                    ],
+                    "Projection": {"ProjectionType": "INCLUDE", "NonKeyAttributes": non_key_attributes},
+                }
+                for index_hash_key, non_key_attributes in [
+                    ("rgid_ext", ["library_orcabus_id", "instrument_run_id", "fastq_set_id", "is_valid"]),
+                    ("library_orcabus_id", ["rgid_ext", "instrument_run_id", "fastq_set_id", "is_valid"]),
+                    ("instrument_run_id", ["rgid_ext", "library_orcabus_id", "fastq_set_id", "is_valid", "index", "lane"]),
+                    ("fastq_set_id", ["rgid_ext", "library_orcabus_id", "instrument_run_id", "is_valid"]),
+                ]
+            ],
+            BillingMode="PAY_PER_REQUEST",
+        )
+
+        dynamodb_client.create_table(
+            TableName=ENV["DYNAMODB_FASTQ_SET_TABLE_NAME"],
+            KeySchema=[{"AttributeName": "id", "KeyType": "HASH"}],
+            AttributeDefinitions=[
+                {"AttributeName": "id", "AttributeType": "S"},
+                {"AttributeName": "library_orcabus_id", "AttributeType": "S"},
+            ],
+            GlobalSecondaryIndexes=[
+                {
+                    "IndexName": "library_orcabus_id-index",
+                    "KeySchema": [
+                        {"AttributeName": "library_orcabus_id", "KeyType": "HASH"},
+                        {"AttributeName": "id", "KeyType": "RANGE"},
+                    ],
+                    "Projection": {
+                        "ProjectionType": "INCLUDE",
+                        "NonKeyAttributes": ["is_current_fastq_set", "allow_additional_fastq"]
+                    },
+                }
+            ],
+            BillingMode="PAY_PER_REQUEST",
+        )
+
+    def batch_create(self, fastq_set_create_list: List[Dict]) -> List[Dict]:
+        response = self.client.post(
+            f"{FASTQ_SET_ENDPOINT}/batchCreate",
+            json={"fastqSetList": fastq_set_create_list}
+        )
+        self.assertEqual(response.status_code, 200, response.text)
+        return response.json()["results"]
+
+    def get_fastq_list_rows(self) -> List[FastqListRowData]:
+        return list(FastqListRowData.scan())
+
+    def get_fastq_sets(self) -> List[FastqSetData]:
+        return list(FastqSetData.scan())
+
+    def test_batch_create(self):
+        results = self.batch_create(list(map(get_fastq_set_create, LIBRARY_ID_LIST)))
+
+        self.assertEqual(list(map(lambda result_iter_: result_iter_["status"], results)), ["CREATED"] * 4)
+        self.assertEqual(
+            list(map(lambda result_iter_: result_iter_["fastqSet"]["library"]["libraryId"], results)),
+            LIBRARY_ID_LIST
+        )
+        self.assertEqual(
+            list(map(lambda result_iter_: len(result_iter_["fastqSet"]["fastqSet"]), results)),
+            [len(LANES)] * 4
+        )
+
+        # Every fastq list row is linked to its fastq set
+        fastq_set_id_by_library_orcabus_id = dict(map(
+            lambda fastq_set_iter_: (fastq_set_iter_.library_orcabus_id, fastq_set_iter_.id),
+            self.get_fastq_sets()
+        ))
+        fastq_list_rows = self.get_fastq_list_rows()
+        self.assertEqual(len(fastq_list_rows), len(LIBRARY_ID_LIST) * len(LANES))
+        for fastq_list_row in fastq_list_rows:
+            self.assertEqual(
+                fastq_list_row.fastq_set_id,
+                fastq_set_id_by_library_orcabus_id[fastq_list_row.library_orcabus_id]
+            )
+
+    def test_batch_create_request_counts(self):
+        self.batch_create(list(map(get_fastq_set_create, LIBRARY_ID_LIST)))
+
+        self.assertEqual(
+            dict(self.request_counts),
+            {
+                # All fastq list rows, then all fastq sets
+                "dynamodb.BatchWriteItem": 2,
+                # A query for the instrument run, and a query per library
+                "dynamodb.Query": 1 + len(LIBRARY_ID_LIST),
+                # The fastq list row events, then the fastq set events
+                "events.PutEvents": 2,
+            }
+        )
+        self.get_libraries_from_library_id_list_mock.assert_called_once()
+
+    def test_fewer_requests_than_create_per_fastq_set(self):
+        for library_id in LIBRARY_ID_LIST:
+            response = self.client.post(FASTQ_SET_ENDPOINT, json=get_fastq_set_create(library_id))
+            self.assertEqual(response.status_code, 200, response.text)
+        create_request_counts = Counter(self.request_counts)
+
+        # Start again with empty tables
+        for fastq_list_row in self.get_fastq_list_rows():
+            fastq_list_row.delete()
+        for fastq_set_obj in self.get_fastq_sets():
+            fastq_set_obj.delete()
+        self.request_counts.clear()
+
+        self.batch_create(list(map(get_fastq_set_create, LIBRARY_ID_LIST)))
+        batch_create_request_counts = Counter(self.request_counts)
+
+        # A put per fastq list row and fastq set, and a get per fastq list row for the response
+        self.assertEqual(create_request_counts["dynamodb.PutItem"], len(LIBRARY_ID_LIST) * (len(LANES) + 1))
+        self.assertEqual(create_request_counts["dynamodb.GetItem"], len(LIBRARY_ID_LIST) * len(LANES))
+        self.assertEqual(batch_create_request_counts["dynamodb.PutItem"], 0)
+        self.assertEqual(batch_create_request_counts["dynamodb.GetItem"], 0)
+
+        self.assertLess(
+            sum(batch_create_request_counts.values()) * 3,
+            sum(create_request_counts.values())
+        )
+
+    def test_per_item_results(self):
+        # An existing current fastq set for the first library
+        self.batch_create([get_fastq_set_create(LIBRARY_ID_LIST[0])])
+
+        results = self.batch_create([
+            # Rerun of the first library, but the existing fastq set is still current
+            get_fastq_set_create(LIBRARY_ID_LIST[0], instrument_run_id=RERUN_INSTRUMENT_RUN_ID),
+            # The first library again, the fastq list rows already exist
+            get_fastq_set_create(LIBRARY_ID_LIST[0]),
+            # A new library
+            get_fastq_set_create(LIBRARY_ID_LIST[1]),
+            # The same library twice in the batch, only the first can be the current fastq set
+            get_fastq_set_create(LIBRARY_ID_LIST[2], lanes=[1]),
+            get_fastq_set_create(LIBRARY_ID_LIST[2], lanes=[2]),
+            # Invalid fastqs
+            get_fastq_set_create(LIBRARY_ID_LIST[3], is_valid=False),
+        ])
+
+        self.assertEqual(
+            list(map(lambda result_iter_: result_iter_["status"], results)),
+            ["FAILED", "FAILED", "CREATED", "CREATED", "FAILED", "FAILED"]
+        )
+        self.assertIn("is already the current fastq set", results[0]["detail"])
+        self.assertIn("already exists", results[1]["detail"])
+        self.assertIn("is already the current fastq set", results[4]["detail"])
+        self.assertEqual(results[5]["detail"], "Fastq set contains invalid fastqs")
+        self.assertIsNone(results[2]["detail"])
+        self.assertEqual(results[0]["library"]["libraryId"], LIBRARY_ID_LIST[0])
+        self.assertIsNone(results[0]["fastqSet"])
+
+        # Nothing of the failed fastq sets is written
+        self.assertEqual(len(self.get_fastq_sets()), 3)
+        self.assertEqual(len(self.get_fastq_list_rows()), len(LANES) * 2 + 1)
+
+    def test_existing_fastq_list_rows(self):
+        fastq_list_row_ids = []
+        for library_id in LIBRARY_ID_LIST:
+            fastq_list_row = FastqListRowData(
+                **get_fastq_set_create(library_id, lanes=[1])["fastqSet"][0]
+            )
+            fastq_list_row.save()
+            fastq_list_row_ids.append(fastq_list_row.id)
+        self.request_counts.clear()
+
+        results = self.batch_create(list(map(
+            lambda library_id_iter_, fastq_list_row_id_iter_: {
+                **get_fastq_set_create(library_id_iter_),
+                "fastqSet": [fastq_list_row_id_iter_]
+            },
+            LIBRARY_ID_LIST, fastq_list_row_ids
+        )))
+
+        self.assertEqual(list(map(lambda result_iter_: result_iter_["status"], results)), ["CREATED"] * 4)
+        self.assertEqual(
+            list(map(lambda result_iter_: result_iter_["fastqSet"]["fastqSet"][0]["id"], results)),
+            fastq_list_row_ids
+        )
+
+        # The existing fastq list rows are read in a single request
+        self.assertEqual(self.request_counts["dynamodb.BatchGetItem"], 1)
+        self.assertEqual(self.request_counts["dynamodb.GetItem"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+
+"""
+Batch query of the jobs of many fastqs against a (moto) fastq job table,
+comparing the dynamodb requests of a batch query with those of a jobs query per fastq
+
+Run from the api directory with
+    PYTHONPATH="../../../../../components/python-metadata-tools-layer/metadata_tools_layer/src:../../../../../components/python-filemanager-tools-layer/filemanager_tools_layer/src:." \\
+    python -m unittest discover tests
+"""
+
+import os
+import unittest
+from collections import Counter
+from typing import Dict, List
+from unittest.mock import patch
+
+ENV = {
+    "AWS_DEFAULT_REGION": "ap-southeast-2",
+    "AWS_ACCESS_KEY_ID": "testing",
+    "AWS_SECRET_ACCESS_KEY": "testing",
+    "DYNAMODB_HOST": "",
+    "DYNAMODB_FASTQ_LIST_ROW_TABLE_NAME": "fastq_list_row",
+    "DYNAMODB_FASTQ_SET_TABLE_NAME": "fastq_set",
+    "DYNAMODB_FASTQ_JOB_TABLE_NAME": "fastq_job",
+    "EVENT_BUS_NAME": "default",
+    "EVENT_SOURCE": "orcabus.fastqmanager",
+    "EVENT_DETAIL_TYPE_FASTQ_LIST_ROW_STATE_CHANGE": "FastqListRowStateChange",
+    "EVENT_DETAIL_TYPE_FASTQ_SET_ROW_STATE_CHANGE": "FastqSetStateChange",
+    "FASTQ_BASE_URL": "http://localhost:8457/",
+}
+
+# The models read the table names on import
+os.environ.update(ENV)
+
+import boto3
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from moto import mock_aws
+
+from fastq_manager_api_tools.api.v1.routers import fastq_list_row
+from fastq_manager_api_tools.models import JobStatus
+from fastq_manager_api_tools.models.job import JobData, JobType
+from fastq_manager_api_tools.utils import get_ulid
+
+FASTQ_LIST_ROW_ENDPOINT = "/api/v1/fastq"
+
+# A fastq set of 100 fastq list rows
+FASTQ_ID_LIST = [f"fqr.{get_ulid()}" for _ in range(100)]
+# Jobs of other fastqs, not in the query
+OTHER_FASTQ_ID_LIST = [f"fqr.{get_ulid()}" for _ in range(20)]
+
+
+@mock_aws
+class JobBatchQueryUnitTest(unittest.TestCase):
+    def setUp(self):
+        patch.dict(os.environ, ENV).start()
+
+        JobData._clear_boto3_state()
+
+        self.create_tables()
+        self.add_jobs()
+
+        # Count the requests of the table client
+        self.request_counts = Counter()
+        JobData._dynamodb_resource().meta.client.meta.events.register("before-call", self.count_request)
+
+        app = FastAPI()
+        app.include_router(fastq_list_row.router, prefix=FASTQ_LIST_ROW_ENDPOINT)
+        self.client = TestClient(app)
+
+    def count_request(self, model, **kwargs):
+        self.request_counts.update([f"{model.service_model.service_name}.{model.name}"])
+
+    def tearDown(self):
+        patch.stopall()
+        JobData._clear_boto3_state()
+
+    def create_tables(self):
+        """
+        The fastq job table and indexes of create-tables.sh
+        """
+        boto3.client("dynamodb").create_table(
+            TableName=ENV["DYNAMODB_FASTQ_JOB_TABLE_NAME"],
+            KeySchema=[{"AttributeName": "id", "KeyType": "HASH"}],
+            AttributeDefinitions=list(map(
+                lambda attribute_iter_: {"AttributeName": attribute_iter_, "AttributeType": "S"},
+                ["id", "fastq_id", "job_type", "status"]
+            )),
+            GlobalSecondaryIndexes=[
+                {
+                    "IndexName": f"{index_hash_key}-index",
+                    "KeySchema": [
+                        {"AttributeName": index_hash_key, "KeyType": "HASH"},
+                        {"AttributeName": "id", "KeyType": "RANGE"},
+                    ],
+                    "Projection": {"ProjectionType": "INCLUDE", "NonKeyAttributes": non_key_attributes},
+                }
+                for index_hash_key, non_key_attributes in [
+                    ("fastq_id", ["job_type", "status"]),
+                    ("job_type", ["fastq_id", "status"]),
+                    ("status", ["fastq_id", "job_type"]),
+                ]
+            ],
+            BillingMode="PAY_PER_REQUEST",
+        )
+
+    def add_jobs(self):
+        """
+        Every fastq has succeeded qc and ntsm jobs,
+        every tenth fastq has a running qc job, and every 25th fastq a pending file compression job
+        """
+        self.active_jobs: Dict[str, List[JobType]] = {}
+
+        with JobData.batch_writer():
+            for fastq_id in FASTQ_ID_LIST + OTHER_FASTQ_ID_LIST:
+                for job_type in [JobType.QC, JobType.NTSM]:
+                    JobData(fastq_id=fastq_id, job_type=job_type, status=JobStatus.SUCCEEDED).save()
+
+            for fastq_index, fastq_id in enumerate(FASTQ_ID_LIST + OTHER_FASTQ_ID_LIST):
+                if fastq_index % 10 == 0:
+                    JobData(fastq_id=fastq_id, job_type=JobType.QC, status=JobStatus.RUNNING).save()
+                    self.active_jobs.setdefault(fastq_id, []).append(JobType.QC)
+                if fastq_index % 25 == 0:
+                    JobData(fastq_id=fastq_id, job_type=JobType.FILE_COMPRESSION, status=JobStatus.PENDING).save()
+                    self.active_jobs.setdefault(fastq_id, []).append(JobType.FILE_COMPRESSION)
+
+    def batch_query(self, body: Dict) -> List[Dict]:
+        response = self.client.post(f"{FASTQ_LIST_ROW_ENDPOINT}/jobs/batchQuery", json=body)
+        self.assertEqual(response.status_code, 200, response.text)
+        return response.json()["results"]
+
+    def test_active_jobs(self):
+        jobs = self.batch_query({
+            "fastqIdList": FASTQ_ID_LIST,
+            "statusList": ["PENDING", "RUNNING"],
+        })
+
+        self.assertEqual(
+            sorted(map(lambda job_iter_: (job_iter_["fastqId"], job_iter_["jobType"]), jobs)),
+            sorted(
+                (fastq_id, job_type.value)
+                for fastq_id, job_types in self.active_jobs.items()
+                if fastq_id in FASTQ_ID_LIST
+                for job_type in job_types
+            )
+        )
+        # Jobs are returned in full, in the order of the fastq ids
+        self.assertTrue(all(map(lambda job_iter_: job_iter_["startTime"] is not None, jobs)))
+        self.assertEqual(
+            list(map(lambda job_iter_: FASTQ_ID_LIST.index(job_iter_["fastqId"]), jobs)),
+            sorted(map(lambda job_iter_: FASTQ_ID_LIST.index(job_iter_["fastqId"]), jobs))
+        )
+
+    def test_job_type_filter(self):
+        jobs = self.batch_query({
+            "fastqIdList": FASTQ_ID_LIST,
+            "jobTypeList": ["QC"],
+            "statusList": ["PENDING", "RUNNING"],
+        })
+
+        self.assertEqual(len(jobs), 10)
+        self.assertEqual(set(map(lambda job_iter_: job_iter_["jobType"], jobs)), {"QC"})
+        self.assertEqual(set(map(lambda job_iter_: job_iter_["status"], jobs)), {"RUNNING"})
+
+    def test_all_statuses(self):
+        # Ids without the 'fqr.' prefix are accepted
+        jobs = self.batch_query({
+            "fastqIdList": list(map(lambda fastq_id_iter_: fastq_id_iter_.split(".", 1)[1], FASTQ_ID_LIST[:5])),
+            "jobTypeList": ["QC"],
+        })
+
+        # A succeeded qc job for each fastq, and a running qc job for the first fastq
+        self.assertEqual(len(jobs), 6)
+        self.assertEqual(
+            Counter(map(lambda job_iter_: job_iter_["status"], jobs)),
+            Counter({"SUCCEEDED": 5, "RUNNING": 1})
+        )
+
+    def test_invalid_fastq_id(self):
+        response = self.client.post(
+            f"{FASTQ_LIST_ROW_ENDPOINT}/jobs/batchQuery",
+            json={"fastqIdList": ["not-a-fastq-id"]}
+        )
+        self.assertEqual(response.status_code, 400)
+
+    def test_batch_query_request_counts(self):
+        self.batch_query({
+            "fastqIdList": FASTQ_ID_LIST,
+            "statusList": ["PENDING", "RUNNING"],
+        })
+
+        self.assertEqual(
+            dict(self.request_counts),
+            {
+                # A query of the status index per status
+                "dynamodb.Query": 2,
+                # The matching jobs, read in full
+                "dynamodb.BatchGetItem": 1,
+            }
+        )
+
+    def test_fewer_requests_than_jobs_query_per_fastq(self):
+        self.batch_query({
+            "fastqIdList": FASTQ_ID_LIST,
+            "statusList": ["PENDING", "RUNNING"],
+        })
+        batch_query_request_count = sum(self.request_counts.values())
+
+        self.request_counts.clear()
+        for fastq_id in FASTQ_ID_LIST:
+            response = self.client.get(f"{FASTQ_LIST_ROW_ENDPOINT}/{fastq_id}/jobs")
+            self.assertEqual(response.status_code, 200, response.text)
+        jobs_query_per_fastq_request_count = sum(self.request_counts.values())
+
+        # A query per fastq, and a get per job
+        self.assertEqual(self.request_counts["dynamodb.Query"], len(FASTQ_ID_LIST))
+        self.assertLess(batch_query_request_count * 50, jobs_query_per_fastq_request_count)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -20,7 +20,8 @@ Generate the following lambdas
   * Requires fastq tools, fastq sync tools, and so fastq unarchiving tools as well
 
 * get fastq list row ids from fastq set id
-  * Requires fastq tools
+  * Also collects the job types in progress of the fastq list rows, in one request for the fastq set
+  * Requires fastq tools, fastq sync tools, and so fastq unarchiving tools as well
 
 * get fastq set ids from fastq list row id
   * Requires fastq tools
@@ -312,7 +313,11 @@ export class FastqSyncManagerStack extends Stack {
           HOSTNAME_SSM_PARAMETER: props.hostnameSsmParameterObj.parameterName,
           ORCABUS_TOKEN_SECRET_ID: props.orcabusTokenSecretObj.secretName,
         },
-        layers: [props.fastqToolsLayer],
+        layers: [
+          props.fastqToolsLayer,
+          props.fastqSyncToolsLayer,
+          props.fastqUnarchivingToolsLayer,
+        ],
       }
     );
     // Give lambda function permissions to secrets and ssm parameters
@@ -2,20 +2,33 @@
 
 """
 Get the fastq list row from the fastq set id
+
+Along with the types of the jobs in progress (pending or running) of each fastq list row,
+collected in a single request for the whole fastq set, so that launching the requirements of each fastq list row
+does not need to request the jobs of the fastq list row again
 """
-from typing import Dict, List
+from typing import Dict, List, Union
 
 from fastq_tools import get_fastq_set, FastqSet
+from fastq_sync_tools import get_job_types_in_progress_by_fastq_id
 
 
-def handler(event, context) -> Dict[str, List[str]]:
+def handler(event, context) -> Dict[str, Union[List[str], Dict[str, List[str]]]]:
     fastq_set_obj: FastqSet = get_fastq_set(event['fastqSetId'])
 
+    fastq_list_row_id_list = list(map(
+        lambda fastq_list_row_iter_: fastq_list_row_iter_['id'],
+        fastq_set_obj['fastqSet']
+    ))
+
     return {
-        "fastqListRowIdList": list(map(
-            lambda fastq_list_row_iter_: fastq_list_row_iter_['id'],
-            fastq_set_obj['fastqSet']
-        ))
+        "fastqListRowIdList": fastq_list_row_id_list,
+        "jobTypesInProgressByFastqListRowId": {
+            fastq_list_row_id_iter_: list(map(lambda job_type_iter_: job_type_iter_.value, job_types_iter_))
+            for fastq_list_row_id_iter_, job_types_iter_ in get_job_types_in_progress_by_fastq_id(
+                fastq_list_row_id_list
+            ).items()
+        }
     }
 
 
@@ -40,5 +53,10 @@ def handler(event, context) -> Dict[str, List[str]]:
 #     # {
 #     #     "fastqListRowIdList": [
 #     #         "fqr.01JQ3BETTR9JPV33S3ZXB18HBN"
-#     #     ]
+#     #     ],
+#     #     "jobTypesInProgressByFastqListRowId": {
+#     #         "fqr.01JQ3BETTR9JPV33S3ZXB18HBN": [
+#     #             "QC"
+#     #         ]
+#     #     }
 #     # }
\ No newline at end of file
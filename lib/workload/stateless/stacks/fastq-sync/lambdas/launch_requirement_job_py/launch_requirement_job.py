@@ -13,6 +13,10 @@ QC
 FINGERPRINT
 COMPRESSION_METADATA
 
+The jobTypesInProgress input holds the types of the jobs in progress of the fastq list row,
+collected once for the whole fastq set (see get_fastq_list_row_ids_from_fastq_set_id),
+if it is not provided, the jobs of the fastq list row are requested
+
 """
 
 from fastq_tools import (
@@ -24,7 +28,7 @@ from fastq_sync_tools import (
     run_fastq_job,
     run_fastq_unarchiving_job,
     check_fastq_unarchiving_job,
-    check_fastq_job
+    check_fastq_job,
 )
 
 
@@ -38,25 +42,31 @@ def handler(event, context):
     # Get inputs
     fastq_list_row_id = event['fastqListRowId']
     requirement_type = Requirements(event['requirementType'])
+    job_types_in_progress = (
+        list(map(lambda job_type_iter_: JobType(job_type_iter_), event['jobTypesInProgress']))
+        if event.get('jobTypesInProgress', None) is not None
+        else None
+    )
 
     # Get the fastq list row as an object
     fastq_list_row_obj = get_fastq(fastq_list_row_id, includeS3Details=True)
 
     # Launch unarchiving job
-    if check_fastq_unarchiving_job(fastq_list_row_id) and requirement_type == Requirements.HAS_ACTIVE_READ_SET:
+    # Only check the jobs of the requirement type
+    if requirement_type == Requirements.HAS_ACTIVE_READ_SET and check_fastq_unarchiving_job(fastq_list_row_id):
         run_fastq_unarchiving_job(
             fastq_list_row_obj
         )
 
     # Run internal jobs
-    if check_fastq_job(fastq_list_row_id, JobType.QC) and requirement_type == Requirements.HAS_QC:
-        run_fastq_job(fastq_list_row_obj, JobType.QC)
+    if requirement_type == Requirements.HAS_QC and check_fastq_job(fastq_list_row_id, JobType.QC, job_types_in_progress):
+        run_fastq_job(fastq_list_row_obj, JobType.QC, job_types_in_progress)
 
-    if check_fastq_job(fastq_list_row_id, JobType.NTSM) and requirement_type == Requirements.HAS_FINGERPRINT:
-        run_fastq_job(fastq_list_row_obj, JobType.NTSM)
+    if requirement_type == Requirements.HAS_FINGERPRINT and check_fastq_job(fastq_list_row_id, JobType.NTSM, job_types_in_progress):
+        run_fastq_job(fastq_list_row_obj, JobType.NTSM, job_types_in_progress)
 
-    if check_fastq_job(fastq_list_row_id, JobType.FILE_COMPRESSION) and requirement_type == Requirements.HAS_FILE_COMPRESSION_INFORMATION:
-        run_fastq_job(fastq_list_row_obj, JobType.FILE_COMPRESSION)
+    if requirement_type == Requirements.HAS_FILE_COMPRESSION_INFORMATION and check_fastq_job(fastq_list_row_id, JobType.FILE_COMPRESSION, job_types_in_progress):
+        run_fastq_job(fastq_list_row_obj, JobType.FILE_COMPRESSION, job_types_in_progress)
 
 
 # if __name__ == "__main__":
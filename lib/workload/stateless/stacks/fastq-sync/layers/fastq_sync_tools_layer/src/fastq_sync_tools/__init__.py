@@ -9,6 +9,7 @@ from .utils.utils import (
     has_qc,
     has_fingerprint,
     has_compression_metadata,
+    get_job_types_in_progress_by_fastq_id,
     check_fastq_job,
     check_fastq_unarchiving_job,
     run_fastq_job,
@@ -26,6 +27,7 @@ __all__ = [
     "has_qc",
     "has_fingerprint",
     "has_compression_metadata",
+    "get_job_types_in_progress_by_fastq_id",
     "check_fastq_job",
     "check_fastq_unarchiving_job",
     "run_fastq_job",
@@ -6,12 +6,12 @@ Bunch of useful helper functions for lambdas in the fastq sync service
 
 
 from os import environ
-from typing import Optional, List, Tuple
+from typing import Optional, List, Tuple, Dict
 
 from fastq_tools import (
     JobStatus, Job, JobType,
     FastqListRow,
-    get_fastq_jobs,
+    get_fastq_jobs_in_fastq_id_list,
     run_qc_stats,
     run_file_compression_stats,
     run_ntsm, FastqSet
@@ -85,28 +85,54 @@ def has_compression_metadata(fastq_list_row_obj: FastqListRow) -> bool:
     return True
 
 
-def check_fastq_job(fastq_id: str, job_type: JobType) -> bool:
+def get_job_types_in_progress_by_fastq_id(fastq_id_list: List[str]) -> Dict[str, List[JobType]]:
     """
-    Check the fastq doesn't already have jobs running for this particular type
+    Get the types of the jobs in progress (pending or running) of every fastq in the list,
+    in a single request rather than one request per fastq
+    :param fastq_id_list:
+    :return: Every fastq id in the list, mapped to the (distinct) types of its jobs in progress
+    """
+    job_types_in_progress_by_fastq_id: Dict[str, List[JobType]] = {
+        fastq_id_iter_: []
+        for fastq_id_iter_ in fastq_id_list
+    }
+
+    for job_iter_ in get_fastq_jobs_in_fastq_id_list(
+        fastq_id_list,
+        status_list=[JobStatus.PENDING, JobStatus.RUNNING]
+    ):
+        job_types_in_progress = job_types_in_progress_by_fastq_id.setdefault(job_iter_['fastqId'], [])
+        if JobType(job_iter_['jobType']) not in job_types_in_progress:
+            job_types_in_progress.append(JobType(job_iter_['jobType']))
+
+    return job_types_in_progress_by_fastq_id
+
+
+def check_fastq_job(
+        fastq_id: str,
+        job_type: JobType,
+        job_types_in_progress: Optional[List[JobType]] = None
+) -> bool:
+    """
+    Check the fastq doesn't already have jobs running for this particular type,
+    only the jobs of this type in progress (pending or running) are requested,
+    unless the job types in progress of the fastq have already been collected for its fastq set
+    (see get_job_types_in_progress_by_fastq_id)
     :param fastq_id:
     :param job_type:
+    :param job_types_in_progress:
     :return:
     """
-    return (
-            len(
-                list(filter(
-                    lambda job_iter_: (
-                            (
-                                    JobType(job_iter_['jobType']) == job_type
-                            ) and
-                            (
-                                    JobStatus(job_iter_['status']) in [JobStatus.PENDING, JobStatus.RUNNING]
-                            )
-                    ),
-                    get_fastq_jobs(fastq_id)
-                ))
-            ) == 0
-    )
+    if job_types_in_progress is not None:
+        return JobType(job_type) not in job_types_in_progress
+
+    return len(
+        get_fastq_jobs_in_fastq_id_list(
+            [fastq_id],
+            job_type_list=[job_type],
+            status_list=[JobStatus.PENDING, JobStatus.RUNNING]
+        )
+    ) == 0
 
 
 def check_fastq_unarchiving_job(fastq_id: str) -> bool:
@@ -128,11 +154,16 @@ def check_fastq_unarchiving_job(fastq_id: str) -> bool:
 
 
 
-def run_fastq_job(fastq_list_row: FastqListRow, job_type: JobType) -> Optional[Job]:
+def run_fastq_job(
+        fastq_list_row: FastqListRow,
+        job_type: JobType,
+        job_types_in_progress: Optional[List[JobType]] = None
+) -> Optional[Job]:
     """
     Run a job for a fastq
     :param fastq_id:
     :param job_type:
+    :param job_types_in_progress: The job types in progress of the fastq, if already collected for its fastq set
     :return:
     """
     # Check that the fastq list row has an active read set
@@ -140,7 +171,7 @@ def run_fastq_job(fastq_list_row: FastqListRow, job_type: JobType) -> Optional[J
         return None
 
     # Check if the job is already running
-    if not check_fastq_job(fastq_list_row['id'], job_type):
+    if not check_fastq_job(fastq_list_row['id'], job_type, job_types_in_progress):
         return None
 
     # Create the job
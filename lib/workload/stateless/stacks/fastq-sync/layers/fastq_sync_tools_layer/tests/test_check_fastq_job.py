@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+
+"""
+The jobs in progress of a fastq are checked in a single request, for the job type only,
+and the jobs in progress of a fastq set are collected in a single request for the whole set
+
+Run from the fastq_sync_tools_layer directory with
+    PYTHONPATH="src:../../../../../components/python-fastq-tools-layer/fastq_tools_layer/src:../../../../../components/python-fastq-unarchiving-tools-layer/fastq_unarchiving_tools_layer/src" \\
+    python -m unittest discover tests
+"""
+
+# Standard imports
+import unittest
+from unittest import mock
+
+# Fastq tools imports
+from fastq_tools import JobStatus, JobType
+
+# Layer imports
+from fastq_sync_tools import check_fastq_job, run_fastq_job, get_job_types_in_progress_by_fastq_id
+from fastq_sync_tools.utils import utils
+
+FASTQ_ID = "fqr.01JQ3BETTR9JPV33S3ZXB18HBN"
+
+# A fastq set of 100 fastq list rows, the first of which is FASTQ_ID
+FASTQ_SET_FASTQ_ID_LIST = [FASTQ_ID] + [
+    f"fqr.01JQ3BETTR9JPV33S3ZXB18{fastq_iter_:03d}"
+    for fastq_iter_ in range(1, 100)
+]
+
+# A running qc job, and a pending file compression job
+# A second pending qc job of the same fastq, and a pending ntsm job of another fastq in the set
+JOBS_IN_PROGRESS = [
+    {"fastqId": FASTQ_ID, "jobType": "QC", "status": "RUNNING"},
+    {"fastqId": FASTQ_ID, "jobType": "FILE_COMPRESSION", "status": "PENDING"},
+    {"fastqId": FASTQ_ID, "jobType": "QC", "status": "PENDING"},
+    {"fastqId": FASTQ_SET_FASTQ_ID_LIST[1], "jobType": "NTSM", "status": "PENDING"},
+]
+
+
+def get_fastq_jobs_in_fastq_id_list(fastq_id_list, job_type_list=None, status_list=None):
+    return list(filter(
+        lambda job_iter_: (
+            job_iter_["fastqId"] in fastq_id_list and
+            (job_type_list is None or JobType(job_iter_["jobType"]) in job_type_list) and
+            (status_list is None or JobStatus(job_iter_["status"]) in status_list)
+        ),
+        JOBS_IN_PROGRESS
+    ))
+
+
+class CheckFastqJobUnitTest(unittest.TestCase):
+    def setUp(self):
+        self.get_fastq_jobs_in_fastq_id_list_mock = mock.MagicMock(wraps=get_fastq_jobs_in_fastq_id_list)
+        mock.patch.object(
+            utils, "get_fastq_jobs_in_fastq_id_list", self.get_fastq_jobs_in_fastq_id_list_mock
+        ).start()
+
+    def tearDown(self):
+        mock.patch.stopall()
+
+    def test_jobs_in_progress(self):
+        self.assertFalse(check_fastq_job(FASTQ_ID, JobType.QC))
+        self.assertFalse(check_fastq_job(FASTQ_ID, JobType.FILE_COMPRESSION))
+        self.assertTrue(check_fastq_job(FASTQ_ID, JobType.NTSM))
+
+    def test_single_request_for_the_job_type(self):
+        check_fastq_job(FASTQ_ID, JobType.QC)
+
+        self.get_fastq_jobs_in_fastq_id_list_mock.assert_called_once_with(
+            [FASTQ_ID],
+            job_type_list=[JobType.QC],
+            status_list=[JobStatus.PENDING, JobStatus.RUNNING]
+        )
+
+    def test_job_in_progress_is_not_launched_again(self):
+        fastq_list_row = {"id": FASTQ_ID}
+
+        with mock.patch.object(utils, "has_active_readset", return_value=True), \
+                mock.patch.object(utils, "run_qc_stats") as run_qc_stats_mock, \
+                mock.patch.object(utils, "run_ntsm", return_value={"id": "fqj.01JQ3BETTR9JPV33S3ZXB18HBN"}) as run_ntsm_mock:
+            self.assertIsNone(run_fastq_job(fastq_list_row, JobType.QC))
+            run_fastq_job(fastq_list_row, JobType.NTSM)
+
+        run_qc_stats_mock.assert_not_called()
+        run_ntsm_mock.assert_called_once_with(fastq_id=FASTQ_ID)
+
+
+class GetJobTypesInProgressByFastqIdUnitTest(unittest.TestCase):
+    def setUp(self):
+        self.get_fastq_jobs_in_fastq_id_list_mock = mock.MagicMock(wraps=get_fastq_jobs_in_fastq_id_list)
+        mock.patch.object(
+            utils, "get_fastq_jobs_in_fastq_id_list", self.get_fastq_jobs_in_fastq_id_list_mock
+        ).start()
+
+    def tearDown(self):
+        mock.patch.stopall()
+
+    def test_single_request_for_the_fastq_set(self):
+        job_types_in_progress_by_fastq_id = get_job_types_in_progress_by_fastq_id(FASTQ_SET_FASTQ_ID_LIST)
+
+        self.get_fastq_jobs_in_fastq_id_list_mock.assert_called_once_with(
+            FASTQ_SET_FASTQ_ID_LIST,
+            status_list=[JobStatus.PENDING, JobStatus.RUNNING]
+        )
+
+        # Every fastq of the set is returned, with the distinct types of its jobs in progress
+        self.assertEqual(len(job_types_in_progress_by_fastq_id), 100)
+        self.assertEqual(job_types_in_progress_by_fastq_id[FASTQ_ID], [JobType.QC, JobType.FILE_COMPRESSION])
+        self.assertEqual(job_types_in_progress_by_fastq_id[FASTQ_SET_FASTQ_ID_LIST[1]], [JobType.NTSM])
+        self.assertEqual(job_types_in_progress_by_fastq_id[FASTQ_SET_FASTQ_ID_LIST[2]], [])
+
+    def test_launching_the_fastq_set_is_a_single_request(self):
+        job_types_in_progress_by_fastq_id = get_job_types_in_progress_by_fastq_id(FASTQ_SET_FASTQ_ID_LIST)
+
+        with mock.patch.object(utils, "has_active_readset", return_value=True), \
+                mock.patch.object(utils, "run_qc_stats") as run_qc_stats_mock:
+            for fastq_id in FASTQ_SET_FASTQ_ID_LIST:
+                if check_fastq_job(fastq_id, JobType.QC, job_types_in_progress_by_fastq_id[fastq_id]):
+                    run_fastq_job({"id": fastq_id}, JobType.QC, job_types_in_progress_by_fastq_id[fastq_id])
+
+        # The fastq with a qc job in progress is skipped, the other 99 are launched
+        self.assertEqual(run_qc_stats_mock.call_count, 99)
+        self.assertNotIn(mock.call(fastq_id=FASTQ_ID), run_qc_stats_mock.call_args_list)
+
+        # One request for the whole fastq set, none per fastq list row
+        self.get_fastq_jobs_in_fastq_id_list_mock.assert_called_once()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -12,9 +12,9 @@ We take an
 """
 
 import typing
-from typing import List, Tuple
+from typing import List, Tuple, Optional
 
-from fastq_tools import get_fastq
+from fastq_tools import get_fastqs_in_fastq_id_list, FastqListRow
 from urllib.parse import urlparse
 import pandas as pd
 import boto3
@@ -38,9 +38,7 @@ def upload_file_to_s3(bucket: str, key: str, file_contents: str):
     )
 
 
-def get_s3_uris_from_fastq_id(fastq_id: str) -> List[str]:
-    fastq_obj = get_fastq(fastq_id, includeS3Details=True)
-
+def get_s3_uris_from_fastq_obj(fastq_obj: FastqListRow) -> List[str]:
     return list(filter(
         lambda s3_uri_iter_: s3_uri_iter_ is not None,
         [
@@ -56,7 +54,7 @@ def split_s3_uri(s3_uri: str) -> Tuple[str, str]:
     return s3_obj.netloc, s3_obj.path.lstrip("/")
 
 
-def create_csv_for_s3_copy_steps(fastq_ids: List[str]) -> pd.DataFrame:
+def create_csv_for_s3_copy_steps(fastq_ids: List[str], instrument_run_id: Optional[str] = None) -> pd.DataFrame:
     """
     Create the csv for s3 copy steps,
 
@@ -69,9 +67,16 @@ def create_csv_for_s3_copy_steps(fastq_ids: List[str]) -> pd.DataFrame:
     """
     rows = []
 
-    for fastq_id in fastq_ids:
-        # Get the s3 uris for each fastq id
-        s3_uris = get_s3_uris_from_fastq_id(fastq_id)
+    # Get the fastq objects in one batch
+    fastq_objs = get_fastqs_in_fastq_id_list(
+        fastq_ids,
+        instrument_run_id=instrument_run_id,
+        includeS3Details=True
+    )
+
+    for fastq_obj in fastq_objs:
+        # Get the s3 uris for each fastq
+        s3_uris = get_s3_uris_from_fastq_obj(fastq_obj)
 
         # For each s3 uri, split the s3 uris into bucket and key
         for s3_uri in s3_uris:
@@ -95,9 +100,10 @@ def handler(event, context):
     fastq_ids = event['fastqIdList']
     steps_copy_bucket = event['s3StepsCopyBucket']
     steps_copy_key = event['s3StepsCopyKey']
+    instrument_run_id = event.get('instrumentRunId', None)
 
     # Generate the csv
-    copy_data_df = create_csv_for_s3_copy_steps(fastq_ids)
+    copy_data_df = create_csv_for_s3_copy_steps(fastq_ids, instrument_run_id=instrument_run_id)
 
     # Uploading to s3
     upload_file_to_s3(
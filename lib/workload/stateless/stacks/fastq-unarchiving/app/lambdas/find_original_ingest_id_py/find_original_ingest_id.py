@@ -3,54 +3,216 @@
 """
 Find the original ingest id
 
-Given a list of fastq ids and a file name, find the fastq id where their s3 uri for R1 or R2 matches the filename
+Given a list of fastq ids and a list of restored files, find the fastq id where their s3 uri for R1 or R2 matches the filename
 
 We need to do this since the s3 steps copy won't necessarily copy over the original ingest id and tags
+
+We build a job-scoped index once, mapping (filename, size) to the original ingest id and fastq id,
+and resolve every restored file against the index in memory.
+
+Files that match more than one fastq (or none) are reported back with an error message
+rather than silently taking the first match.
 """
 
-from typing import List, Dict
-from urllib.parse import urlparse
+from typing import List, Dict, Optional, Tuple, TypedDict, NotRequired
+from urllib.parse import urlparse, urlunparse
 from pathlib import Path
 
 # Local layer imports
-from fastq_tools import get_fastq, FastqListRow
+from fastq_tools import get_fastqs_in_fastq_id_list, FastqListRow
+from filemanager_tools import get_s3_objs_from_ingest_ids_map
 
 
-def get_fastq_objects(fastq_ids: List[str]) -> List[FastqListRow]:
-    return list(map(
-        lambda fastq_id: get_fastq(fastq_id, includeS3Details=True),
-        fastq_ids
-    ))
+class IngestIdIndexEntry(TypedDict):
+    fastqId: str
+    ingestId: str
+    size: Optional[int]
 
 
-def find_original_ingest_id(fastq_ids: List[str], s3_uri: str) -> Dict[str, str]:
-    filename = Path(urlparse(s3_uri).path).name
-    fastq_objects = get_fastq_objects(fastq_ids)
+class RestoredFile(TypedDict):
+    bucket: str
+    key: str
+    size: NotRequired[int]
+
+
+class IngestIdMapping(TypedDict):
+    bucket: str
+    key: str
+    fastqId: Optional[str]
+    ingestId: Optional[str]
+    hasError: bool
+    errorMessage: Optional[str]
+
+
+def get_fastq_objects(fastq_ids: List[str], instrument_run_id: Optional[str] = None) -> List[FastqListRow]:
+    return get_fastqs_in_fastq_id_list(
+        fastq_ids,
+        instrument_run_id=instrument_run_id,
+        includeS3Details=True
+    )
+
+
+def get_file_name_from_s3_uri(s3_uri: str) -> str:
+    return Path(urlparse(s3_uri).path).name
+
+
+def build_ingest_id_index(
+        fastq_objects: List[FastqListRow],
+        include_sizes: bool = True
+) -> Dict[str, List[IngestIdIndexEntry]]:
+    """
+    Build the index of filename to the list of (fastq id, ingest id, size) candidates
+    Sizes are collected in one batched filemanager query over all the ingest ids in the job
+    :param fastq_objects:
+    :param include_sizes:
+    :return:
+    """
+    index_entries: List[Tuple[str, IngestIdIndexEntry]] = []
     for fastq_object in fastq_objects:
-        if Path(urlparse(fastq_object['readSet']['r1']['s3Uri']).path).name == filename:
-            return {
-                "fastqId": fastq_object['id'],
-                "ingestId": fastq_object['readSet']['r1']['ingestId']
-            }
-        if fastq_object['readSet'].get("r2", None) is not None:
-            if Path(urlparse(fastq_object['readSet']['r2']['s3Uri']).path).name == filename:
-                return {
+        for read_name in ["r1", "r2"]:
+            read_obj = fastq_object['readSet'].get(read_name, None)
+            if read_obj is None:
+                continue
+            index_entries.append((
+                get_file_name_from_s3_uri(read_obj['s3Uri']),
+                {
                     "fastqId": fastq_object['id'],
-                    "ingestId": fastq_object['readSet']['r2']['ingestId']
+                    "ingestId": read_obj['ingestId'],
+                    "size": None,
                 }
-    raise ValueError("Filename not found in fastq ids")
+            ))
+
+    if include_sizes and len(index_entries) > 0:
+        size_by_ingest_id = dict(map(
+            lambda s3_obj_iter_: (s3_obj_iter_['ingestId'], s3_obj_iter_['fileObject']['size']),
+            get_s3_objs_from_ingest_ids_map(
+                list(map(lambda index_entry_iter_: index_entry_iter_[1]['ingestId'], index_entries))
+            )
+        ))
+        for _, index_entry in index_entries:
+            index_entry['size'] = size_by_ingest_id.get(index_entry['ingestId'], None)
 
+    ingest_id_index: Dict[str, List[IngestIdIndexEntry]] = {}
+    for file_name, index_entry in index_entries:
+        ingest_id_index.setdefault(file_name, []).append(index_entry)
 
-def handler(event, context) -> Dict[str, str]:
+    return ingest_id_index
+
+
+def resolve_restored_file(
+        ingest_id_index: Dict[str, List[IngestIdIndexEntry]],
+        restored_file: RestoredFile
+) -> IngestIdMapping:
     """
-    Given a list of fastq ids and a file name, find the fastq id where their s3 uri for R1 or R2 matches the filename
+    Resolve a restored file against the index.
+    If the filename matches more than one candidate we narrow by size,
+    anything still ambiguous is reported as an error.
+    :param ingest_id_index:
+    :param restored_file:
+    :return:
+    """
+    s3_uri = str(urlunparse(("s3", restored_file['bucket'], restored_file['key'], None, None, None)))
+    candidates = ingest_id_index.get(Path(restored_file['key']).name, [])
+
+    if len(candidates) > 1 and restored_file.get("size", None) is not None:
+        candidates = list(filter(
+            lambda candidate_iter_: candidate_iter_['size'] == restored_file['size'],
+            candidates
+        ))
+
+    error_message = None
+    if len(candidates) == 0:
+        error_message = f"Could not find {s3_uri} in fastq ids"
+    elif len(candidates) > 1:
+        error_message = (
+            f"Found multiple matches for {s3_uri} in fastq ids "
+            f"({', '.join(map(lambda candidate_iter_: candidate_iter_['fastqId'], candidates))})"
+        )
+
+    return {
+        "bucket": restored_file['bucket'],
+        "key": restored_file['key'],
+        "fastqId": candidates[0]['fastqId'] if error_message is None else None,
+        "ingestId": candidates[0]['ingestId'] if error_message is None else None,
+        "hasError": error_message is not None,
+        "errorMessage": error_message,
+    }
+
+
+def find_original_ingest_ids(
+        fastq_ids: List[str],
+        restored_files: List[RestoredFile],
+        instrument_run_id: Optional[str] = None
+) -> List[IngestIdMapping]:
+    """
+    Resolve all restored files in the job against one index
+    :param fastq_ids:
+    :param restored_files:
+    :param instrument_run_id:
+    :return:
+    """
+    ingest_id_index = build_ingest_id_index(
+        get_fastq_objects(fastq_ids, instrument_run_id=instrument_run_id)
+    )
+
+    return list(map(
+        lambda restored_file_iter_: resolve_restored_file(ingest_id_index, restored_file_iter_),
+        restored_files
+    ))
+
+
+def find_original_ingest_id(fastq_ids: List[str], s3_uri: str) -> Dict[str, str]:
+    s3_obj = urlparse(s3_uri)
+    ingest_id_mapping = resolve_restored_file(
+        build_ingest_id_index(get_fastq_objects(fastq_ids), include_sizes=False),
+        {
+            "bucket": s3_obj.netloc,
+            "key": s3_obj.path.lstrip("/"),
+        }
+    )
+
+    if ingest_id_mapping['hasError']:
+        raise ValueError(ingest_id_mapping['errorMessage'])
+
+    return {
+        "fastqId": ingest_id_mapping['fastqId'],
+        "ingestId": ingest_id_mapping['ingestId']
+    }
+
+
+def handler(event, context) -> Dict:
+    """
+    Given a list of fastq ids and a list of restored files,
+    find the fastq id where their s3 uri for R1 or R2 matches the filename of each restored file.
+
+    For backwards compatibility, a single s3Uri may be provided instead of a fileList
     :param event:
     :param context:
     :return:
     """
     fastq_ids = event.get("fastqIdList", [])
-    s3_uri = event.get("s3Uri", "")
-    return find_original_ingest_id(fastq_ids, s3_uri)
+
+    if event.get("fileList", None) is None:
+        s3_uri = event.get("s3Uri", "")
+        return find_original_ingest_id(fastq_ids, s3_uri)
+
+    return {
+        "ingestIdMappingList": find_original_ingest_ids(
+            fastq_ids,
+            list(map(
+                lambda file_iter_: dict(filter(
+                    lambda kv: kv[1] is not None,
+                    {
+                        "bucket": file_iter_['bucket'],
+                        "key": file_iter_['key'],
+                        "size": file_iter_.get('size', None),
+                    }.items()
+                )),
+                event['fileList']
+            )),
+            instrument_run_id=event.get("instrumentRunId", None)
+        )
+    }
 
 
 # if __name__ == "__main__":
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+
+"""
+Resolve restored files against the job-scoped ingest id index
+
+Run from the find_original_ingest_id_py directory with
+    PYTHONPATH="../../../../../../components/python-fastq-tools-layer/fastq_tools_layer/src:../../../../../../components/python-filemanager-tools-layer/filemanager_tools_layer/src:." \\
+    python -m unittest discover tests
+"""
+
+import unittest
+from unittest import mock
+
+import find_original_ingest_id
+
+CACHE_BUCKET = "pipeline-prod-cache-503977275616-ap-southeast-2"
+ORIGINAL_PREFIX = "byob-icav2/production/primary/240906_A01052_0225_AHV7FJDSXC/20240910abcd1234/Samples/Lane_2/L2401244/"
+RESTORED_PREFIX = "byob-icav2/production/restored/14d/year=2025/month=04/day=03/2e505203-396e-46cd-97fb-feea68ac074c/240906_A01052_0225_AHV7FJDSXC/"
+
+
+def get_fastq_object(fastq_id: str, file_name_prefix: str, ingest_id_prefix: str):
+    return {
+        "id": fastq_id,
+        "readSet": {
+            "r1": {
+                "s3Uri": f"s3://{CACHE_BUCKET}/{ORIGINAL_PREFIX}{file_name_prefix}_R1_001.fastq.ora",
+                "ingestId": f"{ingest_id_prefix}-r1",
+            },
+            "r2": {
+                "s3Uri": f"s3://{CACHE_BUCKET}/{ORIGINAL_PREFIX}{file_name_prefix}_R2_001.fastq.ora",
+                "ingestId": f"{ingest_id_prefix}-r2",
+            },
+        }
+    }
+
+
+FASTQ_OBJECTS = [
+    get_fastq_object("fqr.01JN26CMFST6TTQ955RJETM975", "PRJ241412_L2401244_S1_L002", "0193909b-d346"),
+    get_fastq_object("fqr.01JN26CMJ114B4GAY0G5E8ARW0", "PRJ241413_L2401245_S2_L002", "0193909b-e411"),
+]
+
+SIZE_BY_INGEST_ID = {
+    "0193909b-d346-r1": 1000,
+    "0193909b-d346-r2": 1100,
+    "0193909b-e411-r1": 2000,
+    "0193909b-e411-r2": 2100,
+    "0193909b-f522-r1": 3000,
+    "0193909b-f522-r2": 3100,
+}
+
+
+def get_s3_objs_from_ingest_ids_map(ingest_ids):
+    return [
+        {"ingestId": ingest_id, "fileObject": {"size": SIZE_BY_INGEST_ID[ingest_id]}}
+        for ingest_id in ingest_ids
+    ]
+
+
+class FindOriginalIngestIdUnitTest(unittest.TestCase):
+    def setUp(self):
+        self.get_s3_objs_mock = mock.MagicMock(wraps=get_s3_objs_from_ingest_ids_map)
+        mock.patch.object(find_original_ingest_id, "get_s3_objs_from_ingest_ids_map", self.get_s3_objs_mock).start()
+
+    def tearDown(self):
+        mock.patch.stopall()
+
+    def test_build_ingest_id_index(self):
+        ingest_id_index = find_original_ingest_id.build_ingest_id_index(FASTQ_OBJECTS)
+
+        self.assertEqual(len(ingest_id_index), 4)
+        self.assertEqual(
+            ingest_id_index["PRJ241412_L2401244_S1_L002_R2_001.fastq.ora"],
+            [{"fastqId": "fqr.01JN26CMFST6TTQ955RJETM975", "ingestId": "0193909b-d346-r2", "size": 1100}]
+        )
+        # Sizes come from a single filemanager query for the whole job
+        self.get_s3_objs_mock.assert_called_once()
+
+    def test_build_ingest_id_index_without_sizes(self):
+        ingest_id_index = find_original_ingest_id.build_ingest_id_index(FASTQ_OBJECTS, include_sizes=False)
+
+        self.assertTrue(all(
+            index_entry["size"] is None
+            for index_entries in ingest_id_index.values()
+            for index_entry in index_entries
+        ))
+        self.get_s3_objs_mock.assert_not_called()
+
+    def test_resolve_restored_key(self):
+        mapping = find_original_ingest_id.resolve_restored_file(
+            find_original_ingest_id.build_ingest_id_index(FASTQ_OBJECTS),
+            {"bucket": CACHE_BUCKET, "key": f"{RESTORED_PREFIX}PRJ241413_L2401245_S2_L002_R1_001.fastq.ora"}
+        )
+
+        self.assertFalse(mapping["hasError"])
+        self.assertEqual(mapping["fastqId"], "fqr.01JN26CMJ114B4GAY0G5E8ARW0")
+        self.assertEqual(mapping["ingestId"], "0193909b-e411-r1")
+        self.assertEqual(mapping["key"], f"{RESTORED_PREFIX}PRJ241413_L2401245_S2_L002_R1_001.fastq.ora")
+
+    def test_resolve_non_restored_key(self):
+        mapping = find_original_ingest_id.resolve_restored_file(
+            find_original_ingest_id.build_ingest_id_index(FASTQ_OBJECTS),
+            {"bucket": CACHE_BUCKET, "key": f"{ORIGINAL_PREFIX}PRJ241412_L2401244_S1_L002_R1_001.fastq.ora"}
+        )
+
+        self.assertFalse(mapping["hasError"])
+        self.assertEqual(mapping["fastqId"], "fqr.01JN26CMFST6TTQ955RJETM975")
+        self.assertEqual(mapping["ingestId"], "0193909b-d346-r1")
+
+    def test_resolve_unknown_file(self):
+        mapping = find_original_ingest_id.resolve_restored_file(
+            find_original_ingest_id.build_ingest_id_index(FASTQ_OBJECTS),
+            {"bucket": CACHE_BUCKET, "key": f"{RESTORED_PREFIX}PRJ000000_L0000000_S9_L001_R1_001.fastq.ora"}
+        )
+
+        self.assertTrue(mapping["hasError"])
+        self.assertIsNone(mapping["fastqId"])
+        self.assertIsNone(mapping["ingestId"])
+        self.assertIn("Could not find", mapping["errorMessage"])
+
+    def test_multiple_candidates_narrowed_by_size(self):
+        # The same file name under two fastqs, i.e. a fastq registered twice
+        duplicate_fastq_objects = FASTQ_OBJECTS + [
+            get_fastq_object("fqr.01JN26CMKZ4Q3V0C8RXK2B7T1M", "PRJ241412_L2401244_S1_L002", "0193909b-f522"),
+        ]
+        ingest_id_index = find_original_ingest_id.build_ingest_id_index(duplicate_fastq_objects)
+
+        mapping = find_original_ingest_id.resolve_restored_file(
+            ingest_id_index,
+            {"bucket": CACHE_BUCKET, "key": f"{RESTORED_PREFIX}PRJ241412_L2401244_S1_L002_R1_001.fastq.ora", "size": 3000}
+        )
+        self.assertFalse(mapping["hasError"])
+        self.assertEqual(mapping["fastqId"], "fqr.01JN26CMKZ4Q3V0C8RXK2B7T1M")
+        self.assertEqual(mapping["ingestId"], "0193909b-f522-r1")
+
+    def test_multiple_candidates_ambiguous(self):
+        duplicate_fastq_objects = FASTQ_OBJECTS + [
+            get_fastq_object("fqr.01JN26CMKZ4Q3V0C8RXK2B7T1M", "PRJ241412_L2401244_S1_L002", "0193909b-f522"),
+        ]
+        ingest_id_index = find_original_ingest_id.build_ingest_id_index(duplicate_fastq_objects)
+
+        # No size to narrow by
+        mapping = find_original_ingest_id.resolve_restored_file(
+            ingest_id_index,
+            {"bucket": CACHE_BUCKET, "key": f"{RESTORED_PREFIX}PRJ241412_L2401244_S1_L002_R1_001.fastq.ora"}
+        )
+        self.assertTrue(mapping["hasError"])
+        self.assertIsNone(mapping["fastqId"])
+        self.assertIn("Found multiple matches", mapping["errorMessage"])
+        self.assertIn("fqr.01JN26CMFST6TTQ955RJETM975", mapping["errorMessage"])
+        self.assertIn("fqr.01JN26CMKZ4Q3V0C8RXK2B7T1M", mapping["errorMessage"])
+
+        # A size that matches neither candidate
+        mapping = find_original_ingest_id.resolve_restored_file(
+            ingest_id_index,
+            {"bucket": CACHE_BUCKET, "key": f"{RESTORED_PREFIX}PRJ241412_L2401244_S1_L002_R1_001.fastq.ora", "size": 5}
+        )
+        self.assertTrue(mapping["hasError"])
+        self.assertIn("Could not find", mapping["errorMessage"])
+
+    def test_find_original_ingest_ids(self):
+        with mock.patch.object(find_original_ingest_id, "get_fastq_objects", return_value=FASTQ_OBJECTS):
+            mappings = find_original_ingest_id.find_original_ingest_ids(
+                list(map(lambda fastq_object_iter_: fastq_object_iter_["id"], FASTQ_OBJECTS)),
+                [
+                    {"bucket": CACHE_BUCKET, "key": f"{RESTORED_PREFIX}PRJ241412_L2401244_S1_L002_R2_001.fastq.ora"},
+                    {"bucket": CACHE_BUCKET, "key": f"{RESTORED_PREFIX}PRJ241413_L2401245_S2_L002_R2_001.fastq.ora"},
+                ]
+            )
+
+        self.assertEqual(
+            list(map(lambda mapping_iter_: mapping_iter_["ingestId"], mappings)),
+            ["0193909b-d346-r2", "0193909b-e411-r2"]
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -186,14 +186,14 @@ export class FastqUnarchivingManagerStack extends Stack {
         architecture: lambda.Architecture.ARM_64,
         index: 'find_original_ingest_id.py',
         handler: 'handler',
-        timeout: Duration.seconds(60),
+        timeout: Duration.seconds(300),
         memorySize: 2048,
         environment: {
           /* SSM and Secrets Manager env vars */
           HOSTNAME_SSM_PARAMETER: props.hostnameSsmParameterObj.parameterName,
           ORCABUS_TOKEN_SECRET_ID: props.orcabusTokenSecretObj.secretName,
         },
-        layers: [props.fastqManagerToolsLayer],
+        layers: [props.fileManagerToolsLayer, props.fastqManagerToolsLayer],
       }
     );
     // Give lambda function permissions to secrets and ssm parameters
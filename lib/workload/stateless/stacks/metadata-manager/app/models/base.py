@@ -61,6 +61,9 @@ class BaseManager(models.Manager):
                 api_settings.ORDERING_PARAM,
                 PaginationConstant.PAGE,
                 PaginationConstant.ROWS_PER_PAGE,
+                PaginationConstant.CURSOR,
+                PaginationConstant.PAGINATION,
+                PaginationConstant.APPROXIMATE_COUNT,
                 "sortCol",
                 "sortAsc",
             ]
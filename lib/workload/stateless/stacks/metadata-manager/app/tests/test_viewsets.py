@@ -102,3 +102,40 @@ class LabViewSetTestCase(TestCase):
                                 headers={'Authorization': f'Bearer {TEST_JWT}', 'Content-Type': 'application/json'})
         library = Library.objects.get(library_id=LIBRARY_1['library_id'])
         self.assertEqual(library.coverage, new_coverage, "Coverage should be updated")
+
+    def test_get_api_cursor_pagination(self):
+        """
+        python manage.py test app.tests.test_viewsets.LabViewSetTestCase.test_get_api_cursor_pagination
+        """
+        for i in range(10):
+            Library.objects.create(library_id=f"L99{i:05d}")
+        expected = list(Library.objects.order_by("-orcabus_id").values_list("orcabus_id", flat=True))
+
+        path = version_endpoint("library")
+        logger.info(f"walk '{path}' with cursor pagination")
+        library_ids = []
+        url = f"/{path}/?pagination=cursor&rows_per_page=4&approximate_count=true"
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200, "Ok status response is expected")
+            self.assertNotIn("page", response.data["pagination"], "No page number in cursor pagination")
+            library_ids.extend([lib["orcabus_id"] for lib in response.data["results"]])
+            url = response.data["links"]["next"]
+
+        self.assertEqual(library_ids, expected, "All libraries are expected once and in order")
+
+    def test_get_api_library_id_list(self):
+        """
+        python manage.py test app.tests.test_viewsets.LabViewSetTestCase.test_get_api_library_id_list
+        """
+        for i in range(3):
+            Library.objects.create(library_id=f"L98{i:05d}")
+
+        path = version_endpoint("library")
+        response = self.client.get(f"/{path}/?library_id=L9800000&library_id=L9800002&library_id={LIBRARY_1['library_id']}")
+        self.assertEqual(response.status_code, 200, "Ok status response is expected")
+        self.assertEqual(
+            sorted(lib["library_id"] for lib in response.data["results"]),
+            sorted(["L9800000", "L9800002", LIBRARY_1['library_id']]),
+            "Every library in the list is expected"
+        )
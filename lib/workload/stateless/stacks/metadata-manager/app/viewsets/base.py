@@ -3,7 +3,8 @@ from abc import ABC
 from drf_spectacular.utils import extend_schema
 from rest_framework.mixins import DestroyModelMixin
 
-from app.pagination import StandardResultsSetPagination
+from app.pagination import StandardResultsSetPagination, CursorResultsSetPagination, \
+    is_cursor_pagination_requested
 
 from django.shortcuts import get_object_or_404
 
@@ -21,6 +22,23 @@ class BaseViewSet(ModelViewSet, ABC):
     pagination_class = StandardResultsSetPagination
     filter_backends = [filters.OrderingFilter, filters.SearchFilter]
     http_method_names = ['get', 'patch', 'delete']
+    # Non-nullable fields (indexed together with the pk) allowed as cursor pagination ordering, besides orcabus_id
+    cursor_ordering_fields = []
+
+    @property
+    def paginator(self):
+        """
+        Page number pagination by default, keyset pagination when opted-in with `?pagination=cursor`
+        """
+        if not hasattr(self, '_paginator'):
+            if self.pagination_class is None:
+                self._paginator = None
+            elif self.pagination_class is StandardResultsSetPagination and is_cursor_pagination_requested(
+                    getattr(self, 'request', None)):
+                self._paginator = CursorResultsSetPagination()
+            else:
+                self._paginator = self.pagination_class()
+        return self._paginator
 
     def retrieve_history(self, history_serializer):
         """
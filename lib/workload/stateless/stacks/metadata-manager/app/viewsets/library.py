@@ -28,6 +28,12 @@ class LibraryViewSet(BaseViewSet):
             query_params.pop("coverage[gte]")
             qs = qs.filter(coverage__gte=coverage__gte)
 
+        # Multiple library ids are matched together (i.e. all libraries in a samplesheet in one query)
+        library_id_list = query_params.getlist("library_id", None)
+        if library_id_list:
+            query_params.pop("library_id")
+            qs = qs.filter(library_id__in=library_id_list)
+
         project_id_list = query_params.getlist("project_id", None)
         if project_id_list:
             query_params.pop("project_id")
@@ -64,6 +70,11 @@ class LibraryViewSet(BaseViewSet):
                              description="Filter based on 'coverage' that is greater than or equal to the given value.",
                              required=False,
                              type=float),
+            OpenApiParameter(name='library_id',
+                             description="Filter based on 'library_id', may be given more than once.",
+                             required=False,
+                             many=True,
+                             type=str),
             OpenApiParameter(name='project_id',
                              description="Filter where the associated the project has the given 'project_id'.",
                              required=False,
@@ -225,7 +225,7 @@ export class PieriandxPipelineManagerStack extends cdk.Stack {
         handler: 'handler',
         memorySize: 1024,
         layers: [lambdaLayerObj.lambdaLayerVersionObj],
-        timeout: Duration.seconds(300),
+        timeout: Duration.seconds(900), // All data files of the sequencerrun are uploaded in one invocation
         environment: { ...pieriandxEnvs, ...pieriandxSecretEnvs, ...icav2Envs },
       }
     );
@@ -260,7 +260,8 @@ export class PieriandxPipelineManagerStack extends cdk.Stack {
         handler: 'handler',
         memorySize: 1024,
         layers: [lambdaLayerObj.lambdaLayerVersionObj],
-        timeout: Duration.seconds(30),
+        // Polls every running job in one invocation
+        timeout: Duration.seconds(300),
         environment: pieriandxEnvs,
       }
     );
@@ -3,7 +3,22 @@
 """
 Get informatics job status
 
-Given a case id and an informatics job id, return the status of the job
+Given the running jobs partition items (running_jobs), poll the jobs that are due and return those whose status changed,
+see pieriandx_pipeline_tools.utils.polling_helpers
+
+{
+  "changed_jobs": [
+    {
+      "job_db_item": {...},
+      "get_current_status_step": {...}  # As below
+    }
+  ],
+  "num_running_jobs": 10,
+  "num_polled_jobs": 4,
+  "failed_case_ids": []
+}
+
+Or given a case id and an informatics job id, return the status of the job
 
 The job status can be one of the following:
 * waiting  #  PROCESSING
@@ -34,7 +49,9 @@ import logging
 from os import environ
 
 # Layer imports
+from pieriandx_pipeline_tools.utils.informaticsjob_helpers import get_informaticsjob_and_report_status
 from pieriandx_pipeline_tools.utils.pieriandx_helpers import get_pieriandx_client
+from pieriandx_pipeline_tools.utils.polling_helpers import get_changed_informaticsjob_statuses
 from pieriandx_pipeline_tools.utils.secretsmanager_helpers import set_pieriandx_env_vars
 
 # Set logger
@@ -42,27 +59,6 @@ logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
-JOB_STATUS_BOOL = {
-    "waiting": None,
-    "ready": None,
-    "running": None,
-    "complete": True,
-    "failed": False,
-    "canceled": False
-}
-
-
-REPORT_STATUS_BOOL = {
-    "waiting": None,
-    "ready": None,
-    "running": None,
-    "report_generation_complete": True,
-    "complete": True,
-    "failed": False,
-    "canceled": False
-}
-
-
 def handler(event, context):
     """
     Get informatics job status
@@ -73,6 +69,9 @@ def handler(event, context):
     Returns:
 
     """
+    # Poll all running jobs
+    if "running_jobs" in event:
+        return get_changed_informaticsjob_statuses(event.get("running_jobs"))
 
     # Get event values
     case_id = event.get("case_id", None)
@@ -81,9 +80,6 @@ def handler(event, context):
     current_job_status = event.get("current_job_status", None)
     current_report_status = event.get("current_report_status", None)
 
-    # Initialise job status
-    job_status = None
-
     # Cannot query the job id directly, instead query the case id and get the job id from there
     set_pieriandx_env_vars()
 
@@ -99,153 +95,14 @@ def handler(event, context):
         endpoint=f"/case/{case_id}",
     )
 
-    if report_id is None or report_id == -1:
-        # Get the informatics job object
-        try:
-            informaticsjob_obj = next(
-                filter(
-                    lambda informaticsjob_iter: int(informaticsjob_iter.get("id")) == int(job_id),
-                    case_data.get("informaticsJobs")
-                )
-            )
-        except StopIteration:
-            logger.error(f"Failed to get informatics job {job_id}")
-            return {
-                "status": "failed",
-                "message": f"Failed to get informatics job {job_id} from the case id {case_id}"
-            }
-
-        # Get job status
-        job_status = informaticsjob_obj.get("status")
-
-        # Job has either failed or is incomplete - return as is
-        if (
-                (
-                    # Job not yet complete
-                    not JOB_STATUS_BOOL[job_status]
-                ) or
-                (
-                    # Reports empty
-                    case_data.get("reports") is None
-                ) or
-                (
-                    # Reports length is empty
-                    len(case_data.get("reports")) == 0
-                )
-        ):
-            # Set the expression attribute values dict
-            expression_attribute_values_dict = {
-                ":job_status": {
-                    "S": job_status
-                }
-            }
-            update_expression_str = "SET job_status = :job_status"
-
-            if JOB_STATUS_BOOL[job_status] is not None:
-                expression_attribute_values_dict[":job_status_bool"] = {
-                    "BOOL": JOB_STATUS_BOOL[job_status]
-                }
-                update_expression_str = f"{update_expression_str}, job_status_bool = :job_status_bool"
-
-            if JOB_STATUS_BOOL[job_status] is False:
-                expression_attribute_values_dict[":workflow_status"] = {
-                    "S": "FAILED"
-                }
-                update_expression_str = f"{update_expression_str}, workflow_status = :workflow_status"
-
-            # Return the job status
-            return {
-                "job_status": job_status,
-                "job_status_bool": JOB_STATUS_BOOL[job_status],
-                "report_id": None,
-                "report_status": None,
-                "report_status_bool": None,
-                "job_status_changed": False if job_status == current_job_status else True,
-                "expression_attribute_values_dict": expression_attribute_values_dict,
-                "update_expression_str": update_expression_str
-            }
-
-        # Job is complete and reports not empty, check reports
-        reportjob_obj = case_data.get("reports")[0]
-
-    else:
-        # Report id is not None, get the report object
-        try:
-            reportjob_obj =  next(
-                filter(
-                    lambda reportjob_iter: int(reportjob_iter.get("id")) == int(report_id),
-                    case_data.get("reports")
-                )
-            )
-        except StopIteration:
-            logger.error(f"Failed to get report id {report_id}")
-            return {
-                "status": "failed",
-                "message": f"Failed to get report id {report_id} from the case id {case_id}"
-            }
-
-    # Reinitialise job status
-    job_status = "complete" if job_status is None else job_status
-
-    # Get report  status
-    report_status = reportjob_obj.get("status")
-
-    # Return the job status with the report status
-    # expression_attribute_values_dict
-    # update_expression_str
-
-    # Set the expression attribute values dict
-    expression_attribute_values_dict = {
-        ":job_status": {
-            "S": job_status
-        },
-        ":report_id": {
-            "N": reportjob_obj.get("id")
-        },
-        ":report_status": {
-            "S": report_status
-        },
-    }
-    update_expression_str = "SET job_status = :job_status, report_id = :report_id, report_status = :report_status"
-
-    # Add the bool values if they are not None
-    if JOB_STATUS_BOOL[job_status] is not None:
-        expression_attribute_values_dict[":job_status_bool"] = {
-            "BOOL": JOB_STATUS_BOOL[job_status]
-        }
-        update_expression_str = f"{update_expression_str}, job_status_bool = :job_status_bool"
-
-    if REPORT_STATUS_BOOL[report_status] is not None:
-        expression_attribute_values_dict[":report_status_bool"] = {
-            "BOOL": REPORT_STATUS_BOOL[report_status]
-        }
-        update_expression_str = f"{update_expression_str}, report_status_bool = :report_status_bool"
-
-    # Add the workflow status
-    # If one of the job status or report status are false, then the workflow status is failed
-    if JOB_STATUS_BOOL[job_status] is False or REPORT_STATUS_BOOL[report_status] is False:
-        expression_attribute_values_dict[":workflow_status"] = {
-            "S": "FAILED"
-        }
-        update_expression_str = f"{update_expression_str}, workflow_status = :workflow_status"
-    # If both the job status and report status are true, then the workflow status is complete
-    elif JOB_STATUS_BOOL[job_status] is True and REPORT_STATUS_BOOL[report_status] is True:
-        expression_attribute_values_dict[":workflow_status"] = {
-            "S": "SUCCEEDED"
-        }
-        update_expression_str = f"{update_expression_str}, workflow_status = :workflow_status"
-
-    return {
-        "job_status": job_status,
-        "job_status_bool": JOB_STATUS_BOOL[job_status],
-        "report_id": reportjob_obj.get("id"),
-        "report_status": report_status,
-        "report_status_bool": REPORT_STATUS_BOOL[report_status],
-        "job_status_changed": False if report_status == current_report_status else True,
-        "expression_attribute_values_dict": expression_attribute_values_dict,
-        "update_expression_str": update_expression_str
-    }
-
+    return get_informaticsjob_and_report_status(
+        case_data=case_data,
+        case_id=case_id,
+        job_id=job_id,
+        report_id=report_id,
+        current_job_status=current_job_status,
+        current_report_status=current_report_status,
+    )
 
 
 # if __name__ == "__main__":
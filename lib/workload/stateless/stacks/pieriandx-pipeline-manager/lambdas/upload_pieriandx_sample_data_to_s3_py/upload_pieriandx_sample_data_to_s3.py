@@ -2,11 +2,13 @@
 
 """
 
-Upload a file to pieriandx sample data s3 bucket
+Upload files to pieriandx sample data s3 bucket
 
-Given an icav2 uri, and a destination uri, download and upload the file into the destination uri
+Given a list of data files, each with an icav2 uri and a destination uri, stream each file into the destination uri
 
-If needs_decompression is set to true, the downloaded file will be decompressed before uploading
+If needs_decompression is set to true, the file is decompressed as it is streamed
+
+A data file may instead have contents, in which case the contents are written to the destination uri
 
 Environment variables required are:
 PIERIANDX_S3_ACCESS_CREDENTIALS_SECRET_ID -> The secret id for the s3 access credentials
@@ -15,25 +17,27 @@ ICAV2_ACCESS_TOKEN_SECRET_ID -> The secret id for the icav2 access token
 Input will look like this
 
 {
-  "src_uri": "icav2://project-id/path/to/sample-microsat_output.txt",
-  "dest_uri": "s3://pieriandx/melbourne/20201203_A00123_0001_BHJGJFDS__caseaccessionnumber__20240411235959/L2301368.microsat_output.json",
-  "needs_decompression": false,
-  "contents": null
+  "data_files": [
+    {
+      "src_uri": "icav2://project-id/path/to/sample-microsat_output.txt",
+      "dest_uri": "s3://pieriandx/melbourne/20201203_A00123_0001_BHJGJFDS__caseaccessionnumber__20240411235959/L2301368.microsat_output.json",
+      "needs_decompression": false,
+      "contents": null
+    }
+  ]
 }
 
+A single data file (src_uri, dest_uri, needs_decompression, contents) at the top level of the event is also accepted
+
 """
 
 # Standard imports
-from tempfile import TemporaryDirectory
-from pathlib import Path
-from urllib.parse import urlparse
-from wrapica.project_data import read_icav2_file_contents, convert_uri_to_project_data_obj
 import logging
 
 # Layer imports
-from pieriandx_pipeline_tools.utils.s3_helpers import set_s3_access_cred_env_vars, upload_file
+from pieriandx_pipeline_tools.utils.s3_helpers import set_s3_access_cred_env_vars
 from pieriandx_pipeline_tools.utils.secretsmanager_helpers import set_icav2_env_vars
-from pieriandx_pipeline_tools.utils.compression_helpers import decompress_file
+from pieriandx_pipeline_tools.utils.transfer_helpers import transfer_data_files
 
 # Logger
 logger = logging.getLogger()
@@ -55,47 +59,35 @@ def handler(event, context):
     set_icav2_env_vars()
     set_s3_access_cred_env_vars()
 
-    # Get uris
-    needs_decompression = event.get("needs_decompression", False)
-    dest_uri = event.get("dest_uri")
-    dest_bucket = urlparse(dest_uri).netloc
-    dest_key = urlparse(dest_uri).path
-
-    if event.get("src_uri", None) is not None:
-        icav2_data_obj = convert_uri_to_project_data_obj(event.get("src_uri"))
-
-        with TemporaryDirectory() as temp_dir:
-            # Set output path
-            output_path = Path(temp_dir) / icav2_data_obj.data.details.name
-
-            # Read icav2 file contents
-            read_icav2_file_contents(
-                project_id=icav2_data_obj.project_id,
-                data_id=icav2_data_obj.data.id,
-                output_path=output_path
+    # Get data files
+    data_files = event.get("data_files", None)
+    if data_files is None:
+        data_files = [event]
+
+    # Upload data files
+    transfer_results = transfer_data_files(data_files)
+
+    # Fail once every data file has been attempted
+    failed_transfer_results = list(
+        filter(
+            lambda transfer_result_iter: transfer_result_iter["status"] == "FAILED",
+            transfer_results
+        )
+    )
+    if len(failed_transfer_results) > 0:
+        raise Exception(
+            f"Failed to upload {len(failed_transfer_results)} of {len(transfer_results)} data files: " +
+            ", ".join(
+                map(
+                    lambda transfer_result_iter: transfer_result_iter["dest_uri"],
+                    failed_transfer_results
+                )
             )
+        )
 
-            if needs_decompression:
-                decompress_file(output_path, output_path.parent / output_path.name.replace(".gz", ""))
-                output_path = output_path.parent / output_path.name.replace(".gz", "")
-
-            if output_path.name.endswith("MetricsOutput.tsv"):
-                with open(output_path, "r") as f:
-                    contents = f.read()
-                contents = contents.replace('[Run QC Metrics]', '[Run Metrics]')
-                with open(output_path, "w") as f:
-                    f.write(contents)
-
-            # Upload to s3
-            upload_file(dest_bucket, dest_key, output_path)
-    else:
-        contents = event.get("contents")
-
-        with TemporaryDirectory() as temp_dir:
-            output_path = Path(temp_dir) / Path(dest_key).name
-            output_path.write_text(contents)
-
-            upload_file(dest_bucket, dest_key, output_path)
+    return {
+        "transfer_results": transfer_results
+    }
 
 
 # if __name__ == "__main__":
@@ -4,11 +4,15 @@
 Miscellaneous utilities for parsing through compressed strings
 """
 
+import io
 import json
+import zlib
 from base64 import b64encode, b64decode
 import gzip
 from pathlib import Path
-from typing import Dict, List, Union
+from typing import BinaryIO, Dict, List, Union
+
+DECOMPRESSION_READ_SIZE = 1048576  # 1 MiB (2^20)
 
 
 def compress_dict(input_dict: Union[Dict, List]) -> str:
@@ -58,3 +62,51 @@ def decompress_file(input_file: Path, output_file: Path):
     with gzip.open(input_file, 'rb') as f_in:
         with open(output_file, 'wb') as f_out:
             f_out.write(f_in.read())
+
+
+class GunzipStream(io.RawIOBase):
+    """
+    Decompress a gzipped file object as it is read, without holding the file in memory.
+
+    Files with multiple gzip members (i.e. bgzipped vcfs) are decompressed in full, as gzip.open would.
+
+    Each read is filled as far as the input allows, so the stream can be handed straight to s3 upload_fileobj
+    """
+    def __init__(self, input_fh: BinaryIO, read_size: int = DECOMPRESSION_READ_SIZE):
+        self.input_fh = input_fh
+        self.read_size = read_size
+        self.decompressor = zlib.decompressobj(wbits=zlib.MAX_WBITS | 16)
+        self.compressed_data = b""
+        self.is_input_exhausted = False
+        self.is_member_started = False
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        bytes_read = 0
+        while bytes_read < len(buffer):
+            # Get more compressed data
+            if len(self.compressed_data) == 0 and not self.is_input_exhausted:
+                self.compressed_data = self.input_fh.read(self.read_size)
+                self.is_input_exhausted = len(self.compressed_data) == 0
+            if len(self.compressed_data) == 0:
+                if self.is_member_started:
+                    raise EOFError("Compressed file ended before the end-of-stream marker was reached")
+                break
+
+            # Decompress no more than the space left in the buffer
+            output = self.decompressor.decompress(self.compressed_data, len(buffer) - bytes_read)
+            self.is_member_started = True
+            if self.decompressor.eof:
+                # Start of the next gzip member
+                self.compressed_data = self.decompressor.unused_data
+                self.decompressor = zlib.decompressobj(wbits=zlib.MAX_WBITS | 16)
+                self.is_member_started = False
+            else:
+                self.compressed_data = self.decompressor.unconsumed_tail
+
+            buffer[bytes_read:bytes_read + len(output)] = output
+            bytes_read += len(output)
+
+        return bytes_read
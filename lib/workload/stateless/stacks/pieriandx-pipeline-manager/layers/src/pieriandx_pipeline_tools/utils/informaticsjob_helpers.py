@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+
+"""
+Informatics job and report status of a case
+
+The job status can be one of the following:
+* waiting  #  PROCESSING
+* ready    #  PROCESSING
+* running  #  PROCESSING
+* complete #  TERMINAL
+* failed   #  TERMINAL
+* canceled #  TERMINAL
+
+If the job is complete, the reports for the case are checked to see if the report generation is also complete
+"""
+
+# Standard imports
+import logging
+from typing import Dict, Optional
+
+# Set logger
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+JOB_STATUS_BOOL = {
+    "waiting": None,
+    "ready": None,
+    "running": None,
+    "complete": True,
+    "failed": False,
+    "canceled": False
+}
+
+
+REPORT_STATUS_BOOL = {
+    "waiting": None,
+    "ready": None,
+    "running": None,
+    "report_generation_complete": True,
+    "complete": True,
+    "failed": False,
+    "canceled": False
+}
+
+
+def get_informaticsjob_and_report_status(
+        case_data: Dict,
+        case_id: int,
+        job_id: int,
+        report_id: Optional[int],
+        current_job_status: Optional[str],
+        current_report_status: Optional[str],
+) -> Dict:
+    """
+    Get the informatics job and report status from the case data,
+    along with the dynamodb update expression for the status
+
+    job_status:  STR VALUE OF THE JOB STATUS
+    job_status_bool:  BOOL VALUE OF THE JOB STATUS  TRUE IF COMPLETE, FALSE IF FAILED, NONE OTHERWISE
+    report_id:  INT VALUE OF THE REPORT ID
+    report_status: STR VALUE OF THE REPORT STATUS
+    report_status_bool: BOOL VALUE OF THE REPORT STATUS  TRUE IF COMPLETE, FALSE IF FAILED, NONE OTHERWISE
+    job_status_changed: BOOL VALUE OF WHETHER THE JOB STATUS HAS CHANGED TRUE OR FALSE
+    expression_attribute_values_dict: DICT OF THE EXPRESSION ATTRIBUTE VALUES FOR DYNAMODB UPDATE EXPRESSION
+    update_expression_str: STR OF THE UPDATE EXPRESSION FOR DYNAMODB
+
+    If the job or report cannot be found in the case, a dict with 'status' failed and a 'message' is returned instead
+    """
+    # Initialise job status
+    job_status = None
+
+    if report_id is None or report_id == -1:
+        # Get the informatics job object
+        try:
+            informaticsjob_obj = next(
+                filter(
+                    lambda informaticsjob_iter: int(informaticsjob_iter.get("id")) == int(job_id),
+                    case_data.get("informaticsJobs")
+                )
+            )
+        except StopIteration:
+            logger.error(f"Failed to get informatics job {job_id}")
+            return {
+                "status": "failed",
+                "message": f"Failed to get informatics job {job_id} from the case id {case_id}"
+            }
+
+        # Get job status
+        job_status = informaticsjob_obj.get("status")
+
+        # Job has either failed or is incomplete - return as is
+        if (
+                (
+                    # Job not yet complete
+                    not JOB_STATUS_BOOL[job_status]
+                ) or
+                (
+                    # Reports empty
+                    case_data.get("reports") is None
+                ) or
+                (
+                    # Reports length is empty
+                    len(case_data.get("reports")) == 0
+                )
+        ):
+            # Set the expression attribute values dict
+            expression_attribute_values_dict = {
+                ":job_status": {
+                    "S": job_status
+                }
+            }
+            update_expression_str = "SET job_status = :job_status"
+
+            if JOB_STATUS_BOOL[job_status] is not None:
+                expression_attribute_values_dict[":job_status_bool"] = {
+                    "BOOL": JOB_STATUS_BOOL[job_status]
+                }
+                update_expression_str = f"{update_expression_str}, job_status_bool = :job_status_bool"
+
+            if JOB_STATUS_BOOL[job_status] is False:
+                expression_attribute_values_dict[":workflow_status"] = {
+                    "S": "FAILED"
+                }
+                update_expression_str = f"{update_expression_str}, workflow_status = :workflow_status"
+
+            # Return the job status
+            return {
+                "job_status": job_status,
+                "job_status_bool": JOB_STATUS_BOOL[job_status],
+                "report_id": None,
+                "report_status": None,
+                "report_status_bool": None,
+                "job_status_changed": False if job_status == current_job_status else True,
+                "expression_attribute_values_dict": expression_attribute_values_dict,
+                "update_expression_str": update_expression_str
+            }
+
+        # Job is complete and reports not empty, check reports
+        reportjob_obj = case_data.get("reports")[0]
+
+    else:
+        # Report id is not None, get the report object
+        try:
+            reportjob_obj =  next(
+                filter(
+                    lambda reportjob_iter: int(reportjob_iter.get("id")) == int(report_id),
+                    case_data.get("reports")
+                )
+            )
+        except StopIteration:
+            logger.error(f"Failed to get report id {report_id}")
+            return {
+                "status": "failed",
+                "message": f"Failed to get report id {report_id} from the case id {case_id}"
+            }
+
+    # Reinitialise job status
+    job_status = "complete" if job_status is None else job_status
+
+    # Get report  status
+    report_status = reportjob_obj.get("status")
+
+    # Return the job status with the report status
+    # expression_attribute_values_dict
+    # update_expression_str
+
+    # Set the expression attribute values dict
+    expression_attribute_values_dict = {
+        ":job_status": {
+            "S": job_status
+        },
+        ":report_id": {
+            "N": reportjob_obj.get("id")
+        },
+        ":report_status": {
+            "S": report_status
+        },
+    }
+    update_expression_str = "SET job_status = :job_status, report_id = :report_id, report_status = :report_status"
+
+    # Add the bool values if they are not None
+    if JOB_STATUS_BOOL[job_status] is not None:
+        expression_attribute_values_dict[":job_status_bool"] = {
+            "BOOL": JOB_STATUS_BOOL[job_status]
+        }
+        update_expression_str = f"{update_expression_str}, job_status_bool = :job_status_bool"
+
+    if REPORT_STATUS_BOOL[report_status] is not None:
+        expression_attribute_values_dict[":report_status_bool"] = {
+            "BOOL": REPORT_STATUS_BOOL[report_status]
+        }
+        update_expression_str = f"{update_expression_str}, report_status_bool = :report_status_bool"
+
+    # Add the workflow status
+    # If one of the job status or report status are false, then the workflow status is failed
+    if JOB_STATUS_BOOL[job_status] is False or REPORT_STATUS_BOOL[report_status] is False:
+        expression_attribute_values_dict[":workflow_status"] = {
+            "S": "FAILED"
+        }
+        update_expression_str = f"{update_expression_str}, workflow_status = :workflow_status"
+    # If both the job status and report status are true, then the workflow status is complete
+    elif JOB_STATUS_BOOL[job_status] is True and REPORT_STATUS_BOOL[report_status] is True:
+        expression_attribute_values_dict[":workflow_status"] = {
+            "S": "SUCCEEDED"
+        }
+        update_expression_str = f"{update_expression_str}, workflow_status = :workflow_status"
+
+    return {
+        "job_status": job_status,
+        "job_status_bool": JOB_STATUS_BOOL[job_status],
+        "report_id": reportjob_obj.get("id"),
+        "report_status": report_status,
+        "report_status_bool": REPORT_STATUS_BOOL[report_status],
+        "job_status_changed": False if report_status == current_report_status else True,
+        "expression_attribute_values_dict": expression_attribute_values_dict,
+        "update_expression_str": update_expression_str
+    }
+
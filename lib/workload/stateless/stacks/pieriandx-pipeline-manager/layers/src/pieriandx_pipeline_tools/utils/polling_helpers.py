@@ -0,0 +1,308 @@
+#!/usr/bin/env python3
+
+"""
+Poll the status of every running informatics job in one go
+
+The monitor runs step function runs every POLL_CYCLE_SECONDS,
+rather than fetching every case on every cycle, each job is polled less often the longer it has been running
+(the poll interval doubles with the elapsed time of the job, up to MAX_POLL_INTERVAL_SECONDS).
+Each case is offset within its poll interval by a jitter derived from the case id, so jobs submitted together
+are not all polled on the same cycle.
+
+Cases are fetched side by side on one session with a single auth token,
+and are requested conditionally (If-None-Match / If-Modified-Since) when the case was fetched by an earlier
+invocation of this lambda.
+
+Only the jobs whose job or report status changed are returned
+"""
+
+# Standard imports
+import logging
+import random
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from math import floor, log2
+from os import environ
+from threading import Lock
+from typing import Dict, List, Optional, Tuple, TypedDict
+
+# Pyriandx imports
+from pyriandx.utils import retry_session
+from requests.adapters import HTTPAdapter
+
+# Local imports
+from .informaticsjob_helpers import get_informaticsjob_and_report_status
+from .pieriandx_helpers import get_pieriandx_client
+from .secretsmanager_helpers import get_pieriandx_auth_token
+
+# Set logger
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Globals
+# Rate of the monitor runs rule
+POLL_CYCLE_SECONDS = 300
+MIN_POLL_INTERVAL_SECONDS = 300
+MAX_POLL_INTERVAL_SECONDS = 3600
+# The interval doubles with every doubling of the elapsed time past this, so jobs are polled
+# every MIN_POLL_INTERVAL_SECONDS for their first two hours, then every 10, 20 and 40 minutes, up to hourly after 16 hours
+POLL_INTERVAL_RAMP_SECONDS = 3600
+CASE_FETCH_MAX_CONCURRENCY = 8
+
+# Validators (ETag / Last-Modified) and case data from the last fetch of each case, kept by warm lambdas
+CASE_DATA_CACHE: Dict[int, Tuple[Dict[str, str], Dict]] = {}
+
+
+class RunningJob(TypedDict):
+    case_id: int
+    informaticsjob_id: int
+    report_id: Optional[int]
+    job_status: Optional[str]
+    report_status: Optional[str]
+    submission_time: Optional[datetime]
+
+
+def get_running_job_from_db_item(job_db_item: Dict) -> RunningJob:
+    """
+    Running jobs partition items from a dynamodb scan (typed attribute values)
+    :param job_db_item:
+    :return:
+    """
+    submission_time = job_db_item.get("submission_time", {}).get("S", None)
+    return {
+        "case_id": int(job_db_item["case_id"]["N"]),
+        "informaticsjob_id": int(job_db_item["informaticsjob_id"]["N"]),
+        "report_id": int(job_db_item["report_id"]["N"]) if "report_id" in job_db_item else None,
+        "job_status": job_db_item.get("job_status", {}).get("S", None),
+        "report_status": job_db_item.get("report_status", {}).get("S", None),
+        "submission_time": (
+            datetime.fromisoformat(submission_time.replace("Z", "+00:00"))
+            if submission_time
+            else None
+        ),
+    }
+
+
+def get_poll_interval(elapsed_seconds: float) -> float:
+    """
+    Exponential backoff on the elapsed time of the job
+    :param elapsed_seconds:
+    :return:
+    """
+    if elapsed_seconds < POLL_INTERVAL_RAMP_SECONDS:
+        return MIN_POLL_INTERVAL_SECONDS
+    return min(
+        MAX_POLL_INTERVAL_SECONDS,
+        MIN_POLL_INTERVAL_SECONDS * 2 ** floor(log2(elapsed_seconds / POLL_INTERVAL_RAMP_SECONDS))
+    )
+
+
+def get_poll_jitter(case_id: int, poll_interval: float) -> float:
+    """
+    Offset of the case within its poll interval, the same case gets the same offset on every cycle
+    :param case_id:
+    :param poll_interval:
+    :return:
+    """
+    return random.Random(case_id).random() * poll_interval
+
+
+def is_poll_due(
+        case_id: int,
+        submission_time: Optional[datetime],
+        poll_time: datetime,
+        poll_cycle_seconds: float = POLL_CYCLE_SECONDS
+) -> bool:
+    """
+    A job is polled on the cycle where its (jittered) elapsed time crosses a multiple of its poll interval,
+    so it is polled once per poll interval (and within two intervals when the interval steps up)
+    :param case_id:
+    :param submission_time: Jobs registered before the submission time was recorded are polled on every cycle
+    :param poll_time:
+    :param poll_cycle_seconds:
+    :return:
+    """
+    if submission_time is None:
+        return True
+
+    elapsed_seconds = (poll_time - submission_time).total_seconds()
+    poll_interval = get_poll_interval(elapsed_seconds)
+    if poll_interval <= poll_cycle_seconds:
+        return True
+
+    jittered_elapsed_seconds = elapsed_seconds + get_poll_jitter(case_id, poll_interval)
+    return (
+        floor(jittered_elapsed_seconds / poll_interval) !=
+        floor((jittered_elapsed_seconds - poll_cycle_seconds) / poll_interval)
+    )
+
+
+class CaseFetcher:
+    """
+    Fetch cases from pieriandx on one session, conditionally if the case was fetched before
+    """
+    def __init__(self, max_concurrency: int = CASE_FETCH_MAX_CONCURRENCY):
+        self.base_url = environ['PIERIANDX_BASE_URL']
+        self.max_concurrency = max_concurrency
+        self.token_lock = Lock()
+
+        # Use the pyriandx client headers and retries, on a session with a connection per thread
+        self.session = retry_session(
+            get_pieriandx_client(
+                email=environ['PIERIANDX_USER_EMAIL'],
+                token=get_pieriandx_auth_token(),
+                instiution=environ['PIERIANDX_INSTITUTION'],
+                base_url=self.base_url,
+            ).headers
+        )
+        for prefix, adapter in list(self.session.adapters.items()):
+            self.session.mount(
+                prefix, HTTPAdapter(max_retries=adapter.max_retries, pool_maxsize=max_concurrency)
+            )
+
+    def refresh_auth_token(self, rejected_auth_token: str):
+        with self.token_lock:
+            # Another thread may have already refreshed the token
+            if self.session.headers.get("X-Auth-Token") == rejected_auth_token:
+                self.session.headers["X-Auth-Token"] = get_pieriandx_auth_token(force_refresh=True)
+
+    def get_case(self, case_id: int) -> Dict:
+        """
+        Get the case data
+        :param case_id:
+        :return:
+        """
+        validators, cached_case_data = CASE_DATA_CACHE.get(case_id, ({}, None))
+        conditional_headers = {}
+        if validators.get("ETag") is not None:
+            conditional_headers["If-None-Match"] = validators.get("ETag")
+        if validators.get("Last-Modified") is not None:
+            conditional_headers["If-Modified-Since"] = validators.get("Last-Modified")
+
+        for _ in range(2):
+            auth_token = self.session.headers.get("X-Auth-Token")
+            response = self.session.get(f"{self.base_url}/case/{case_id}", headers=conditional_headers)
+            if response.status_code != 401:
+                break
+            # Cached auth token has expired
+            logger.info("Auth token was rejected, collecting a new auth token")
+            self.refresh_auth_token(auth_token)
+
+        if response.status_code == 304 and cached_case_data is not None:
+            return cached_case_data
+
+        response.raise_for_status()
+        case_data = response.json()
+
+        # Keep the case for a conditional fetch next time
+        validators = {
+            header: response.headers.get(header)
+            for header in ["ETag", "Last-Modified"]
+            if response.headers.get(header) is not None
+        }
+        if len(validators) > 0:
+            CASE_DATA_CACHE[case_id] = (validators, case_data)
+
+        return case_data
+
+    def get_cases(self, case_ids: List[int]) -> Dict[int, Dict]:
+        """
+        Get the case data of each case, cases that could not be fetched are left out
+        :param case_ids:
+        :return:
+        """
+        def _get_case(case_id: int) -> Tuple[int, Optional[Dict]]:
+            try:
+                return case_id, self.get_case(case_id)
+            except Exception as e:
+                logger.error(f"Could not get case {case_id}: {e}")
+                return case_id, None
+
+        with ThreadPoolExecutor(max_workers=self.max_concurrency) as executor:
+            return dict(
+                filter(
+                    lambda case_iter: case_iter[1] is not None,
+                    executor.map(_get_case, list(dict.fromkeys(case_ids)))
+                )
+            )
+
+
+def get_changed_informaticsjob_statuses(
+        job_db_items: List[Dict],
+        poll_time: Optional[datetime] = None,
+        max_concurrency: int = CASE_FETCH_MAX_CONCURRENCY
+) -> Dict:
+    """
+    Poll the running jobs that are due, and return those whose job or report status has changed
+
+    Each changed job is returned as
+    {
+        "job_db_item": <the running jobs partition item>,
+        "get_current_status_step": <the output of get_informaticsjob_and_report_status>
+    }
+    :param job_db_items: Items from the running jobs partition
+    :param poll_time:
+    :param max_concurrency:
+    :return:
+    """
+    if poll_time is None:
+        poll_time = datetime.now(timezone.utc)
+
+    running_jobs = list(map(get_running_job_from_db_item, job_db_items))
+
+    # Jobs to poll on this cycle
+    due_jobs = list(
+        filter(
+            lambda job_iter: is_poll_due(job_iter[1]["case_id"], job_iter[1]["submission_time"], poll_time),
+            zip(job_db_items, running_jobs)
+        )
+    )
+
+    logger.info(f"Polling {len(due_jobs)} of {len(running_jobs)} running jobs")
+
+    if len(due_jobs) == 0:
+        return {
+            "changed_jobs": [],
+            "num_running_jobs": len(running_jobs),
+            "num_polled_jobs": 0,
+            "failed_case_ids": [],
+        }
+
+    # Get each case once
+    case_data_by_id = CaseFetcher(max_concurrency=max_concurrency).get_cases(
+        list(map(lambda job_iter: job_iter[1]["case_id"], due_jobs))
+    )
+
+    changed_jobs = []
+    failed_case_ids = []
+    for job_db_item, running_job in due_jobs:
+        if running_job["case_id"] not in case_data_by_id:
+            failed_case_ids.append(running_job["case_id"])
+            continue
+
+        job_status = get_informaticsjob_and_report_status(
+            case_data=case_data_by_id[running_job["case_id"]],
+            case_id=running_job["case_id"],
+            job_id=running_job["informaticsjob_id"],
+            report_id=running_job["report_id"],
+            current_job_status=running_job["job_status"],
+            current_report_status=running_job["report_status"],
+        )
+
+        if job_status.get("status", None) == "failed":
+            logger.error(job_status.get("message"))
+            failed_case_ids.append(running_job["case_id"])
+            continue
+
+        if job_status["job_status_changed"]:
+            changed_jobs.append({
+                "job_db_item": job_db_item,
+                "get_current_status_step": job_status,
+            })
+
+    return {
+        "changed_jobs": changed_jobs,
+        "num_running_jobs": len(running_jobs),
+        "num_polled_jobs": len(due_jobs),
+        "failed_case_ids": failed_case_ids,
+    }
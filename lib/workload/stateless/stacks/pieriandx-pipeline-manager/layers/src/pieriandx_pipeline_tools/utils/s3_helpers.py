@@ -6,13 +6,20 @@ Download file from s3
 
 import typing
 from pathlib import Path
+from typing import BinaryIO, Union
 
 import boto3
+from boto3.s3.transfer import TransferConfig
 from os import environ
 
 if typing.TYPE_CHECKING:
     from mypy_boto3_s3 import S3Client
 
+# Streamed uploads hold at most (max_in_memory_upload_chunks + max_concurrency) parts in memory
+STREAMING_UPLOAD_PART_SIZE = 8388608  # 8 MiB (8 * 2^20)
+STREAMING_UPLOAD_MAX_CONCURRENCY = 2
+STREAMING_UPLOAD_MAX_IN_MEMORY_PARTS = 2
+
 
 def get_s3_client() -> 'S3Client':
     return boto3.client(
@@ -34,6 +41,45 @@ def upload_file(bucket: str, key: str, input_file_path: Path) -> None:
     )
 
 
+def get_streaming_transfer_config() -> TransferConfig:
+    transfer_config = TransferConfig(
+        multipart_threshold=STREAMING_UPLOAD_PART_SIZE,
+        multipart_chunksize=STREAMING_UPLOAD_PART_SIZE,
+        max_concurrency=STREAMING_UPLOAD_MAX_CONCURRENCY
+    )
+    # Not a boto3 TransferConfig argument, but read by s3transfer for non-seekable streams
+    transfer_config.max_in_memory_upload_chunks = STREAMING_UPLOAD_MAX_IN_MEMORY_PARTS
+    return transfer_config
+
+
+def upload_fileobj(bucket: str, key: str, input_fh: BinaryIO, s3_client: 'S3Client' = None) -> None:
+    """
+    Upload a (non-seekable) stream, with a multipart upload if the stream is larger than a part
+    """
+    if s3_client is None:
+        s3_client = get_s3_client()
+    s3_client.upload_fileobj(
+        input_fh,
+        bucket,
+        key.lstrip("/"),
+        ExtraArgs={
+            'ServerSideEncryption': 'AES256'
+        },
+        Config=get_streaming_transfer_config()
+    )
+
+
+def put_object(bucket: str, key: str, body: Union[str, bytes], s3_client: 'S3Client' = None) -> None:
+    if s3_client is None:
+        s3_client = get_s3_client()
+    s3_client.put_object(
+        Bucket=bucket,
+        Key=key.lstrip("/"),
+        Body=body,
+        ServerSideEncryption='AES256'
+    )
+
+
 def set_s3_access_cred_env_vars():
     from .secretsmanager_helpers import get_pieriandx_s3_access_credentials
     access_creds = get_pieriandx_s3_access_credentials()
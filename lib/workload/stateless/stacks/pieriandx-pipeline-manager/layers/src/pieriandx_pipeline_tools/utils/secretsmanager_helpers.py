@@ -4,7 +4,9 @@ import typing
 from copy import copy
 from typing import Dict
 import boto3
-from time import sleep
+import logging
+import random
+from time import sleep, monotonic
 from os import environ
 import json
 
@@ -14,6 +16,18 @@ if typing.TYPE_CHECKING:
 
 ICAV2_BASE_URL = "https://ica.illumina.com/ica/rest"
 
+# The token is reused by later invocations of a warm lambda for this long
+PIERIANDX_AUTH_TOKEN_CACHE_SECONDS = 600
+# Token collection retries, with exponential backoff and full jitter
+PIERIANDX_AUTH_TOKEN_MAX_ATTEMPTS = 5
+PIERIANDX_AUTH_TOKEN_BACKOFF_SECONDS = 1
+PIERIANDX_AUTH_TOKEN_MAX_BACKOFF_SECONDS = 8
+
+# Auth token and the monotonic time it was collected
+PIERIANDX_AUTH_TOKEN_CACHE: Dict = {}
+
+logger = logging.getLogger(__name__)
+
 
 def get_secrets_manager_client() -> 'SecretsManagerClient':
     return boto3.client('secretsmanager')
@@ -27,17 +41,47 @@ def get_secret_value_from_aws_secrets_manager(secret_id: str) -> str:
     return secret_value_obj['SecretString']
 
 
-def get_pieriandx_auth_token() -> str:
+def get_pieriandx_auth_token(force_refresh: bool = False) -> str:
+    """
+    Collect the pieriandx auth token from the token collection lambda, cached for PIERIANDX_AUTH_TOKEN_CACHE_SECONDS
+
+    :param force_refresh: Collect a new token, i.e. when the cached token was rejected
+    :return:
+    """
     from .lambda_helpers import run_lambda_function
     collection_token_lambda = environ.get("PIERIANDX_COLLECT_AUTH_TOKEN_LAMBDA_NAME")
 
-    auth_token = run_lambda_function(collection_token_lambda, "")
+    if (
+            not force_refresh and
+            PIERIANDX_AUTH_TOKEN_CACHE.get("auth_token") is not None and
+            monotonic() - PIERIANDX_AUTH_TOKEN_CACHE.get("collection_time") < PIERIANDX_AUTH_TOKEN_CACHE_SECONDS
+    ):
+        return PIERIANDX_AUTH_TOKEN_CACHE.get("auth_token")
+
+    for attempt in range(PIERIANDX_AUTH_TOKEN_MAX_ATTEMPTS):
+        if attempt > 0:
+            sleep(
+                random.uniform(
+                    0,
+                    min(PIERIANDX_AUTH_TOKEN_MAX_BACKOFF_SECONDS, PIERIANDX_AUTH_TOKEN_BACKOFF_SECONDS * 2 ** attempt)
+                )
+            )
 
-    while auth_token is None or auth_token == 'null' or json.loads(auth_token).get("auth_token") is None:
-        sleep(5)
         auth_token = run_lambda_function(collection_token_lambda, "")
 
-    return json.loads(auth_token).get("auth_token")
+        if auth_token is None or auth_token == 'null' or json.loads(auth_token).get("auth_token") is None:
+            logger.warning(f"Could not collect the pieriandx auth token (attempt {attempt + 1})")
+            continue
+
+        PIERIANDX_AUTH_TOKEN_CACHE.update({
+            "auth_token": json.loads(auth_token).get("auth_token"),
+            "collection_time": monotonic(),
+        })
+        return PIERIANDX_AUTH_TOKEN_CACHE.get("auth_token")
+
+    raise ValueError(
+        f"Could not collect the pieriandx auth token after {PIERIANDX_AUTH_TOKEN_MAX_ATTEMPTS} attempts"
+    )
 
 
 def get_pieriandx_s3_access_credentials() -> Dict:
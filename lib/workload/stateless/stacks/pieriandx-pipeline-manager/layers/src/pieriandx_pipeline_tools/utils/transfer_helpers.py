@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+
+"""
+Stream icav2 files into the pieriandx sample data s3 bucket
+
+Each file is read from its presigned url, decompressed on the fly if required,
+and written with a multipart upload, so no file is ever held on local disk or in memory.
+"""
+
+# Standard imports
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, TypedDict
+from urllib.parse import urlparse
+import typing
+
+import urllib3
+
+# Wrapica imports
+from wrapica.project_data import convert_uri_to_project_data_obj, create_download_url
+
+# Local imports
+from .compression_helpers import GunzipStream
+from .s3_helpers import get_s3_client, upload_fileobj, put_object
+
+if typing.TYPE_CHECKING:
+    from mypy_boto3_s3 import S3Client
+
+# Logger
+logger = logging.getLogger()
+
+# Globals
+DATA_FILE_TRANSFER_MAX_CONCURRENCY = 4
+DOWNLOAD_TIMEOUT = urllib3.Timeout(connect=10, read=60)
+METRICS_OUTPUT_SUFFIX = "MetricsOutput.tsv"
+
+
+class DataFileTransferResult(TypedDict):
+    src_uri: Optional[str]
+    dest_uri: str
+    status: str  # One of TRANSFERRED, FAILED
+    error_message: Optional[str]
+
+
+def get_http_pool_manager(max_concurrency: int = DATA_FILE_TRANSFER_MAX_CONCURRENCY) -> urllib3.PoolManager:
+    return urllib3.PoolManager(
+        maxsize=max_concurrency,
+        timeout=DOWNLOAD_TIMEOUT,
+        retries=urllib3.Retry(total=3, backoff_factor=1, status_forcelist=[500, 502, 503, 504])
+    )
+
+
+def transfer_data_file(
+        data_file: Dict,
+        s3_client: 'S3Client',
+        http_pool_manager: urllib3.PoolManager
+):
+    """
+    Upload a data file to the pieriandx sample data s3 bucket
+
+    data_file has the dest_uri, and either
+      * the src_uri (and needs_decompression)
+      * the contents
+    """
+    dest_uri = data_file.get("dest_uri")
+    dest_bucket = urlparse(dest_uri).netloc
+    dest_key = urlparse(dest_uri).path
+
+    if data_file.get("src_uri", None) is None:
+        put_object(dest_bucket, dest_key, data_file.get("contents"), s3_client=s3_client)
+        return
+
+    icav2_data_obj = convert_uri_to_project_data_obj(data_file.get("src_uri"))
+    src_file_name = icav2_data_obj.data.details.name
+
+    response = http_pool_manager.request(
+        "GET",
+        create_download_url(
+            project_id=icav2_data_obj.project_id,
+            file_id=icav2_data_obj.data.id
+        ),
+        preload_content=False,
+        decode_content=False
+    )
+    try:
+        if response.status != 200:
+            raise ValueError(f"Could not download {data_file.get('src_uri')}, got status code {response.status}")
+
+        input_fh = response
+        if data_file.get("needs_decompression", False):
+            input_fh = GunzipStream(response)
+            src_file_name = src_file_name.replace(".gz", "")
+
+        if src_file_name.endswith(METRICS_OUTPUT_SUFFIX):
+            # Small tsv, pieriandx expects the [Run Metrics] section header
+            put_object(
+                dest_bucket,
+                dest_key,
+                input_fh.read().decode().replace('[Run QC Metrics]', '[Run Metrics]'),
+                s3_client=s3_client
+            )
+        else:
+            upload_fileobj(dest_bucket, dest_key, input_fh, s3_client=s3_client)
+    finally:
+        response.release_conn()
+
+
+def transfer_data_files(
+        data_files: List[Dict],
+        max_concurrency: int = DATA_FILE_TRANSFER_MAX_CONCURRENCY
+) -> List[DataFileTransferResult]:
+    """
+    Upload the data files, a few at a time.
+
+    Every data file is attempted, the results are returned in the order of the data files
+    """
+    # One client for all threads, boto3 clients are thread safe but client creation is not
+    s3_client = get_s3_client()
+    http_pool_manager = get_http_pool_manager(max_concurrency)
+
+    def _transfer_data_file(data_file: Dict) -> DataFileTransferResult:
+        try:
+            transfer_data_file(data_file, s3_client, http_pool_manager)
+        except Exception as e:
+            logger.error(f"Could not upload {data_file.get('src_uri')} to {data_file.get('dest_uri')}: {e}")
+            return {
+                "src_uri": data_file.get("src_uri", None),
+                "dest_uri": data_file.get("dest_uri"),
+                "status": "FAILED",
+                "error_message": str(e),
+            }
+        logger.info(f"Uploaded {Path(urlparse(data_file.get('dest_uri')).path).name}")
+        return {
+            "src_uri": data_file.get("src_uri", None),
+            "dest_uri": data_file.get("dest_uri"),
+            "status": "TRANSFERRED",
+            "error_message": None,
+        }
+
+    with ThreadPoolExecutor(max_workers=max_concurrency) as executor:
+        return list(executor.map(_transfer_data_file, data_files))
@@ -0,0 +1,360 @@
+#!/usr/bin/env python3
+
+"""
+Batch polling of the running informatics jobs
+
+The pieriandx api is served by a local HTTP stub, with ETag support and auth token checks,
+the token collection lambda is patched out.
+
+Run from the layers directory with
+    PYTHONPATH=src pytest tests/test_polling_helpers.py
+"""
+
+# Standard imports
+import json
+import os
+import threading
+import unittest
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+
+# Local imports
+from pieriandx_pipeline_tools.utils import polling_helpers, secretsmanager_helpers
+from pieriandx_pipeline_tools.utils.informaticsjob_helpers import get_informaticsjob_and_report_status
+from pieriandx_pipeline_tools.utils.polling_helpers import (
+    MAX_POLL_INTERVAL_SECONDS,
+    MIN_POLL_INTERVAL_SECONDS,
+    POLL_CYCLE_SECONDS,
+    get_changed_informaticsjob_statuses,
+    get_poll_interval,
+    is_poll_due,
+)
+
+POLL_TIME = datetime(2024, 11, 4, 3, 0, 0, tzinfo=timezone.utc)
+
+
+class PierianDxStub:
+    """
+    Serves /case/{case_id}, with an ETag per case version, and rejects stale auth tokens
+    """
+    def __init__(self):
+        self.cases = {}
+        self.case_versions = Counter()
+        self.valid_auth_token = "token-1"
+        self.requests = Counter()
+        self.not_modified = Counter()
+        self.unauthorised = Counter()
+
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                case_id = int(self.path.rstrip("/").rsplit("/", 1)[-1])
+                stub.requests[case_id] += 1
+
+                if self.headers.get("X-Auth-Token") != stub.valid_auth_token:
+                    stub.unauthorised[case_id] += 1
+                    self.send_response(401)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+
+                if case_id not in stub.cases:
+                    self.send_response(404)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+
+                etag = f'"{case_id}-{stub.case_versions[case_id]}"'
+                if self.headers.get("If-None-Match") == etag:
+                    stub.not_modified[case_id] += 1
+                    self.send_response(304)
+                    self.send_header("ETag", etag)
+                    self.end_headers()
+                    return
+
+                body = json.dumps(stub.cases[case_id]).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.send_header("ETag", etag)
+                self.end_headers()
+                self.wfile.write(body)
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    def set_case(self, case_id: int, job_id: int, job_status: str, report_status: str = None):
+        self.cases[case_id] = {
+            "id": case_id,
+            "informaticsJobs": [{"id": str(job_id), "status": job_status}],
+            "reports": [] if report_status is None else [{"id": str(job_id + 1), "status": report_status}],
+        }
+        self.case_versions[case_id] += 1
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *args):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def get_job_db_item(case_id: int, job_id: int, job_status: str, submission_time: datetime = None):
+    job_db_item = {
+        "id": {"S": str(case_id)},
+        "id_type": {"S": "running_jobs"},
+        "case_id": {"N": str(case_id)},
+        "informaticsjob_id": {"N": str(job_id)},
+        "job_status": {"S": job_status},
+    }
+    if submission_time is not None:
+        job_db_item["submission_time"] = {"S": submission_time.strftime("%Y-%m-%dT%H:%M:%S.%fZ")}
+    return job_db_item
+
+
+class TestPollingHelpers(unittest.TestCase):
+    def setUp(self):
+        polling_helpers.CASE_DATA_CACHE.clear()
+        secretsmanager_helpers.PIERIANDX_AUTH_TOKEN_CACHE.clear()
+
+        self.stub = PierianDxStub().__enter__()
+        self.addCleanup(self.stub.__exit__)
+
+        env_patch = patch.dict(os.environ, {
+            "PIERIANDX_BASE_URL": self.stub.base_url,
+            "PIERIANDX_USER_EMAIL": "services@umccr.org",
+            "PIERIANDX_INSTITUTION": "melbournetest",
+            "PIERIANDX_COLLECT_AUTH_TOKEN_LAMBDA_NAME": "collectPierianDxAccessToken",
+        })
+        env_patch.start()
+        self.addCleanup(env_patch.stop)
+
+        # Token collection lambda returns the token the stub currently accepts
+        self.token_collections = 0
+
+        def run_lambda_function(function_name, payload):
+            self.token_collections += 1
+            return json.dumps({"auth_token": self.stub.valid_auth_token})
+
+        lambda_patch = patch(
+            "pieriandx_pipeline_tools.utils.lambda_helpers.run_lambda_function", run_lambda_function
+        )
+        lambda_patch.start()
+        self.addCleanup(lambda_patch.stop)
+
+        sleep_patch = patch.object(secretsmanager_helpers, "sleep")
+        self.sleep_mock = sleep_patch.start()
+        self.addCleanup(sleep_patch.stop)
+
+    def test_only_changed_jobs_are_returned(self):
+        self.stub.set_case(101, 1001, "running")
+        self.stub.set_case(102, 1002, "complete", report_status="complete")
+        self.stub.set_case(103, 1003, "failed")
+
+        job_db_items = [
+            get_job_db_item(101, 1001, "running"),
+            get_job_db_item(102, 1002, "running"),
+            get_job_db_item(103, 1003, "running"),
+            # Case missing from pieriandx
+            get_job_db_item(104, 1004, "running"),
+        ]
+        changed_job_statuses = get_changed_informaticsjob_statuses(job_db_items, poll_time=POLL_TIME)
+
+        self.assertEqual(
+            list(map(lambda job_iter: job_iter["job_db_item"], changed_job_statuses["changed_jobs"])),
+            job_db_items[1:3]
+        )
+        self.assertEqual(
+            changed_job_statuses["changed_jobs"][0]["get_current_status_step"]["update_expression_str"],
+            "SET job_status = :job_status, report_id = :report_id, report_status = :report_status, "
+            "job_status_bool = :job_status_bool, report_status_bool = :report_status_bool, "
+            "workflow_status = :workflow_status"
+        )
+        self.assertEqual(changed_job_statuses["num_running_jobs"], 4)
+        self.assertEqual(changed_job_statuses["num_polled_jobs"], 4)
+        self.assertEqual(changed_job_statuses["failed_case_ids"], [104])
+        self.assertEqual(self.token_collections, 1)
+
+    def test_each_case_is_fetched_once(self):
+        self.stub.set_case(101, 1001, "running")
+        get_changed_informaticsjob_statuses(
+            [get_job_db_item(101, 1001, "waiting"), get_job_db_item(101, 1001, "waiting")],
+            poll_time=POLL_TIME
+        )
+        self.assertEqual(self.stub.requests[101], 1)
+
+    def test_jobs_not_due_are_not_fetched(self):
+        self.stub.set_case(101, 1001, "running")
+        self.stub.set_case(102, 1002, "running")
+
+        # Polled every cycle in the first hour, but not every cycle after a day
+        recent_job_db_item = get_job_db_item(101, 1001, "waiting", POLL_TIME - timedelta(minutes=20))
+        old_job_db_item = get_job_db_item(102, 1002, "waiting", POLL_TIME - timedelta(days=1))
+
+        num_old_job_polls = 0
+        for cycle_iter in range(MAX_POLL_INTERVAL_SECONDS // POLL_CYCLE_SECONDS):
+            changed_job_statuses = get_changed_informaticsjob_statuses(
+                [recent_job_db_item, old_job_db_item],
+                poll_time=POLL_TIME + timedelta(seconds=cycle_iter * POLL_CYCLE_SECONDS)
+            )
+            num_old_job_polls += changed_job_statuses["num_polled_jobs"] - 1
+
+        self.assertEqual(num_old_job_polls, 1)
+        self.assertEqual(self.stub.requests[102], 1)
+        self.assertEqual(self.stub.requests[101], MAX_POLL_INTERVAL_SECONDS // POLL_CYCLE_SECONDS)
+
+    def test_no_jobs_due_does_not_collect_a_token(self):
+        self.stub.set_case(102, 1002, "running")
+        old_job_db_item = get_job_db_item(102, 1002, "waiting", POLL_TIME - timedelta(days=1))
+
+        polled_cycles = list(
+            filter(
+                lambda cycle_iter: get_changed_informaticsjob_statuses(
+                    [old_job_db_item],
+                    poll_time=POLL_TIME + timedelta(seconds=cycle_iter * POLL_CYCLE_SECONDS)
+                )["num_polled_jobs"] > 0,
+                range(MAX_POLL_INTERVAL_SECONDS // POLL_CYCLE_SECONDS)
+            )
+        )
+
+        self.assertEqual(len(polled_cycles), 1)
+        self.assertEqual(self.token_collections, 1)
+
+    def test_unchanged_cases_are_not_downloaded_again(self):
+        self.stub.set_case(101, 1001, "running")
+        job_db_items = [get_job_db_item(101, 1001, "running")]
+
+        self.assertEqual(get_changed_informaticsjob_statuses(job_db_items)["changed_jobs"], [])
+        self.assertEqual(get_changed_informaticsjob_statuses(job_db_items)["changed_jobs"], [])
+        self.assertEqual(self.stub.not_modified[101], 1)
+
+        # New version of the case
+        self.stub.set_case(101, 1001, "complete")
+        changed_job_statuses = get_changed_informaticsjob_statuses(job_db_items)
+        self.assertEqual(changed_job_statuses["changed_jobs"][0]["get_current_status_step"]["job_status"], "complete")
+        self.assertEqual(self.stub.not_modified[101], 1)
+        self.assertEqual(self.stub.requests[101], 3)
+
+    def test_rejected_token_is_refreshed_once(self):
+        for case_id in range(101, 111):
+            self.stub.set_case(case_id, case_id + 1000, "running")
+        job_db_items = list(map(lambda case_id: get_job_db_item(case_id, case_id + 1000, "waiting"), range(101, 111)))
+
+        get_changed_informaticsjob_statuses(job_db_items)
+        self.assertEqual(self.token_collections, 1)
+
+        # Token expires, the cached token is rejected and collected again (once for all cases)
+        self.stub.valid_auth_token = "token-2"
+        changed_job_statuses = get_changed_informaticsjob_statuses(job_db_items)
+
+        self.assertEqual(len(changed_job_statuses["changed_jobs"]), 10)
+        self.assertEqual(changed_job_statuses["failed_case_ids"], [])
+        self.assertEqual(self.token_collections, 2)
+        # Requests sent before the refresh are rejected, each is retried once
+        self.assertGreaterEqual(sum(self.stub.unauthorised.values()), 1)
+        self.assertLessEqual(sum(self.stub.unauthorised.values()), 10)
+        self.assertEqual(sum(self.stub.requests.values()), 20 + sum(self.stub.unauthorised.values()))
+
+    def test_token_collection_backs_off_then_fails(self):
+        with patch(
+            "pieriandx_pipeline_tools.utils.lambda_helpers.run_lambda_function",
+            side_effect=[None, "null", json.dumps({"auth_token": "token-1"})]
+        ):
+            self.assertEqual(secretsmanager_helpers.get_pieriandx_auth_token(), "token-1")
+        self.assertEqual(self.sleep_mock.call_count, 2)
+        for sleep_call, max_backoff in zip(self.sleep_mock.call_args_list, [2, 4]):
+            self.assertTrue(0 <= sleep_call.args[0] <= max_backoff)
+
+        # Cached token
+        self.assertEqual(secretsmanager_helpers.get_pieriandx_auth_token(), "token-1")
+        self.assertEqual(self.token_collections, 0)
+
+        with patch(
+            "pieriandx_pipeline_tools.utils.lambda_helpers.run_lambda_function", return_value=None
+        ) as run_lambda_function_mock:
+            with self.assertRaises(ValueError):
+                secretsmanager_helpers.get_pieriandx_auth_token(force_refresh=True)
+        self.assertEqual(
+            run_lambda_function_mock.call_count, secretsmanager_helpers.PIERIANDX_AUTH_TOKEN_MAX_ATTEMPTS
+        )
+
+    def test_poll_schedule(self):
+        # Intervals grow with the elapsed time of the job
+        self.assertEqual(get_poll_interval(0), MIN_POLL_INTERVAL_SECONDS)
+        self.assertEqual(get_poll_interval(3 * 3600), 2 * MIN_POLL_INTERVAL_SECONDS)
+        self.assertEqual(get_poll_interval(7 * 24 * 3600), MAX_POLL_INTERVAL_SECONDS)
+
+        # Every job is polled once per interval, and no more than the two intervals either side of a step up apart
+        for case_id in range(100):
+            submission_time = POLL_TIME - timedelta(seconds=case_id * 997)
+            poll_times = list(
+                filter(
+                    lambda poll_time_iter: is_poll_due(case_id, submission_time, poll_time_iter),
+                    map(
+                        lambda cycle_iter: POLL_TIME + timedelta(seconds=cycle_iter * POLL_CYCLE_SECONDS),
+                        range(24 * 3600 // POLL_CYCLE_SECONDS)
+                    )
+                )
+            )
+            for previous_poll_time, poll_time in zip(poll_times, poll_times[1:]):
+                previous_poll_interval = get_poll_interval((previous_poll_time - submission_time).total_seconds())
+                poll_interval = get_poll_interval((poll_time - submission_time).total_seconds())
+                if previous_poll_interval == poll_interval:
+                    self.assertEqual((poll_time - previous_poll_time).total_seconds(), poll_interval)
+                else:
+                    self.assertLessEqual(
+                        (poll_time - previous_poll_time).total_seconds(),
+                        previous_poll_interval + poll_interval
+                    )
+
+        # Jobs without a submission time are polled every cycle
+        self.assertTrue(is_poll_due(1, None, POLL_TIME))
+
+    def test_single_case_handler(self):
+        import importlib.util
+        from pathlib import Path
+
+        self.stub.set_case(101, 1001, "complete", report_status="running")
+        lambda_path = (
+            Path(__file__).absolute().parent.parent.parent /
+            "lambdas" / "get_informaticsjob_and_report_status_py" / "get_informaticsjob_and_report_status.py"
+        )
+        spec = importlib.util.spec_from_file_location("get_informaticsjob_and_report_status", lambda_path)
+        lambda_module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(lambda_module)
+
+        self.assertEqual(
+            lambda_module.handler(
+                {
+                    "case_id": 101,
+                    "informaticsjob_id": 1001,
+                    "report_id": -1,
+                    "current_job_status": "running",
+                    "current_report_status": "",
+                },
+                None
+            ),
+            get_informaticsjob_and_report_status(
+                case_data=self.stub.cases[101],
+                case_id=101,
+                job_id=1001,
+                report_id=-1,
+                current_job_status="running",
+                current_report_status="",
+            )
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
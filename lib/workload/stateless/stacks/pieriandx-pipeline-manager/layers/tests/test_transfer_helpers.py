@@ -0,0 +1,299 @@
+#!/usr/bin/env python3
+
+"""
+Streaming transfer of icav2 files into the pieriandx s3 bucket
+
+The icav2 presigned urls are served by a local HTTP stub, the s3 bucket by a moto server in a separate process
+(so the peak memory measured here is the transfer alone).
+
+Run from the layers directory with
+    PYTHONPATH=src pytest tests/test_transfer_helpers.py
+"""
+
+# Standard imports
+import gzip
+import hashlib
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+import unittest
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from importlib.util import find_spec
+from io import BytesIO
+from pathlib import Path
+from types import SimpleNamespace
+from unittest.mock import patch
+from urllib.request import Request, urlopen
+
+import boto3
+
+# Local imports
+from pieriandx_pipeline_tools.utils import s3_helpers, transfer_helpers
+from pieriandx_pipeline_tools.utils.compression_helpers import GunzipStream
+
+PROJECT_ID = "ea19a3f5-ec7c-4940-a474-c31cd91dbad4"
+BUCKET = "pdx-cgwxfer-test"
+SEQUENCERRUN_PREFIX = "melbournetest/231116_A01052_0172_BHVLM5DSX7__L2400161__V2__abcd1235__abcd1234"
+LARGE_FILE_SIZE = 96 * 1048576  # 96 MiB (96 * 2^20)
+
+
+def write_gz_fixture(path: Path, size: int, num_members: int = 1) -> str:
+    """
+    Write a gzipped vcf like file of size bytes (uncompressed), in num_members gzip members, returns the md5 of the
+    uncompressed contents
+    """
+    md5sum = hashlib.md5()
+    member_size = size // num_members
+    with open(path, "wb") as output_fh:
+        line_num = 0
+        for member_num in range(num_members):
+            member_bytes_remaining = member_size if member_num < num_members - 1 else size - member_size * member_num
+            with gzip.GzipFile(fileobj=output_fh, mode="wb", compresslevel=1) as gzip_fh:
+                while member_bytes_remaining > 0:
+                    chunk = "".join(
+                        f"chr1\t{line_num + i}\t.\tA\tG\t{(line_num + i) % 97}\tPASS\tDP={(line_num + i) % 1013}\n"
+                        for i in range(10000)
+                    ).encode()[:member_bytes_remaining]
+                    line_num += 10000
+                    gzip_fh.write(chunk)
+                    md5sum.update(chunk)
+                    member_bytes_remaining -= len(chunk)
+    return md5sum.hexdigest()
+
+
+def get_free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class PresignedUrlStubServer(ThreadingHTTPServer):
+    """
+    Serves the files of a directory on GET /<file name>, in small chunks
+    """
+    daemon_threads = True
+
+    def __init__(self, directory: Path):
+        self.directory = directory
+        super().__init__(("127.0.0.1", 0), PresignedUrlStubRequestHandler)
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+
+class PresignedUrlStubRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        file_path = self.server.directory / self.path.lstrip("/")
+        if not file_path.is_file():
+            self.send_response(404)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("Content-Length", str(file_path.stat().st_size))
+        self.end_headers()
+        with open(file_path, "rb") as input_fh:
+            shutil.copyfileobj(input_fh, self.wfile, 65536)
+
+
+class TestGunzipStream(unittest.TestCase):
+    def test_multi_member_gzip_is_decompressed_in_full(self):
+        members = [b"first member\n" * 1000, b"", b"third member\n" * 5000]
+        gunzip_stream = GunzipStream(BytesIO(b"".join(map(gzip.compress, members))), read_size=100)
+
+        parts = list(iter(lambda: gunzip_stream.read(4096), b""))
+
+        self.assertEqual(b"".join(parts), b"".join(members))
+        # Each read is filled, so every multipart upload part but the last has the full part size
+        self.assertTrue(all(len(part) == 4096 for part in parts[:-1]))
+
+    def test_truncated_gzip_is_an_error(self):
+        with self.assertRaises(EOFError):
+            GunzipStream(BytesIO(gzip.compress(b"truncated\n" * 1000)[:-20])).read()
+
+    def test_corrupt_gzip_is_an_error(self):
+        with self.assertRaises(zlib.error):
+            GunzipStream(BytesIO(b"not a gzip file")).read()
+
+
+@unittest.skipUnless(find_spec("moto"), "moto is not installed")
+class TestTransferDataFiles(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        # Generated fixtures
+        cls.fixtures_dir = Path(tempfile.mkdtemp())
+        cls.large_vcf_md5sum = write_gz_fixture(cls.fixtures_dir / "L2400161.hard-filtered.vcf.gz", LARGE_FILE_SIZE)
+        cls.bgzip_vcf_md5sum = write_gz_fixture(
+            cls.fixtures_dir / "L2400161.cnv.vcf.gz", 3 * s3_helpers.STREAMING_UPLOAD_PART_SIZE, num_members=50
+        )
+        with gzip.open(cls.fixtures_dir / "L2400161_MetricsOutput.tsv.gz", "wt") as metrics_fh:
+            metrics_fh.write("[Header]\nOutput Date\t2024-07-18\n[Run QC Metrics]\nMetric (UOM)\tLSL\tUSL\n")
+        (cls.fixtures_dir / "L2400161.microsat_output.json").write_text('{"Result": "MSI-Stable"}')
+
+        # Presigned url stub
+        cls.http_server = PresignedUrlStubServer(cls.fixtures_dir)
+        threading.Thread(target=cls.http_server.serve_forever, daemon=True).start()
+
+        # Moto s3 server, in its own process
+        cls.moto_port = get_free_port()
+        cls.moto_process = subprocess.Popen(
+            [sys.executable, "-m", "moto.server", "-H", "127.0.0.1", "-p", str(cls.moto_port)],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        for _ in range(100):
+            try:
+                socket.create_connection(("127.0.0.1", cls.moto_port), timeout=1).close()
+                break
+            except OSError:
+                time.sleep(0.1)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.moto_process.terminate()
+        cls.moto_process.wait()
+        cls.http_server.shutdown()
+        cls.http_server.server_close()
+        shutil.rmtree(cls.fixtures_dir)
+
+    def setUp(self):
+        env_patcher = patch.dict(
+            os.environ,
+            {
+                "AWS_ACCESS_KEY_ID": "testing",
+                "AWS_SECRET_ACCESS_KEY": "testing",
+                "AWS_DEFAULT_REGION": "ap-southeast-2",
+                "AWS_ENDPOINT_URL_S3": f"http://127.0.0.1:{self.moto_port}",
+            }
+        )
+        env_patcher.start()
+        self.addCleanup(env_patcher.stop)
+
+        wrapica_patcher = patch.multiple(
+            transfer_helpers,
+            convert_uri_to_project_data_obj=lambda uri: SimpleNamespace(
+                project_id=PROJECT_ID,
+                data=SimpleNamespace(id=Path(uri).name, details=SimpleNamespace(name=Path(uri).name))
+            ),
+            create_download_url=lambda project_id, file_id: f"{self.http_server.base_url}/{file_id}",
+        )
+        wrapica_patcher.start()
+        self.addCleanup(wrapica_patcher.stop)
+
+        # Empty moto backend for each test
+        urlopen(Request(f"http://127.0.0.1:{self.moto_port}/moto-api/reset", method="POST")).close()
+        self.s3_client = boto3.client("s3")
+        self.s3_client.create_bucket(
+            Bucket=BUCKET,
+            CreateBucketConfiguration={"LocationConstraint": "ap-southeast-2"}
+        )
+
+    def get_data_file(self, src_name: str, dest_name: str, needs_decompression: bool):
+        return {
+            "src_uri": f"icav2://{PROJECT_ID}/analysis/cttsov2/20240718ff7a0cbc/Results/L2400161/{src_name}",
+            "dest_uri": f"s3://{BUCKET}/{SEQUENCERRUN_PREFIX}/{dest_name}",
+            "needs_decompression": needs_decompression,
+            "contents": None,
+        }
+
+    def get_dest_md5sum(self, dest_name: str) -> str:
+        md5sum = hashlib.md5()
+        body = self.s3_client.get_object(Bucket=BUCKET, Key=f"{SEQUENCERRUN_PREFIX}/{dest_name}")["Body"]
+        for chunk in body.iter_chunks(1048576):
+            md5sum.update(chunk)
+        return md5sum.hexdigest()
+
+    def test_data_files_are_streamed_to_s3(self):
+        transfer_results = transfer_helpers.transfer_data_files(
+            [
+                self.get_data_file("L2400161.cnv.vcf.gz", "Data/L2400161.cnv.vcf", True),
+                self.get_data_file("L2400161_MetricsOutput.tsv.gz", "Data/L2400161_MetricsOutput.tsv", True),
+                self.get_data_file("L2400161.microsat_output.json", "Data/L2400161.microsat_output.json", False),
+                {"dest_uri": f"s3://{BUCKET}/{SEQUENCERRUN_PREFIX}/done.txt", "contents": ""},
+            ]
+        )
+
+        self.assertEqual([result["status"] for result in transfer_results], ["TRANSFERRED"] * 4)
+        self.assertEqual(self.get_dest_md5sum("Data/L2400161.cnv.vcf"), self.bgzip_vcf_md5sum)
+        self.assertEqual(
+            self.s3_client.head_object(Bucket=BUCKET, Key=f"{SEQUENCERRUN_PREFIX}/Data/L2400161.cnv.vcf")["ETag"][-3:],
+            '-3"',
+            "Expected a three part multipart upload"
+        )
+        self.assertIn(
+            b"[Run Metrics]",
+            self.s3_client.get_object(
+                Bucket=BUCKET, Key=f"{SEQUENCERRUN_PREFIX}/Data/L2400161_MetricsOutput.tsv"
+            )["Body"].read()
+        )
+        self.assertEqual(
+            self.s3_client.get_object(
+                Bucket=BUCKET, Key=f"{SEQUENCERRUN_PREFIX}/Data/L2400161.microsat_output.json"
+            )["Body"].read(),
+            b'{"Result": "MSI-Stable"}'
+        )
+        self.assertEqual(
+            self.s3_client.head_object(Bucket=BUCKET, Key=f"{SEQUENCERRUN_PREFIX}/done.txt")["ContentLength"],
+            0
+        )
+
+    def test_peak_memory_is_bounded_by_the_part_size(self):
+        data_file = self.get_data_file("L2400161.hard-filtered.vcf.gz", "Data/L2400161.hard-filtered.vcf", True)
+
+        tracemalloc.start()
+        try:
+            transfer_results = transfer_helpers.transfer_data_files([data_file])
+            _, peak_memory = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        self.assertEqual(transfer_results[0]["status"], "TRANSFERRED")
+        self.assertEqual(self.get_dest_md5sum("Data/L2400161.hard-filtered.vcf"), self.large_vcf_md5sum)
+        # Parts queued and in flight, plus the part being read and its copy while it is checksummed
+        memory_bound = (
+            s3_helpers.STREAMING_UPLOAD_MAX_IN_MEMORY_PARTS + s3_helpers.STREAMING_UPLOAD_MAX_CONCURRENCY + 2
+        ) * s3_helpers.STREAMING_UPLOAD_PART_SIZE
+        self.assertLess(peak_memory, memory_bound)
+        self.assertLess(peak_memory, LARGE_FILE_SIZE / 2)
+
+    def test_failures_are_reported_per_file_after_the_batch(self):
+        transfer_results = transfer_helpers.transfer_data_files(
+            [
+                self.get_data_file("L2400161.microsat_output.json", "Data/L2400161.microsat_output.json", False),
+                self.get_data_file("L2400161.missing.vcf.gz", "Data/L2400161.missing.vcf", True),
+                # Not gzipped
+                self.get_data_file("L2400161.microsat_output.json", "Data/L2400161.microsat_output.txt", True),
+            ]
+        )
+
+        self.assertEqual(
+            [result["status"] for result in transfer_results],
+            ["TRANSFERRED", "FAILED", "FAILED"]
+        )
+        self.assertIn("404", transfer_results[1]["error_message"])
+        # Failed files are not left half written in the bucket
+        self.assertEqual(
+            [
+                s3_object["Key"]
+                for s3_object in self.s3_client.list_objects_v2(
+                    Bucket=BUCKET, Prefix=f"{SEQUENCERRUN_PREFIX}/Data/"
+                ).get("Contents", [])
+            ],
+            [f"{SEQUENCERRUN_PREFIX}/Data/L2400161.microsat_output.json"]
+        )
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,95 @@
+import statistics
+import time
+
+from django.core.management import BaseCommand
+from django.db import connection
+from rest_framework.test import APIRequestFactory
+
+from sequence_run_manager.models import Sequence
+from sequence_run_manager.pagination import CursorResultsSetPagination
+from sequence_run_manager.viewsets.sequence import SequenceViewSet
+
+BENCHMARK_SEQUENCE_RUN_ID_PREFIX = "r.benchmark."
+
+
+class Command(BaseCommand):
+    help = """
+    Compare page number and cursor pagination latency of the sequence list API on a large table.
+    Local Postgres only (see `make up`), the benchmark rows are removed at the end unless --keep is given.
+
+    python manage.py benchmark_pagination --rows 1000000 --page 10000
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=1_000_000, help="Number of sequence rows to generate")
+        parser.add_argument("--rows-per-page", type=int, default=100, help="Page size")
+        parser.add_argument("--page", type=int, default=10_000, help="Deep page to compare against page 1")
+        parser.add_argument("--repeat", type=int, default=5, help="Number of timed requests per case")
+        parser.add_argument("--keep", action="store_true", help="Keep the generated rows")
+
+    def handle(self, *args, **options):
+        assert connection.vendor == "postgresql", "The benchmark requires the local Postgres database"
+
+        rows, rows_per_page, page = options["rows"], options["rows_per_page"], options["page"]
+
+        existing = Sequence.objects.filter(sequence_run_id__startswith=BENCHMARK_SEQUENCE_RUN_ID_PREFIX).count()
+        if existing < rows:
+            self.generate_rows(existing, rows)
+
+        view = SequenceViewSet.as_view({"get": "list"})
+        factory = APIRequestFactory()
+
+        # The cursor of a deep page is built directly from the last row of the previous page, as the client would
+        # have received it in the `next` link after walking all the previous pages
+        last_row_of_previous_page = Sequence.objects.order_by("-orcabus_id")[(page - 1) * rows_per_page - 1]
+        paginator = CursorResultsSetPagination()
+        paginator.base_url, paginator.ordering_field, paginator.pk_name = "", "orcabus_id", "orcabus_id"
+        deep_cursor_query = paginator.encode_cursor(last_row_of_previous_page, "n").lstrip("?")
+
+        cases = {
+            "page number, page 1": f"page=1&rows_per_page={rows_per_page}",
+            f"page number, page {page}": f"page={page}&rows_per_page={rows_per_page}",
+            "cursor, page 1": f"pagination=cursor&rows_per_page={rows_per_page}",
+            f"cursor, page {page}": f"pagination=cursor&rows_per_page={rows_per_page}&{deep_cursor_query}",
+        }
+
+        print(f"{Sequence.objects.count()} rows, {rows_per_page} rows per page, median of {options['repeat']} requests")
+        for name, query in cases.items():
+            timings = []
+            for _ in range(options["repeat"]):
+                request = factory.get(f"/api/v1/sequence/?{query}")
+                start = time.perf_counter()
+                response = view(request)
+                timings.append((time.perf_counter() - start) * 1000)
+                assert response.status_code == 200, response.data
+                assert len(response.data["results"]) == rows_per_page, len(response.data["results"])
+            print(f"{name:<30}{statistics.median(timings):>10.1f} ms")
+
+        if not options["keep"]:
+            Sequence.objects.filter(sequence_run_id__startswith=BENCHMARK_SEQUENCE_RUN_ID_PREFIX).delete()
+
+        print("Done")
+
+    @staticmethod
+    def generate_rows(start: int, end: int):
+        print(f"Generating {end - start} sequence rows")
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"""
+                INSERT INTO {Sequence._meta.db_table}
+                    (orcabus_id, sequence_run_id, status, start_time, sample_sheet_name, run_volume_name,
+                     run_folder_path, run_data_uri)
+                SELECT
+                    'ZZ' || lpad(i::text, 24, '0'),
+                    %s || i,
+                    'SUCCEEDED',
+                    now() - make_interval(mins => i),
+                    'SampleSheet.csv',
+                    'bssh.benchmark',
+                    '/Runs/' || i,
+                    's3://bssh.benchmark/Runs/' || i
+                FROM generate_series(%s, %s) AS i
+                """,
+                [BENCHMARK_SEQUENCE_RUN_ID_PREFIX, start, end - 1],
+            )
+            cursor.execute(f"ANALYZE {Sequence._meta.db_table}")
@@ -0,0 +1,19 @@
+# Generated by Django 5.1.4 on 2026-10-19 06:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("sequence_run_manager", "0007_samplesheet"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="sequence",
+            index=models.Index(
+                fields=["start_time", "orcabus_id"], name="sequence_start_time_id_idx"
+            ),
+        ),
+    ]
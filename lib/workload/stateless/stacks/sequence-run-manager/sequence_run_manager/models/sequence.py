@@ -84,6 +84,10 @@ class Sequence(OrcaBusBaseModel):
                                                                                             api_url__isnull=False),
                                    name='check_run_folder_path_or_bssh_keys_not_null')
         ]
+        indexes = [
+            # supporting index for the keyset (cursor) pagination ordered by start_time
+            models.Index(fields=['start_time', 'orcabus_id'], name='sequence_start_time_id_idx'),
+        ]
 
     orcabus_id = OrcaBusIdField(primary_key=True, prefix='seq')
 
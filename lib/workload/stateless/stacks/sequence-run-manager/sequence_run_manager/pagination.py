@@ -1,14 +1,28 @@
+import binascii
+import json
+import logging
 from abc import ABC
+from base64 import b64decode, b64encode
+from typing import Optional
 
-from rest_framework.pagination import PageNumberPagination
+from django.db import connections
+from django.db.models import Q
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.pagination import BasePagination, PageNumberPagination
 from rest_framework.response import Response
 from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+logger = logging.getLogger(__name__)
 
 
 class PaginationConstant(ABC):
     ROWS_PER_PAGE = "rows_per_page"
     PAGE = "page"
     COUNT = "count"
+    CURSOR = "cursor"
+    PAGINATION = "pagination"
+    APPROXIMATE_COUNT = "approximate_count"
 
 
 class StandardResultsSetPagination(PageNumberPagination):
@@ -59,3 +73,230 @@ class StandardResultsSetPagination(PageNumberPagination):
                 "results": schema
             },
         }
+
+
+class CursorResultsSetPagination(BasePagination):
+    """
+    Keyset (cursor) pagination, opt-in alternative to StandardResultsSetPagination.
+
+    Rows are ordered by (ordering field, pk) and a page is fetched with a `(field, pk) < (last field, last pk)`
+    predicate instead of an OFFSET, and there is no COUNT(*). The latency is therefore the same on page 1 and on
+    page 10,000. The ordering field must be non-nullable and indexed together with the pk, hence only
+    `orcabus_id` (the pk) and the fields listed in the view's `cursor_ordering_fields` are allowed.
+
+    The approximate count is only returned when requested with `?approximate_count=true` and comes from the
+    Postgres planner statistics (no table scan).
+    """
+    page_size = api_settings.PAGE_SIZE
+    page_size_query_param = PaginationConstant.ROWS_PER_PAGE
+    max_page_size = 1000
+    cursor_query_param = PaginationConstant.CURSOR
+    approximate_count_query_param = PaginationConstant.APPROXIMATE_COUNT
+    default_ordering = "-orcabus_id"
+    invalid_cursor_message = "Invalid cursor"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        self.pk_name = queryset.model._meta.pk.name
+        self.ordering_field, self.descending = self.get_ordering(request, view)
+        cursor = self.decode_cursor(request)
+
+        self.approximate_count = None
+        if str(request.query_params.get(self.approximate_count_query_param, "")).lower() == "true":
+            self.approximate_count = get_approximate_count(queryset)
+
+        is_previous = cursor is not None and cursor["d"] == "p"
+
+        # Going backwards is the same keyset query on the reversed ordering, with the page flipped afterward
+        descending = self.descending != is_previous
+        prefix = "-" if descending else ""
+        queryset = queryset.order_by(f"{prefix}{self.ordering_field}", f"{prefix}{self.pk_name}")
+
+        if cursor is not None:
+            lookup = "lt" if descending else "gt"
+            queryset = queryset.filter(
+                Q(**{f"{self.ordering_field}__{lookup}": cursor["v"]}) |
+                Q(**{self.ordering_field: cursor["v"], f"{self.pk_name}__{lookup}": cursor["k"]})
+            )
+
+        # Fetch one extra row to know if there is a following page
+        results = list(queryset[:self.page_size + 1])
+        has_more = len(results) > self.page_size
+        results = results[:self.page_size]
+
+        if is_previous:
+            results.reverse()
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next, self.has_previous = has_more, cursor is not None
+
+        self.page = results
+        return results
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+            if page_size > 0:
+                return min(page_size, self.max_page_size)
+        except (KeyError, ValueError):
+            pass
+        return self.page_size
+
+    def get_ordering(self, request, view):
+        """
+        Return the (field, descending) tuple from the `ordering` query parameter, falling back to the view ordering
+        """
+        ordering = request.query_params.get(api_settings.ORDERING_PARAM, None)
+        if not ordering:
+            view_ordering = getattr(view, "ordering", None) or [self.default_ordering]
+            ordering = view_ordering[0] if isinstance(view_ordering, (list, tuple)) else view_ordering
+
+        ordering = ordering.split(",")[0].strip()
+        field = ordering.lstrip("-")
+        allowed_fields = ["orcabus_id", self.pk_name] + list(getattr(view, "cursor_ordering_fields", []))
+        if field not in allowed_fields:
+            raise ValidationError(
+                {api_settings.ORDERING_PARAM: f"Ordering by '{field}' is not supported with cursor pagination, "
+                                              f"use one of {sorted(set(allowed_fields))}"}
+            )
+
+        return field, ordering.startswith("-")
+
+    def decode_cursor(self, request) -> Optional[dict]:
+        encoded = request.query_params.get(self.cursor_query_param, None)
+        if not encoded:
+            return None
+
+        try:
+            cursor = json.loads(b64decode(encoded.encode("ascii")).decode("utf-8"))
+            if cursor["d"] not in ("n", "p") or "v" not in cursor or "k" not in cursor:
+                raise ValueError(cursor)
+        except (TypeError, ValueError, KeyError, binascii.Error, UnicodeDecodeError):
+            raise NotFound(self.invalid_cursor_message)
+
+        return cursor
+
+    def encode_cursor(self, instance, direction: str) -> str:
+        cursor = {
+            "d": direction,
+            "v": getattr(instance, self.ordering_field),
+            "k": getattr(instance, self.pk_name),
+        }
+        # Not DjangoJSONEncoder, it truncates datetime to milliseconds and the keyset must be exact
+        encoded = b64encode(json.dumps(cursor, default=_encode_cursor_value).encode("utf-8")).decode("ascii")
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], "n")
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return self.encode_cursor(self.page[0], "p")
+
+    def get_paginated_response(self, data):
+        return Response(
+            {
+                "links": {
+                    "next": self.get_next_link(),
+                    "previous": self.get_previous_link(),
+                },
+                "pagination": {
+                    PaginationConstant.COUNT: self.approximate_count,
+                    PaginationConstant.ROWS_PER_PAGE: self.page_size,
+                },
+                "results": data,
+            }
+        )
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            'required': ['links', 'pagination', 'results'],
+            "properties": {
+                "links": {
+                    "type": "object",
+                    "properties": {
+                        "next": {"type": "string", "format": "uri", "nullable": True,
+                                 'example': 'http://api.example.org/accounts/?{cursor_query_param}=eyJkIjoibiJ9'.format(
+                                     cursor_query_param=self.cursor_query_param)},
+                        "previous": {"type": "string", "format": "uri", "nullable": True,
+                                     'example': 'http://api.example.org/accounts/?{cursor_query_param}=eyJkIjoicCJ9'.format(
+                                         cursor_query_param=self.cursor_query_param)},
+                    },
+                },
+                "pagination": {
+                    "type": "object",
+                    "properties": {
+                        PaginationConstant.COUNT: {"type": "integer", "nullable": True},
+                        PaginationConstant.ROWS_PER_PAGE: {"type": "integer"},
+                    },
+                },
+                "results": schema
+            },
+        }
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {
+                'name': self.cursor_query_param,
+                'required': False,
+                'in': 'query',
+                'description': 'The pagination cursor value.',
+                'schema': {'type': 'string'},
+            },
+            {
+                'name': self.page_size_query_param,
+                'required': False,
+                'in': 'query',
+                'description': 'Number of results to return per page.',
+                'schema': {'type': 'integer'},
+            },
+            {
+                'name': self.approximate_count_query_param,
+                'required': False,
+                'in': 'query',
+                'description': 'Include the approximate count from the table statistics.',
+                'schema': {'type': 'boolean'},
+            },
+        ]
+
+
+def is_cursor_pagination_requested(request) -> bool:
+    """
+    Cursor pagination is opt-in with `?pagination=cursor`, or implicitly when following a `cursor` link
+    """
+    if request is None:
+        return False
+    return (
+        request.query_params.get(PaginationConstant.PAGINATION, None) == PaginationConstant.CURSOR or
+        PaginationConstant.CURSOR in request.query_params
+    )
+
+
+def _encode_cursor_value(value):
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    return str(value)
+
+
+def get_approximate_count(queryset) -> Optional[int]:
+    """
+    Estimated row count of the queryset from the query planner statistics, without running a COUNT(*).
+    Returns None on non-Postgres databases.
+    """
+    if connections[queryset.db].vendor != "postgresql":
+        return None
+
+    try:
+        plan = json.loads(queryset.order_by().explain(format="json"))
+        return int(plan[0]["Plan"]["Plan Rows"])
+    except Exception as e:
+        logger.warning(f"Unable to estimate the queryset count: {e}")
+        return None
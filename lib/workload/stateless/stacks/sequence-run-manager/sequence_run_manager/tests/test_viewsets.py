@@ -1,4 +1,5 @@
 import logging
+from datetime import timedelta
 
 from django.test import TestCase
 from django.utils.timezone import now
@@ -77,3 +78,52 @@ class SequenceViewSetTestCase(TestCase):
             0,
             "No results are expected for unrecognized query parameter",
         )
+
+    def test_get_api_cursor_pagination(self):
+        """
+        python manage.py test sequence_run_manager.tests.test_viewsets.SequenceViewSetTestCase.test_get_api_cursor_pagination
+        """
+        start_time = now()
+        for i in range(24):
+            Sequence.objects.create(
+                run_volume_name="gds_name",
+                run_folder_path=f"/to/gds/folder/path/{i}",
+                run_data_uri=f"gds://gds_name/to/gds/folder/path/{i}",
+                status=SequenceStatus.STARTED,
+                # every 3 sequences share the same start_time, to check the (start_time, orcabus_id) tie-breaker
+                start_time=start_time - timedelta(hours=i // 3),
+                sample_sheet_name="SampleSheet.csv",
+                sequence_run_id=f"r.{i:06d}",
+            )
+
+        logger.info("Default is still page number pagination")
+        response = self.client.get(f"{self.endpoint}/?rows_per_page=10")
+        self.assertEqual(response.data["pagination"]["page"], 1)
+        self.assertEqual(response.data["pagination"]["count"], 25)
+
+        for ordering in ["-orcabus_id", "start_time", "-start_time"]:
+            logger.info(f"Walk forward and backward with cursor pagination, ordering by {ordering}")
+            tie_breaker = "-orcabus_id" if ordering.startswith("-") else "orcabus_id"
+            expected = [s.orcabus_id for s in Sequence.objects.order_by(ordering, tie_breaker)]
+
+            pages = []
+            url = f"{self.endpoint}/?pagination=cursor&rows_per_page=10&ordering={ordering}"
+            while url:
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, 200, "Ok status response is expected")
+                self.assertNotIn("page", response.data["pagination"])
+                pages.append(response)
+                url = response.data["links"]["next"]
+
+            self.assertEqual([len(p.data["results"]) for p in pages], [10, 10, 5])
+            self.assertEqual([r["orcabus_id"] for p in pages for r in p.data["results"]], expected)
+
+            response = self.client.get(pages[-1].data["links"]["previous"])
+            self.assertEqual(response.data["results"], pages[1].data["results"])
+            response = self.client.get(response.data["links"]["previous"])
+            self.assertEqual(response.data["results"], pages[0].data["results"])
+            self.assertIsNone(response.data["links"]["previous"])
+
+        logger.info("Unsupported ordering for cursor pagination")
+        response = self.client.get(f"{self.endpoint}/?pagination=cursor&ordering=sequence_run_name")
+        self.assertEqual(response.status_code, 400)
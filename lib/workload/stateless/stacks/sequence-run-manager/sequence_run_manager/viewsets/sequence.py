@@ -10,6 +10,7 @@ class SequenceViewSet(BaseViewSet):
     search_fields = Sequence.get_base_fields()
     queryset = Sequence.objects.all()
     lookup_value_regex = "[^/]+" # to allow id prefix
+    cursor_ordering_fields = ["start_time"]
 
     def get_queryset(self):
         """
@@ -1,32 +1,117 @@
 import logging
 import os
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Tuple
 import json
+from cachetools import TTLCache, LRUCache
 from libumccr.aws import libsm
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 logger = logging.getLogger(__name__)
 
+# Container-lifetime caches, shared by every BSSHService instance
+# The token is re-fetched from the Secret Manager at most once per TTL (or on a 401 from BSSH)
+BSSH_TOKEN_CACHE_TTL_SECONDS = 3600
+BSSH_REQUEST_TIMEOUT_SECONDS = 30
+BSSH_REQUEST_MAX_RETRIES = 3
+BSSH_REQUEST_BACKOFF_FACTOR = 0.5
+
+_bssh_token_cache: TTLCache = TTLCache(maxsize=1, ttl=BSSH_TOKEN_CACHE_TTL_SECONDS)
+
+# Sample sheet contents keyed by (run id, sample sheet ETag)
+_sample_sheet_content_cache: LRUCache = LRUCache(maxsize=32)
+
+_bssh_session: Optional[requests.Session] = None
+
+
+def get_bssh_access_token() -> str:
+    """
+    Get the BSSH access token from the Secret Manager, cached for the lifetime of the container (up to the TTL)
+    """
+    token = _bssh_token_cache.get("token")
+    if token:
+        return token
+
+    assert os.environ.get("BASESPACE_ACCESS_TOKEN_SECRET_ID", None), "BASESPACE_ACCESS_TOKEN_SECRET_ID is not set"
+    try:
+        token = libsm.get_secret(os.environ.get("BASESPACE_ACCESS_TOKEN_SECRET_ID"))
+    except Exception as e:
+        logger.error(f"Error retrieving BSSH token from the Secret Manager: {e}")
+        raise e
+
+    if not token:
+        raise ValueError("BSSH_TOKEN is not set")
+
+    _bssh_token_cache["token"] = token
+    return token
+
+
+def invalidate_bssh_access_token():
+    """Drop the cached token, i.e after it has been rotated"""
+    _bssh_token_cache.clear()
+
+
+def get_bssh_session() -> requests.Session:
+    """
+    Get the pooled requests session, retrying idempotent requests with exponential backoff
+    """
+    global _bssh_session
+
+    if _bssh_session is None:
+        retry = Retry(
+            total=BSSH_REQUEST_MAX_RETRIES,
+            backoff_factor=BSSH_REQUEST_BACKOFF_FACTOR,
+            status_forcelist=[429, 500, 502, 503, 504],
+            allowed_methods=["GET", "HEAD"],
+            raise_on_status=False,
+        )
+        _bssh_session = requests.Session()
+        _bssh_session.mount("https://", HTTPAdapter(max_retries=retry))
+        _bssh_session.mount("http://", HTTPAdapter(max_retries=retry))
+
+    return _bssh_session
+
+
+def get_run_id_from_api_url(api_url: str) -> str:
+    """
+    e.g. https://api.aps2.sh.basespace.illumina.com/v2/runs/r.4Wz-ABCDEFGHIJKLM-A -> r.4Wz-ABCDEFGHIJKLM-A
+    """
+    return api_url.rstrip("/").split("/")[-1]
+
+
 class BSSHService:
     
     """Service class for BSSH (BaseSpace Sequence Hub) operations"""
     
     def __init__(self):
-        assert os.environ.get("BASESPACE_ACCESS_TOKEN_SECRET_ID", None), "BASESPACE_ACCESS_TOKEN_SECRET_ID is not set"
-        try:
-            BASESPACE_ACCESS_TOKEN = libsm.get_secret(os.environ.get("BASESPACE_ACCESS_TOKEN_SECRET_ID"))
-        except Exception as e:
-            logger.error(f"Error retrieving BSSH token from the Secret Manager: {e}")
-            raise e
-        
-        if not BASESPACE_ACCESS_TOKEN:
-            raise ValueError("BSSH_TOKEN is not set")
-        self.headers = {
-            'Authorization': f'Bearer {BASESPACE_ACCESS_TOKEN}',
+        self.session = get_bssh_session()
+        self.headers = self._get_headers()
+        self.base_url = "https://api.aps2.sh.basespace.illumina.com/v2/"
+
+    @staticmethod
+    def _get_headers() -> Dict[str, str]:
+        return {
+            'Authorization': f'Bearer {get_bssh_access_token()}',
             'Content-Type': 'application/json'
         }
-        self.base_url = "https://api.aps2.sh.basespace.illumina.com/v2/"
-        
+
+    def _get(self, url: str, **kwargs) -> requests.Response:
+        """
+        GET through the pooled session.
+        If the token has been rotated (401), refresh the token and try once more.
+        """
+        response = self.session.get(url, headers=self.headers, timeout=BSSH_REQUEST_TIMEOUT_SECONDS, **kwargs)
+
+        if response.status_code == 401:
+            logger.info("BSSH returned 401, refreshing the BSSH token")
+            invalidate_bssh_access_token()
+            self.headers = self._get_headers()
+            response = self.session.get(url, headers=self.headers, timeout=BSSH_REQUEST_TIMEOUT_SECONDS, **kwargs)
+
+        response.raise_for_status()
+        return response
+
     
     def handle_request_error(self, e: Exception, operation: str):
         """
@@ -176,13 +261,8 @@ class BSSHService:
         """
         
         try:
-            response = requests.get(
-                api_url,
-                headers=self.headers
-            )
-            
-            # Raise error for bad status codes
-            response.raise_for_status()
+            # Raises error for bad status codes
+            response = self._get(api_url)
             
             logger.info('BSSH run details API call successful.')
             return response.json()
@@ -213,6 +293,9 @@ class BSSHService:
             
         Returns:
             Base64 encoded gzip string containing sample sheet data or None if not found
+
+        Sample sheet contents are cached by run id and ETag,
+        so repeated state changes for the same run do not re-download the sample sheet.
             
         Example of run files api call response (api call to get files in project):
         {
@@ -254,15 +337,25 @@ class BSSHService:
 
         logger.info(f'Bssh run api url: {api_url} , sample sheet name: {sample_sheet_name}')
         try:
-            file_content_url = self._find_sample_sheet_url(api_url, sample_sheet_name)
+            file_content_url, etag = self._find_sample_sheet_url_and_etag(api_url, sample_sheet_name)
                 
             if not file_content_url:
                 logger.warning(f'Sample sheet {sample_sheet_name} not found in BSSH run {api_url}')
                 return None 
             
             logger.info(f'File content url: {file_content_url}')
-            
-            return self._fetch_and_decode_file_content(file_content_url)
+
+            cache_key = (get_run_id_from_api_url(api_url), etag) if etag else None
+            if cache_key is not None and cache_key in _sample_sheet_content_cache:
+                logger.info(f'Using cached sample sheet for run {cache_key[0]} (ETag {etag})')
+                return _sample_sheet_content_cache[cache_key]
+
+            sample_sheet_content = self._fetch_and_decode_file_content(file_content_url)
+
+            if cache_key is not None:
+                _sample_sheet_content_cache[cache_key] = sample_sheet_content
+
+            return sample_sheet_content
             
         except Exception as e:
             logger.error(f'Error getting sample sheet file: {e}')
@@ -277,6 +370,17 @@ class BSSHService:
         Returns:
             URL of the sample sheet file or None if not found
         """
+        return self._find_sample_sheet_url_and_etag(api_url, sample_sheet_name)[0]
+
+    def _find_sample_sheet_url_and_etag(self, api_url: str, sample_sheet_name: str) -> Tuple[Optional[str], Optional[str]]:
+        """
+        Find the URL and ETag of the sample sheet file in the BSSH run files
+        Args:
+            api_url: BSSH run URL
+            sample_sheet_name: Name of the sample sheet file
+        Returns:
+            Tuple of the URL and ETag of the sample sheet file, (None, None) if not found
+        """
         try:
             bssh_run_files_url = f"{api_url}/files"
             offset = 0
@@ -290,8 +394,7 @@ class BSSHService:
                     'limit': limit
                 }
             
-                response = requests.get(bssh_run_files_url, params=params, headers=self.headers)
-                response.raise_for_status()
+                response = self._get(bssh_run_files_url, params=params)
             
                 files = response.json().get('Items', [])
                 
@@ -300,22 +403,21 @@ class BSSHService:
                 
                 for file in files:
                     if file['Name'] == sample_sheet_name:
-                        return file['HrefContent']
+                        return file['HrefContent'], file.get('ETag', None)
             
                 if len(files) < limit:
                     break
                 
                 offset += limit
         
-            return None
+            return None, None
         except Exception as e:
             self.handle_request_error(e, "when getting sample sheet file content url")
             
     def _fetch_and_decode_file_content(self, content_url: str) -> Optional[str]:
         """Fetch file content and return as Jsonb format to persist in DB"""
         try:
-            response = requests.get(content_url, headers=self.headers, stream=True)
-            response.raise_for_status()
+            response = self._get(content_url, stream=True)
 
             content = response.content
             if not content:
@@ -0,0 +1,91 @@
+from unittest.mock import MagicMock, patch
+
+from libumccr.aws import libsm
+from mockito import verify
+
+from sequence_run_manager_proc.services import bssh_srv
+from sequence_run_manager_proc.services.bssh_srv import BSSHService
+from sequence_run_manager_proc.tests.case import logger, SequenceRunProcUnitTestCase
+
+API_URL = "https://api.aps2.sh.basespace.illumina.com/v2/runs/r.4Wz-ABCDEFGHIJKLM-A"
+CONTENT_URL = f"{API_URL}/files/123/content"
+
+
+def _mock_response(status_code=200, json_data=None, content=None):
+    response = MagicMock()
+    response.status_code = status_code
+    response.json.return_value = json_data
+    response.content = content
+    return response
+
+
+class BSSHServiceUnitTests(SequenceRunProcUnitTestCase):
+    def setUp(self) -> None:
+        super(BSSHServiceUnitTests, self).setUp()
+        bssh_srv.invalidate_bssh_access_token()
+        bssh_srv._sample_sheet_content_cache.clear()
+
+        self.mock_session = MagicMock()
+        patcher_session = patch.object(bssh_srv, "get_bssh_session", return_value=self.mock_session)
+        patcher_session.start()
+        self.addCleanup(patcher_session.stop)
+
+    def tearDown(self) -> None:
+        bssh_srv.invalidate_bssh_access_token()
+        bssh_srv._sample_sheet_content_cache.clear()
+        super(BSSHServiceUnitTests, self).tearDown()
+
+    def _files_listing(self, etag):
+        return _mock_response(json_data={
+            "Items": [
+                {"Name": "SampleSheet.csv", "HrefContent": CONTENT_URL, "ETag": etag},
+            ]
+        })
+
+    def test_token_fetched_once_per_container(self):
+        """
+        python manage.py test sequence_run_manager_proc.tests.test_bssh_srv.BSSHServiceUnitTests.test_token_fetched_once_per_container
+        """
+        BSSHService()
+        BSSHService()
+        BSSHService()
+
+        verify(libsm, times=1).get_secret("test")
+
+    def test_sample_sheet_cached_by_etag(self):
+        """
+        python manage.py test sequence_run_manager_proc.tests.test_bssh_srv.BSSHServiceUnitTests.test_sample_sheet_cached_by_etag
+        """
+        self.mock_session.get.side_effect = [
+            self._files_listing("etag-1"),
+            _mock_response(content=b"[Header]\nFileFormatVersion,2\n"),
+            # Same ETag, only the listing is requested again
+            self._files_listing("etag-1"),
+            # New ETag, the sample sheet is downloaded again
+            self._files_listing("etag-2"),
+            _mock_response(content=b"[Header]\nFileFormatVersion,2\nRunName,foo\n"),
+        ]
+
+        first = BSSHService().get_sample_sheet_from_bssh_run_files(API_URL, "SampleSheet.csv")
+        second = BSSHService().get_sample_sheet_from_bssh_run_files(API_URL, "SampleSheet.csv")
+        third = BSSHService().get_sample_sheet_from_bssh_run_files(API_URL, "SampleSheet.csv")
+
+        logger.info(third)
+        self.assertEqual(first, second)
+        self.assertIn("RunName,foo", third)
+        self.assertEqual(self.mock_session.get.call_count, 5)
+
+    def test_token_refreshed_on_unauthorized(self):
+        """
+        python manage.py test sequence_run_manager_proc.tests.test_bssh_srv.BSSHServiceUnitTests.test_token_refreshed_on_unauthorized
+        """
+        self.mock_session.get.side_effect = [
+            _mock_response(status_code=401),
+            _mock_response(json_data={"Id": "r.4Wz-ABCDEFGHIJKLM-A"}),
+        ]
+
+        run_details = BSSHService().get_run_details(API_URL)
+
+        self.assertEqual(run_details["Id"], "r.4Wz-ABCDEFGHIJKLM-A")
+        self.assertEqual(self.mock_session.get.call_count, 2)
+        verify(libsm, times=2).get_secret("test")
@@ -5,6 +5,7 @@ import * as dynamodb from 'aws-cdk-lib/aws-dynamodb';
 import { NewSamplesheetEventShowerConstruct } from './part_1/samplesheet-event-shower';
 import { NewFastqListRowsEventShowerConstruct } from './part_2/fastq-list-rows-event-shower';
 import * as secretsManager from 'aws-cdk-lib/aws-secretsmanager';
+import * as s3 from 'aws-cdk-lib/aws-s3';
 
 /*
 Provide the glue to push 'shower' events
@@ -15,6 +16,7 @@ export interface showerGlueHandlerConstructProps {
   eventBusObj: events.IEventBus;
   instrumentRunTableObj: dynamodb.ITableV2;
   icav2AccessTokenSecretObj: secretsManager.ISecret;
+  payloadCodecBucketObj: s3.IBucket;
 }
 
 export class showerGlueHandlerConstruct extends NestedStack {
@@ -48,6 +50,8 @@ export class showerGlueHandlerConstruct extends NestedStack {
         tableObj: props.instrumentRunTableObj,
         /* Secrets */
         icav2AccessTokenSecretObj: props.icav2AccessTokenSecretObj,
+        /* Buckets */
+        payloadCodecBucketObj: props.payloadCodecBucketObj,
       }
     );
   }
@@ -8,13 +8,10 @@ import { PythonUvFunction } from '../../../../../../../components/uv-python-lamb
 import * as lambda from 'aws-cdk-lib/aws-lambda';
 import * as secretsManager from 'aws-cdk-lib/aws-secretsmanager';
 import * as ssm from 'aws-cdk-lib/aws-ssm';
-import * as iam from 'aws-cdk-lib/aws-iam';
 import {
   hostedZoneNameParameterPath,
   jwtSecretName,
 } from '../../../../../../../../../config/constants';
-import * as cdk from 'aws-cdk-lib';
-import { NagSuppressions } from 'cdk-nag';
 import { MetadataToolsPythonLambdaLayer } from '../../../../../../../components/python-metadata-tools-layer';
 import { Duration } from 'aws-cdk-lib';
 
@@ -86,20 +83,6 @@ export class NewSamplesheetEventShowerConstruct extends Construct {
     Part 1: Build lambdas
     */
 
-    // Decompress samplesheet
-    const getLibraryIdsFromGzippedSampleSheetLambdaFunction = new PythonUvFunction(
-      this,
-      'get_library_id_from_gzipped_samplesheet_lambda',
-      {
-        entry: path.join(__dirname, 'lambdas/get_library_ids_from_gzipped_samplesheet_py'),
-        runtime: lambda.Runtime.PYTHON_3_12,
-        architecture: lambda.Architecture.ARM_64,
-        index: 'get_library_ids_from_gzipped_samplesheet.py',
-        handler: 'handler',
-        memorySize: 2048,
-      }
-    );
-
     // Generate library event data
     const generateLibraryEventDataLambdaFunction = new PythonUvFunction(
       this,
@@ -115,8 +98,21 @@ export class NewSamplesheetEventShowerConstruct extends Construct {
           /* SSM and Secrets Manager env vars */
           HOSTNAME_SSM_PARAMETER: hostnameSsmParameterObj.parameterName,
           ORCABUS_TOKEN_SECRET_ID: jwtTokenSecretObj.secretName,
+          /* Table env vars */
+          INSTRUMENT_RUN_TABLE_NAME: props.tableObj.tableName,
+          INSTRUMENT_RUN_TABLE_PARTITION_NAME:
+            this.newSamplesheetEventShowerMap.tablePartition.instrumentRun,
+          LIBRARY_TABLE_PARTITION_NAME: this.newSamplesheetEventShowerMap.tablePartition.library,
+          /* Library in samplesheet event env vars */
+          EVENT_BUS_NAME: props.eventBusObj.eventBusName,
+          EVENT_SOURCE: this.newSamplesheetEventShowerMap.outputSource,
+          EVENT_DETAIL_TYPE:
+            this.newSamplesheetEventShowerMap.outputDetailType.metadataInSampleSheet,
+          EVENT_STATUS: this.newSamplesheetEventShowerMap.outputStatus.libraryInSamplesheet,
+          EVENT_PAYLOAD_VERSION: this.newSamplesheetEventShowerMap.outputPayloadVersion,
         },
-        timeout: Duration.seconds(60),
+        // Generates the events of every library in the samplesheet
+        timeout: Duration.seconds(300),
         layers: [metadataToolsLayer],
       }
     );
@@ -125,6 +121,10 @@ export class NewSamplesheetEventShowerConstruct extends Construct {
     jwtTokenSecretObj.grantRead(generateLibraryEventDataLambdaFunction.currentVersion);
     hostnameSsmParameterObj.grantRead(generateLibraryEventDataLambdaFunction.currentVersion);
 
+    // And to write the libraries to the table and put the library events
+    props.tableObj.grantReadWriteData(generateLibraryEventDataLambdaFunction.currentVersion);
+    props.eventBusObj.grantPutEventsTo(generateLibraryEventDataLambdaFunction.currentVersion);
+
     /*
     Part 2: Build state machine
     */
@@ -151,14 +151,6 @@ export class NewSamplesheetEventShowerConstruct extends Construct {
         __start_samplesheet_shower_status__:
           this.newSamplesheetEventShowerMap.outputStatus.startEventShower,
 
-        // Library In Samplesheet
-        __library_in_samplesheet_detail_type__:
-          this.newSamplesheetEventShowerMap.outputDetailType.metadataInSampleSheet,
-        __library_in_samplesheet_payload_version__:
-          this.newSamplesheetEventShowerMap.outputPayloadVersion,
-        __library_in_samplesheet_status__:
-          this.newSamplesheetEventShowerMap.outputStatus.libraryInSamplesheet,
-
         // Complete Event Shower
         __complete_samplesheet_shower_detail_type__:
           this.newSamplesheetEventShowerMap.outputDetailType.showerTerminal,
@@ -169,14 +161,11 @@ export class NewSamplesheetEventShowerConstruct extends Construct {
 
         /* Table settings */
         __table_name__: props.tableObj.tableName,
-        __library_table_partition_name__: this.newSamplesheetEventShowerMap.tablePartition.library,
         __instrument_run_table_partition_name__:
           this.newSamplesheetEventShowerMap.tablePartition.instrumentRun,
 
         // Lambdas
-        __get_library_ids_from_gzipped_samplesheet_lambda_function_arn__:
-          getLibraryIdsFromGzippedSampleSheetLambdaFunction.currentVersion.functionArn,
-        __get_library_object_and_event_data_from_metadata_api_lambda_function_arn__:
+        __generate_library_event_data_objects_lambda_function_arn__:
           generateLibraryEventDataLambdaFunction.currentVersion.functionArn,
       },
     });
@@ -189,55 +178,11 @@ export class NewSamplesheetEventShowerConstruct extends Construct {
     props.tableObj.grantReadWriteData(this.stateMachineObj);
 
     /* Allow state machine to invoke lambda */
-    [
-      getLibraryIdsFromGzippedSampleSheetLambdaFunction,
-      generateLibraryEventDataLambdaFunction,
-    ].forEach((lambda) => {
-      lambda.currentVersion.grantInvoke(this.stateMachineObj);
-    });
+    generateLibraryEventDataLambdaFunction.currentVersion.grantInvoke(this.stateMachineObj);
 
     /* Allow state machine to send events */
     props.eventBusObj.grantPutEventsTo(this.stateMachineObj);
 
-    /* State machine runs a distributed map */
-    // Because this steps execution uses a distributed map running an express step function, we
-    // have to wire up some extra permissions
-    // Grant the state machine's role to execute itself
-    // However we cannot just grant permission to the role as this will result in a circular dependency
-    // between the state machine and the role
-    // Instead we use the workaround here - https://github.com/aws/aws-cdk/issues/28820#issuecomment-1936010520
-    const distributedMapPolicy = new iam.Policy(this, 'sfn-distributed-map-policy', {
-      document: new iam.PolicyDocument({
-        statements: [
-          new iam.PolicyStatement({
-            resources: [this.stateMachineObj.stateMachineArn],
-            actions: ['states:StartExecution'],
-          }),
-          new iam.PolicyStatement({
-            resources: [
-              `arn:aws:states:${cdk.Aws.REGION}:${cdk.Aws.ACCOUNT_ID}:execution:${this.stateMachineObj.stateMachineName}/*:*`,
-            ],
-            actions: ['states:RedriveExecution'],
-          }),
-        ],
-      }),
-    });
-    // Add the policy to the state machine role
-    this.stateMachineObj.role.attachInlinePolicy(distributedMapPolicy);
-
-    // Add in the nag suppressions
-    NagSuppressions.addResourceSuppressions(
-      [this.stateMachineObj, distributedMapPolicy],
-      [
-        {
-          id: 'AwsSolutions-IAM5',
-          reason:
-            'statemachine needs wild card permissions on itself because of the distributed map nature of the state machine',
-        },
-      ],
-      true
-    );
-
     /*
     Part 4: Build event rule
     */
@@ -9,13 +9,44 @@ Generate the events for
 * Start of the SampleSheet Shower
 * Library Event Data Objects (library id, plus event data)
 * End of the SampleSheet Shower
+
+In batch mode (no libraryId in the event), the samplesheet is decompressed once, the bclconvert rows are grouped
+by sample id in one pass, and every library is collected from the metadata api in one bulk query.
+The library event data objects of the whole run are then written to the instrument run database and
+put on the event bus here, rather than returned, as the size of a run (and so of the output) is not bounded.
 """
 # Imports
 import gzip
 import json
+import typing
 from base64 import b64decode
+from datetime import datetime, timezone
+from os import environ
 from typing import Dict, List, Union
-from metadata_tools import get_library_from_library_id, Library
+import boto3
+from metadata_tools import get_library_from_library_id, get_libraries_from_library_id_list, Library
+
+if typing.TYPE_CHECKING:
+    from mypy_boto3_dynamodb import DynamoDBClient
+    from mypy_boto3_events import EventBridgeClient
+
+# Table name
+DYNAMODB_TABLE_NAME_ENV_VAR = "INSTRUMENT_RUN_TABLE_NAME"
+
+# Table partitions
+INSTRUMENT_RUN_PARTITION_ENV_VAR = "INSTRUMENT_RUN_TABLE_PARTITION_NAME"
+LIBRARY_PARTITION_ENV_VAR = "LIBRARY_TABLE_PARTITION_NAME"
+
+# Event settings
+EVENT_BUS_NAME_ENV_VAR = "EVENT_BUS_NAME"
+EVENT_SOURCE_ENV_VAR = "EVENT_SOURCE"
+EVENT_DETAIL_TYPE_ENV_VAR = "EVENT_DETAIL_TYPE"
+EVENT_STATUS_ENV_VAR = "EVENT_STATUS"
+EVENT_PAYLOAD_VERSION_ENV_VAR = "EVENT_PAYLOAD_VERSION"
+
+# PutEvents limits
+PUT_EVENTS_MAX_ENTRIES = 10
+PUT_EVENTS_MAX_SIZE_BYTES = 256 * 1024
 
 
 # Functions
@@ -36,21 +67,6 @@ def decompress_dict(input_compressed_b64gz_str: str) -> Union[Dict, List]:
     )
 
 
-def get_library_bclconvert_rows(library_obj: Dict, bclconvert_data: List[Dict]) -> List[Dict]:
-    """
-    Get library bclconvert rows
-    :param library_obj:
-    :param bclconvert_data:
-    :return:
-    """
-    return list(
-        filter(
-            lambda bclconvert_row: bclconvert_row.get("sample_id") == library_obj.get("libraryId"),
-            bclconvert_data
-        )
-    )
-
-
 def generate_library_event_data_object_from_library(
         library_obj: Library,
         instrument_run_id: str,
@@ -137,21 +153,237 @@ def generate_library_event_data_object_from_library(
     }
 
 
+def get_bclconvert_rows_by_sample_id(bclconvert_data: List[Dict]) -> Dict[str, List[Dict]]:
+    """
+    Group the bclconvert rows by sample id in a single pass, in samplesheet order
+    :param bclconvert_data:
+    :return:
+    """
+    bclconvert_rows_by_sample_id = {}
+    for bclconvert_row in bclconvert_data:
+        bclconvert_rows_by_sample_id.setdefault(bclconvert_row['sample_id'], []).append(bclconvert_row)
+    return bclconvert_rows_by_sample_id
+
+
+def get_dynamodb_db_client() -> 'DynamoDBClient':
+    return boto3.client('dynamodb')
+
+
+def get_event_bridge_client() -> 'EventBridgeClient':
+    return boto3.client('events')
+
+
+def get_table_name() -> str:
+    return environ.get(DYNAMODB_TABLE_NAME_ENV_VAR)
+
+
+def get_utc_timestamp() -> str:
+    """
+    Get a UTC timestamp in ISO format
+    :return:
+    """
+    return datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
+
+
+def add_libraries_to_instrument_run(instrument_run_id: str, library_orcabus_id_list: List[str]):
+    """
+    Add every library of the run to the library set of the instrument run in one update
+    :param instrument_run_id:
+    :param library_orcabus_id_list:
+    :return:
+    """
+    get_dynamodb_db_client().update_item(
+        TableName=get_table_name(),
+        Key={
+            'id': {'S': instrument_run_id},
+            'id_type': {'S': environ.get(INSTRUMENT_RUN_PARTITION_ENV_VAR)},
+        },
+        UpdateExpression="ADD library_set :library_set",
+        ExpressionAttributeValues={
+            ':library_set': {'SS': library_orcabus_id_list},
+        }
+    )
+
+
+def add_instrument_run_to_library(library_obj: Library, instrument_run_id: str):
+    """
+    Add the instrument run to the library, the library id and library object are only set
+    when the library is first added to the database
+    :param library_obj:
+    :param instrument_run_id:
+    :return:
+    """
+    get_dynamodb_db_client().update_item(
+        TableName=get_table_name(),
+        Key={
+            'id': {'S': library_obj['orcabusId']},
+            'id_type': {'S': environ.get(LIBRARY_PARTITION_ENV_VAR)},
+        },
+        UpdateExpression=(
+            "ADD instrument_run_id_set :instrument_run_id_set "
+            "SET library_id = if_not_exists(library_id, :library_id), "
+            "library_obj = if_not_exists(library_obj, :library_obj)"
+        ),
+        ExpressionAttributeValues={
+            ':instrument_run_id_set': {'SS': [instrument_run_id]},
+            ':library_id': {'S': library_obj['libraryId']},
+            ':library_obj': {'S': json.dumps(library_obj, separators=(',', ':'))},
+        }
+    )
+
+
+def get_library_event_entry(event_data: Dict, timestamp: str) -> Dict:
+    """
+    Library in samplesheet event entry for PutEvents
+    :param event_data:
+    :param timestamp:
+    :return:
+    """
+    return {
+        "Detail": json.dumps(
+            {
+                "timestamp": timestamp,
+                "status": environ.get(EVENT_STATUS_ENV_VAR),
+                "payload": {
+                    "version": environ.get(EVENT_PAYLOAD_VERSION_ENV_VAR),
+                    "data": event_data,
+                }
+            },
+            separators=(',', ':')
+        ),
+        "DetailType": environ.get(EVENT_DETAIL_TYPE_ENV_VAR),
+        "EventBusName": environ.get(EVENT_BUS_NAME_ENV_VAR),
+        "Source": environ.get(EVENT_SOURCE_ENV_VAR),
+    }
+
+
+def get_put_events_entry_size(entry: Dict) -> int:
+    """
+    Size of an entry as counted against the PutEvents request size limit
+    :param entry:
+    :return:
+    """
+    return sum(
+        len(entry.get(key, "").encode('utf-8'))
+        for key in ["Source", "DetailType", "Detail"]
+    ) + sum(len(resource.encode('utf-8')) for resource in entry.get("Resources", []))
+
+
+def get_put_events_entry_chunks(entries: List[Dict]) -> List[List[Dict]]:
+    """
+    Split the entries into chunks that each fit in a single PutEvents request
+    :param entries:
+    :return:
+    """
+    entry_chunks = []
+    chunk_size_bytes = 0
+    for entry in entries:
+        entry_size_bytes = get_put_events_entry_size(entry)
+        if (
+                len(entry_chunks) == 0 or
+                len(entry_chunks[-1]) == PUT_EVENTS_MAX_ENTRIES or
+                chunk_size_bytes + entry_size_bytes > PUT_EVENTS_MAX_SIZE_BYTES
+        ):
+            entry_chunks.append([])
+            chunk_size_bytes = 0
+        entry_chunks[-1].append(entry)
+        chunk_size_bytes += entry_size_bytes
+    return entry_chunks
+
+
+def put_events(entries: List[Dict]):
+    """
+    Put the events in as few requests as possible
+    :param entries:
+    :return:
+    """
+    for entry_chunk in get_put_events_entry_chunks(entries):
+        response = get_event_bridge_client().put_events(Entries=entry_chunk)
+        if response.get('FailedEntryCount', 0) > 0:
+            raise ValueError(
+                f"Could not put {response['FailedEntryCount']} of {len(entry_chunk)} library events: " +
+                ", ".join(
+                    set(
+                        entry_iter_['ErrorMessage']
+                        for entry_iter_ in response['Entries']
+                        if 'ErrorMessage' in entry_iter_
+                    )
+                )
+            )
+
+
+def batch_handler(event: Dict) -> Dict:
+    """
+    Generate, record and put the library event data objects of every library in the samplesheet
+    :param event:
+    :return:
+    """
+    instrument_run_id = event['instrumentRunId']
+
+    # Decompress the samplesheet once, and group the bclconvert rows by library
+    bclconvert_rows_by_sample_id = get_bclconvert_rows_by_sample_id(
+        decompress_dict(event['samplesheetB64gz'])['bclconvert_data']
+    )
+
+    # Get every library object in one query
+    library_obj_list = get_libraries_from_library_id_list(
+        library_id_list=list(bclconvert_rows_by_sample_id.keys())
+    )
+
+    event_data_list = list(
+        map(
+            lambda library_obj_iter_: generate_library_event_data_object_from_library(
+                library_obj=library_obj_iter_,
+                instrument_run_id=instrument_run_id,
+                bclconvert_rows=bclconvert_rows_by_sample_id[library_obj_iter_['libraryId']]
+            ),
+            library_obj_list
+        )
+    )
+
+    # Update the instrument run database
+    add_libraries_to_instrument_run(
+        instrument_run_id=instrument_run_id,
+        library_orcabus_id_list=list(map(lambda library_obj_iter_: library_obj_iter_['orcabusId'], library_obj_list))
+    )
+    for library_obj in library_obj_list:
+        add_instrument_run_to_library(library_obj, instrument_run_id)
+
+    # Put the library events
+    timestamp = get_utc_timestamp()
+    put_events(
+        list(
+            map(
+                lambda event_data_iter_: get_library_event_entry(event_data_iter_, timestamp),
+                event_data_list
+            )
+        )
+    )
+
+    return {
+        "libraryIdList": list(map(lambda library_obj_iter_: library_obj_iter_['libraryId'], library_obj_list))
+    }
+
+
 def handler(event, context):
     """
     Generate the event objects
 
+    Without a library id, generate (and put) the event objects of every library in the samplesheet
+
     :param event:
     :param context:
     :return:
     """
 
+    if 'libraryId' not in event:
+        return batch_handler(event)
+
     # Get the library id
     library_id = event['libraryId']
-    bclconvert_library_data = list(filter(
-        lambda bclconvert_data_row_iter_: bclconvert_data_row_iter_['sample_id'] == library_id,
+    bclconvert_library_data = get_bclconvert_rows_by_sample_id(
         decompress_dict(event['samplesheetB64gz'])['bclconvert_data']
-    ))
+    ).get(library_id, [])
     instrument_run_id = event['instrumentRunId']
 
     # Get the library object list
@@ -165,7 +397,6 @@ def handler(event, context):
         bclconvert_rows=bclconvert_library_data
     )
 
-
     return {
         "libraryObj": library_obj,
         "eventDataObj": event_data
@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+
+"""
+The batch mode of the library event data objects lambda, against a fake metadata api
+and a (moto) instrument run table and event bus
+
+Run from the generate_library_event_data_objects_py directory, with the metadata tools layer on the python path, with
+    PYTHONPATH="../../../../../../../../../components/python-metadata-tools-layer/metadata_tools_layer/src:." python -m unittest discover tests
+"""
+
+# Standard imports
+import gzip
+import json
+import os
+import unittest
+from base64 import b64encode
+from types import SimpleNamespace
+from unittest import mock
+from urllib.parse import urlparse
+
+import boto3
+from moto import mock_aws
+
+# Layer imports
+from metadata_tools import LibraryNotFoundError
+from metadata_tools.utils import requests_helpers
+
+# Local imports
+import generate_library_event_data_objects
+
+TABLE_NAME = "stacky-instrument-run-table"
+EVENT_BUS_NAME = "OrcaBusMain"
+INSTRUMENT_RUN_ID = "250502_A00130_0367_AHFH2WDSXF"
+NUM_LIBRARIES = 384
+NUM_LANES = 4
+
+ENV = {
+    "AWS_DEFAULT_REGION": "ap-southeast-2",
+    "INSTRUMENT_RUN_TABLE_NAME": TABLE_NAME,
+    "INSTRUMENT_RUN_TABLE_PARTITION_NAME": "instrument_run",
+    "LIBRARY_TABLE_PARTITION_NAME": "library",
+    "EVENT_BUS_NAME": EVENT_BUS_NAME,
+    "EVENT_SOURCE": "orcabus.instrumentrunmanager",
+    "EVENT_DETAIL_TYPE": "SamplesheetMetadataUnion",
+    "EVENT_STATUS": "LibraryInSamplesheet",
+    "EVENT_PAYLOAD_VERSION": "0.1.0",
+}
+
+
+def get_library_id(library_index: int) -> str:
+    return f"L25{library_index:05d}"
+
+
+def get_samplesheet_b64gz(num_libraries: int) -> str:
+    """
+    A NovaSeq X like samplesheet, every library on every lane
+    """
+    samplesheet = {
+        "header": {"file_format_version": 2},
+        "bclconvert_data": [
+            {
+                "lane": lane,
+                "sample_id": get_library_id(library_index),
+                "index": f"{library_index:08d}".replace("0", "A").replace("1", "C"),
+                "index2": f"{library_index:08d}".replace("0", "G").replace("1", "T"),
+                "override_cycles": "Y151;I8;I8;Y151",
+            }
+            for lane in range(1, NUM_LANES + 1)
+            for library_index in range(num_libraries)
+        ]
+    }
+    return b64encode(gzip.compress(json.dumps(samplesheet).encode())).decode()
+
+
+class FakeMetadataApi:
+    """
+    Library endpoint of the metadata api, counts each request
+    """
+    def __init__(self, num_libraries: int):
+        self.libraries_by_library_id = {
+            get_library_id(library_index): {
+                "orcabusId": f"lib.{library_index:026d}",
+                "libraryId": get_library_id(library_index),
+                "phenotype": "normal",
+                "workflow": "clinical",
+                "quality": "good",
+                "type": "WGS",
+                "assay": "TsqNano",
+                "coverage": 40.0,
+                "sample": {"orcabusId": f"smp.{library_index:026d}", "sampleId": f"MDX25{library_index:04d}"},
+                "subject": {"orcabusId": f"sbj.{library_index:026d}", "subjectId": f"{library_index}"},
+                "projectSet": [{"orcabusId": "prj.01JBMVXFEY2HEBA1MDDBVKKX4Z", "projectId": "BPOP"}],
+            }
+            for library_index in range(num_libraries)
+        }
+        self.num_requests = 0
+
+    def get(self, url, headers, params):
+        self.num_requests += 1
+        assert urlparse(url).path == "/api/v1/library"
+        library_id_list = params["library_id"]
+        if not isinstance(library_id_list, list):
+            library_id_list = [library_id_list]
+        results = [
+            self.libraries_by_library_id[library_id]
+            for library_id in library_id_list
+            if library_id in self.libraries_by_library_id
+        ]
+        assert len(results) <= params["rowsPerPage"]
+        return SimpleNamespace(
+            raise_for_status=lambda: None,
+            json=lambda: {"links": {"next": None}, "results": results},
+        )
+
+
+@mock_aws
+class TestGenerateLibraryEventDataObjects(unittest.TestCase):
+    def setUp(self):
+        env_patch = mock.patch.dict(os.environ, ENV)
+        env_patch.start()
+        self.addCleanup(env_patch.stop)
+
+        self.dynamodb_client = boto3.client("dynamodb")
+        self.dynamodb_client.create_table(
+            TableName=TABLE_NAME,
+            KeySchema=[
+                {"AttributeName": "id", "KeyType": "HASH"},
+                {"AttributeName": "id_type", "KeyType": "RANGE"},
+            ],
+            AttributeDefinitions=[
+                {"AttributeName": "id", "AttributeType": "S"},
+                {"AttributeName": "id_type", "AttributeType": "S"},
+            ],
+            BillingMode="PAY_PER_REQUEST",
+        )
+        events_client = boto3.client("events")
+        events_client.create_event_bus(Name=EVENT_BUS_NAME)
+        self.events_client = mock.Mock(wraps=events_client)
+
+        self.metadata_api = FakeMetadataApi(NUM_LIBRARIES)
+        for patch in [
+            mock.patch.object(requests_helpers, "get_orcabus_token", return_value="token"),
+            mock.patch.object(requests_helpers, "get_hostname", return_value="dev.umccr.org"),
+            mock.patch.object(requests_helpers.requests, "get", side_effect=self.metadata_api.get),
+            mock.patch.object(
+                generate_library_event_data_objects, "get_event_bridge_client", return_value=self.events_client
+            ),
+        ]:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def run_batch(self, instrument_run_id: str = INSTRUMENT_RUN_ID, num_libraries: int = NUM_LIBRARIES):
+        with mock.patch.object(
+                generate_library_event_data_objects, "decompress_dict",
+                wraps=generate_library_event_data_objects.decompress_dict
+        ) as decompress_dict_mock:
+            output = generate_library_event_data_objects.handler(
+                {
+                    "samplesheetB64gz": get_samplesheet_b64gz(num_libraries),
+                    "instrumentRunId": instrument_run_id,
+                },
+                None
+            )
+        self.assertEqual(decompress_dict_mock.call_count, 1)
+        return output
+
+    def get_put_events_entries(self):
+        return [
+            entry
+            for put_events_call in self.events_client.put_events.call_args_list
+            for entry in put_events_call.kwargs["Entries"]
+        ]
+
+    def test_batch_handler(self):
+        output = self.run_batch()
+
+        self.assertEqual(output["libraryIdList"], [get_library_id(i) for i in range(NUM_LIBRARIES)])
+
+        # One bulk metadata query per id list chunk, not per library
+        self.assertEqual(self.metadata_api.num_requests, 2)
+
+        # Every put events request fits the PutEvents limits
+        for put_events_call in self.events_client.put_events.call_args_list:
+            entries = put_events_call.kwargs["Entries"]
+            self.assertLessEqual(len(entries), 10)
+            self.assertLessEqual(
+                sum(map(generate_library_event_data_objects.get_put_events_entry_size, entries)),
+                256 * 1024
+            )
+        self.assertEqual(self.events_client.put_events.call_count, -(-NUM_LIBRARIES // 10))
+
+        # One event per library, with the rows of every lane
+        event_data_list = [json.loads(entry["Detail"])["payload"]["data"] for entry in self.get_put_events_entries()]
+        self.assertEqual(len(event_data_list), NUM_LIBRARIES)
+        for library_index, event_data in enumerate(event_data_list):
+            self.assertEqual(event_data["library"]["libraryId"], get_library_id(library_index))
+            self.assertEqual([row["lane"] for row in event_data["bclconvertDataRows"]], list(range(1, NUM_LANES + 1)))
+            self.assertTrue(all(
+                rgid["fastqListRowRgid"].endswith(f".{INSTRUMENT_RUN_ID}.{get_library_id(library_index)}")
+                for rgid in event_data["fastqListRows"]
+            ))
+
+        # Libraries are recorded against the instrument run, and the instrument run against each library
+        instrument_run_item = self.dynamodb_client.get_item(
+            TableName=TABLE_NAME,
+            Key={"id": {"S": INSTRUMENT_RUN_ID}, "id_type": {"S": "instrument_run"}}
+        )["Item"]
+        self.assertEqual(len(instrument_run_item["library_set"]["SS"]), NUM_LIBRARIES)
+
+        library_item = self.dynamodb_client.get_item(
+            TableName=TABLE_NAME,
+            Key={"id": {"S": f"lib.{0:026d}"}, "id_type": {"S": "library"}}
+        )["Item"]
+        self.assertEqual(library_item["library_id"]["S"], get_library_id(0))
+        self.assertEqual(library_item["instrument_run_id_set"]["SS"], [INSTRUMENT_RUN_ID])
+        self.assertEqual(json.loads(library_item["library_obj"]["S"])["libraryId"], get_library_id(0))
+
+    def test_library_on_second_run(self):
+        self.run_batch(num_libraries=2)
+        self.run_batch(instrument_run_id="250503_A01052_0200_BHFH2WDSXF", num_libraries=2)
+
+        library_item = self.dynamodb_client.get_item(
+            TableName=TABLE_NAME,
+            Key={"id": {"S": f"lib.{0:026d}"}, "id_type": {"S": "library"}}
+        )["Item"]
+        self.assertEqual(
+            sorted(library_item["instrument_run_id_set"]["SS"]),
+            sorted([INSTRUMENT_RUN_ID, "250503_A01052_0200_BHFH2WDSXF"])
+        )
+
+    def test_missing_library(self):
+        del self.metadata_api.libraries_by_library_id[get_library_id(3)]
+
+        with self.assertRaises(LibraryNotFoundError):
+            self.run_batch(num_libraries=5)
+
+        # Nothing is recorded or put for a partially found samplesheet
+        self.assertEqual(self.events_client.put_events.call_count, 0)
+
+    def test_put_events_entry_chunks(self):
+        entries = [
+            {"Source": "s", "DetailType": "d", "Detail": "x" * size}
+            for size in [100_000, 100_000, 100_000, 10, 10]
+        ]
+        self.assertEqual(
+            list(map(len, generate_library_event_data_objects.get_put_events_entry_chunks(entries))),
+            [2, 3]
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -22,9 +22,10 @@ import {
   DockerImageFunction,
   Runtime,
 } from 'aws-cdk-lib/aws-lambda';
-import { Duration } from 'aws-cdk-lib';
+import { Duration, Size } from 'aws-cdk-lib';
 import * as lambda from 'aws-cdk-lib/aws-lambda';
 import * as secretsManager from 'aws-cdk-lib/aws-secretsmanager';
+import * as s3 from 'aws-cdk-lib/aws-s3';
 
 export interface NewFastqListRowsEventShowerConstructProps {
   /* Event Bus */
@@ -35,6 +36,9 @@ export interface NewFastqListRowsEventShowerConstructProps {
 
   /* Secrets */
   icav2AccessTokenSecretObj: secretsManager.ISecret;
+
+  /* Buckets */
+  payloadCodecBucketObj: s3.IBucket;
 }
 
 export class NewFastqListRowsEventShowerConstruct extends Construct {
@@ -86,6 +90,8 @@ export class NewFastqListRowsEventShowerConstruct extends Construct {
       'lambda_b64gz_translator_lambda',
       {
         functionNamePrefix: this.newFastqListRowsEventShowerMap.prefix,
+        // The bssh fastq copy manager offloads large fastq list rows to the payload codec bucket
+        payloadCodecBucket: props.payloadCodecBucketObj,
       }
     ).lambdaObj;
 
@@ -134,48 +140,31 @@ export class NewFastqListRowsEventShowerConstruct extends Construct {
     // Give fastqc stats lambda permission to access the secret
     props.icav2AccessTokenSecretObj.grantRead(generateDemuxStatsLambda.currentVersion);
 
-    // Get the fastqc stats
+    // Get the rapid qc stats (fastqc and sequali) from the first 1 million reads
     const architecture = lambda.Architecture.ARM_64;
-    const getFastqcStats = new DockerImageFunction(this, 'get_fastqc_stats', {
-      description: 'Get Fastqc stats from first 1 million reads',
-      code: DockerImageCode.fromImageAsset(path.join(__dirname, 'lambdas/get_fastqc_stats'), {
+    const getRapidQcStatsLambdaObj = new DockerImageFunction(this, 'get_rapid_qc_stats', {
+      description: 'Get the fastqc and sequali stats from first 1 million reads',
+      code: DockerImageCode.fromImageAsset(path.join(__dirname, 'lambdas/get_rapid_qc_stats'), {
         file: 'Dockerfile',
         buildArgs: {
           platform: architecture.dockerPlatform,
         },
       }),
       // Pulling data from icav2 can take time
-      timeout: Duration.seconds(180), // Maximum length of lambda duration is 15 minutes
+      timeout: Duration.seconds(300), // Maximum length of lambda duration is 15 minutes
       retryAttempts: 0, // Never perform a retry if it fails
-      memorySize: 2048, // Don't want pandas to kill the lambda
+      // Two fastqc jvms and sequali run at the same time
+      memorySize: 4096,
+      // The uncompressed R1 and R2 read subsets are cached in /tmp
+      ephemeralStorageSize: Size.gibibytes(2),
       architecture: architecture,
       environment: {
         ICAV2_ACCESS_TOKEN_SECRET_ID: props.icav2AccessTokenSecretObj.secretName,
       },
     });
 
-    // Give fastqc stats lambda permission to access the secret
-    props.icav2AccessTokenSecretObj.grantRead(getFastqcStats.currentVersion);
-
-    // Get the sequali stats
-    const getSequaliStatsLambdaObj = new DockerImageFunction(this, 'get_sequali_stats', {
-      description: 'Get the sequali stats from first 1 million reads',
-      code: DockerImageCode.fromImageAsset(path.join(__dirname, 'lambdas/get_sequali_stats'), {
-        file: 'Dockerfile',
-        buildArgs: {
-          platform: architecture.dockerPlatform,
-        },
-      }),
-      memorySize: 2048, // Don't want pandas to kill the lambda
-      timeout: Duration.seconds(300),
-      architecture: Architecture.ARM_64,
-      environment: {
-        ICAV2_ACCESS_TOKEN_SECRET_ID: props.icav2AccessTokenSecretObj.secretName,
-      },
-    });
-
     // Give the lambda permission to access the secret
-    props.icav2AccessTokenSecretObj.grantRead(getSequaliStatsLambdaObj.currentVersion);
+    props.icav2AccessTokenSecretObj.grantRead(getRapidQcStatsLambdaObj.currentVersion);
 
     /*
     Part 2: Build state machine
@@ -253,9 +242,8 @@ export class NewFastqListRowsEventShowerConstruct extends Construct {
           generateEventDataObjsLambda.currentVersion.functionArn,
         __get_read_counts_per_rgid_lambda_function_arn__:
           generateDemuxStatsLambda.currentVersion.functionArn,
-        __get_fastqc_stats_lambda_function_arn__: getFastqcStats.currentVersion.functionArn,
-        __get_sequali_stats_lambda_function_arn__:
-          getSequaliStatsLambdaObj.currentVersion.functionArn,
+        __get_rapid_qc_stats_lambda_function_arn__:
+          getRapidQcStatsLambdaObj.currentVersion.functionArn,
       },
     });
 
@@ -270,8 +258,7 @@ export class NewFastqListRowsEventShowerConstruct extends Construct {
       decompressFastqListRowLambda,
       generateEventDataObjsLambda,
       generateDemuxStatsLambda,
-      getFastqcStats,
-      getSequaliStatsLambdaObj,
+      getRapidQcStatsLambdaObj,
       cleanupFastqListRowLambda,
     ].forEach((lambda) => {
       lambda.currentVersion.grantInvoke(this.stateMachineObj.role);
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+
+"""
+Get the rapid qc stats of a fastq list row
+
+Sample the first million reads of R1 and R2 once (see read_subset_sampler.py),
+then run fastqc on R1, fastqc on R2 and sequali on R1 + R2 concurrently from the cached read subsets
+"""
+
+# Standard imports
+import boto3
+import typing
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from os import environ
+
+# Wrapica
+from wrapica.project_data import (
+    ProjectData, create_download_url, convert_uri_to_project_data_obj
+)
+
+# Local imports
+from read_subset_sampler import get_read_subset_path, evict_read_subsets, write_read_subsets
+from run_fastqc import run_fastqc
+from get_sequali_stats import run_sequali
+
+# Type checking
+if typing.TYPE_CHECKING:
+    from mypy_boto3_secretsmanager import SecretsManagerClient
+
+# Globals
+ICAV2_BASE_URL = "https://ica.illumina.com/ica/rest"
+
+# Set loggers
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+
+def get_secrets_manager_client() -> 'SecretsManagerClient':
+    """
+    Return Secrets Manager client
+    """
+    return boto3.client("secretsmanager")
+
+
+def get_secret(secret_id: str) -> str:
+    """
+    Return secret value
+    """
+    return get_secrets_manager_client().get_secret_value(SecretId=secret_id)["SecretString"]
+
+
+# Functions
+def set_icav2_env_vars():
+    """
+    Set the icav2 environment variables
+    :return:
+    """
+    environ["ICAV2_BASE_URL"] = ICAV2_BASE_URL
+    environ["ICAV2_ACCESS_TOKEN"] = get_secret(
+        environ["ICAV2_ACCESS_TOKEN_SECRET_ID"]
+    )
+
+
+def get_download_url(uri: str) -> str:
+    """
+    Get a presigned url for a fastq uri
+    :param uri:
+    :return:
+    """
+    projectdata_obj: ProjectData = convert_uri_to_project_data_obj(uri)
+
+    return create_download_url(
+        projectdata_obj.project_id,
+        projectdata_obj.data.id
+    )
+
+
+def handler(event, context):
+    """
+    Given the fastq list row id and the R1 and R2 uris, sample the first million reads of each read file,
+    then run fastqc and sequali on the read subsets
+
+    Extract the relevant outputs from the fastqc and sequali outputs and return them in json format
+    :param event:
+    :param context:
+    :return:
+    """
+    # Get the inputs
+    fastq_list_row_id = event['fastq_list_row_id']
+    read1_uri = event['read1_fastq_uri']
+    read2_uri = event['read2_fastq_uri']
+    read_count = event['read_count']
+
+    # Check read count is not zero
+    if read_count == 0:
+        return {
+            "fastqc_stats_r1": None,
+            "fastqc_stats_r2": None,
+            "sequali_rapid_summary": None
+        }
+
+    # Only keep the read subsets of this fastq list row in /tmp
+    evict_read_subsets(fastq_list_row_id)
+
+    # Sample the read files that are not already in the cache
+    r1_subset_path = get_read_subset_path(fastq_list_row_id, "R1")
+    r2_subset_path = get_read_subset_path(fastq_list_row_id, "R2")
+
+    uri_by_subset_path = {
+        subset_path: uri
+        for subset_path, uri in [(r1_subset_path, read1_uri), (r2_subset_path, read2_uri)]
+        if not subset_path.is_file()
+    }
+
+    if uri_by_subset_path:
+        # Set the icav2 environment variables
+        set_icav2_env_vars()
+
+        write_read_subsets(
+            {
+                subset_path: get_download_url(uri)
+                for subset_path, uri in uri_by_subset_path.items()
+            }
+        )
+
+    # Run fastqc on each read subset and sequali on both, concurrently
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        fastqc_r1_future = executor.submit(run_fastqc, r1_subset_path)
+        fastqc_r2_future = executor.submit(run_fastqc, r2_subset_path)
+        sequali_future = executor.submit(run_sequali, r1_subset_path, r2_subset_path, read_count)
+
+    return {
+        "fastqc_stats_r1": fastqc_r1_future.result(),
+        "fastqc_stats_r2": fastqc_r2_future.result(),
+        "sequali_rapid_summary": sequali_future.result()
+    }
+
+
+# if __name__ == "__main__":
+#     # Set environ
+#     import json
+#     environ['AWS_PROFILE'] = 'umccr-production'
+#     environ['AWS_REGION'] = 'ap-southeast-2'
+#     environ['ICAV2_ACCESS_TOKEN_SECRET_ID'] = "ICAv2JWTKey-umccr-prod-service-production"
+#
+#     print(
+#         json.dumps(
+#             handler(
+#                 {
+#                     "fastq_list_row_id": "GTCAAGTCCA.GCGTTCGATA.1__240926_A01052_0232_AHW7LHDSXC",
+#                     "read1_fastq_uri": "s3://pipeline-prod-cache-503977275616-ap-southeast-2/byob-icav2/production/primary/240926_A01052_0232_AHW7LHDSXC/20240928f63332ac/Samples/Lane_1/L2401325/L2401325_S1_L001_R1_001.fastq.gz",
+#                     "read2_fastq_uri": "s3://pipeline-prod-cache-503977275616-ap-southeast-2/byob-icav2/production/primary/240926_A01052_0232_AHW7LHDSXC/20240928f63332ac/Samples/Lane_1/L2401325/L2401325_S1_L001_R2_001.fastq.gz",
+#                     "read_count": 1000000
+#                 },
+#                 None
+#             ),
+#             indent=4
+#         )
+#     )
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+
+"""
+Given the paths to the uncompressed R1 and R2 read subsets, run sequali and return a rapid summary
+"""
+import json
+from pathlib import Path
+
+# Standard imports
+import pandas as pd
+import logging
+import tempfile
+import subprocess
+
+# Type checking
+from typing import Dict, List
+
+# Globals
+HG38_N_BASES = 3099734149  #  https://www.ncbi.nlm.nih.gov/datasets/genome/GCF_000001405.26
+
+# Set loggers
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+
+def get_insert_size_estimate(insert_sizes: List[int]) -> float:
+    """
+    Given a list, return the weighted average
+    :param insert_sizes:
+    :return:
+    """
+
+    # Get the weighted average
+    # Dont include '0' insert
+
+    # Prevent ZeroDivisionError
+    if sum(insert_sizes[1:]) == 0:
+        return 0
+
+    insert_size_estimate = sum(
+        [
+            insert_size * insert_size_count
+            for insert_size, insert_size_count in enumerate(insert_sizes)
+            if insert_size > 0
+        ]
+    ) / sum(insert_sizes[1:])
+
+    return round(insert_size_estimate, 2)
+
+
+def run_sequali(r1_fastq_path: Path, r2_fastq_path: Path, read_count: int) -> Dict[str, str]:
+    """
+    Run sequali on the read subsets
+    :param r1_fastq_path:
+    :param r2_fastq_path:
+    :param read_count:
+    :return:
+    """
+    # Run the sequali command in a temp directory
+    with tempfile.TemporaryDirectory() as working_dir:
+        sequali_proc = subprocess.run(
+            [
+                "sequali",
+                "--outdir", "output",
+                "--json", "output.json",
+                str(r1_fastq_path),
+                str(r2_fastq_path)
+            ],
+            cwd=working_dir,
+            capture_output=True
+        )
+
+        if not sequali_proc.returncode == 0:
+            # Log the output
+            logger.error("Sequali command failed")
+            logger.error("Stdout: '%s'", sequali_proc.stdout.decode())
+            logger.error("Stderr: '%s'", sequali_proc.stderr.decode())
+
+            # Raise the error
+            raise ChildProcessError
+
+        # Get the sequali output
+        sequali_output = Path(working_dir) / "output" / "output.json"
+
+        # Read the file into a pandas dataframe
+        with open(sequali_output, "r") as file_h:
+            sequali_output_dict = json.load(file_h)
+
+        # Convert to a dataframe
+        sequali_summary_df = (
+            pd.DataFrame(
+                {
+                    "r1": sequali_output_dict['summary'],
+                    "r2": sequali_output_dict['summary_read2']
+                }
+            )
+            .transpose()
+            .reset_index()
+            # Get q20 fraction
+            .assign(
+                q20_pct=lambda x: round(x['q20_bases'] / x['total_bases'], 2),
+                gc_pct=lambda x: round(x['total_gc_bases'] / x['total_bases'], 2)
+            )
+            # Drop columns related to total values (this is just a summary of the first million reads)
+            .drop(
+                columns=[
+                    "total_reads", "total_bases",
+                    "q20_reads", "q20_bases",
+                    "total_gc_bases", "total_n_bases"
+                ]
+            )
+        )
+
+        # Calculate the insert size estimate
+        insert_size_estimate = get_insert_size_estimate(sequali_output_dict['insert_size_metrics']['insert_sizes'])
+
+        # Get the duplicate fraction metric
+        duplicate_fraction = round(1.0 - sequali_output_dict['duplication_fractions']['remaining_fraction'], 2)
+
+        return {
+            # Insert Size Estimate and Duplicate Fraction
+            "insert_size_estimate": insert_size_estimate,
+            "duplicate_fraction": duplicate_fraction,
+            "estimated_bases": (
+                int(sequali_summary_df['mean_length'].sum() * read_count)
+            ),
+            "estimated_wgs_cov": round(sequali_summary_df['mean_length'].sum() * read_count / HG38_N_BASES, 2),
+            # R1 Mean length
+            "r1_mean_length": round(sequali_summary_df.query('index=="r1"')['mean_length'].item(), 2),
+            "r2_mean_length": round(sequali_summary_df.query('index=="r2"')['mean_length'].item(), 2),
+            # Min Read Length
+            "r1_min_read_length": round(sequali_summary_df.query('index=="r1"')['minimum_length'].item(), 2),
+            "r2_min_read_length": round(sequali_summary_df.query('index=="r2"')['minimum_length'].item(), 2),
+            # Max Read Length
+            "r1_max_read_length": round(sequali_summary_df.query('index=="r1"')['maximum_length'].item(), 2),
+            "r2_max_read_length": round(sequali_summary_df.query('index=="r2"')['maximum_length'].item(), 2),
+            # Q20 Fraction
+            "r1_q20_frac": round(sequali_summary_df.query('index=="r1"')['q20_pct'].item(), 2),
+            "r2_q20_frac": round(sequali_summary_df.query('index=="r2"')['q20_pct'].item(), 2),
+            # GC Fraction
+            "r1_gc_frac": round(sequali_summary_df.query('index=="r1"')['gc_pct'].item(), 2),
+            "r2_gc_frac": round(sequali_summary_df.query('index=="r2"')['gc_pct'].item(), 2),
+        }
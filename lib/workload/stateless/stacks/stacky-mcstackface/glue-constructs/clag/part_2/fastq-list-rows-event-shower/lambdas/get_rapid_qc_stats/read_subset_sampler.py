@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+
+"""
+Sample the first million reads of a gzipped fastq file into an uncompressed local cache
+
+The subset is byte for byte the output of
+
+wget --output-document /dev/stdout "${S3_PRESIGNED_URL}" | zcat | head -n4000000
+
+The download is closed as soon as the subset is complete,
+and R1 and R2 are sampled concurrently (zlib and the socket reads release the GIL)
+
+Subsets are cached under the fastq list row id, so that fastqc and sequali read the same subset,
+and a retry of the same fastq list row on a warm lambda does not download the reads again
+"""
+
+# Standard imports
+import gzip
+import logging
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from tempfile import gettempdir
+from typing import Dict
+from urllib.request import urlopen
+
+# Globals
+NUM_READS = 1000000
+LINES_PER_READ = 4
+CHUNK_SIZE = 2 ** 20  # Decompress 1 MiB at a time
+READ_SUBSET_CACHE_DIR = Path(gettempdir()) / "read_subsets"
+
+# Set loggers
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+
+def get_read_subset_path(cache_key: str, read_name: str) -> Path:
+    """
+    Get the path of the uncompressed read subset of a fastq list row
+    :param cache_key: The fastq list row id, i.e. <rgid>__<instrument_run_id>
+    :param read_name: R1 or R2
+    :return:
+    """
+    return READ_SUBSET_CACHE_DIR / cache_key / f"{read_name}.fastq"
+
+
+def evict_read_subsets(cache_key: str):
+    """
+    Remove the read subsets of every other fastq list row,
+    /tmp is kept between invocations of a warm lambda but only has room for one fastq list row
+    :param cache_key:
+    :return:
+    """
+    if not READ_SUBSET_CACHE_DIR.is_dir():
+        return
+
+    for cache_dir in READ_SUBSET_CACHE_DIR.iterdir():
+        if cache_dir.name == cache_key:
+            continue
+        logger.info(f"Evicting read subsets of {cache_dir.name}")
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+
+def write_read_subset(fastq_gz_url: str, output_path: Path, num_reads: int = NUM_READS) -> int:
+    """
+    Stream the gzipped fastq file and write the first num_reads reads (num_reads * 4 lines) to output_path
+
+    Like zcat, concatenated gzip members are decompressed as one stream.
+    The subset is written to a temporary file first,
+    so a failed download never leaves a partial subset in the cache
+
+    :param fastq_gz_url: A presigned url (or any url urllib can open) to the gzipped fastq file
+    :param output_path:
+    :param num_reads:
+    :return: The number of lines written
+    """
+    num_lines_remaining = num_reads * LINES_PER_READ
+    num_lines_written = 0
+
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    temp_output_path = output_path.with_name(output_path.name + ".tmp")
+
+    try:
+        with (
+            urlopen(fastq_gz_url) as response_h,
+            gzip.GzipFile(fileobj=response_h, mode="rb") as fastq_h,
+            open(temp_output_path, "wb") as output_h
+        ):
+            while num_lines_remaining > 0:
+                chunk = fastq_h.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+
+                num_lines_in_chunk = chunk.count(b"\n")
+
+                # Truncate the chunk after the last line we need
+                if num_lines_in_chunk >= num_lines_remaining:
+                    end_position = -1
+                    for _ in range(num_lines_remaining):
+                        end_position = chunk.index(b"\n", end_position + 1)
+                    chunk = chunk[:end_position + 1]
+                    num_lines_in_chunk = num_lines_remaining
+
+                output_h.write(chunk)
+                num_lines_remaining -= num_lines_in_chunk
+                num_lines_written += num_lines_in_chunk
+    except BaseException:
+        temp_output_path.unlink(missing_ok=True)
+        raise
+
+    temp_output_path.replace(output_path)
+
+    return num_lines_written
+
+
+def write_read_subsets(fastq_gz_url_by_output_path: Dict[Path, str], num_reads: int = NUM_READS):
+    """
+    Write the read subsets of each fastq file concurrently
+    :param fastq_gz_url_by_output_path:
+    :param num_reads:
+    :return:
+    """
+    if not fastq_gz_url_by_output_path:
+        return
+
+    with ThreadPoolExecutor(max_workers=len(fastq_gz_url_by_output_path)) as executor:
+        futures = [
+            executor.submit(write_read_subset, fastq_gz_url, output_path, num_reads)
+            for output_path, fastq_gz_url in fastq_gz_url_by_output_path.items()
+        ]
+
+    # Raise the first error, if any
+    for future in futures:
+        future.result()
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+
+"""
+Given the path to an uncompressed read subset, run fastqc and return the summary
+"""
+
+# Standard imports
+import logging
+import subprocess
+import tempfile
+from pathlib import Path
+from typing import Dict, List
+
+import pandas as pd
+
+# Set loggers
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+
+def run_fastqc(fastq_path: Path) -> List[Dict[str, str]]:
+    """
+    Run fastqc on the read subset, the subset is piped through stdin as before
+
+    PASS    Basic Statistics        stdin
+    PASS    Per base sequence quality       stdin
+    PASS    Per tile sequence quality       stdin
+    PASS    Per sequence quality scores     stdin
+    WARN    Per base sequence content       stdin
+    PASS    Per sequence GC content stdin
+    PASS    Per base N content      stdin
+    WARN    Sequence Length Distribution    stdin
+    WARN    Sequence Duplication Levels     stdin
+    PASS    Overrepresented sequences       stdin
+    PASS    Adapter Content stdin
+
+    :param fastq_path:
+    :return:
+    """
+    # Run the fastqc command in a temp directory
+    with tempfile.TemporaryDirectory() as working_dir, open(fastq_path, "rb") as fastq_h:
+        output_dir = Path(working_dir) / "outdir"
+        output_dir.mkdir()
+
+        run_fastqc_proc = subprocess.run(
+            [
+                "fastqc",
+                "--extract",
+                "--outdir", str(output_dir),
+                "--format", "fastq",
+                "--quiet",
+                "stdin"
+            ],
+            stdin=fastq_h,
+            cwd=working_dir,
+            capture_output=True
+        )
+
+        if not run_fastqc_proc.returncode == 0:
+            logger.error(f"Run FastQC Proc failed with return code {run_fastqc_proc.returncode}")
+            logger.error(f"Run FastQC Proc failed with stderr {run_fastqc_proc.stderr.decode()}")
+            logger.error(f"Run FastQC Proc failed with stdout {run_fastqc_proc.stdout.decode()}")
+            raise ChildProcessError
+
+        # Read the fastqc summary into a pandas dataframe
+        fastqc_output_df = pd.read_csv(
+            output_dir / "stdin_fastqc" / "summary.txt",
+            sep="\t",
+            names=["status", "metric", "stdin"]
+        ).drop(columns=["stdin"])
+
+    # Convert metric from spaces to snake case
+    fastqc_output_df["metric"] = fastqc_output_df["metric"].str.replace(" ", "_")
+
+    # Return as a dict
+    return fastqc_output_df.to_dict(orient="records")
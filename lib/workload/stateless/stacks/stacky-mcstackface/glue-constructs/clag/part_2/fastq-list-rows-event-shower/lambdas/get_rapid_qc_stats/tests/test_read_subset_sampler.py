@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+
+"""
+The read subset sampler against the head based extraction it replaces, on generated gzipped fastq files
+
+Run from the get_rapid_qc_stats directory with
+    python -m unittest discover tests
+"""
+
+# Standard imports
+import gzip
+import random
+import shlex
+import subprocess
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+# Local imports
+import read_subset_sampler
+from read_subset_sampler import (
+    evict_read_subsets, get_read_subset_path, write_read_subset, write_read_subsets
+)
+
+
+def generate_fastq(num_reads: int, seed: int, read_length: int = 151) -> bytes:
+    """
+    Generate an uncompressed fastq file
+    :param num_reads:
+    :param seed:
+    :param read_length:
+    :return:
+    """
+    rng = random.Random(seed)
+    return b"".join(
+        (
+            f"@A01052:253:H5FY3DSXF:1:1101:{read_iter}:1000 1:N:0:GTCAAGTCCA+GCGTTCGATA\n"
+            f"{''.join(rng.choices('ACGTN', k=read_length))}\n"
+            "+\n"
+            f"{''.join(rng.choices('F:,#', k=read_length))}\n"
+        ).encode()
+        for read_iter in range(num_reads)
+    )
+
+
+def head_extraction(fastq_gz_path: Path, num_lines: int) -> bytes:
+    """
+    The extraction the sampler replaces, without the download
+    :param fastq_gz_path:
+    :param num_lines:
+    :return:
+    """
+    return subprocess.run(
+        ["bash", "-c", f"zcat {shlex.quote(str(fastq_gz_path))} | head -n{num_lines}"],
+        capture_output=True,
+        check=True
+    ).stdout
+
+
+class TestReadSubsetSampler(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.temp_path = Path(self.temp_dir.name)
+
+        # Keep the cache out of the real /tmp/read_subsets
+        cache_dir_patcher = mock.patch.object(
+            read_subset_sampler, "READ_SUBSET_CACHE_DIR", self.temp_path / "read_subsets"
+        )
+        cache_dir_patcher.start()
+        self.addCleanup(cache_dir_patcher.stop)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def write_fastq_gz(self, name: str, *members: bytes) -> Path:
+        """
+        Write each member as its own gzip member, as zcat would read a concatenated gzip file
+        """
+        fastq_gz_path = self.temp_path / name
+        with open(fastq_gz_path, "wb") as fastq_gz_h:
+            for member in members:
+                fastq_gz_h.write(gzip.compress(member))
+        return fastq_gz_path
+
+    def assert_matches_head_extraction(self, fastq_gz_path: Path, num_reads: int):
+        output_path = self.temp_path / "subset" / f"{fastq_gz_path.name}.fastq"
+
+        num_lines = write_read_subset(fastq_gz_path.as_uri(), output_path, num_reads=num_reads)
+
+        expected_bytes = head_extraction(fastq_gz_path, num_reads * 4)
+        self.assertEqual(output_path.read_bytes(), expected_bytes)
+        self.assertEqual(num_lines, expected_bytes.count(b"\n"))
+
+    def test_subset_of_single_member(self):
+        fastq_gz_path = self.write_fastq_gz("L2400001_S1_L001_R1_001.fastq.gz", generate_fastq(500, seed=1))
+        self.assert_matches_head_extraction(fastq_gz_path, num_reads=200)
+
+    def test_subset_across_gzip_members(self):
+        fastq_gz_path = self.write_fastq_gz(
+            "L2400001_S1_L001_R2_001.fastq.gz",
+            generate_fastq(150, seed=2),
+            generate_fastq(150, seed=3),
+            generate_fastq(150, seed=4)
+        )
+        self.assert_matches_head_extraction(fastq_gz_path, num_reads=250)
+
+    def test_subset_across_chunks(self):
+        # Chunk sizes that split reads (and lines) at every offset
+        fastq_gz_path = self.write_fastq_gz("L2400001_S1_L001_R1_001.fastq.gz", generate_fastq(50, seed=5))
+        for chunk_size in [1, 7, 64, 333, 4096]:
+            with self.subTest(chunk_size=chunk_size), mock.patch.object(read_subset_sampler, "CHUNK_SIZE", chunk_size):
+                self.assert_matches_head_extraction(fastq_gz_path, num_reads=37)
+
+    def test_file_shorter_than_subset(self):
+        fastq_gz_path = self.write_fastq_gz("L2400001_S1_L001_R1_001.fastq.gz", generate_fastq(20, seed=6))
+        self.assert_matches_head_extraction(fastq_gz_path, num_reads=1000)
+
+    def test_file_without_trailing_newline(self):
+        fastq_gz_path = self.write_fastq_gz(
+            "L2400001_S1_L001_R1_001.fastq.gz", generate_fastq(20, seed=7).rstrip(b"\n")
+        )
+        self.assert_matches_head_extraction(fastq_gz_path, num_reads=1000)
+
+    def test_write_read_subsets_of_r1_and_r2(self):
+        r1_path = self.write_fastq_gz("L2400001_S1_L001_R1_001.fastq.gz", generate_fastq(300, seed=8))
+        r2_path = self.write_fastq_gz("L2400001_S1_L001_R2_001.fastq.gz", generate_fastq(300, seed=9))
+
+        r1_subset_path = get_read_subset_path("GTCAAGTCCA.GCGTTCGATA.1__run", "R1")
+        r2_subset_path = get_read_subset_path("GTCAAGTCCA.GCGTTCGATA.1__run", "R2")
+
+        write_read_subsets(
+            {
+                r1_subset_path: r1_path.as_uri(),
+                r2_subset_path: r2_path.as_uri(),
+            },
+            num_reads=100
+        )
+
+        self.assertEqual(r1_subset_path.read_bytes(), head_extraction(r1_path, 400))
+        self.assertEqual(r2_subset_path.read_bytes(), head_extraction(r2_path, 400))
+        # No partial files are left behind
+        self.assertEqual(sorted(p.name for p in r1_subset_path.parent.iterdir()), ["R1.fastq", "R2.fastq"])
+
+    def test_failed_download_is_not_cached(self):
+        subset_path = get_read_subset_path("GTCAAGTCCA.GCGTTCGATA.1__run", "R1")
+        truncated_path = self.temp_path / "truncated.fastq.gz"
+        truncated_path.write_bytes(gzip.compress(generate_fastq(100, seed=10))[:-100])
+
+        with self.assertRaises(EOFError):
+            write_read_subset(truncated_path.as_uri(), subset_path, num_reads=1000)
+
+        self.assertFalse(subset_path.exists())
+        self.assertEqual(list(subset_path.parent.iterdir()), [])
+
+    def test_evict_read_subsets_of_other_fastq_list_rows(self):
+        kept_path = get_read_subset_path("GTCAAGTCCA.GCGTTCGATA.1__run", "R1")
+        evicted_path = get_read_subset_path("AACCGGTTAA.TTGGCCAATT.1__run", "R1")
+        for subset_path in [kept_path, evicted_path]:
+            subset_path.parent.mkdir(parents=True)
+            subset_path.write_bytes(generate_fastq(1, seed=11))
+
+        evict_read_subsets("GTCAAGTCCA.GCGTTCGATA.1__run")
+
+        self.assertTrue(kept_path.is_file())
+        self.assertFalse(evicted_path.parent.exists())
+
+
+if __name__ == "__main__":
+    unittest.main()
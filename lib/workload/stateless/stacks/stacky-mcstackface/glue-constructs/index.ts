@@ -5,6 +5,7 @@ import * as ssm from 'aws-cdk-lib/aws-ssm';
 import * as cdk from 'aws-cdk-lib';
 import * as secretsManager from 'aws-cdk-lib/aws-secretsmanager';
 import * as lambda from 'aws-cdk-lib/aws-lambda';
+import * as s3 from 'aws-cdk-lib/aws-s3';
 // import { showerGlueHandlerConstruct } from './clag';
 // import { BclconvertToBsshFastqCopyEventHandlerConstruct } from './elmer';
 // import { BsshFastqCopyToBclconvertInteropQcConstruct } from './gorilla';
@@ -48,6 +49,9 @@ export interface GlueConstructProps {
   /* Secrets */
   icav2AccessTokenSecretObj: secretsManager.ISecret;
 
+  /* Buckets */
+  payloadCodecBucketObj: s3.IBucket;
+
   /* BSSH SSM Parameters */
   bsshOutputFastqCopyOutputUriSsmParameterObj: ssm.IStringParameter;
 
@@ -70,6 +74,8 @@ export class GlueConstruct extends Construct {
     //   instrumentRunTableObj: props.instrumentRunTableObj,
     //   /* Secrets */
     //   icav2AccessTokenSecretObj: props.icav2AccessTokenSecretObj,
+    //   /* Buckets */
+    //   payloadCodecBucketObj: props.payloadCodecBucketObj,
     // });
 
     /*
@@ -274,6 +280,9 @@ export interface GlueStackConfig {
   /* Secrets */
   icav2AccessTokenSecretName: string;
 
+  /* Buckets */
+  payloadCodecBucketName: string;
+
   /* BSSH SSM Parameters */
   bsshOutputFastqCopyUriSsmParameterName: string;
 
@@ -388,6 +397,15 @@ export class GlueStack extends cdk.Stack {
       props.icav2AccessTokenSecretName
     );
 
+    /*
+    Buckets
+    */
+    const payloadCodecBucketObj = s3.Bucket.fromBucketName(
+      this,
+      'payloadCodecBucketObj',
+      props.payloadCodecBucketName
+    );
+
     /*
     BSSH SSM Parameters
     */
@@ -443,6 +461,9 @@ export class GlueStack extends cdk.Stack {
       /* Secrets */
       icav2AccessTokenSecretObj: icav2AccessTokenSecretObj,
 
+      /* Buckets */
+      payloadCodecBucketObj: payloadCodecBucketObj,
+
       /* BSSH SSM Parameters */
       bsshOutputFastqCopyOutputUriSsmParameterObj: bsshOutputFastqCopyUriSsmParameterObj,
 
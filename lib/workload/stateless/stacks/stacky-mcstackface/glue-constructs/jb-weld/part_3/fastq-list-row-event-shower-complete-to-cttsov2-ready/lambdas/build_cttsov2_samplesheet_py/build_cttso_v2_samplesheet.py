@@ -8,7 +8,7 @@ Given an instrument run id, and a list of bclconvert data rows, generate a sampl
 
 # Imports
 from copy import deepcopy
-from typing import Optional
+from typing import Dict, List, Optional, Tuple
 import logging
 
 logger = logging.getLogger(__name__)
@@ -519,32 +519,136 @@ V2_CTTSO_VALID_INDEXES = [
 ]
 
 
+# Index kit versions are told apart by the index length
+CTTSO_KIT_VERSION_BY_INDEX_LENGTH = {
+    8: "v1",
+    10: "v2"
+}
+
+CTTSO_VALID_INDEXES_BY_KIT_VERSION = {
+    "v1": V1_CTTSO_VALID_INDEXES,
+    "v2": V2_CTTSO_VALID_INDEXES
+}
+
+CTTSO_INDEX_TYPES = ["index", "index_rev", "index2", "index2_rev"]
+
+# Suggest (at most three) kit indexes up to two mismatches away from an index we cannot find
+MAX_NEAR_MATCH_HAMMING_DISTANCE = 2
+MAX_NEAR_MATCH_SUGGESTIONS = 3
+
+
+def build_cttso_index_registry() -> Dict[Tuple[str, str, str], str]:
+    """
+    Map (kit version, index type, index sequence) to the index id, for every index of every kit,
+    i5 indexes are registered in both the forward (index2) and reverse complement (index2_rev) orientation
+
+    Like a scan of the kit list, the first index id wins if two kit entries share a sequence
+    """
+    cttso_index_registry = {}
+
+    for kit_version, cttso_valid_indexes in CTTSO_VALID_INDEXES_BY_KIT_VERSION.items():
+        for index_dict in cttso_valid_indexes:
+            for index_type in CTTSO_INDEX_TYPES:
+                if index_type not in index_dict:
+                    continue
+                cttso_index_registry.setdefault(
+                    (kit_version, index_type, index_dict[index_type]),
+                    index_dict["index_id"]
+                )
+
+    return cttso_index_registry
+
+
+def build_cttso_index_dict_by_index_id(kit_version: str) -> Dict[str, Dict[str, str]]:
+    """
+    Map the index id to the kit entry, the first entry wins if two kit entries share an index id
+    """
+    cttso_index_dict_by_index_id = {}
+
+    for index_dict in CTTSO_VALID_INDEXES_BY_KIT_VERSION[kit_version]:
+        cttso_index_dict_by_index_id.setdefault(index_dict["index_id"], index_dict)
+
+    return cttso_index_dict_by_index_id
+
+
+CTTSO_INDEX_REGISTRY = build_cttso_index_registry()
+V2_CTTSO_INDEX_DICT_BY_INDEX_ID = build_cttso_index_dict_by_index_id("v2")
+
+
+def get_cttso_kit_version_from_index(index_str: str) -> str:
+    try:
+        return CTTSO_KIT_VERSION_BY_INDEX_LENGTH[len(index_str)]
+    except KeyError:
+        logger.error(f"Index {index_str} is not the length of any cttso index kit")
+        raise ValueError(
+            f"Index {index_str} is {len(index_str)} bases long, "
+            f"expected one of {', '.join(map(str, CTTSO_KIT_VERSION_BY_INDEX_LENGTH.keys()))} bases"
+        )
+
+
+def get_hamming_distance(index_str: str, other_index_str: str) -> int:
+    return sum(
+        base != other_base
+        for base, other_base in zip(index_str, other_index_str)
+    )
+
+
+def get_cttso_index_near_matches(
+        index_str: str,
+        index_types: List[str],
+        max_hamming_distance: int = MAX_NEAR_MATCH_HAMMING_DISTANCE
+) -> List[Tuple[str, str, str, int]]:
+    """
+    Find the kit indexes of the same kit and index type(s) within max_hamming_distance mismatches of the index,
+    closest first
+
+    Only called when an index cannot be found, so a linear scan of the kit is fine here
+    :return: (index id, index type, index sequence, hamming distance) tuples
+    """
+    kit_version = get_cttso_kit_version_from_index(index_str)
+
+    near_matches = []
+    for index_dict in CTTSO_VALID_INDEXES_BY_KIT_VERSION[kit_version]:
+        for index_type in index_types:
+            if index_type not in index_dict:
+                continue
+            hamming_distance = get_hamming_distance(index_str, index_dict[index_type])
+            if hamming_distance <= max_hamming_distance:
+                near_matches.append((index_dict["index_id"], index_type, index_dict[index_type], hamming_distance))
+
+    return sorted(near_matches, key=lambda near_match_iter: near_match_iter[3])
+
+
+def get_cttso_index_id_from_index_types(index_str: str, index_types: List[str]) -> str:
+    """
+    Get the index id of the first index type (in order) that has the index sequence in its kit
+
+    Raises a ValueError listing the closest kit indexes if the index is not in the kit
+    """
+    kit_version = get_cttso_kit_version_from_index(index_str)
+
+    for index_type in index_types:
+        index_id = CTTSO_INDEX_REGISTRY.get((kit_version, index_type, index_str))
+        if index_id is not None:
+            return index_id
+
+    error_message = f"Could not get index id for {' / '.join(index_types)} - {index_str}"
+    near_matches = get_cttso_index_near_matches(index_str, index_types)
+    if near_matches:
+        error_message += ", did you mean " + " or ".join(
+            f"{index_id} ({index_type} {index_seq}, {hamming_distance} mismatch{'es' if hamming_distance > 1 else ''})"
+            for index_id, index_type, index_seq, hamming_distance in near_matches[:MAX_NEAR_MATCH_SUGGESTIONS]
+        ) + "?"
+
+    logger.error(error_message)
+    raise ValueError(error_message)
+
+
 def get_cttso_index_id_from_index(index_str: str, index_type: str) -> str:
     """
     Base function for get_cttso_i7_index_id_from_index and get_cttso_i5_index_id_from_index2
     """
-    if len(index_str) == 10:
-        try:
-            return next(
-                filter(
-                    lambda index_dict: index_dict.get(index_type) == index_str,
-                    V2_CTTSO_VALID_INDEXES
-                )
-            ).get("index_id")
-        except StopIteration:
-            logger.error(f"Could not get index id for {index_type} - {index_str}")
-            raise ValueError
-    elif len(index_str) == 8:
-        try:
-            return next(
-                filter(
-                    lambda index_dict: index_dict.get(index_type) == index_str,
-                    V1_CTTSO_VALID_INDEXES
-                )
-            ).get("index_id")
-        except StopIteration:
-            logger.error(f"Could not get index id for {index_type} - {index_str}")
-            raise ValueError
+    return get_cttso_index_id_from_index_types(index_str, [index_type])
 
 
 def get_cttso_i7_index_id_from_index(i7_index_str: str) -> str:
@@ -558,16 +662,16 @@ def get_cttso_i5_index_id_from_index(i5_index_str: str, is_forward_index_orienta
         else:
             return get_cttso_index_id_from_index(i5_index_str, "index2_rev")
     else:
-        og_log_level = logger.level
-        logger.setLevel(logging.CRITICAL)
-        try:
-            index_id = get_cttso_index_id_from_index(i5_index_str, "index2")
-        except ValueError:
-            logger.setLevel(og_log_level)
-            index_id = get_cttso_index_id_from_index(i5_index_str, "index2_rev")
-        logger.setLevel(og_log_level)
+        # Prefer the forward orientation
+        return get_cttso_index_id_from_index_types(i5_index_str, ["index2", "index2_rev"])
+
 
-        return index_id
+def get_v2_cttso_index_dict_from_index_id(index_id: str) -> Dict[str, str]:
+    try:
+        return V2_CTTSO_INDEX_DICT_BY_INDEX_ID[index_id]
+    except KeyError:
+        logger.error(f"Could not find index id {index_id} in the v2 cttso index kit")
+        raise ValueError(f"Could not find index id {index_id} in the v2 cttso index kit")
 
 
 def handler(event, context):
@@ -631,30 +735,31 @@ def handler(event, context):
 
     # If any of the index ids end with V3, we might need to a bit of a 'switcheroo' to
     # convince the dragen tso500 pipeline we can pass the samplesheet validation step
+    index_updates_by_sample_id = {}
     for tso500l_data_row in tso500l_data:
+        index_updates = {}
+
         if tso500l_data_row["i7_index_id"].endswith("V3"):
             # Update the tso500 row i7 index id and index
             tso500l_data_row["i7_index_id"] = tso500l_data_row["i7_index_id"].replace("V3", "")
-            tso500l_data_row["index"] = next(filter(
-                lambda index_dict: index_dict.get("index_id") == tso500l_data_row["i7_index_id"],
-                V2_CTTSO_VALID_INDEXES
-            )).get("index")
-            # We will also need to update the bclconvert data row index
-            for bclconvert_data_row in bclconvert_data:
-                if bclconvert_data_row["sample_id"] == tso500l_data_row["sample_id"]:
-                    bclconvert_data_row["index"] = tso500l_data_row["index"]
+            index_updates["index"] = get_v2_cttso_index_dict_from_index_id(
+                tso500l_data_row["i7_index_id"]
+            ).get("index")
 
         if tso500l_data_row["i5_index_id"].endswith("V3"):
             # Update the tso500 row i5 index id and index2
             tso500l_data_row["i5_index_id"] = tso500l_data_row["i5_index_id"].replace("V3", "")
-            tso500l_data_row["index2"] = next(filter(
-                lambda index_dict: index_dict.get("index_id") == tso500l_data_row["i5_index_id"],
-                V2_CTTSO_VALID_INDEXES
-            )).get("index2")
-            # We will also need to update the bclconvert data row index
-            for bclconvert_data_row in bclconvert_data:
-                if bclconvert_data_row["sample_id"] == tso500l_data_row["sample_id"]:
-                    bclconvert_data_row["index2"] = tso500l_data_row["index2"]
+            index_updates["index2"] = get_v2_cttso_index_dict_from_index_id(
+                tso500l_data_row["i5_index_id"]
+            ).get("index2")
+
+        if index_updates:
+            tso500l_data_row.update(index_updates)
+            index_updates_by_sample_id.setdefault(tso500l_data_row["sample_id"], {}).update(index_updates)
+
+    # We will also need to update the bclconvert data row indexes, join on the sample id
+    for bclconvert_data_row in bclconvert_data:
+        bclconvert_data_row.update(index_updates_by_sample_id.get(bclconvert_data_row["sample_id"], {}))
 
     return {
         "samplesheet": {
@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+
+"""
+The index kit registry against the linear kit scans it replaces, over every index of every kit
+
+Run from the build_cttsov2_samplesheet_py directory with
+    python -m unittest discover tests
+"""
+
+import logging
+import random
+import unittest
+from copy import deepcopy
+from typing import List
+
+import build_cttso_v2_samplesheet
+from build_cttso_v2_samplesheet import (
+    V1_CTTSO_VALID_INDEXES,
+    V2_CTTSO_VALID_INDEXES,
+    get_cttso_index_id_from_index,
+    get_cttso_i5_index_id_from_index,
+    get_cttso_i7_index_id_from_index,
+    get_hamming_distance,
+    handler,
+)
+
+ALL_CTTSO_VALID_INDEXES = V1_CTTSO_VALID_INDEXES + V2_CTTSO_VALID_INDEXES
+INDEX_TYPES = ["index", "index_rev", "index2", "index2_rev"]
+BASES = "ACGT"
+NUM_RANDOM_INDEXES = 500
+
+
+# The linear kit scans the registry replaces
+def scan_cttso_index_id_from_index(index_str: str, index_type: str) -> str:
+    cttso_valid_indexes = V2_CTTSO_VALID_INDEXES if len(index_str) == 10 else V1_CTTSO_VALID_INDEXES
+    try:
+        return next(
+            filter(
+                lambda index_dict: index_dict.get(index_type) == index_str,
+                cttso_valid_indexes
+            )
+        ).get("index_id")
+    except StopIteration:
+        raise ValueError
+
+
+def scan_cttso_i5_index_id_from_index(i5_index_str: str) -> str:
+    try:
+        return scan_cttso_index_id_from_index(i5_index_str, "index2")
+    except ValueError:
+        return scan_cttso_index_id_from_index(i5_index_str, "index2_rev")
+
+
+def scan_handler_tso500l_rows(bclconvert_data_rows: List):
+    """
+    The V3 switcheroo of the handler, scanning the kit for each tso500l row and the bclconvert data for each sample
+    """
+    bclconvert_data = [
+        {key: row[key] for key in ["sample_id", "index", "index2", "lane"]}
+        for row in bclconvert_data_rows
+    ]
+    tso500l_data = [
+        {
+            "sample_id": bclconvert_data_rows[0]["sample_id"],
+            "sample_type": "DNA",
+            "index": bclconvert_data_rows[0]["index"],
+            "index2": bclconvert_data_rows[0]["index2"],
+            "i7_index_id": scan_cttso_index_id_from_index(bclconvert_data_rows[0]["index"], "index"),
+            "i5_index_id": scan_cttso_i5_index_id_from_index(bclconvert_data_rows[0]["index2"]),
+        }
+    ]
+    for tso500l_data_row in tso500l_data:
+        for index_id_key, index_key in [("i7_index_id", "index"), ("i5_index_id", "index2")]:
+            if tso500l_data_row[index_id_key].endswith("V3"):
+                tso500l_data_row[index_id_key] = tso500l_data_row[index_id_key].replace("V3", "")
+                tso500l_data_row[index_key] = next(filter(
+                    lambda index_dict: index_dict.get("index_id") == tso500l_data_row[index_id_key],
+                    V2_CTTSO_VALID_INDEXES
+                )).get(index_key)
+                for bclconvert_data_row in bclconvert_data:
+                    if bclconvert_data_row["sample_id"] == tso500l_data_row["sample_id"]:
+                        bclconvert_data_row[index_key] = tso500l_data_row[index_key]
+    return bclconvert_data, tso500l_data
+
+
+def mutate_index(index_str: str, num_mismatches: int, rng: random.Random) -> str:
+    index_list = list(index_str)
+    for position in rng.sample(range(len(index_str)), num_mismatches):
+        index_list[position] = rng.choice(BASES.replace(index_list[position], ""))
+    return "".join(index_list)
+
+
+class CttsoIndexRegistryUnitTest(unittest.TestCase):
+    def setUp(self):
+        self.rng = random.Random(20241019)
+        logging.disable(logging.CRITICAL)
+
+    def tearDown(self):
+        logging.disable(logging.NOTSET)
+
+    def assert_same_as_scan(self, index_str: str, index_type: str):
+        try:
+            expected_index_id = scan_cttso_index_id_from_index(index_str, index_type)
+        except ValueError:
+            with self.assertRaises(ValueError):
+                get_cttso_index_id_from_index(index_str, index_type)
+        else:
+            self.assertEqual(get_cttso_index_id_from_index(index_str, index_type), expected_index_id)
+
+    def test_every_kit_index(self):
+        for index_dict in ALL_CTTSO_VALID_INDEXES:
+            for index_type in INDEX_TYPES:
+                if index_type not in index_dict:
+                    continue
+                # Including the sequence looked up as any of the other index types
+                for lookup_index_type in INDEX_TYPES:
+                    with self.subTest(index_id=index_dict["index_id"], index_type=index_type, lookup=lookup_index_type):
+                        self.assert_same_as_scan(index_dict[index_type], lookup_index_type)
+
+    def test_every_kit_i5_index_in_either_orientation(self):
+        for index_dict in ALL_CTTSO_VALID_INDEXES:
+            for index_type in ["index2", "index2_rev"]:
+                with self.subTest(index_id=index_dict["index_id"], index_type=index_type):
+                    self.assertEqual(
+                        get_cttso_i5_index_id_from_index(index_dict[index_type]),
+                        scan_cttso_i5_index_id_from_index(index_dict[index_type])
+                    )
+            self.assertEqual(get_cttso_i5_index_id_from_index(index_dict["index2"], True), index_dict["index_id"])
+            self.assertEqual(get_cttso_i5_index_id_from_index(index_dict["index2_rev"], False), index_dict["index_id"])
+            self.assertEqual(get_cttso_i7_index_id_from_index(index_dict["index"]), index_dict["index_id"])
+
+    def test_random_indexes(self):
+        for _ in range(NUM_RANDOM_INDEXES):
+            index_str = "".join(self.rng.choice(BASES) for _ in range(self.rng.choice([8, 10])))
+            for index_type in INDEX_TYPES:
+                with self.subTest(index=index_str, index_type=index_type):
+                    self.assert_same_as_scan(index_str, index_type)
+
+    def test_near_match_suggestion(self):
+        for index_dict in self.rng.sample(ALL_CTTSO_VALID_INDEXES, 100):
+            mistyped_index = mutate_index(index_dict["index"], 1, self.rng)
+            if mistyped_index in {index_dict_iter["index"] for index_dict_iter in ALL_CTTSO_VALID_INDEXES}:
+                continue
+            with self.subTest(index_id=index_dict["index_id"], mistyped_index=mistyped_index):
+                with self.assertRaises(ValueError) as error_context:
+                    get_cttso_i7_index_id_from_index(mistyped_index)
+                # One mismatch away, the intended index is the first (closest) suggestion
+                self.assertIn(
+                    f"did you mean {index_dict['index_id']} (index {index_dict['index']}, 1 mismatch)",
+                    str(error_context.exception)
+                )
+
+    def test_no_near_match(self):
+        index_str = "NNNNNNNNNN"
+        with self.assertRaises(ValueError) as error_context:
+            get_cttso_i7_index_id_from_index(index_str)
+        self.assertEqual(str(error_context.exception), f"Could not get index id for index - {index_str}")
+
+    def test_unknown_index_length(self):
+        with self.assertRaises(ValueError):
+            get_cttso_i7_index_id_from_index("ACGTACG")
+
+    def test_hamming_distance(self):
+        for _ in range(NUM_RANDOM_INDEXES):
+            index_str = "".join(self.rng.choice(BASES) for _ in range(10))
+            num_mismatches = self.rng.randint(0, 10)
+            self.assertEqual(
+                get_hamming_distance(index_str, mutate_index(index_str, num_mismatches, self.rng)),
+                num_mismatches
+            )
+
+
+class HandlerUnitTest(unittest.TestCase):
+    def setUp(self):
+        logging.disable(logging.CRITICAL)
+
+    def tearDown(self):
+        logging.disable(logging.NOTSET)
+
+    def test_every_kit_entry(self):
+        for index_dict in ALL_CTTSO_VALID_INDEXES:
+            for index2_type in ["index2", "index2_rev"]:
+                # Two lanes of the same sample
+                bclconvert_data_rows = [
+                    {"sample_id": "L2500613", "index": index_dict["index"], "index2": index_dict[index2_type], "lane": lane}
+                    for lane in [3, 4]
+                ]
+                with self.subTest(index_id=index_dict["index_id"], index2_type=index2_type):
+                    try:
+                        expected_bclconvert_data, expected_tso500l_data = scan_handler_tso500l_rows(bclconvert_data_rows)
+                    except StopIteration:
+                        # A V3 index without a V2 counterpart
+                        with self.assertRaises(ValueError):
+                            handler({"instrument_run_id": "run", "bclconvert_data_rows": bclconvert_data_rows}, None)
+                        continue
+
+                    samplesheet = handler(
+                        {"instrument_run_id": "run", "bclconvert_data_rows": deepcopy(bclconvert_data_rows)},
+                        None
+                    )["samplesheet"]
+                    self.assertEqual(samplesheet["bclconvert_data"], expected_bclconvert_data)
+                    self.assertEqual(samplesheet["tso500l_data"], expected_tso500l_data)
+
+    def test_v3_switcheroo(self):
+        samplesheet = handler(
+            {
+                "bclconvert_data_rows": [
+                    {"sample_id": "L2500613", "index": "CGACATCCGA", "index2": "AATGAACGTA", "lane": 4},
+                    {"sample_id": "L2500614", "index": "GAACTGAGCG", "index2": "CGCTCCACGA", "lane": 4},
+                ],
+                "instrument_run_id": "250523_A01052_0263_AHFHHTDSXF"
+            },
+            None
+        )["samplesheet"]
+
+        self.assertEqual(
+            samplesheet["bclconvert_data"],
+            [
+                {"sample_id": "L2500613", "index": "CGTCTCATAT", "index2": "TATAGTAGCT", "lane": 4},
+                # Not in the tso500l data, left as is
+                {"sample_id": "L2500614", "index": "GAACTGAGCG", "index2": "CGCTCCACGA", "lane": 4},
+            ]
+        )
+        self.assertEqual(
+            samplesheet["tso500l_data"],
+            [
+                {
+                    "sample_id": "L2500613",
+                    "sample_type": "DNA",
+                    "index": "CGTCTCATAT",
+                    "index2": "TATAGTAGCT",
+                    "i7_index_id": "UDP0003",
+                    "i5_index_id": "UDP0003"
+                }
+            ]
+        )
+        self.assertEqual(
+            samplesheet["bclconvert_settings"]["override_cycles"],
+            build_cttso_v2_samplesheet.V2_BCLCONVERT_SETTINGS["override_cycles"]
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -10,6 +10,7 @@ import * as lambda from 'aws-cdk-lib/aws-lambda';
 import * as iam from 'aws-cdk-lib/aws-iam';
 import { Duration } from 'aws-cdk-lib';
 import { EventField } from 'aws-cdk-lib/aws-events';
+import { DragenMetricsPythonLambdaLayer } from '../../../../../../../components/python-dragen-metrics-layer';
 
 /*
 Part 6
@@ -54,6 +55,11 @@ export class FastqListRowQcCompleteConstruct extends Construct {
     /*
     Part 1: Build the lambdas
     */
+    // Dragen metrics layer, for streaming the metrics files
+    const dragenMetricsLayer = new DragenMetricsPythonLambdaLayer(this, 'dragen_metrics_layer', {
+      layerPrefix: this.WgtsQcCompleteMap.prefix,
+    }).lambdaLayerVersionObj;
+
     const collectMetricsLambdaObj = new PythonFunction(
       this,
       'collect_qc_metrics_from_alignment_directory_py',
@@ -64,6 +70,7 @@ export class FastqListRowQcCompleteConstruct extends Construct {
         index: 'collect_qc_metrics_from_alignment_directory.py',
         handler: 'handler',
         memorySize: 1024,
+        layers: [dragenMetricsLayer],
         environment: {
           ICAV2_ACCESS_TOKEN_SECRET_ID: props.icav2JwtSecretsObj.secretName,
         },
@@ -20,13 +20,15 @@ For RNA Samples we find the quant_metrics.csv file and take the value for 'Fold
 pd.read_csv("MDX240202.quant_metrics.csv", header=None, names=["rgid_group", "rgid_index", "description", "value", "pct"]).query("rgid_group=='RNA QUANTIFICATION STATISTICS' and description=='Fold coverage of all exons'")['value'].item()
 '107.91'
 
+Rather than reading each metrics file into pandas, the metrics files are streamed (concurrently) through the
+dragen metrics layer, which stops reading a file as soon as its metrics are found.
+A metric that DRAGEN could not compute (NA or empty) is returned as None.
 """
 # Standard imports
 import logging
 import typing
-from typing import List
-import pandas as pd
-from io import StringIO
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional
 from os import environ
 import boto3
 
@@ -41,12 +43,13 @@ from wrapica.libica_models import (
 )
 from wrapica.project_data import (
     list_project_data_non_recursively,
-    read_icav2_file_contents_to_string, convert_uri_to_project_data_obj
+    create_download_url, convert_uri_to_project_data_obj
 )
 
-# Globals
-METRIC_COLUMNS = ["rgid_group", "rgid_index", "description", "value", "pct"]
+# Layer imports
+from dragen_metrics import DragenMetricKey, MetricValue, stream_dragen_metrics_from_url
 
+# Globals
 WGS_COVERAGE_SUMMARY_GROUP_NAME = "COVERAGE SUMMARY"
 WGS_COVERAGE_MEAN_COVERAGE_DESCRIPTION = "Average alignment coverage over genome"
 
@@ -89,57 +92,69 @@ def set_icav2_env_vars():
     )
 
 
-def icav2_csv_file_to_pd_dataframe(
-        project_id: str,
-        data_id: str,
-        column_names: List[str]
-) -> pd.DataFrame:
+def get_metrics_file_from_output_files(
+        all_output_files: List[ProjectData],
+        file_name_suffix: str
+) -> ProjectData:
     """
-    Return a pandas DataFrame from the icav2 csv file
-
-    :param project_id:
-    :param data_id:
-    :param column_names:
+    Find the metrics file in the alignment output files
+    :param all_output_files:
+    :param file_name_suffix:
     :return:
     """
-    return pd.read_csv(
-        StringIO(
-            read_icav2_file_contents_to_string(
-                project_id=project_id,
-                data_id=data_id
+    try:
+        return next(
+            filter(
+                lambda project_data_iter: project_data_iter.data.details.name.endswith(file_name_suffix),
+                all_output_files
             )
-        ),
-        header=None,
-        names=column_names
-    )
+        )
+    except StopIteration:
+        logger.error(f"Could not find the {file_name_suffix} file")
+        raise FileNotFoundError
+
+
+def get_float_metric_value(metric_value: MetricValue) -> Optional[float]:
+    """
+    The metric value as a float, None if DRAGEN could not compute the metric (NA or empty)
+    :param metric_value:
+    :return:
+    """
+    if metric_value is None:
+        return None
+    return float(metric_value)
 
 
 def get_mean_coverage_from_wgs_coverage_file(
         project_id: str,
         coverage_metrics_data_id: str
-) -> float:
+) -> Optional[float]:
     """
     Return the mean coverage from the coverage metrics csv file
     :param project_id:
     :param coverage_metrics_data_id:
     :return:
     """
-    return float(
-        icav2_csv_file_to_pd_dataframe(
-            project_id=project_id,
-            data_id=coverage_metrics_data_id,
-            column_names=METRIC_COLUMNS
-        ).query(
-            f"rgid_group=='{WGS_COVERAGE_SUMMARY_GROUP_NAME}' and "
-            f"description=='{WGS_COVERAGE_MEAN_COVERAGE_DESCRIPTION}'"
-        )['value'].item()
+    # Summary metrics have no rgid
+    metric_key = DragenMetricKey(
+        section=WGS_COVERAGE_SUMMARY_GROUP_NAME,
+        rgid=None,
+        metric=WGS_COVERAGE_MEAN_COVERAGE_DESCRIPTION
+    )
+
+    return get_float_metric_value(
+        stream_dragen_metrics_from_url(
+            create_download_url(project_id, coverage_metrics_data_id),
+            [metric_key],
+            columns=['value']
+        )[metric_key].values['value']
     )
 
 
 def get_duplicate_marked_reads_pct_from_mapping_file(
         project_id: str,
         mapping_metrics_data_id: str
-) -> float:
+) -> Optional[float]:
     """
     Return the percentage of duplicate marked reads from the mapping metrics csv file
 
@@ -147,22 +162,26 @@ def get_duplicate_marked_reads_pct_from_mapping_file(
     :param mapping_metrics_data_id:
     :return:
     """
-    return float(
-        icav2_csv_file_to_pd_dataframe(
-            project_id=project_id,
-            data_id=mapping_metrics_data_id,
-            column_names=METRIC_COLUMNS
-        ).query(
-            f"rgid_group=='{WGS_MAPPING_METRICS_GROUP_NAME}' and "
-            f"description=='{WGS_MAPPING_METRICS_DUPLICATE_MARKED_READS_DESCRIPTION}'"
-        )['pct'].item()
+    # Summary metrics have no rgid
+    metric_key = DragenMetricKey(
+        section=WGS_MAPPING_METRICS_GROUP_NAME,
+        rgid=None,
+        metric=WGS_MAPPING_METRICS_DUPLICATE_MARKED_READS_DESCRIPTION
+    )
+
+    return get_float_metric_value(
+        stream_dragen_metrics_from_url(
+            create_download_url(project_id, mapping_metrics_data_id),
+            [metric_key],
+            columns=['pct']
+        )[metric_key].values['pct']
     )
 
 
 def get_fold_coverage_of_all_exons_from_quant_file(
         project_id: str,
         quant_metrics_data_id: str
-) -> float:
+) -> Optional[float]:
     """
     Return the fold coverage of all exons from the quantification metrics csv file
 
@@ -170,15 +189,19 @@ def get_fold_coverage_of_all_exons_from_quant_file(
     :param quant_metrics_data_id:
     :return:
     """
-    return float(
-        icav2_csv_file_to_pd_dataframe(
-            project_id=project_id,
-            data_id=quant_metrics_data_id,
-            column_names=METRIC_COLUMNS
-        ).query(
-            f"rgid_group=='{RNA_QUANTIFICATION_GROUP_NAME}' and "
-            f"description=='{RNA_QUANTIFICATION_FOLD_COVERAGE_OF_ALL_EXONS_DESCRIPTION}'"
-        )['value'].item()
+    # Summary metrics have no rgid
+    metric_key = DragenMetricKey(
+        section=RNA_QUANTIFICATION_GROUP_NAME,
+        rgid=None,
+        metric=RNA_QUANTIFICATION_FOLD_COVERAGE_OF_ALL_EXONS_DESCRIPTION
+    )
+
+    return get_float_metric_value(
+        stream_dragen_metrics_from_url(
+            create_download_url(project_id, quant_metrics_data_id),
+            [metric_key],
+            columns=['value']
+        )[metric_key].values['value']
     )
 
 
@@ -207,59 +230,33 @@ def handler(event, context):
     )
 
     if sample_type == 'WGS':
-        # Find the mapping metrics file
-        try:
-            mapping_metrics_data_obj = next(
-                filter(
-                    lambda project_data_iter: project_data_iter.data.details.name.endswith("mapping_metrics.csv"),
-                    all_output_files
-                )
+        # Find the mapping metrics and coverage metrics files
+        mapping_metrics_data_obj = get_metrics_file_from_output_files(all_output_files, "mapping_metrics.csv")
+        coverage_metrics_data_obj = get_metrics_file_from_output_files(all_output_files, "wgs_coverage_metrics.csv")
+
+        # Read both files at the same time
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            # Get the mean coverage
+            mean_coverage_future = executor.submit(
+                get_mean_coverage_from_wgs_coverage_file,
+                project_id=coverage_metrics_data_obj.project_id,
+                coverage_metrics_data_id=coverage_metrics_data_obj.data.id
             )
-        except StopIteration:
-            logger.error("Could not find the mapping metrics file")
-            raise FileNotFoundError
-
-        # Find the coverage metrics file
-        try:
-            coverage_metrics_data_obj = next(
-                filter(
-                    lambda project_data_iter: project_data_iter.data.details.name.endswith("wgs_coverage_metrics.csv"),
-                    all_output_files
-                )
-            )
-        except StopIteration:
-            logger.error("Could not find the coverage metrics file")
-            raise FileNotFoundError
-
-        # Get the mean coverage
-        mean_coverage = get_mean_coverage_from_wgs_coverage_file(
-            project_id=coverage_metrics_data_obj.project_id,
-            coverage_metrics_data_id=coverage_metrics_data_obj.data.id
-        )
 
-        # Get the percentage of duplicate marked reads
-        pct_duplicate_marked_reads = get_duplicate_marked_reads_pct_from_mapping_file(
-            project_id=mapping_metrics_data_obj.project_id,
-            mapping_metrics_data_id=mapping_metrics_data_obj.data.id
-        )
+            # Get the percentage of duplicate marked reads
+            pct_duplicate_marked_reads_future = executor.submit(
+                get_duplicate_marked_reads_pct_from_mapping_file,
+                project_id=mapping_metrics_data_obj.project_id,
+                mapping_metrics_data_id=mapping_metrics_data_obj.data.id
+            )
 
         return {
-            "genome_coverage": mean_coverage,
-            "duplication_rate": pct_duplicate_marked_reads
+            "genome_coverage": mean_coverage_future.result(),
+            "duplication_rate": pct_duplicate_marked_reads_future.result()
         }
     else:
-
         # Find the quant metrics file
-        try:
-            quant_metrics_data_obj = next(
-                filter(
-                    lambda project_data_iter: project_data_iter.data.details.name.endswith("quant_metrics.csv"),
-                    all_output_files
-                )
-            )
-        except StopIteration:
-            logger.error("Could not find the quant metrics file")
-            raise FileNotFoundError
+        quant_metrics_data_obj = get_metrics_file_from_output_files(all_output_files, "quant_metrics.csv")
 
         # Get the fold coverage of all exons
         fold_coverage_of_all_exons = get_fold_coverage_of_all_exons_from_quant_file(
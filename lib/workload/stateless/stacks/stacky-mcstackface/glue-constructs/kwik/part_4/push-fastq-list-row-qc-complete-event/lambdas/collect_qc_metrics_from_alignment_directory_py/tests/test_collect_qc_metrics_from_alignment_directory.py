@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+
+"""
+The handler, with wrapica stubbed and the metrics files streamed through the dragen metrics layer
+
+Run from the collect_qc_metrics_from_alignment_directory_py directory with
+    PYTHONPATH="../../../../../../../../../components/python-dragen-metrics-layer/dragen_metrics_layer/src:." python -m unittest discover tests
+"""
+
+# Standard imports
+import unittest
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Dict, List, Optional
+from unittest.mock import MagicMock, patch
+
+# Layer imports
+from dragen_metrics.utils import stream_helpers
+
+FIXTURES_DIR = Path(__file__).parent / "fixtures"
+MAPPING_METRICS_PATH = FIXTURES_DIR / "L2401544.mapping_metrics.csv"
+WGS_COVERAGE_METRICS_PATH = FIXTURES_DIR / "L2401544.wgs_coverage_metrics.csv"
+QUANT_METRICS_PATH = FIXTURES_DIR / "MDX240202.quant_metrics.csv"
+PROJECT_ID = "ea19a3f5-ec7c-4940-a474-c31cd91dbad4"
+ALIGNMENT_OUTPUT_URI = f"icav2://{PROJECT_ID}/analysis/wgtsQc/20240719a08aae4b/L2401544_dragen/"
+
+
+def mock_requests_get(contents_by_url):
+    """
+    requests.get for presigned urls (the file name), streamed line by line
+    """
+    def requests_get(url, stream, timeout):
+        lines = contents_by_url[url].splitlines()
+        return MagicMock(
+            __enter__=lambda self_: self_,
+            iter_lines=MagicMock(return_value=iter(lines)),
+        )
+    return requests_get
+
+
+class TestHandler(unittest.TestCase):
+    """
+    The handler, with the wrapica calls and the download stubbed
+    """
+    def setUp(self):
+        # Import here, the handler module needs wrapica
+        import collect_qc_metrics_from_alignment_directory
+        self.handler_module = collect_qc_metrics_from_alignment_directory
+
+    def run_handler(self, sample_type: str, metrics_paths: List[Path], contents_by_name: Optional[Dict[str, str]] = None):
+        output_files = [
+            SimpleNamespace(
+                project_id=PROJECT_ID,
+                data=SimpleNamespace(id=metrics_path.name, details=SimpleNamespace(name=metrics_path.name))
+            )
+            for metrics_path in metrics_paths
+        ]
+        with patch.multiple(
+            self.handler_module,
+            set_icav2_env_vars=MagicMock(),
+            convert_uri_to_project_data_obj=MagicMock(
+                return_value=SimpleNamespace(project_id=PROJECT_ID, data=SimpleNamespace(id="fol.1234"))
+            ),
+            list_project_data_non_recursively=MagicMock(return_value=output_files),
+            create_download_url=lambda project_id, data_id: data_id,
+        ), patch.object(
+            stream_helpers.requests, "get",
+            mock_requests_get({
+                metrics_path.name: (contents_by_name or {}).get(metrics_path.name, metrics_path.read_text())
+                for metrics_path in metrics_paths
+            })
+        ):
+            return self.handler_module.handler(
+                {"alignment_output_uri": ALIGNMENT_OUTPUT_URI, "sample_type": sample_type},
+                None
+            )
+
+    def test_wgs(self):
+        self.assertEqual(
+            self.run_handler("WGS", [MAPPING_METRICS_PATH, WGS_COVERAGE_METRICS_PATH]),
+            {"genome_coverage": 37.06, "duplication_rate": 7.63}
+        )
+
+    def test_wts(self):
+        self.assertEqual(
+            self.run_handler("WTS", [QUANT_METRICS_PATH]),
+            {"exon_fold_coverage": 107.91}
+        )
+
+    def test_metric_not_computed(self):
+        # DRAGEN writes NA (or nothing) when a metric cannot be computed
+        for missing_value in ["NA", ""]:
+            with self.subTest(missing_value=missing_value):
+                self.assertEqual(
+                    self.run_handler(
+                        "WTS", [QUANT_METRICS_PATH],
+                        {
+                            QUANT_METRICS_PATH.name: QUANT_METRICS_PATH.read_text().replace(
+                                "Fold coverage of all exons,107.91", f"Fold coverage of all exons,{missing_value}"
+                            )
+                        }
+                    ),
+                    {"exon_fold_coverage": None}
+                )
+
+    def test_missing_metrics_file(self):
+        with self.assertRaises(FileNotFoundError):
+            self.run_handler("WGS", [MAPPING_METRICS_PATH])
+
+
+if __name__ == "__main__":
+    unittest.main()
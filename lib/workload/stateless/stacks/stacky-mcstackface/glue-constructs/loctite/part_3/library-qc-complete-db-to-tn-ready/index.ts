@@ -28,6 +28,7 @@ Output Event status: `draft`
 
 * Subscribe to the wgts input event glue, library complete event. 
 * Launch a draft event for the tumor normal pipeline if the libraries' subject has a complement library that is also complete
+* Libraries that have completed qc are kept in a pairing index, partitioned by subject, see find_complement_library_pair
 */
 
 export interface LibraryQcCompleteToTnDraftConstructProps {
@@ -52,6 +53,7 @@ export class LibraryQcCompleteToTnReadyConstruct extends Construct {
       subject: 'subject',
       library: 'library',
       fastq_list_row: 'fastq_list_row',
+      library_pairing: 'library_pairing',
     },
     triggerSource: 'orcabus.wgtsqcinputeventglue',
     triggerStatus: 'QC_COMPLETE',
@@ -75,8 +77,16 @@ export class LibraryQcCompleteToTnReadyConstruct extends Construct {
       index: 'find_complement_library_pair.py',
       handler: 'handler',
       memorySize: 1024,
+      environment: {
+        /* Table env vars */
+        TABLE_NAME: props.tableObj.tableName,
+        LIBRARY_PAIRING_TABLE_PARTITION_NAME: this.TnReadyMap.tablePartition.library_pairing,
+      },
     });
 
+    // Add the library to, and query, the pairing index of the subject
+    props.tableObj.grantReadWriteData(findComplementLibraryPair.currentVersion);
+
     // Generate event data lambda object
     const generateEventDataLambdaObj = new PythonFunction(this, 'generate_draft_event_payload_py', {
       entry: path.join(__dirname, 'lambdas', 'generate_draft_event_payload_py'),
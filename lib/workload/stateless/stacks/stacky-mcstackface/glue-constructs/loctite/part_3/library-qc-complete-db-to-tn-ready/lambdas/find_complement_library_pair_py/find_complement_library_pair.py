@@ -1,66 +1,192 @@
 #!/usr/bin/env python3
 
 """
-Given a library object and a list of complementary library objects, find a matching pair for the library object.
+Given a library object that has just completed qc, find a matching pair for the library object.
 
 The library objects must match on 'workflow' and 'type' attributes, but must be the opposite phenotype.
+
+Libraries that have completed qc are kept in a pairing index in the glue table, partitioned by subject,
+
+{
+    "id": "<subject_orcabus_id>",
+    "id_type": "library_pairing#<library_orcabus_id>",
+    "library_json": "<library object>"
+}
+
+The library is added to the index when it completes qc,
+so the complement libraries of the subject are a single query on the subject partition.
+Libraries that completed qc before the index existed are loaded into it once
+by scripts/backfill_library_pairing_index.py (at the root of the stacky-mcstackface stack).
+
+If the subject has more than one complement library (i.e. a library has been topped up or resequenced)
+the complement library of the same workflow wins, then the most recent library (see get_library_pairing_precedence)
+so the pair does not depend on the order in which the libraries completed qc.
 """
 
-from typing import Dict, List
+import json
+import typing
+from os import environ
+from typing import Dict, List, Optional, Tuple
+
+import boto3
+
+if typing.TYPE_CHECKING:
+    from mypy_boto3_dynamodb import DynamoDBClient
+
+# Globals
+DYNAMODB_TABLE_NAME_ENV_VAR = "TABLE_NAME"
+LIBRARY_PAIRING_PARTITION_ENV_VAR = "LIBRARY_PAIRING_TABLE_PARTITION_NAME"
+
 
+def get_dynamodb_db_client() -> 'DynamoDBClient':
+    return boto3.client('dynamodb')
 
-def find_complement_library_pair(library: Dict, complement_libraries: List[Dict]):
+
+def get_library_pairing_id_type_prefix() -> str:
+    return f"{environ[LIBRARY_PAIRING_PARTITION_ENV_VAR]}#"
+
+
+def add_library_to_pairing_index(library: Dict):
     """
-    Given a library object and a list of complementary library objects, find a matching pair for the library object
-    within the complement library list.
+    Add (or replace) the library in the pairing index of its subject
     :param library:
-    :param complement_libraries:
     :return:
     """
-    for complement_library in complement_libraries:
-        # Need to both be of the same type
-        if not library['type'] == complement_library['type']:
-            continue
-
-        # Need to be of different phenotypes
-        if library['phenotype'] == complement_library['phenotype']:
-            continue
-
-        # Can be different workflows IF
-        # The 'research' workflow is the tumor and the 'clinical' workflow is the normal
-        # But do not allow clinical tumors to be matched with research normals
-        # Or if they are the same workflow, but different phenotypes
-        if (
-            # Special case for research
+    get_dynamodb_db_client().put_item(
+        TableName=environ[DYNAMODB_TABLE_NAME_ENV_VAR],
+        Item={
+            'id': {'S': library['subject_orcabus_id']},
+            'id_type': {'S': get_library_pairing_id_type_prefix() + library['orcabus_id']},
+            'library_json': {'S': json.dumps(library)},
+        }
+    )
+
+
+def get_libraries_from_pairing_index(subject_orcabus_id: str) -> List[Dict]:
+    """
+    Get every library of the subject in the pairing index
+    :param subject_orcabus_id:
+    :return:
+    """
+    query_kwargs = {
+        'TableName': environ[DYNAMODB_TABLE_NAME_ENV_VAR],
+        'KeyConditionExpression': '#id = :subject_orcabus_id AND begins_with(#id_type, :id_type_prefix)',
+        'ExpressionAttributeNames': {
+            '#id': 'id',
+            '#id_type': 'id_type',
+        },
+        'ExpressionAttributeValues': {
+            ':subject_orcabus_id': {'S': subject_orcabus_id},
+            ':id_type_prefix': {'S': get_library_pairing_id_type_prefix()},
+        },
+        # Read our own write, and any library of the subject that completed just before this one
+        'ConsistentRead': True,
+    }
+
+    libraries = []
+    while True:
+        query_response = get_dynamodb_db_client().query(**query_kwargs)
+        libraries.extend(
+            json.loads(item_iter_['library_json']['S'])
+            for item_iter_ in query_response['Items']
+        )
+        if 'LastEvaluatedKey' not in query_response:
+            break
+        query_kwargs['ExclusiveStartKey'] = query_response['LastEvaluatedKey']
+
+    return libraries
+
+
+def get_library_pairing_precedence(library: Dict) -> Tuple[str, str]:
+    """
+    Precedence of duplicate libraries, the most recent library wins,
+    library ids are issued in order, and a topped up or rerun library sorts after the original,
+    i.e. L2400231 < L2400231_topup < L2400238
+    The orcabus id breaks any remaining tie
+    :param library:
+    :return:
+    """
+    return library['library_id'], library['orcabus_id']
+
+
+def is_complement_library(library: Dict, complement_library: Dict) -> bool:
+    """
+    Can the complement library be paired with the library
+    :param library:
+    :param complement_library:
+    :return:
+    """
+    # Need to both be of the same type
+    if not library['type'] == complement_library['type']:
+        return False
+
+    # Need to be of different phenotypes
+    if library['phenotype'] == complement_library['phenotype']:
+        return False
+
+    # Can be different workflows IF
+    # The 'research' workflow is the tumor and the 'clinical' workflow is the normal
+    # But do not allow clinical tumors to be matched with research normals
+    # Or if they are the same workflow, but different phenotypes
+    return (
+        # Special case for research
+        (
             (
-                (
-                        library['workflow'] == 'research' and
-                        complement_library['workflow'] == 'clinical'
-                ) and (
-                        library['phenotype'] == 'tumor' and
-                        complement_library['phenotype'] == 'normal'
-                )
-            ) or
-            # Complement case
+                    library['workflow'] == 'research' and
+                    complement_library['workflow'] == 'clinical'
+            ) and (
+                    library['phenotype'] == 'tumor' and
+                    complement_library['phenotype'] == 'normal'
+            )
+        ) or
+        # Complement case
+        (
             (
-                (
-                        library['workflow'] == 'clinical' and
-                        complement_library['workflow'] == 'research'
-                ) and (
-                        library['phenotype'] == 'normal' and
-                        complement_library['phenotype'] == 'tumor'
-                )
-            ) or
-            # Standard clinical+clinical or research+research
+                    library['workflow'] == 'clinical' and
+                    complement_library['workflow'] == 'research'
+            ) and (
+                    library['phenotype'] == 'normal' and
+                    complement_library['phenotype'] == 'tumor'
+            )
+        ) or
+        # Standard clinical+clinical or research+research
+        (
             (
-                (
-                        library['workflow'] == complement_library['workflow']
-                )
+                    library['workflow'] == complement_library['workflow']
             )
-        ):
-            return library, complement_library
+        )
+    )
+
+
+def find_complement_library_pair(
+        library: Dict,
+        complement_libraries: List[Dict]
+) -> Tuple[Optional[Dict], Optional[Dict]]:
+    """
+    Given a library object and a list of complementary library objects, find a matching pair for the library object
+    within the complement library list.
+    :param library:
+    :param complement_libraries:
+    :return:
+    """
+    complement_libraries = list(
+        filter(
+            lambda complement_library_iter_: is_complement_library(library, complement_library_iter_),
+            complement_libraries
+        )
+    )
 
-    return None, None
+    if len(complement_libraries) == 0:
+        return None, None
+
+    return library, max(
+        complement_libraries,
+        key=lambda complement_library_iter_: (
+            # Prefer a complement library of the same workflow
+            complement_library_iter_['workflow'] == library['workflow'],
+            get_library_pairing_precedence(complement_library_iter_)
+        )
+    )
 
 
 def handler(event, context):
@@ -72,16 +198,17 @@ def handler(event, context):
     """
 
     library_obj: Dict = event['library_obj']
-    complement_libraries: List[Dict] = event['complementary_library_obj_list']
 
-    # Filter out empty complement libraries
+    # Add the library to the pairing index, then collect the libraries of the subject that have completed qc
+    add_library_to_pairing_index(library_obj)
+
+    # Filter out the library itself
     complement_libraries = list(
         filter(
             lambda comp_lib_iter_: (
-                comp_lib_iter_ is not None and
                 not comp_lib_iter_['orcabus_id'] == library_obj['orcabus_id']
             ),
-            complement_libraries
+            get_libraries_from_pairing_index(library_obj['subject_orcabus_id'])
         )
     )
 
@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+
+"""
+The library pairing index against a (moto) tumor normal glue table, with libraries completing qc in every order
+
+Run from the find_complement_library_pair_py directory with
+    python -m unittest discover tests
+"""
+
+import os
+import unittest
+from itertools import permutations
+from typing import Dict, List, Optional
+from unittest.mock import MagicMock, patch
+
+import boto3
+from moto import mock_aws
+
+import find_complement_library_pair
+
+TABLE_NAME = "stacky-tn-glue-table"
+SUBJECT_ORCABUS_ID = "sbj.01J9T96QNATH3FNMFZK7V0NPJT"
+
+ENV = {
+    "AWS_DEFAULT_REGION": "ap-southeast-2",
+    "TABLE_NAME": TABLE_NAME,
+    "LIBRARY_PAIRING_TABLE_PARTITION_NAME": "library_pairing",
+}
+
+
+def get_library(
+        library_id: str, phenotype: str, workflow: str = "clinical",
+        subject_orcabus_id: str = SUBJECT_ORCABUS_ID
+) -> Dict:
+    return {
+        "orcabus_id": f"lib.{library_id}",
+        "library_id": library_id,
+        "phenotype": phenotype,
+        "workflow": workflow,
+        "type": "WGS",
+        "assay": "TsqNano",
+        "subject_id": "SN_PMC-141",
+        "subject_orcabus_id": subject_orcabus_id,
+        "fastq_list_row_id_set": [f"GTCAAGTCCA.GCGTTCGATA.1__{library_id}"],
+    }
+
+
+TUMOR_LIBRARY = get_library("L2400231", "tumor")
+NORMAL_LIBRARY = get_library("L2400238", "normal")
+# The normal library, topped up
+NORMAL_TOPUP_LIBRARY = get_library("L2400238_topup", "normal")
+
+
+@mock_aws
+class FindComplementLibraryPairUnitTest(unittest.TestCase):
+    def setUp(self):
+        patch.dict(os.environ, ENV).start()
+
+        self.dynamodb_client = boto3.client("dynamodb", region_name="ap-southeast-2")
+        self.create_table()
+
+        # Count the queries and scans of the table
+        self.counting_dynamodb_client = MagicMock(wraps=self.dynamodb_client)
+        patch.object(
+            find_complement_library_pair, "get_dynamodb_db_client",
+            lambda: self.counting_dynamodb_client
+        ).start()
+
+    def tearDown(self):
+        patch.stopall()
+
+    def create_table(self):
+        self.dynamodb_client.create_table(
+            TableName=TABLE_NAME,
+            KeySchema=[
+                {"AttributeName": "id", "KeyType": "HASH"},
+                {"AttributeName": "id_type", "KeyType": "RANGE"},
+            ],
+            AttributeDefinitions=[
+                {"AttributeName": "id", "AttributeType": "S"},
+                {"AttributeName": "id_type", "AttributeType": "S"},
+            ],
+            BillingMode="PAY_PER_REQUEST",
+        )
+
+    def reset_table(self):
+        self.dynamodb_client.delete_table(TableName=TABLE_NAME)
+        self.create_table()
+
+    def complete_qc(self, library: Dict) -> Dict:
+        return find_complement_library_pair.handler({"library_obj": library}, None)
+
+    def assert_pair(self, response: Dict, tumor_library: Optional[Dict], normal_library: Optional[Dict]):
+        self.assertEqual(response["successful_pairing"], tumor_library is not None)
+        self.assertEqual(response["tumor_library"], tumor_library)
+        self.assertEqual(response["normal_library"], normal_library)
+
+    def test_out_of_order_completion(self):
+        libraries = [TUMOR_LIBRARY, NORMAL_LIBRARY, NORMAL_TOPUP_LIBRARY]
+
+        for completion_order in permutations(libraries):
+            with self.subTest(completion_order=[library["library_id"] for library in completion_order]):
+                self.reset_table()
+
+                completed_libraries: List[Dict] = []
+                for library in completion_order:
+                    response = self.complete_qc(library)
+                    completed_libraries.append(library)
+
+                    if TUMOR_LIBRARY not in completed_libraries or len(completed_libraries) == 1:
+                        # No tumor, or no normal yet
+                        self.assert_pair(response, None, None)
+                    elif library == TUMOR_LIBRARY:
+                        # The most recent normal that has completed qc, whichever order they completed in
+                        self.assert_pair(
+                            response,
+                            TUMOR_LIBRARY,
+                            NORMAL_TOPUP_LIBRARY if NORMAL_TOPUP_LIBRARY in completed_libraries else NORMAL_LIBRARY
+                        )
+                    else:
+                        # The normal that has just completed qc
+                        self.assert_pair(response, TUMOR_LIBRARY, library)
+
+    def test_one_query_per_completion(self):
+        for library in [TUMOR_LIBRARY, NORMAL_LIBRARY, NORMAL_TOPUP_LIBRARY]:
+            self.complete_qc(library)
+
+        self.assertEqual(self.counting_dynamodb_client.query.call_count, 3)
+        self.counting_dynamodb_client.scan.assert_not_called()
+
+    def test_requeued_library_is_not_duplicated(self):
+        self.complete_qc(NORMAL_LIBRARY)
+        self.complete_qc(NORMAL_LIBRARY)
+
+        self.assertEqual(
+            find_complement_library_pair.get_libraries_from_pairing_index(SUBJECT_ORCABUS_ID),
+            [NORMAL_LIBRARY]
+        )
+
+    def test_other_subjects_are_not_paired(self):
+        self.complete_qc(get_library("L2400999", "normal", subject_orcabus_id="sbj.01J9T96QNATH3FNMFZK7V0ABCD"))
+
+        self.assert_pair(self.complete_qc(TUMOR_LIBRARY), None, None)
+
+    def test_same_workflow_is_preferred(self):
+        research_tumor_library = get_library("L2400240", "tumor", workflow="research")
+        research_normal_library = get_library("L2400239", "normal", workflow="research")
+
+        # The clinical normal is the most recent, but the research normal is of the same workflow
+        self.complete_qc(research_normal_library)
+        self.complete_qc(get_library("L2400250", "normal"))
+        self.assert_pair(self.complete_qc(research_tumor_library), research_tumor_library, research_normal_library)
+
+    def test_research_tumor_clinical_normal(self):
+        research_tumor_library = get_library("L2400240", "tumor", workflow="research")
+
+        self.complete_qc(NORMAL_LIBRARY)
+        self.assert_pair(self.complete_qc(research_tumor_library), research_tumor_library, NORMAL_LIBRARY)
+
+        # But not a clinical tumor with a research normal
+        self.reset_table()
+        self.complete_qc(get_library("L2400239", "normal", workflow="research"))
+        self.assert_pair(self.complete_qc(TUMOR_LIBRARY), None, None)
+
+
+if __name__ == "__main__":
+    unittest.main()
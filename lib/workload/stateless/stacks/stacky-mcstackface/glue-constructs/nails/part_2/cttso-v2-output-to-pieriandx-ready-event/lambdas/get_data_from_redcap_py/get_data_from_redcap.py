@@ -4,16 +4,18 @@
 Given a library id, retrieve the necessary information from the REDCap database for this library id
 
 We really only need the disease name if it exists
+
+The raw and label fields of the library are collected with one filter logic query each,
+the two queries run side by side, and the merged records are cached by warm lambdas for a short time.
 """
 
 # Standard imports
 import logging
 import typing
-from typing import List
-from time import sleep
-from typing import Dict
+from concurrent.futures import ThreadPoolExecutor
+from time import sleep, monotonic
+from typing import Dict, List, Optional, Tuple
 from os import environ
-import pandas as pd
 import boto3
 from botocore.exceptions import ClientError
 import json
@@ -62,6 +64,44 @@ REDCAP_LABEL_FIELDS_CLINICAL: List = [
     "pierian_metadata_complete"
 ]
 
+REDCAP_RAW_FIELDS_RENAME_MAP: Dict = {
+    "clinician_firstname": "requesting_physician_first_name",
+    "clinician_lastname": "requesting_physician_last_name",
+    "libraryid": "library_id",
+    "disease": "disease_id",
+    "date_collection": "date_collected",
+    "date_receipt": "date_received"
+}
+
+REDCAP_LABEL_FIELDS_RENAME_MAP: Dict = {
+    "report_type": "sample_type",
+    "patient_gender": "gender",
+    "disease": "disease_name",
+    "libraryid": "library_id"
+}
+
+# Merged record fields
+REDCAP_DATA_RAW_FIELDS: List = [
+    "disease_id",
+    "requesting_physician_first_name",
+    "requesting_physician_last_name",
+    "library_id",
+    "date_collected",
+    "date_received",
+    "patient_urn"
+]
+
+REDCAP_DATA_LABEL_FIELDS: List = [
+    "sample_type",
+    "disease_name",
+    "gender",
+    "pierian_metadata_complete"
+]
+
+# Merged records by library id, kept by warm lambdas
+REDCAP_DATA_CACHE_TTL_SECONDS = 300
+REDCAP_DATA_CACHE: Dict[str, Tuple[float, Dict]] = {}
+
 
 def get_lambda_client() -> 'LambdaClient':
     return boto3.client('lambda')
@@ -75,210 +115,188 @@ def get_redcap_lambda_from_env():
     return environ['REDCAP_LAMBDA_FUNCTION_NAME']
 
 
-def warm_up_lambda():
+def get_filter_logic(library_id_list: List[str]) -> str:
     """
-    Warm up the lambda function
+    One filter logic over every library id
+    :param library_id_list:
     :return:
     """
-    try:
-        get_lambda_client().invoke(
-            FunctionName=get_redcap_lambda_from_env(),
-            InvocationType='RequestResponse'
+    return " or ".join(
+        map(
+            lambda library_id_iter_: f"[libraryid] = \"{library_id_iter_}\"",
+            library_id_list
         )
-        return True
-    except ClientError as e:
-        print(f"Error warming up lambda: {e}")
-        logger.info(f"Error warming up lambda: {e}")
-        return False
+    )
 
 
-def launch_redcap_raw_lambda(library_id: str) -> pd.DataFrame:
+def launch_redcap_lambda(library_id_list: List[str], fields: List[str], raw_or_label: str) -> List[Dict]:
     """
-    Launch the redcap lambda
-    :param library_id:
+    Launch the redcap lambda, retried while the lambda cannot be invoked (i.e. while it is still warming up)
+    :param library_id_list:
+    :param fields:
+    :param raw_or_label:
     :return:
     """
-    redcap_raw_df: pd.DataFrame = pd.DataFrame(columns=REDCAP_RAW_FIELDS_CLINICAL)
-
-    raw_list: List = json.loads(
-        json.loads(
-            get_lambda_client().invoke(
+    while True:
+        try:
+            response = get_lambda_client().invoke(
                 FunctionName=get_redcap_lambda_from_env(),
                 InvocationType='RequestResponse',
                 Payload=json.dumps(
                     {
                         "redcapProjectName": "TinyCT",
                         "queryStringParameters": {
-                            "filter_logic": f"[libraryid] = \"{library_id}\"",
-                            "fields": REDCAP_RAW_FIELDS_CLINICAL,
-                            "raw_or_label": "raw",
+                            "filter_logic": get_filter_logic(library_id_list),
+                            "fields": fields,
+                            "raw_or_label": raw_or_label,
                         }
                     }
                 )
-            )['Payload'].read()
-        )['body']
-    )
-
-    # Concat the raw data to the redcap raw df
-    redcap_raw_df = pd.concat(
-        [
-            redcap_raw_df,
-            pd.DataFrame(raw_list, columns=REDCAP_RAW_FIELDS_CLINICAL)
-        ]
-    )
+            )
+            break
+        except ClientError as e:
+            logger.info(f"Error invoking redcap lambda: {e}")
+            sleep(10)
 
-    # Rename columns
-    redcap_raw_df.rename(
-        columns={
-            "clinician_firstname": "requesting_physician_first_name",
-            "clinician_lastname": "requesting_physician_last_name",
-            "libraryid": "library_id",
-            "mrn": "patient_urn",
-            "disease": "disease_id",
-            "date_collection": "date_collected",
-            "date_receipt": "date_received"
-        },
-        inplace=True
+    return json.loads(
+        json.loads(
+            response['Payload'].read()
+        )['body']
     )
 
-    # Replace null values with NAs
-    redcap_raw_df = redcap_raw_df.replace({None: pd.NA, "": pd.NA})
-
-    return redcap_raw_df
-
 
-
-def launch_redcap_label_lambda(library_id: str) -> pd.DataFrame:
+def get_raw_record(raw_redcap_record: Dict) -> Dict:
     """
-    Launch the redcap lambda
-    :param library_id:
+    Rename the raw fields, empty values are set to None
+    :param raw_redcap_record:
     :return:
     """
-    redcap_label_df: pd.DataFrame = pd.DataFrame(columns=REDCAP_LABEL_FIELDS_CLINICAL)
+    raw_record = {}
+    for field in REDCAP_RAW_FIELDS_CLINICAL:
+        value = raw_redcap_record.get(field, None)
+        raw_record[REDCAP_RAW_FIELDS_RENAME_MAP.get(field, field)] = value if value != "" else None
+    return raw_record
 
-    label_list: List = json.loads(
-        json.loads(
-            get_lambda_client().invoke(
-                FunctionName=get_redcap_lambda_from_env(),
-                InvocationType='RequestResponse',
-                Payload=json.dumps(
-                    {
-                        "redcapProjectName": "TinyCT",
-                        "queryStringParameters": {
-                            "filter_logic": f"[libraryid] = \"{library_id}\"",
-                            "fields": REDCAP_LABEL_FIELDS_CLINICAL,
-                            "raw_or_label": "label",
-                        }
-                    }
-                )
-            )['Payload'].read()
-        )['body']
-    )
 
-    # Concatenate dict with empty columns
-    redcap_label_df = pd.concat(
-        [
-            redcap_label_df,
-            pd.DataFrame(label_list, columns=REDCAP_LABEL_FIELDS_CLINICAL)
-        ]
-    )
-
-    # Rename columns
-    redcap_label_df.rename(
-        columns={
-            "report_type": "sample_type",
-            "patient_gender": "gender",
-            "disease": "disease_name",
-            "libraryid": "library_id"
-        },
-        inplace=True
+def get_label_record(label_redcap_record: Dict) -> Dict:
+    """
+    Rename the label fields
+    :param label_redcap_record:
+    :return:
+    """
+    return dict(
+        map(
+            lambda field_iter_: (
+                REDCAP_LABEL_FIELDS_RENAME_MAP.get(field_iter_, field_iter_),
+                label_redcap_record.get(field_iter_, None)
+            ),
+            REDCAP_LABEL_FIELDS_CLINICAL
+        )
     )
 
-    # Filter to select columns
-    redcap_label_df = redcap_label_df[
-        [
-            "sample_type",
-            "disease_name",
-            "gender",
-            "library_id",
-            "pierian_metadata_complete"
-        ]
-    ]
-
-    return redcap_label_df
 
-def get_and_merge_raw_and_label_data(library_id: str) -> Dict:
+def merge_raw_and_label_records(library_id: str, raw_records: List[Dict], label_records: List[Dict]) -> Dict:
     """
-    Get the raw and label data from redcap and merge it
+    Merge the raw and label records of a library
     :param library_id:
+    :param raw_records:
+    :param label_records:
     :return:
     """
-    redcap_raw_df = launch_redcap_raw_lambda(library_id)
-    redcap_label_df = launch_redcap_label_lambda(library_id)
-
     # Check we have at least one entry
-    if redcap_raw_df.shape[0] == 0:
+    if len(raw_records) == 0:
         logger.info(f"No entries found for library '{library_id}'")
         raise ValueError
 
-    # Update the date field with na values if not set (for validation samples only)
-    validation_samples_index = redcap_label_df.query(
-        "sample_type.str.lower()=='validation'"
-    ).index
-    # For clinical samples, we only need to update the time_collected field
-    clinical_samples_index = redcap_label_df.query(
-        "not sample_type=='validation'"
-    ).index
-
-    # Replace na values for date_collection or date_received, or date_receipt if None or null
-    # Update time_collected field in both  since it might not exist
-    # Update for validation samples
-    for date_column in ["date_collected", "date_received", "time_collected"]:
-        redcap_raw_df.loc[validation_samples_index, date_column] = \
-            redcap_raw_df.loc[validation_samples_index, date_column].fillna(AUS_TIME_CURRENT_DEFAULT_DICT[date_column])
-        # Update for clinical samples
-    for date_column in ["time_collected"]:
-        redcap_raw_df.loc[clinical_samples_index, date_column] = \
-            redcap_raw_df.loc[clinical_samples_index, date_column].fillna(AUS_TIME_CURRENT_DEFAULT_DICT[date_column])
-
-    # Update date fields
-    redcap_raw_df["date_collected"] = redcap_raw_df.apply(
-        lambda date_str: date_str.date_collected + "T" + date_str.time_collected + f":00{AUS_TIMEZONE_SUFFIX}",
-        axis="columns"
-    )
+    num_entries: int
+    if not (num_entries := len(raw_records) * len(label_records)) == 1:
+        logger.info(f"Expected one record, not {num_entries}")
+        raise ValueError(f"Expected one record, not {num_entries}")
+
+    raw_record = raw_records[0]
+    label_record = label_records[0]
+
+    # Dates are set to today if not set (for validation samples only)
+    date_columns = ["time_collected"]
+    sample_type = label_record["sample_type"]
+    if isinstance(sample_type, str) and sample_type.lower() == "validation":
+        date_columns += ["date_collected", "date_received"]
+    for date_column in date_columns:
+        if raw_record[date_column] is None:
+            raw_record[date_column] = AUS_TIME_CURRENT_DEFAULT_DICT[date_column]
+
+    # Add the time to the date fields
+    if raw_record["date_collected"] is not None and raw_record["time_collected"] is not None:
+        raw_record["date_collected"] = (
+            raw_record["date_collected"] + "T" + raw_record["time_collected"] + f":00{AUS_TIMEZONE_SUFFIX}"
+        )
+    else:
+        raw_record["date_collected"] = None
+    if raw_record["date_received"] is not None:
+        raw_record["date_received"] = raw_record["date_received"] + f"T00:00:00{AUS_TIMEZONE_SUFFIX}"
 
-    # Add time to 'date_receipt' string
-    redcap_raw_df["date_received"] = redcap_raw_df.apply(
-        lambda x: x.date_received + f"T00:00:00{AUS_TIMEZONE_SUFFIX}",
-        axis="columns"
-    )
+    return {
+        **{field: raw_record[field] for field in REDCAP_DATA_RAW_FIELDS},
+        **{field: label_record[field] for field in REDCAP_DATA_LABEL_FIELDS},
+    }
 
-    # Subset columns for redcap raw df
-    redcap_raw_df = redcap_raw_df[
-        [
-            "disease_id",
-            "requesting_physician_first_name",
-            "requesting_physician_last_name",
-            "library_id",
-            "date_collected",
-            "date_received",
-            "patient_urn"
-        ]
-    ]
-
-    # Merge redcap data
-    redcap_df: pd.DataFrame = pd.merge(
-        redcap_raw_df, redcap_label_df,
-        on=["library_id"]
-    )
 
-    # Merge redcap information and then return
-    num_entries: int
-    if not (num_entries := redcap_df.shape[0]) == 1:
-        logger.info(f"Expected dataframe to be of length 1, not {num_entries}")
-        raise ValueError(f"Expected dataframe to be of length 1, not {num_entries}")
+def get_redcap_data_by_library_id(library_id_list: List[str]) -> Dict[str, Optional[Dict]]:
+    """
+    Get the merged redcap record of each library, None if the library is not (uniquely) in redcap
+    :param library_id_list:
+    :return:
+    """
+    redcap_data_by_library_id: Dict[str, Optional[Dict]] = {}
+
+    # Use the cached records first
+    for library_id in library_id_list:
+        expiry_time, redcap_data = REDCAP_DATA_CACHE.get(library_id, (0, None))
+        if expiry_time > monotonic():
+            redcap_data_by_library_id[library_id] = redcap_data
+
+    uncached_library_id_list = list(
+        filter(
+            lambda library_id_iter_: library_id_iter_ not in redcap_data_by_library_id,
+            dict.fromkeys(library_id_list)
+        )
+    )
+    if len(uncached_library_id_list) == 0:
+        return redcap_data_by_library_id
 
-    return redcap_df.to_dict(orient='records')[0]
+    # Get the raw and label records side by side
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        raw_future = executor.submit(
+            launch_redcap_lambda, uncached_library_id_list, REDCAP_RAW_FIELDS_CLINICAL, "raw"
+        )
+        label_future = executor.submit(
+            launch_redcap_lambda, uncached_library_id_list, REDCAP_LABEL_FIELDS_CLINICAL, "label"
+        )
+        raw_records = list(map(get_raw_record, raw_future.result()))
+        label_records = list(map(get_label_record, label_future.result()))
+
+    # Group by library
+    raw_records_by_library_id: Dict[str, List[Dict]] = {}
+    for raw_record in raw_records:
+        raw_records_by_library_id.setdefault(raw_record["library_id"], []).append(raw_record)
+    label_records_by_library_id: Dict[str, List[Dict]] = {}
+    for label_record in label_records:
+        label_records_by_library_id.setdefault(label_record["library_id"], []).append(label_record)
+
+    for library_id in uncached_library_id_list:
+        try:
+            redcap_data = merge_raw_and_label_records(
+                library_id,
+                raw_records_by_library_id.get(library_id, []),
+                label_records_by_library_id.get(library_id, [])
+            )
+        except ValueError:
+            redcap_data_by_library_id[library_id] = None
+            continue
+        REDCAP_DATA_CACHE[library_id] = (monotonic() + REDCAP_DATA_CACHE_TTL_SECONDS, redcap_data)
+        redcap_data_by_library_id[library_id] = redcap_data
+
+    return redcap_data_by_library_id
 
 
 def handler(event, context) -> Dict:
@@ -288,23 +306,12 @@ def handler(event, context) -> Dict:
     :param context:
     :return:
     """
-    # Wait for lambda to warm up
-    logger.info("Warming up redcap lambda")
-    while not warm_up_lambda():
-        sleep(10)
-    logger.info("Redcap lambda warmup complete!")
-
     # Return
-    try:
-        return {
-            "redcap_data": get_and_merge_raw_and_label_data(event['library_id']),
-            "in_redcap": True
-        }
-    except ValueError:
-        return {
-            "redcap_data": None,
-            "in_redcap": False
-        }
+    redcap_data = get_redcap_data_by_library_id([event['library_id']])[event['library_id']]
+    return {
+        "redcap_data": redcap_data,
+        "in_redcap": redcap_data is not None
+    }
 
 
 # if __name__ == '__main__':
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+
+"""
+The merged redcap records of the filter logic query match the per library outputs recorded from the
+pandas implementation, against a stubbed redcap lambda
+
+Run from the get_data_from_redcap_py directory with
+    PYTHONPATH=. python -m unittest discover tests
+"""
+
+# Standard imports
+import io
+import json
+import os
+import re
+import unittest
+from pathlib import Path
+from unittest import mock
+
+# Local imports
+import get_data_from_redcap
+
+FIXTURES_DIR = Path(__file__).parent / "fixtures"
+
+
+class RedcapLambdaStub:
+    """
+    Stand in for the lambda client, answers TinyCT filter logic queries on library ids
+    """
+    def __init__(self, records):
+        self.records = records
+        self.invocations = []
+
+    def invoke(self, FunctionName, InvocationType, Payload=None):
+        payload = json.loads(Payload)
+        self.invocations.append(payload)
+        query_string_parameters = payload["queryStringParameters"]
+        library_id_list = re.findall(r'\[libraryid\] = "([^"]+)"', query_string_parameters["filter_logic"])
+        rows = [
+            {
+                field: record[query_string_parameters["raw_or_label"]][field]
+                for field in query_string_parameters["fields"]
+            }
+            for record in self.records
+            if record["raw"]["libraryid"] in library_id_list
+        ]
+        return {
+            "Payload": io.BytesIO(json.dumps({"statusCode": 200, "body": json.dumps(rows)}).encode())
+        }
+
+
+class TestGetDataFromRedcap(unittest.TestCase):
+    def setUp(self):
+        self.expected = json.loads((FIXTURES_DIR / "expected_outputs.json").read_text())
+        self.lambda_stub = RedcapLambdaStub(
+            json.loads((FIXTURES_DIR / "redcap_records.json").read_text())["records"]
+        )
+
+        get_data_from_redcap.REDCAP_DATA_CACHE.clear()
+        for patch in [
+            mock.patch.dict(os.environ, {"REDCAP_LAMBDA_FUNCTION_NAME": "redcap-apis-dev-lambda-function"}),
+            mock.patch.object(get_data_from_redcap, "get_lambda_client", return_value=self.lambda_stub),
+            mock.patch.object(
+                get_data_from_redcap, "AUS_TIME_CURRENT_DEFAULT_DICT", self.expected["aus_time_current_default_dict"]
+            ),
+            mock.patch.object(get_data_from_redcap, "AUS_TIMEZONE_SUFFIX", self.expected["aus_timezone_suffix"]),
+        ]:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def test_per_library(self):
+        for library_id, expected_output in self.expected["outputs"].items():
+            self.assertEqual(
+                get_data_from_redcap.handler({"library_id": library_id}, None),
+                expected_output,
+                library_id
+            )
+        # A raw and a label query per library, no warm up invocations
+        self.assertEqual(len(self.lambda_stub.invocations), 2 * len(self.expected["outputs"]))
+
+    def test_batch(self):
+        library_id_list = list(self.expected["outputs"].keys())
+        redcap_data_by_library_id = get_data_from_redcap.get_redcap_data_by_library_id(library_id_list)
+
+        self.assertEqual(
+            {
+                library_id: {"redcap_data": redcap_data, "in_redcap": redcap_data is not None}
+                for library_id, redcap_data in redcap_data_by_library_id.items()
+            },
+            self.expected["outputs"]
+        )
+        # One raw and one label query for the whole batch
+        self.assertEqual(
+            sorted(invocation["queryStringParameters"]["raw_or_label"] for invocation in self.lambda_stub.invocations),
+            ["label", "raw"]
+        )
+
+    def test_cache(self):
+        get_data_from_redcap.get_redcap_data_by_library_id(list(self.expected["outputs"].keys()))
+
+        # Libraries found in redcap are served from the cache, the rest are queried again
+        self.assertEqual(
+            get_data_from_redcap.handler({"library_id": "L2401380"}, None),
+            self.expected["outputs"]["L2401380"]
+        )
+        self.assertEqual(len(self.lambda_stub.invocations), 2)
+        get_data_from_redcap.handler({"library_id": "L2401386"}, None)
+        self.assertEqual(len(self.lambda_stub.invocations), 4)
+
+        # Until the cache expires
+        with mock.patch.object(
+                get_data_from_redcap, "monotonic",
+                return_value=get_data_from_redcap.monotonic() + get_data_from_redcap.REDCAP_DATA_CACHE_TTL_SECONDS
+        ):
+            get_data_from_redcap.handler({"library_id": "L2401380"}, None)
+        self.assertEqual(len(self.lambda_stub.invocations), 6)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -48,6 +48,7 @@ export class OncoanalyserDnaRnaReadyConstruct extends Construct {
     workflowName: 'oncoanalyser-wgts-dna-rna',
     workflowVersion: '2.0.0',
     tablePartitionName: 'library',
+    libraryPairingTablePartitionName: 'library_pairing',
   };
 
   constructor(scope: Construct, id: string, props: OncoanalyserDnaRnaReadyConstructProps) {
@@ -80,8 +81,18 @@ export class OncoanalyserDnaRnaReadyConstruct extends Construct {
         index: 'find_complement_library.py',
         handler: 'handler',
         memorySize: 1024,
+        environment: {
+          /* Table env vars */
+          TABLE_NAME: props.tableObj.tableName,
+          LIBRARY_PAIRING_TABLE_PARTITION_NAME:
+            this.OncoanalyserDnaRnaReadyMap.libraryPairingTablePartitionName,
+        },
       }
     );
+
+    // Add the libraries to, and query, the pairing index of the subject
+    props.tableObj.grantReadWriteData(getComplementLibraryPairLambdaObj.currentVersion);
+
     const collectOrcaBusObjFromSubjectIdLambdaObj = new GetMetadataLambdaConstruct(
       this,
       'get_orcabus_id_from_subject_id',
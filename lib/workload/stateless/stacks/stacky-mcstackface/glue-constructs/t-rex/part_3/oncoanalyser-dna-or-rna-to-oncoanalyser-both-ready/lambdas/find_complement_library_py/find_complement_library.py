@@ -1,228 +1,317 @@
-#!/usr/bin/env python3
-
-"""
-Find complement dna/rna library
-
-Ensure we have a tumor dna, normal dna and tumor rna library
-
-Return library object (library_id, orcabus_id) for each library
-"""
-
-#!/usr/bin/env python3
-
-"""
-Given a library object and a list of complementary library objects, find a matching pair for the library object.
-
-The library objects must match on 'workflow' and 'type' attributes, but must be the opposite phenotype.
-"""
-
-from typing import Dict, List, Tuple, Optional
-
-
-def find_complement_library_pairs(library: Dict, complement_libraries: List[Dict]) -> Tuple[Optional[Dict], Optional[Dict], Optional[Dict]]:
-    """
-    Given a library object and a list of complementary library objects, find a matching pair for the library object
-    within the complement library list.
-    :param library:
-    :param complement_libraries:
-    :return:
-    """
-
-    if library['type'].lower() == "wgs":
-        # Get only
-        dna_normal_libraries = list(
-            filter(
-                lambda lib_iter_: (
-                    lib_iter_['type'].lower() == "wgs" and
-                    lib_iter_['phenotype'] == 'normal'
-                ),
-                complement_libraries
-            )
-        )
-
-        # Unlikely if we have just run oncoanalyser dna
-        # FIXME - also handle duplicate cases
-        if len(dna_normal_libraries) == 0:
-            return None, None, None
-
-        # Get the rna library
-        rna_tumor_libraries = list(
-            filter(
-                lambda lib_iter_: (
-                    lib_iter_['type'].lower() == "wts" and
-                    lib_iter_['phenotype'] == 'tumor'
-                ),
-                complement_libraries
-            )
-        )
-
-        # FIXME - also handle duplicate cases
-        if len(rna_tumor_libraries) == 0:
-            return None, None, None
-
-        return library, dna_normal_libraries[0], rna_tumor_libraries[0]
-
-    elif library['type'].lower() == "wts":
-        # Get dna tumor library
-        dna_tumor_libraries = list(
-            filter(
-                lambda lib_iter_: (
-                    lib_iter_['type'].lower() == "wgs" and
-                    lib_iter_['phenotype'] == 'tumor'
-                ),
-                complement_libraries
-            )
-        )
-
-        if len(dna_tumor_libraries) == 0:
-            return None, None, None
-
-        # Get dna normal library
-        dna_normal_libraries = list(
-            filter(
-                lambda lib_iter_: (
-                    lib_iter_['type'].lower() == "wgs" and
-                    lib_iter_['phenotype'] == 'normal'
-                ),
-                complement_libraries
-            )
-        )
-
-        if len(dna_normal_libraries) == 0:
-            return None, None, None
-
-        return dna_tumor_libraries[0], dna_normal_libraries[0], library
-
-    return None, None, None
-
-
-def handler(event, context):
-    """
-    Lambda handler function
-    :param event:
-    :param context:
-    :return:
-    """
-
-    library_obj: Dict = event['library_obj']
-    complement_libraries: List[Dict] = event['complementary_library_obj_list']
-
-    # Filter out empty complement libraries
-    complement_libraries = list(
-        filter(
-            lambda comp_lib_iter_: (
-                comp_lib_iter_ is not None and
-                not comp_lib_iter_['orcabus_id'] == library_obj['orcabus_id']
-            ),
-            complement_libraries
-        )
-    )
-
-    dna_tumor_library, dna_normal_library, rna_tumor_library = (
-        find_complement_library_pairs(library_obj, complement_libraries)
-    )
-
-    if dna_tumor_library is None:
-        return {
-            'successful_pairing': False,
-            'tumor_dna_library': None,
-            'normal_dna_library': None,
-            'tumor_rna_library': None
-        }
-
-    return {
-        'successful_pairing': True,
-        'tumor_dna_library': dna_tumor_library,
-        'normal_dna_library': dna_normal_library,
-        'tumor_rna_library': rna_tumor_library
-    }
-
-
-
-# if __name__ == "__main__":
-#     import json
-#
-#     print(
-#         json.dumps(
-#             handler(
-#                 {
-#                     "library_obj": {
-#                         "phenotype": "tumor",
-#                         "library_id": "L2400231",
-#                         "workflow": "clinical",
-#                         "assay": "TsqNano",
-#                         "subject_orcabus_id": "sbj.01J9T96QNATH3FNMFZK7V0NPJT",
-#                         "orcabus_id": "lib.01J9T96QQ816T14K2K6JTTS94F",
-#                         "type": "WGS"
-#                     },
-#                     "complementary_library_obj_list": [
-#                         {
-#                             "phenotype": "tumor",
-#                             "subject_id": "SN_PMC-141",
-#                             "library_id": "L2400231",
-#                             "workflow": "clinical",
-#                             "assay": "TsqNano",
-#                             "subject_orcabus_id": "sbj.01J9T96QNATH3FNMFZK7V0NPJT",
-#                             "orcabus_id": "lib.01J9T96QQ816T14K2K6JTTS94F",
-#                             "type": "WGS"
-#                         },
-#                         {
-#                             "phenotype": "normal",
-#                             "subject_id": "SN_PMC-141",
-#                             "library_id": "L2400238",
-#                             "workflow": "clinical",
-#                             "assay": "TsqNano",
-#                             "subject_orcabus_id": "sbj.01J9T96QNATH3FNMFZK7V0NPJT",
-#                             "orcabus_id": "lib.01J9T96R8N5GFF32JYJZGWH9EK",
-#                             "type": "WGS"
-#                         },
-#                         {
-#                             "phenotype": "tumor",
-#                             "subject_id": "SN_PMC-141",
-#                             "library_id": "L2400255",
-#                             "workflow": "clinical",
-#                             "assay": "NebRNA",
-#                             "subject_orcabus_id": "sbj.01J9T96QNATH3FNMFZK7V0NPJT",
-#                             "orcabus_id": "lib.01J9T96SNEESDAZN0CB4MAY118",
-#                             "type": "WTS"
-#                         }
-#                     ]
-#                 },
-#                 None
-#             ),
-#             indent=4
-#         )
-#     )
-#
-#     # {
-#     #     "successful_pairing": true,
-#     #     "tumor_dna_library": {
-#     #         "phenotype": "tumor",
-#     #         "library_id": "L2400231",
-#     #         "workflow": "clinical",
-#     #         "assay": "TsqNano",
-#     #         "subject_orcabus_id": "sbj.01J9T96QNATH3FNMFZK7V0NPJT",
-#     #         "orcabus_id": "lib.01J9T96QQ816T14K2K6JTTS94F",
-#     #         "type": "WGS"
-#     #     },
-#     #     "normal_dna_library": {
-#     #         "phenotype": "normal",
-#     #         "subject_id": "SN_PMC-141",
-#     #         "library_id": "L2400238",
-#     #         "workflow": "clinical",
-#     #         "assay": "TsqNano",
-#     #         "subject_orcabus_id": "sbj.01J9T96QNATH3FNMFZK7V0NPJT",
-#     #         "orcabus_id": "lib.01J9T96R8N5GFF32JYJZGWH9EK",
-#     #         "type": "WGS"
-#     #     },
-#     #     "tumor_rna_library": {
-#     #         "phenotype": "tumor",
-#     #         "subject_id": "SN_PMC-141",
-#     #         "library_id": "L2400255",
-#     #         "workflow": "clinical",
-#     #         "assay": "NebRNA",
-#     #         "subject_orcabus_id": "sbj.01J9T96QNATH3FNMFZK7V0NPJT",
-#     #         "orcabus_id": "lib.01J9T96SNEESDAZN0CB4MAY118",
-#     #         "type": "WTS"
-#     #     }
+#!/usr/bin/env python3
+
+"""
+Find complement dna/rna library
+
+Ensure we have a tumor dna, normal dna and tumor rna library
+
+Return library object (library_id, orcabus_id) for each library
+
+Libraries that have completed oncoanalyser are kept in a pairing index in the glue table, partitioned by subject,
+
+{
+    "id": "<subject_orcabus_id>",
+    "id_type": "library_pairing#<library_orcabus_id>",
+    "library_json": "<library object>"
+}
+
+The libraries are added to the index as their oncoanalyser run completes (the tumor and normal for a dna run),
+so the complement libraries of the subject are a single query on the subject partition.
+Libraries that completed oncoanalyser before the index existed are loaded into it once
+by scripts/backfill_library_pairing_index.py (at the root of the stacky-mcstackface stack).
+
+If the subject has more than one library of a type and phenotype (i.e. a library has been topped up or resequenced)
+the most recent library wins (see get_library_pairing_precedence),
+so the libraries do not depend on the order in which the oncoanalyser runs completed.
+"""
+
+import json
+import typing
+from os import environ
+from typing import Dict, List, Tuple, Optional
+
+import boto3
+
+if typing.TYPE_CHECKING:
+    from mypy_boto3_dynamodb import DynamoDBClient
+
+# Globals
+DYNAMODB_TABLE_NAME_ENV_VAR = "TABLE_NAME"
+LIBRARY_PAIRING_PARTITION_ENV_VAR = "LIBRARY_PAIRING_TABLE_PARTITION_NAME"
+
+LIBRARY_ITEM_ATTRIBUTES = [
+    "library_id", "phenotype", "workflow", "type", "assay", "subject_id", "subject_orcabus_id"
+]
+
+
+def get_dynamodb_db_client() -> 'DynamoDBClient':
+    return boto3.client('dynamodb')
+
+
+def get_library_pairing_id_type_prefix() -> str:
+    return f"{environ[LIBRARY_PAIRING_PARTITION_ENV_VAR]}#"
+
+
+def get_library_obj_from_library_item(library_item: Dict) -> Dict:
+    """
+    Convert a library item of the glue table into a library object
+    :param library_item:
+    :return:
+    """
+    return {
+        "orcabus_id": library_item['id']['S'],
+        **{
+            attribute_iter_: library_item[attribute_iter_]['S']
+            for attribute_iter_ in LIBRARY_ITEM_ATTRIBUTES
+        }
+    }
+
+
+def add_library_to_pairing_index(library: Dict):
+    """
+    Add (or replace) the library in the pairing index of its subject
+    :param library:
+    :return:
+    """
+    get_dynamodb_db_client().put_item(
+        TableName=environ[DYNAMODB_TABLE_NAME_ENV_VAR],
+        Item={
+            'id': {'S': library['subject_orcabus_id']},
+            'id_type': {'S': get_library_pairing_id_type_prefix() + library['orcabus_id']},
+            'library_json': {'S': json.dumps(library)},
+        }
+    )
+
+
+def get_libraries_from_pairing_index(subject_orcabus_id: str) -> List[Dict]:
+    """
+    Get every library of the subject in the pairing index
+    :param subject_orcabus_id:
+    :return:
+    """
+    query_kwargs = {
+        'TableName': environ[DYNAMODB_TABLE_NAME_ENV_VAR],
+        'KeyConditionExpression': '#id = :subject_orcabus_id AND begins_with(#id_type, :id_type_prefix)',
+        'ExpressionAttributeNames': {
+            '#id': 'id',
+            '#id_type': 'id_type',
+        },
+        'ExpressionAttributeValues': {
+            ':subject_orcabus_id': {'S': subject_orcabus_id},
+            ':id_type_prefix': {'S': get_library_pairing_id_type_prefix()},
+        },
+        # Read our own write, and any library of the subject that completed just before this one
+        'ConsistentRead': True,
+    }
+
+    libraries = []
+    while True:
+        query_response = get_dynamodb_db_client().query(**query_kwargs)
+        libraries.extend(
+            json.loads(item_iter_['library_json']['S'])
+            for item_iter_ in query_response['Items']
+        )
+        if 'LastEvaluatedKey' not in query_response:
+            break
+        query_kwargs['ExclusiveStartKey'] = query_response['LastEvaluatedKey']
+
+    return libraries
+
+
+def get_library_pairing_precedence(library: Dict) -> Tuple[str, str]:
+    """
+    Precedence of duplicate libraries, the most recent library wins,
+    library ids are issued in order, and a topped up or rerun library sorts after the original,
+    i.e. L2400231 < L2400231_topup < L2400238
+    The orcabus id breaks any remaining tie
+    :param library:
+    :return:
+    """
+    return library['library_id'], library['orcabus_id']
+
+
+def get_library_by_type_and_phenotype(
+        libraries: List[Dict],
+        library_type: str,
+        phenotype: str
+) -> Optional[Dict]:
+    """
+    Get the library of the type and phenotype, the most recent if there is more than one
+    :param libraries:
+    :param library_type:
+    :param phenotype:
+    :return:
+    """
+    libraries = list(
+        filter(
+            lambda lib_iter_: (
+                lib_iter_['type'].lower() == library_type and
+                lib_iter_['phenotype'] == phenotype
+            ),
+            libraries
+        )
+    )
+
+    if len(libraries) == 0:
+        return None
+
+    return max(libraries, key=get_library_pairing_precedence)
+
+
+def find_complement_library_pairs(library: Dict, complement_libraries: List[Dict]) -> Tuple[Optional[Dict], Optional[Dict], Optional[Dict]]:
+    """
+    Given a library object and a list of complementary library objects, find a matching pair for the library object
+    within the complement library list.
+    :param library:
+    :param complement_libraries:
+    :return:
+    """
+
+    if library['type'].lower() == "wgs":
+        # Unlikely if we have just run oncoanalyser dna
+        dna_normal_library = get_library_by_type_and_phenotype(complement_libraries, "wgs", "normal")
+        if dna_normal_library is None:
+            return None, None, None
+
+        # Get the rna library
+        rna_tumor_library = get_library_by_type_and_phenotype(complement_libraries, "wts", "tumor")
+        if rna_tumor_library is None:
+            return None, None, None
+
+        return library, dna_normal_library, rna_tumor_library
+
+    elif library['type'].lower() == "wts":
+        # Get dna tumor library
+        dna_tumor_library = get_library_by_type_and_phenotype(complement_libraries, "wgs", "tumor")
+        if dna_tumor_library is None:
+            return None, None, None
+
+        # Get dna normal library
+        dna_normal_library = get_library_by_type_and_phenotype(complement_libraries, "wgs", "normal")
+        if dna_normal_library is None:
+            return None, None, None
+
+        return dna_tumor_library, dna_normal_library, library
+
+    return None, None, None
+
+
+def handler(event, context):
+    """
+    Lambda handler function
+    :param event:
+    :param context:
+    :return:
+    """
+
+    library_obj: Dict = event['library_obj']
+
+    # Add the libraries of the completed oncoanalyser run to the pairing index,
+    # then collect the libraries of the subject that have completed oncoanalyser
+    for completed_library_item in event['completed_library_item_list']:
+        add_library_to_pairing_index(get_library_obj_from_library_item(completed_library_item))
+
+    # Filter out the library itself
+    complement_libraries = list(
+        filter(
+            lambda comp_lib_iter_: (
+                not comp_lib_iter_['orcabus_id'] == library_obj['orcabus_id']
+            ),
+            get_libraries_from_pairing_index(library_obj['subject_orcabus_id'])
+        )
+    )
+
+    dna_tumor_library, dna_normal_library, rna_tumor_library = (
+        find_complement_library_pairs(library_obj, complement_libraries)
+    )
+
+    if dna_tumor_library is None:
+        return {
+            'successful_pairing': False,
+            'tumor_dna_library': None,
+            'normal_dna_library': None,
+            'tumor_rna_library': None
+        }
+
+    return {
+        'successful_pairing': True,
+        'tumor_dna_library': dna_tumor_library,
+        'normal_dna_library': dna_normal_library,
+        'tumor_rna_library': rna_tumor_library
+    }
+
+
+# if __name__ == "__main__":
+#     import json
+#
+#     environ['AWS_PROFILE'] = 'umccr-development'
+#     environ['AWS_REGION'] = 'ap-southeast-2'
+#     environ['TABLE_NAME'] = 'stacky-oncoanalyser-both-sash-glue-table'
+#     environ['LIBRARY_PAIRING_TABLE_PARTITION_NAME'] = 'library_pairing'
+#
+#     # The rna library completes, the dna libraries are already in the pairing index
+#     print(
+#         json.dumps(
+#             handler(
+#                 {
+#                     "library_obj": {
+#                         "phenotype": "tumor",
+#                         "library_id": "L2400255",
+#                         "workflow": "clinical",
+#                         "assay": "NebRNA",
+#                         "subject_orcabus_id": "sbj.01J9T96QNATH3FNMFZK7V0NPJT",
+#                         "orcabus_id": "lib.01J9T96SNEESDAZN0CB4MAY118",
+#                         "type": "WTS"
+#                     },
+#                     "completed_library_item_list": [
+#                         {
+#                             "id": {"S": "lib.01J9T96SNEESDAZN0CB4MAY118"},
+#                             "id_type": {"S": "library"},
+#                             "phenotype": {"S": "tumor"},
+#                             "subject_id": {"S": "SN_PMC-141"},
+#                             "library_id": {"S": "L2400255"},
+#                             "workflow": {"S": "clinical"},
+#                             "assay": {"S": "NebRNA"},
+#                             "subject_orcabus_id": {"S": "sbj.01J9T96QNATH3FNMFZK7V0NPJT"},
+#                             "type": {"S": "WTS"}
+#                         }
+#                     ]
+#                 },
+#                 None
+#             ),
+#             indent=4
+#         )
+#     )
+#
+#     # {
+#     #     "successful_pairing": true,
+#     #     "tumor_dna_library": {
+#     #         "phenotype": "tumor",
+#     #         "library_id": "L2400231",
+#     #         "workflow": "clinical",
+#     #         "assay": "TsqNano",
+#     #         "subject_orcabus_id": "sbj.01J9T96QNATH3FNMFZK7V0NPJT",
+#     #         "orcabus_id": "lib.01J9T96QQ816T14K2K6JTTS94F",
+#     #         "type": "WGS"
+#     #     },
+#     #     "normal_dna_library": {
+#     #         "phenotype": "normal",
+#     #         "subject_id": "SN_PMC-141",
+#     #         "library_id": "L2400238",
+#     #         "workflow": "clinical",
+#     #         "assay": "TsqNano",
+#     #         "subject_orcabus_id": "sbj.01J9T96QNATH3FNMFZK7V0NPJT",
+#     #         "orcabus_id": "lib.01J9T96R8N5GFF32JYJZGWH9EK",
+#     #         "type": "WGS"
+#     #     },
+#     #     "tumor_rna_library": {
+#     #         "phenotype": "tumor",
+#     #         "subject_id": "SN_PMC-141",
+#     #         "library_id": "L2400255",
+#     #         "workflow": "clinical",
+#     #         "assay": "NebRNA",
+#     #         "subject_orcabus_id": "sbj.01J9T96QNATH3FNMFZK7V0NPJT",
+#     #         "orcabus_id": "lib.01J9T96SNEESDAZN0CB4MAY118",
+#     #         "type": "WTS"
+#     #     }
 #     # }
\ No newline at end of file
@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+
+"""
+The library pairing index against a (moto) oncoanalyser glue table, with oncoanalyser runs completing in every order
+
+Run from the find_complement_library_py directory with
+    python -m unittest discover tests
+"""
+
+import os
+import unittest
+from itertools import permutations
+from typing import Dict, List, Optional
+from unittest.mock import MagicMock, patch
+
+import boto3
+from moto import mock_aws
+
+import find_complement_library
+
+TABLE_NAME = "stacky-oncoanalyser-both-sash-glue-table"
+SUBJECT_ORCABUS_ID = "sbj.01J9T96QNATH3FNMFZK7V0NPJT"
+
+ENV = {
+    "AWS_DEFAULT_REGION": "ap-southeast-2",
+    "TABLE_NAME": TABLE_NAME,
+    "LIBRARY_PAIRING_TABLE_PARTITION_NAME": "library_pairing",
+}
+
+
+def get_library(library_id: str, library_type: str, phenotype: str) -> Dict:
+    return {
+        "orcabus_id": f"lib.{library_id}",
+        "library_id": library_id,
+        "phenotype": phenotype,
+        "workflow": "clinical",
+        "type": library_type,
+        "assay": "TsqNano" if library_type == "WGS" else "NebRNA",
+        "subject_id": "SN_PMC-141",
+        "subject_orcabus_id": SUBJECT_ORCABUS_ID,
+    }
+
+
+def get_library_item(library: Dict) -> Dict:
+    """
+    The library as a (low level) item of the glue table
+    """
+    return {
+        "id": {"S": library["orcabus_id"]},
+        "id_type": {"S": "library"},
+        "analysis_complete": {"BOOL": True},
+        **{
+            attribute: {"S": library[attribute]}
+            for attribute in find_complement_library.LIBRARY_ITEM_ATTRIBUTES
+        }
+    }
+
+
+TUMOR_DNA_LIBRARY = get_library("L2400231", "WGS", "tumor")
+NORMAL_DNA_LIBRARY = get_library("L2400238", "WGS", "normal")
+TUMOR_RNA_LIBRARY = get_library("L2400255", "WTS", "tumor")
+# The rna library, resequenced
+TUMOR_RNA_RERUN_LIBRARY = get_library("L2400255_rerun", "WTS", "tumor")
+
+# The oncoanalyser dna run completes the tumor and normal dna libraries
+DNA_RUN = "dna"
+RNA_RUN = "rna"
+RNA_RERUN_RUN = "rna_rerun"
+
+
+@mock_aws
+class FindComplementLibraryUnitTest(unittest.TestCase):
+    def setUp(self):
+        patch.dict(os.environ, ENV).start()
+
+        self.dynamodb_client = boto3.client("dynamodb", region_name="ap-southeast-2")
+        self.create_table()
+
+        # Count the queries and scans of the table
+        self.counting_dynamodb_client = MagicMock(wraps=self.dynamodb_client)
+        patch.object(
+            find_complement_library, "get_dynamodb_db_client",
+            lambda: self.counting_dynamodb_client
+        ).start()
+
+    def tearDown(self):
+        patch.stopall()
+
+    def create_table(self):
+        self.dynamodb_client.create_table(
+            TableName=TABLE_NAME,
+            KeySchema=[
+                {"AttributeName": "id", "KeyType": "HASH"},
+                {"AttributeName": "id_type", "KeyType": "RANGE"},
+            ],
+            AttributeDefinitions=[
+                {"AttributeName": "id", "AttributeType": "S"},
+                {"AttributeName": "id_type", "AttributeType": "S"},
+            ],
+            BillingMode="PAY_PER_REQUEST",
+        )
+
+    def reset_table(self):
+        self.dynamodb_client.delete_table(TableName=TABLE_NAME)
+        self.create_table()
+
+    def complete_oncoanalyser_run(self, run: str) -> Dict:
+        """
+        The payload of the state machine, for a dna or rna oncoanalyser run
+        """
+        if run == DNA_RUN:
+            library_obj = TUMOR_DNA_LIBRARY
+            completed_libraries = [TUMOR_DNA_LIBRARY, NORMAL_DNA_LIBRARY]
+        else:
+            library_obj = TUMOR_RNA_LIBRARY if run == RNA_RUN else TUMOR_RNA_RERUN_LIBRARY
+            completed_libraries = [library_obj]
+
+        return find_complement_library.handler(
+            {
+                "library_obj": {
+                    key: value for key, value in library_obj.items() if not key == "subject_id"
+                },
+                "completed_library_item_list": list(map(get_library_item, completed_libraries))
+            },
+            None
+        )
+
+    def assert_libraries(self, response: Dict, tumor_rna_library: Optional[Dict]):
+        if tumor_rna_library is None:
+            self.assertEqual(
+                response,
+                {
+                    "successful_pairing": False,
+                    "tumor_dna_library": None,
+                    "normal_dna_library": None,
+                    "tumor_rna_library": None
+                }
+            )
+            return
+
+        self.assertTrue(response["successful_pairing"])
+        self.assertEqual(response["tumor_dna_library"]["orcabus_id"], TUMOR_DNA_LIBRARY["orcabus_id"])
+        self.assertEqual(response["normal_dna_library"], NORMAL_DNA_LIBRARY)
+        self.assertEqual(response["tumor_rna_library"]["orcabus_id"], tumor_rna_library["orcabus_id"])
+
+    def test_out_of_order_completion(self):
+        for completion_order in permutations([DNA_RUN, RNA_RUN, RNA_RERUN_RUN]):
+            with self.subTest(completion_order=completion_order):
+                self.reset_table()
+
+                completed_runs: List[str] = []
+                for run in completion_order:
+                    response = self.complete_oncoanalyser_run(run)
+                    completed_runs.append(run)
+
+                    if DNA_RUN not in completed_runs or len(completed_runs) == 1:
+                        # No dna, or no rna yet
+                        self.assert_libraries(response, None)
+                    elif run == DNA_RUN:
+                        # The most recent rna library that has completed, whichever order they completed in
+                        self.assert_libraries(
+                            response,
+                            TUMOR_RNA_RERUN_LIBRARY if RNA_RERUN_RUN in completed_runs else TUMOR_RNA_LIBRARY
+                        )
+                    else:
+                        # The rna library that has just completed
+                        self.assert_libraries(
+                            response,
+                            TUMOR_RNA_LIBRARY if run == RNA_RUN else TUMOR_RNA_RERUN_LIBRARY
+                        )
+
+    def test_one_query_per_completion(self):
+        for run in [RNA_RUN, DNA_RUN]:
+            self.complete_oncoanalyser_run(run)
+
+        # The dna run adds two libraries to the index, but is still a single query
+        self.assertEqual(self.counting_dynamodb_client.put_item.call_count, 3)
+        self.assertEqual(self.counting_dynamodb_client.query.call_count, 2)
+        self.counting_dynamodb_client.scan.assert_not_called()
+
+    def test_normal_is_indexed_with_the_dna_run(self):
+        self.complete_oncoanalyser_run(DNA_RUN)
+
+        self.assertEqual(
+            sorted(
+                find_complement_library.get_libraries_from_pairing_index(SUBJECT_ORCABUS_ID),
+                key=lambda library: library["library_id"]
+            ),
+            [TUMOR_DNA_LIBRARY, NORMAL_DNA_LIBRARY]
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+
+"""
+Backfill the library pairing index of a glue table from its library rows
+
+The loctite (tumor normal) and t-rex (oncoanalyser both sash) glue lambdas add a library to the pairing index
+of its subject as the library completes (qc or oncoanalyser), and only ever query the index.
+
+Libraries that completed before the pairing index existed are only in the library partition,
+run this once per glue table after the index is deployed so that those libraries are paired.
+
+Every completed library row is put into the index,
+the put is keyed on the subject and library orcabus ids so the script can be re-run safely.
+
+Usage:
+
+python3 backfill_library_pairing_index.py \
+  --table-name stacky-tn-glue-table \
+  --completed-by qc
+
+python3 backfill_library_pairing_index.py \
+  --table-name stacky-oncoanalyser-both-sash-glue-table \
+  --completed-by oncoanalyser
+"""
+
+# Standard imports
+import json
+import logging
+import typing
+from argparse import ArgumentParser
+from typing import Dict, Iterator
+
+import boto3
+
+if typing.TYPE_CHECKING:
+    from mypy_boto3_dynamodb import DynamoDBClient
+
+# Globals
+LIBRARY_PARTITION_NAME = "library"
+LIBRARY_PAIRING_PARTITION_NAME = "library_pairing"
+
+LIBRARY_ITEM_ATTRIBUTES = [
+    "library_id", "phenotype", "workflow", "type", "assay", "subject_id", "subject_orcabus_id"
+]
+
+# Filter expression of the library rows that have completed, by glue table
+COMPLETED_BY_FILTER_EXPRESSIONS = {
+    # Loctite, the library has completed qc
+    "qc": {
+        'FilterExpression': '#id_type = :id_type AND attribute_exists(#qc_metrics_json)',
+        'ExpressionAttributeNames': {
+            '#id_type': 'id_type',
+            '#qc_metrics_json': 'qc_metrics_json',
+        },
+        'ExpressionAttributeValues': {
+            ':id_type': {'S': LIBRARY_PARTITION_NAME},
+        },
+    },
+    # T-Rex, the library has completed oncoanalyser
+    "oncoanalyser": {
+        'FilterExpression': '#id_type = :id_type AND #analysis_complete = :analysis_complete',
+        'ExpressionAttributeNames': {
+            '#id_type': 'id_type',
+            '#analysis_complete': 'analysis_complete',
+        },
+        'ExpressionAttributeValues': {
+            ':id_type': {'S': LIBRARY_PARTITION_NAME},
+            ':analysis_complete': {'BOOL': True},
+        },
+    },
+}
+
+# Set logger
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def get_dynamodb_db_client() -> 'DynamoDBClient':
+    return boto3.client('dynamodb')
+
+
+def get_library_obj_from_library_item(library_item: Dict, completed_by: str) -> Dict:
+    """
+    Convert a library item of the glue table into the library object the glue lambdas keep in the index
+    :param library_item:
+    :param completed_by:
+    :return:
+    """
+    library_obj = {
+        "orcabus_id": library_item['id']['S'],
+        **{
+            attribute_iter_: library_item[attribute_iter_]['S']
+            for attribute_iter_ in LIBRARY_ITEM_ATTRIBUTES
+        },
+    }
+
+    # Loctite also pairs on the fastq list rows of the library
+    if completed_by == "qc":
+        library_obj["fastq_list_row_id_set"] = library_item['fastq_list_row_id_set']['SS']
+
+    return library_obj
+
+
+def get_completed_library_items(table_name: str, completed_by: str) -> Iterator[Dict]:
+    """
+    Scan the library partition of the glue table for the library rows that have completed
+    :param table_name:
+    :param completed_by:
+    :return:
+    """
+    for page in get_dynamodb_db_client().get_paginator('scan').paginate(
+        TableName=table_name,
+        **COMPLETED_BY_FILTER_EXPRESSIONS[completed_by]
+    ):
+        yield from page['Items']
+
+
+def add_library_to_pairing_index(table_name: str, library: Dict):
+    """
+    Add (or replace) the library in the pairing index of its subject
+    :param table_name:
+    :param library:
+    :return:
+    """
+    get_dynamodb_db_client().put_item(
+        TableName=table_name,
+        Item={
+            'id': {'S': library['subject_orcabus_id']},
+            'id_type': {'S': f"{LIBRARY_PAIRING_PARTITION_NAME}#{library['orcabus_id']}"},
+            'library_json': {'S': json.dumps(library)},
+        }
+    )
+
+
+def backfill_library_pairing_index(table_name: str, completed_by: str) -> int:
+    """
+    Add every completed library row of the glue table to the pairing index
+    :param table_name:
+    :param completed_by:
+    :return: The number of libraries added to the index
+    """
+    library_count = 0
+    for library_item in get_completed_library_items(table_name, completed_by):
+        add_library_to_pairing_index(table_name, get_library_obj_from_library_item(library_item, completed_by))
+        library_count += 1
+
+    return library_count
+
+
+def main():
+    parser = ArgumentParser(description="Backfill the library pairing index of a glue table from its library rows")
+    parser.add_argument("--table-name", required=True, help="Name of the glue table")
+    parser.add_argument(
+        "--completed-by", required=True, choices=list(COMPLETED_BY_FILTER_EXPRESSIONS.keys()),
+        help="qc for the loctite (tumor normal) glue table, oncoanalyser for the t-rex glue table"
+    )
+    args = parser.parse_args()
+
+    library_count = backfill_library_pairing_index(args.table_name, args.completed_by)
+    logger.info(f"Added {library_count} libraries to the pairing index of {args.table_name}")
+
+
+if __name__ == "__main__":
+    main()
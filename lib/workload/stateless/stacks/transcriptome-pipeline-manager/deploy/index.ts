@@ -14,6 +14,7 @@ import { DefinitionBody } from 'aws-cdk-lib/aws-stepfunctions';
 import { PythonLambdaFastqListRowsToCwlInputConstruct } from '../../../../components/python-lambda-fastq-list-rows-to-cwl-input';
 import { WfmWorkflowStateChangeIcav2ReadyEventHandlerConstruct } from '../../../../components/sfn-icav2-ready-event-handler';
 import { Icav2AnalysisEventHandlerConstruct } from '../../../../components/sfn-icav2-state-change-event-handler';
+import { Icav2ToolsPythonLambdaLayer } from '../../../../components/python-icav2-tools-layer';
 
 export interface WtsIcav2PipelineManagerConfig {
   /* ICAv2 Pipeline analysis essentials */
@@ -241,6 +242,11 @@ export class WtsIcav2PipelineManagerStack extends cdk.Stack {
     */
 
     // Build the lambdas
+    // Icav2 tools layer, for the output tree snapshot
+    const icav2ToolsLayer = new Icav2ToolsPythonLambdaLayer(this, 'icav2_tools_layer', {
+      layerPrefix: props.stateMachinePrefix,
+    }).lambdaLayerVersionObj;
+
     // Set the output json lambda
     const setOutputJsonLambdaObj = new PythonFunction(
       this,
@@ -253,6 +259,7 @@ export class WtsIcav2PipelineManagerStack extends cdk.Stack {
         handler: 'handler',
         memorySize: 1024,
         timeout: Duration.seconds(60),
+        layers: [icav2ToolsLayer],
         environment: {
           ICAV2_ACCESS_TOKEN_SECRET_ID: this.icav2AccessTokenSecretObj.secretName,
         },
@@ -33,9 +33,12 @@ from wrapica.enums import DataType, UriType
 from wrapica.libica_models import ProjectData
 from wrapica.project_data import (
     convert_uri_to_project_data_obj,
-    list_project_data_non_recursively, convert_project_data_obj_to_uri
+    convert_project_data_obj_to_uri
 )
 
+# Layer imports
+from icav2_tools import OutputTreeSnapshot
+
 # IDE imports only
 if typing.TYPE_CHECKING:
     from mypy_boto3_secretsmanager.client import SecretsManagerClient
@@ -73,7 +76,7 @@ def set_icav2_env_vars():
     )
 
 
-def get_files_from_transcriptome_directory(dragen_transcriptome_project_data_obj: ProjectData, dragen_output_prefix: str) -> Dict[str, ProjectData]:
+def get_files_from_transcriptome_directory(output_tree_snapshot: OutputTreeSnapshot, dragen_transcriptome_project_data_obj: ProjectData, dragen_output_prefix: str) -> Dict[str, ProjectData]:
     """
     Get the following files from the germline directory:
     dragen_germline_snv_vcf
@@ -81,9 +84,8 @@ def get_files_from_transcriptome_directory(dragen_transcriptome_project_data_obj
     :return:
     """
 
-    transcriptome_files_list: typing.List[ProjectData] = list_project_data_non_recursively(
-        project_id=dragen_transcriptome_project_data_obj.project_id,
-        parent_folder_id=dragen_transcriptome_project_data_obj.data.id,
+    transcriptome_files_list: typing.List[ProjectData] = output_tree_snapshot.list_project_data_non_recursively(
+        dragen_transcriptome_project_data_obj,
         data_type=DataType.FILE
     )
 
@@ -109,16 +111,15 @@ def get_files_from_transcriptome_directory(dragen_transcriptome_project_data_obj
     }
 
 
-def get_files_from_arriba_directory(arriba_project_data_obj: ProjectData) -> Dict[str, ProjectData]:
+def get_files_from_arriba_directory(output_tree_snapshot: OutputTreeSnapshot, arriba_project_data_obj: ProjectData) -> Dict[str, ProjectData]:
     """
     Get the following files from the germline directory:
     arriba_html_report
     :return:
     """
 
-    arriba_files_list: typing.List[ProjectData] = list_project_data_non_recursively(
-        project_id=arriba_project_data_obj.project_id,
-        parent_folder_id=arriba_project_data_obj.data.id,
+    arriba_files_list: typing.List[ProjectData] = output_tree_snapshot.list_project_data_non_recursively(
+        arriba_project_data_obj,
         data_type=DataType.FILE
     )
 
@@ -136,16 +137,15 @@ def get_files_from_arriba_directory(arriba_project_data_obj: ProjectData) -> Dic
     }
 
 
-def get_files_from_qualimap_directory(qualimap_project_data_obj: ProjectData) -> Dict[str, ProjectData]:
+def get_files_from_qualimap_directory(output_tree_snapshot: OutputTreeSnapshot, qualimap_project_data_obj: ProjectData) -> Dict[str, ProjectData]:
     """
     Get the following files from the germline directory:
     qualimap_html_report
     :return:
     """
 
-    qualimap_files_list: typing.List[ProjectData] = list_project_data_non_recursively(
-        project_id=qualimap_project_data_obj.project_id,
-        parent_folder_id=qualimap_project_data_obj.data.id,
+    qualimap_files_list: typing.List[ProjectData] = output_tree_snapshot.list_project_data_non_recursively(
+        qualimap_project_data_obj,
         data_type=DataType.FILE
     )
 
@@ -163,19 +163,19 @@ def get_files_from_qualimap_directory(qualimap_project_data_obj: ProjectData) ->
     }
 
 
-def get_files_from_multiqc_directory(multiqc_project_data_obj: ProjectData) -> Dict[str, ProjectData]:
+def get_files_from_multiqc_directory(output_tree_snapshot: OutputTreeSnapshot, multiqc_project_data_obj: ProjectData) -> Dict[str, ProjectData]:
     """
     Get the following files from the multiqc directory
 
     multiqc_html_report
 
+    :param output_tree_snapshot:
     :param multiqc_project_data_obj:
     :return:
     """
 
-    multiqc_files_list: typing.List[ProjectData] = list_project_data_non_recursively(
-        project_id=multiqc_project_data_obj.project_id,
-        parent_folder_id=multiqc_project_data_obj.data.id,
+    multiqc_files_list: typing.List[ProjectData] = output_tree_snapshot.list_project_data_non_recursively(
+        multiqc_project_data_obj,
         data_type=DataType.FILE
     )
 
@@ -210,10 +210,11 @@ def handler(event, context):
     # Get the analysis output uri as a project data object
     analysis_output_obj = convert_uri_to_project_data_obj(analysis_output_uri)
 
+    # List the analysis output once, every lookup below is answered from this snapshot
+    output_tree_snapshot = OutputTreeSnapshot.from_project_data_obj(analysis_output_obj)
+
     # FInd the dragen germline output
-    top_dir_list: List[ProjectData] = list_project_data_non_recursively(
-        project_id=analysis_output_obj.project_id,
-        parent_folder_id=analysis_output_obj.data.id,
+    top_dir_list: List[ProjectData] = output_tree_snapshot.list_project_data_non_recursively(
         data_type=DataType.FOLDER
     )
 
@@ -255,16 +256,16 @@ def handler(event, context):
     }
 
     # Get the files from the transcriptome directory
-    file_outputs_dict.update(get_files_from_transcriptome_directory(dragen_transcriptome_directory, output_prefix))
+    file_outputs_dict.update(get_files_from_transcriptome_directory(output_tree_snapshot, dragen_transcriptome_directory, output_prefix))
 
     # Get the files from the qualimap directory
-    file_outputs_dict.update(get_files_from_qualimap_directory(qualimap_directory))
+    file_outputs_dict.update(get_files_from_qualimap_directory(output_tree_snapshot, qualimap_directory))
 
     # Get the files from the arriba directory
-    file_outputs_dict.update(get_files_from_arriba_directory(arriba_directory))
+    file_outputs_dict.update(get_files_from_arriba_directory(output_tree_snapshot, arriba_directory))
 
     # Get the html report from the multiqc directory
-    file_outputs_dict.update(get_files_from_multiqc_directory(multiqc_directory))
+    file_outputs_dict.update(get_files_from_multiqc_directory(output_tree_snapshot, multiqc_directory))
 
     # Every value in the file outputs dict is a project data object, convert each value to a uri
     outputs_as_uri = dict(
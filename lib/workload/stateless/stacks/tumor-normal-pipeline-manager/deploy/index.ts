@@ -16,6 +16,7 @@ import { WfmWorkflowStateChangeIcav2ReadyEventHandlerConstruct } from '../../../
 import { Icav2AnalysisEventHandlerConstruct } from '../../../../components/sfn-icav2-state-change-event-handler';
 import { OraDecompressionConstruct } from '../../../../components/ora-file-decompression-fq-pair-sfn';
 import { NagSuppressions } from 'cdk-nag';
+import { Icav2ToolsPythonLambdaLayer } from '../../../../components/python-icav2-tools-layer';
 
 export interface TnIcav2PipelineManagerConfig {
   /* ICAv2 Pipeline analysis essentials */
@@ -226,6 +227,11 @@ export class TnIcav2PipelineManagerStack extends cdk.Stack {
     */
 
     // Build the lambdas
+    // Icav2 tools layer, for the output tree snapshot
+    const icav2ToolsLayer = new Icav2ToolsPythonLambdaLayer(this, 'icav2_tools_layer', {
+      layerPrefix: props.stateMachinePrefix,
+    }).lambdaLayerVersionObj;
+
     // Set the output json lambda
     const setOutputJsonLambdaObj = new PythonFunction(
       this,
@@ -238,6 +244,7 @@ export class TnIcav2PipelineManagerStack extends cdk.Stack {
         handler: 'handler',
         memorySize: 1024,
         timeout: Duration.seconds(60),
+        layers: [icav2ToolsLayer],
         environment: {
           ICAV2_ACCESS_TOKEN_SECRET_ID: this.icav2AccessTokenSecretObj.secretName,
         },
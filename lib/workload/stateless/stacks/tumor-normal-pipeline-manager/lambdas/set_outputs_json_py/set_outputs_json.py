@@ -33,10 +33,12 @@ from wrapica.enums import DataType, UriType
 from wrapica.libica_models import ProjectData
 from wrapica.project_data import (
     convert_uri_to_project_data_obj,
-    list_project_data_non_recursively,
     convert_project_data_obj_to_uri
 )
 
+# Layer imports
+from icav2_tools import OutputTreeSnapshot
+
 # IDE imports only
 if typing.TYPE_CHECKING:
     from mypy_boto3_secretsmanager.client import SecretsManagerClient
@@ -74,7 +76,7 @@ def set_icav2_env_vars():
     )
 
 
-def get_files_from_germline_directory(dragen_germline_project_data_obj: ProjectData, dragen_germline_output_prefix: str) -> Dict[str, ProjectData]:
+def get_files_from_germline_directory(output_tree_snapshot: OutputTreeSnapshot, dragen_germline_project_data_obj: ProjectData, dragen_germline_output_prefix: str) -> Dict[str, ProjectData]:
     """
     Get the following files from the germline directory:
     dragen_germline_snv_vcf
@@ -82,9 +84,8 @@ def get_files_from_germline_directory(dragen_germline_project_data_obj: ProjectD
     :return:
     """
 
-    germline_files_list: typing.List[ProjectData] = list_project_data_non_recursively(
-        project_id=dragen_germline_project_data_obj.project_id,
-        parent_folder_id=dragen_germline_project_data_obj.data.id,
+    germline_files_list: typing.List[ProjectData] = output_tree_snapshot.list_project_data_non_recursively(
+        dragen_germline_project_data_obj,
         data_type=DataType.FILE
     )
 
@@ -110,7 +111,7 @@ def get_files_from_germline_directory(dragen_germline_project_data_obj: ProjectD
     }
 
 
-def get_files_from_somatic_directory(dragen_somatic_project_data_obj: ProjectData, dragen_somatic_output_prefix: str) -> Dict[str, ProjectData]:
+def get_files_from_somatic_directory(output_tree_snapshot: OutputTreeSnapshot, dragen_somatic_project_data_obj: ProjectData, dragen_somatic_output_prefix: str) -> Dict[str, ProjectData]:
     """
     Get the following files from the dragen somatic directory
 
@@ -121,14 +122,14 @@ def get_files_from_somatic_directory(dragen_somatic_project_data_obj: ProjectDat
     dragen_somatic_sv_vcf
     dragen_somatic_bam
 
+    :param output_tree_snapshot:
     :param dragen_somatic_project_data_obj:
     :param dragen_somatic_output_prefix:
     :return:
     """
 
-    somatic_files_list: typing.List[ProjectData] = list_project_data_non_recursively(
-        project_id=dragen_somatic_project_data_obj.project_id,
-        parent_folder_id=dragen_somatic_project_data_obj.data.id,
+    somatic_files_list: typing.List[ProjectData] = output_tree_snapshot.list_project_data_non_recursively(
+        dragen_somatic_project_data_obj,
         data_type=DataType.FILE
     )
 
@@ -186,19 +187,19 @@ def get_files_from_somatic_directory(dragen_somatic_project_data_obj: ProjectDat
     }
 
 
-def get_files_from_multiqc_directory(multiqc_project_data_obj: ProjectData) -> Dict[str, ProjectData]:
+def get_files_from_multiqc_directory(output_tree_snapshot: OutputTreeSnapshot, multiqc_project_data_obj: ProjectData) -> Dict[str, ProjectData]:
     """
     Get the following files from the multiqc directory
 
     multiqc_html_report
 
+    :param output_tree_snapshot:
     :param multiqc_project_data_obj:
     :return:
     """
 
-    multiqc_files_list: typing.List[ProjectData] = list_project_data_non_recursively(
-        project_id=multiqc_project_data_obj.project_id,
-        parent_folder_id=multiqc_project_data_obj.data.id,
+    multiqc_files_list: typing.List[ProjectData] = output_tree_snapshot.list_project_data_non_recursively(
+        multiqc_project_data_obj,
         data_type=DataType.FILE
     )
 
@@ -234,10 +235,11 @@ def handler(event, context):
     # Get the analysis output uri as a project data object
     analysis_output_obj = convert_uri_to_project_data_obj(analysis_output_uri)
 
+    # List the analysis output once, every lookup below is answered from this snapshot
+    output_tree_snapshot = OutputTreeSnapshot.from_project_data_obj(analysis_output_obj)
+
     # FInd the dragen germline output
-    top_dir_list: List[ProjectData] = list_project_data_non_recursively(
-        project_id=analysis_output_obj.project_id,
-        parent_folder_id=analysis_output_obj.data.id,
+    top_dir_list: List[ProjectData] = output_tree_snapshot.list_project_data_non_recursively(
         data_type=DataType.FOLDER
     )
 
@@ -271,13 +273,13 @@ def handler(event, context):
     }
 
     # Get the files from the germline directory
-    file_outputs_dict.update(get_files_from_germline_directory(dragen_germline_directory, germline_output_prefix))
+    file_outputs_dict.update(get_files_from_germline_directory(output_tree_snapshot, dragen_germline_directory, germline_output_prefix))
 
     # Get the files from the somatic directory
-    file_outputs_dict.update(get_files_from_somatic_directory(dragen_somatic_directory, somatic_output_prefix))
+    file_outputs_dict.update(get_files_from_somatic_directory(output_tree_snapshot, dragen_somatic_directory, somatic_output_prefix))
 
     # Get the html report from the multiqc directory
-    file_outputs_dict.update(get_files_from_multiqc_directory(multiqc_directory))
+    file_outputs_dict.update(get_files_from_multiqc_directory(output_tree_snapshot, multiqc_directory))
 
     # Every value in the file outputs dict is a project data object, convert each value to a uri
     outputs_as_uri = dict(
@@ -0,0 +1,35 @@
+#!/usr/bin/env python3
+
+"""
+The outputs json from the output tree snapshot matches the outputs json recorded
+from the previous per folder listings, on a recorded listing of an analysis output
+
+The stub harness is shared with the other pipeline managers, from the icav2 tools layer tests
+
+Run from the set_outputs_json_py directory, with the icav2 tools layer (and its tests) on the python path, with
+    PYTHONPATH="../../../../../components/python-icav2-tools-layer/icav2_tools_layer/src:../../../../../components/python-icav2-tools-layer/icav2_tools_layer/tests:." python -m unittest discover tests
+"""
+
+# Standard imports
+import unittest
+from pathlib import Path
+
+# Layer test imports
+from set_outputs_json_harness import SetOutputsJsonTestMixin
+
+# Local imports
+import set_outputs_json
+
+
+class TestSetOutputsJson(SetOutputsJsonTestMixin, unittest.TestCase):
+    set_outputs_json_module = set_outputs_json
+    fixtures_dir = Path(__file__).parent / "fixtures"
+    event = {
+        "analysis_output_uri": "icav2://ea19a3f5-ec7c-4940-a474-c31cd91dbad4/analysis/tumor_normal/202407237e0fd947/",
+        "somatic_output_prefix": "L2400195",
+        "germline_output_prefix": "L2400191",
+    }
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -34,9 +34,11 @@ from wrapica.enums import DataType, UriType
 from wrapica.libica_models import ProjectData
 from wrapica.project_data import (
     convert_uri_to_project_data_obj, convert_project_data_obj_to_uri,
-    list_project_data_non_recursively
 )
 
+# Layer imports
+from icav2_tools import OutputTreeSnapshot
+
 
 # IDE imports only
 if typing.TYPE_CHECKING:
@@ -87,11 +89,11 @@ def handler(events, context):
     # Convert analysis uri to project folder object
     analysis_project_data_obj = convert_uri_to_project_data_obj(analysis_uri)
 
+    # List the analysis output once, every lookup below is answered from this snapshot
+    output_tree_snapshot = OutputTreeSnapshot.from_project_data_obj(analysis_project_data_obj)
+
     # Analysis list
-    analysis_top_level_data_list = list_project_data_non_recursively(
-        project_id=analysis_project_data_obj.project_id,
-        parent_folder_id=analysis_project_data_obj.data.id,
-    )
+    analysis_top_level_data_list = output_tree_snapshot.list_project_data_non_recursively()
 
     # Get multiqc directory
     try:
@@ -126,9 +128,8 @@ def handler(events, context):
         bam_file_obj: ProjectData = next(
             filter(
                 lambda project_data_obj_iter: project_data_obj_iter.data.details.name.endswith(".bam"),
-                list_project_data_non_recursively(
-                    project_id=alignment_data_obj.project_id,
-                    parent_folder_id=alignment_data_obj.data.id,
+                output_tree_snapshot.list_project_data_non_recursively(
+                    alignment_data_obj,
                     data_type=DataType.FILE
                 )
             )
@@ -142,9 +143,8 @@ def handler(events, context):
     multiqc_html_data_obj: ProjectData = next(
         filter(
             lambda project_data_obj_iter: project_data_obj_iter.data.details.name.endswith(".html"),
-            list_project_data_non_recursively(
-                project_id=multiqc_data_obj.project_id,
-                parent_folder_id=multiqc_data_obj.data.id,
+            output_tree_snapshot.list_project_data_non_recursively(
+                multiqc_data_obj,
                 data_type=DataType.FILE
             )
         )
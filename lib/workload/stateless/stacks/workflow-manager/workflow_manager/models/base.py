@@ -46,6 +46,9 @@ class OrcaBusBaseManager(models.Manager):
                 api_settings.ORDERING_PARAM,
                 PaginationConstant.PAGE,
                 PaginationConstant.ROWS_PER_PAGE,
+                PaginationConstant.CURSOR,
+                PaginationConstant.PAGINATION,
+                PaginationConstant.APPROXIMATE_COUNT,
                 "sortCol",
                 "sortAsc",
             ]
@@ -1,7 +1,8 @@
 from abc import ABC
 from rest_framework import filters
 from django.shortcuts import get_object_or_404
-from workflow_manager.pagination import StandardResultsSetPagination
+from workflow_manager.pagination import StandardResultsSetPagination, CursorResultsSetPagination, \
+    is_cursor_pagination_requested
 from rest_framework.response import Response
 from rest_framework.viewsets import ReadOnlyModelViewSet
 
@@ -12,3 +13,20 @@ class BaseViewSet(ReadOnlyModelViewSet, ABC):
     ordering = ["-orcabus_id"]
     pagination_class = StandardResultsSetPagination
     filter_backends = [filters.OrderingFilter, filters.SearchFilter]
+    # Non-nullable fields (indexed together with the pk) allowed as cursor pagination ordering, besides orcabus_id
+    cursor_ordering_fields = []
+
+    @property
+    def paginator(self):
+        """
+        Page number pagination by default, keyset pagination when opted-in with `?pagination=cursor`
+        """
+        if not hasattr(self, '_paginator'):
+            if self.pagination_class is None:
+                self._paginator = None
+            elif self.pagination_class is StandardResultsSetPagination and is_cursor_pagination_requested(
+                    getattr(self, 'request', None)):
+                self._paginator = CursorResultsSetPagination()
+            else:
+                self._paginator = self.pagination_class()
+        return self._paginator
@@ -0,0 +1,447 @@
+#!/usr/bin/env python3
+
+"""
+lambda-import-time ::: Cold start import budget for the python lambdas
+
+Imports each python lambda handler in a fresh interpreter under `python -X importtime`,
+with the handler directory, the layers of its own stack and the shared component layers on the python path
+(as the lambda runtime would see them), and reports the import time of each handler.
+
+Exits non-zero if a handler imports slower than its budget (see budgets.json), or cannot be imported at all.
+
+Usage:
+    python3 test/lambda-import-time/lambda_import_time.py [--repeat 3] [--report report.md] [handler_path ...]
+
+Run from the root of the repository, in a python 3.12 virtual environment with the lambda and layer dependencies installed.
+Handlers that cannot be imported (i.e. a dependency is missing from the environment) fail the run,
+unless --allow-import-errors is set
+"""
+
+# Standard imports
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional
+
+# Globals
+REPO_ROOT = Path(__file__).absolute().parent.parent.parent
+WORKLOAD_DIR = REPO_ROOT / "lib" / "workload"
+COMPONENTS_DIR = WORKLOAD_DIR / "components"
+BUDGETS_JSON_PATH = Path(__file__).absolute().parent / "budgets.json"
+
+HANDLER_REGEX = re.compile(r"^def handler\(", re.MULTILINE)
+DJANGO_SETTINGS_MODULE_REGEX = re.compile(r"[\"']DJANGO_SETTINGS_MODULE[\"'],\s*[\"']([\w.]+)[\"']")
+PROJECT_ROOT_FILE_NAMES = ["manage.py", "pyproject.toml"]
+IMPORT_TIME_REGEX = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)\s*$")
+EXCLUDED_DIR_NAMES = {"node_modules", "tests", "cdk.out", ".venv", "__pycache__"}
+
+IMPORT_TIMEOUT_SECONDS = 120
+NUM_TOP_IMPORTS = 3
+
+
+@dataclass
+class ImportTimeEntry:
+    module_name: str
+    self_us: int
+    cumulative_us: int
+    children: List['ImportTimeEntry'] = field(default_factory=list)
+
+
+@dataclass
+class HandlerReport:
+    handler_path: Path
+    budget_ms: float
+    import_time_ms: Optional[float] = None
+    top_imports: List[ImportTimeEntry] = field(default_factory=list)
+    import_error: Optional[str] = None
+
+    @property
+    def over_budget(self) -> bool:
+        return self.import_time_ms is not None and self.import_time_ms > self.budget_ms
+
+
+def find_handler_paths() -> List[Path]:
+    """
+    Every python file under lib/workload with a top level 'handler' function
+    :return:
+    """
+    handler_paths = []
+    for python_path in sorted(WORKLOAD_DIR.rglob("*.py")):
+        if EXCLUDED_DIR_NAMES.intersection(python_path.relative_to(WORKLOAD_DIR).parts):
+            continue
+        if HANDLER_REGEX.search(python_path.read_text(errors="ignore")):
+            handler_paths.append(python_path)
+    return handler_paths
+
+
+def get_layer_src_dirs(root_dir: Path) -> List[Path]:
+    """
+    The 'src' directories of the python layers (poetry projects) under a directory
+    :param root_dir:
+    :return:
+    """
+    return sorted(
+        pyproject_path.parent / "src"
+        for pyproject_path in root_dir.rglob("pyproject.toml")
+        if (pyproject_path.parent / "src").is_dir() and
+        not EXCLUDED_DIR_NAMES.intersection(pyproject_path.relative_to(root_dir).parts)
+    )
+
+
+def get_stack_dir(handler_path: Path) -> Path:
+    """
+    The stack (or component) directory of a handler
+    :param handler_path:
+    :return:
+    """
+    relative_parts = handler_path.relative_to(WORKLOAD_DIR).parts
+    if relative_parts[0] == "components":
+        return WORKLOAD_DIR.joinpath(*relative_parts[:2])
+    # stateless/stacks/<stack> or stateful/stacks/<stack>
+    return WORKLOAD_DIR.joinpath(*relative_parts[:3])
+
+
+def get_project_root_dir(handler_path: Path) -> Optional[Path]:
+    """
+    The nearest directory above the handler (up to its stack directory) with a manage.py or pyproject.toml,
+    i.e. the django project of a django lambda, that is packaged whole with the handler
+    :param handler_path:
+    :return:
+    """
+    stack_dir = get_stack_dir(handler_path)
+    for parent_dir in handler_path.parents:
+        if any(map(lambda file_name_iter: (parent_dir / file_name_iter).is_file(), PROJECT_ROOT_FILE_NAMES)):
+            return parent_dir
+        if parent_dir == stack_dir:
+            return None
+    return None
+
+
+def get_django_settings_module(handler_path: Path) -> Optional[str]:
+    """
+    The default settings module in the manage.py of the django project of the handler
+    :param handler_path:
+    :return:
+    """
+    project_root_dir = get_project_root_dir(handler_path)
+    if project_root_dir is None or not (project_root_dir / "manage.py").is_file():
+        return None
+    settings_module_match = DJANGO_SETTINGS_MODULE_REGEX.search((project_root_dir / "manage.py").read_text())
+    return settings_module_match.group(1) if settings_module_match is not None else None
+
+
+def get_handler_python_path(handler_path: Path) -> List[Path]:
+    """
+    The handler directory, then its project root (if any),
+    then the layers of its own stack (or component), then the shared component layers
+    :param handler_path:
+    :return:
+    """
+    python_path = [handler_path.parent]
+    project_root_dir = get_project_root_dir(handler_path)
+    if project_root_dir is not None and project_root_dir not in python_path:
+        python_path.append(project_root_dir)
+    for layer_src_dir in get_layer_src_dirs(get_stack_dir(handler_path)) + get_layer_src_dirs(COMPONENTS_DIR):
+        if layer_src_dir not in python_path:
+            python_path.append(layer_src_dir)
+    return python_path
+
+
+def parse_import_time(import_time_stderr: str) -> List[ImportTimeEntry]:
+    """
+    Parse the -X importtime output into a tree, the output lists each module after the modules it imports,
+    with the nesting depth as indentation
+    :param import_time_stderr:
+    :return: The top level imports
+    """
+    pending_entries_by_depth: Dict[int, List[ImportTimeEntry]] = {}
+    for line in import_time_stderr.splitlines():
+        import_time_match = IMPORT_TIME_REGEX.match(line)
+        if import_time_match is None:
+            continue
+        self_us, cumulative_us, indent, module_name = import_time_match.groups()
+        depth = len(indent) // 2
+        entry = ImportTimeEntry(
+            module_name=module_name,
+            self_us=int(self_us),
+            cumulative_us=int(cumulative_us),
+            children=pending_entries_by_depth.pop(depth + 1, []),
+        )
+        pending_entries_by_depth.setdefault(depth, []).append(entry)
+    return pending_entries_by_depth.get(0, [])
+
+
+def measure_handler_import_time(
+        handler_path: Path,
+        python_executable: str,
+        extra_python_path: List[str],
+        environment: Dict[str, str]
+) -> (Optional[ImportTimeEntry], Optional[str]):
+    """
+    Import the handler module in a fresh interpreter
+    :param handler_path:
+    :param python_executable:
+    :param extra_python_path:
+    :param environment: Environment variables read by handlers at import time (unless already set)
+    :return: The import time tree of the handler module, or the import error
+    """
+    env = dict(os.environ)
+    for env_key, env_value in environment.items():
+        env.setdefault(env_key, env_value)
+    env["PYTHONPATH"] = os.pathsep.join(
+        list(map(str, get_handler_python_path(handler_path))) +
+        extra_python_path +
+        ([env["PYTHONPATH"]] if env.get("PYTHONPATH") else [])
+    )
+    env["PYTHONDONTWRITEBYTECODE"] = "1"
+    # Clients created at import time need a region
+    env.setdefault("AWS_REGION", "ap-southeast-2")
+    env.setdefault("AWS_DEFAULT_REGION", env["AWS_REGION"])
+    # Django lambdas configure django at import time
+    if get_django_settings_module(handler_path) is not None:
+        env.setdefault("DJANGO_SETTINGS_MODULE", get_django_settings_module(handler_path))
+
+    module_name = handler_path.stem
+    try:
+        import_proc = subprocess.run(
+            [python_executable, "-X", "importtime", "-c", f"import {module_name}"],
+            cwd=handler_path.parent,
+            env=env,
+            capture_output=True,
+            text=True,
+            timeout=IMPORT_TIMEOUT_SECONDS,
+        )
+    except subprocess.TimeoutExpired:
+        return None, f"Timed out after {IMPORT_TIMEOUT_SECONDS} seconds"
+
+    if import_proc.returncode != 0:
+        error_lines = list(
+            filter(
+                lambda line_iter: not line_iter.startswith("import time:") and line_iter.strip(),
+                import_proc.stderr.splitlines()
+            )
+        )
+        return None, error_lines[-1] if len(error_lines) > 0 else f"Exited with {import_proc.returncode}"
+
+    try:
+        return next(
+            filter(
+                lambda entry_iter: entry_iter.module_name == module_name,
+                parse_import_time(import_proc.stderr)
+            )
+        ), None
+    except StopIteration:
+        return None, f"Could not find {module_name} in the import time output"
+
+
+def get_handler_report(
+        handler_path: Path,
+        budgets: Dict,
+        repeat: int,
+        python_executable: str,
+        extra_python_path: List[str]
+) -> HandlerReport:
+    """
+    Import the handler 'repeat' times and keep the fastest import
+    :param handler_path:
+    :param budgets:
+    :param repeat:
+    :param python_executable:
+    :param extra_python_path:
+    :return:
+    """
+    relative_handler_path = str(handler_path.relative_to(REPO_ROOT))
+    handler_report = HandlerReport(
+        handler_path=handler_path,
+        budget_ms=budgets.get("handlers", {}).get(relative_handler_path, budgets["default_budget_ms"]),
+    )
+
+    for _ in range(repeat):
+        handler_entry, import_error = measure_handler_import_time(
+            handler_path, python_executable, extra_python_path, budgets.get("environment", {})
+        )
+        if import_error is not None:
+            handler_report.import_error = import_error
+            return handler_report
+        if handler_report.import_time_ms is None or handler_entry.cumulative_us / 1000 < handler_report.import_time_ms:
+            handler_report.import_time_ms = handler_entry.cumulative_us / 1000
+            handler_report.top_imports = sorted(
+                handler_entry.children,
+                key=lambda entry_iter: entry_iter.cumulative_us,
+                reverse=True
+            )[:NUM_TOP_IMPORTS]
+
+    return handler_report
+
+
+def get_markdown_table(header: List[str], right_aligned: List[bool], rows: List[List[str]]) -> List[str]:
+    """
+    Markdown table with padded columns (as prettier would format it)
+    :param header:
+    :param right_aligned:
+    :param rows:
+    :return:
+    """
+    column_widths = [
+        max([3, len(header[column_index])] + [len(row_iter[column_index]) for row_iter in rows])
+        for column_index in range(len(header))
+    ]
+
+    def _get_row(cells: List[str]) -> str:
+        return "| " + " | ".join(
+            cell.rjust(column_width) if is_right_aligned else cell.ljust(column_width)
+            for cell, column_width, is_right_aligned in zip(cells, column_widths, right_aligned)
+        ) + " |"
+
+    return [
+        _get_row(header),
+        "| " + " | ".join(
+            "-" * (column_width - 1) + ":" if is_right_aligned else "-" * column_width
+            for column_width, is_right_aligned in zip(column_widths, right_aligned)
+        ) + " |",
+    ] + list(map(_get_row, rows))
+
+
+def get_markdown_report(handler_reports: List[HandlerReport], python_version: str) -> str:
+    """
+    One row per handler
+    :param handler_reports:
+    :param python_version:
+    :return:
+    """
+    num_over_budget = len(list(filter(lambda report_iter: report_iter.over_budget, handler_reports)))
+    num_import_errors = len(list(filter(lambda report_iter: report_iter.import_error is not None, handler_reports)))
+
+    report_lines = [
+        "# Lambda handler import times",
+        "",
+        f"Python {python_version}, "
+        f"{len(handler_reports)} handlers, {num_over_budget} over budget, {num_import_errors} could not be imported",
+        "",
+    ]
+    rows = []
+    for handler_report in handler_reports:
+        if handler_report.import_error is not None:
+            status = f"import error: {handler_report.import_error.replace('|', '/')}"
+        elif handler_report.over_budget:
+            status = "OVER BUDGET"
+        else:
+            status = "ok"
+        rows.append([
+            f"`{handler_report.handler_path.relative_to(REPO_ROOT)}`",
+            f"{handler_report.import_time_ms:.0f}" if handler_report.import_time_ms is not None else "",
+            f"{handler_report.budget_ms:.0f}",
+            status,
+            ", ".join(
+                f"{entry_iter.module_name} {entry_iter.cumulative_us / 1000:.0f}"
+                for entry_iter in handler_report.top_imports
+            ),
+        ])
+
+    report_lines += get_markdown_table(
+        ["Handler", "Import time (ms)", "Budget (ms)", "Status", "Heaviest imports (ms)"],
+        [False, True, True, False, False],
+        rows
+    )
+    return "\n".join(report_lines) + "\n"
+
+
+def get_args():
+    parser = argparse.ArgumentParser(description="Measure the import time of each python lambda handler")
+    parser.add_argument(
+        "handler_paths", nargs="*", type=Path,
+        help="Handlers to measure, defaults to every handler under lib/workload"
+    )
+    parser.add_argument("--repeat", type=int, default=3, help="Imports per handler, the fastest is kept")
+    parser.add_argument("--max-workers", type=int, default=1, help="Handlers to measure side by side")
+    parser.add_argument("--python", default=sys.executable, help="Interpreter to import the handlers with")
+    parser.add_argument(
+        "--extra-python-path", action="append", default=[],
+        help="Appended to the python path of each handler, i.e. a directory of installed layer dependencies"
+    )
+    parser.add_argument("--budgets", type=Path, default=BUDGETS_JSON_PATH)
+    parser.add_argument("--report", type=Path, help="Write the markdown report here, as well as to stdout")
+    parser.add_argument("--json", type=Path, help="Write the report as json here")
+    parser.add_argument(
+        "--allow-import-errors", action="store_true",
+        help="Only report the handlers that cannot be imported, rather than failing the run"
+    )
+    return parser.parse_args()
+
+
+def main():
+    args = get_args()
+
+    with open(args.budgets) as budgets_h:
+        budgets = json.load(budgets_h)
+
+    # Modules with a handler function that are not lambdas are listed under 'excluded_handlers'
+    handler_paths = (
+        list(map(lambda path_iter: path_iter.absolute(), args.handler_paths))
+        if len(args.handler_paths) > 0
+        else list(
+            filter(
+                lambda path_iter: str(path_iter.relative_to(REPO_ROOT)) not in budgets.get("excluded_handlers", []),
+                find_handler_paths()
+            )
+        )
+    )
+
+    with ThreadPoolExecutor(max_workers=args.max_workers) as executor:
+        handler_reports: List[HandlerReport] = list(
+            executor.map(
+                lambda handler_path_iter: get_handler_report(
+                    handler_path_iter, budgets, args.repeat, args.python, args.extra_python_path
+                ),
+                handler_paths
+            )
+        )
+
+    python_version = subprocess.run(
+        [args.python, "-c", "import platform; print(platform.python_version())"],
+        capture_output=True, text=True
+    ).stdout.strip()
+
+    markdown_report = get_markdown_report(handler_reports, python_version)
+    print(markdown_report)
+    if args.report is not None:
+        args.report.write_text(markdown_report)
+
+    if args.json is not None:
+        with open(args.json, "w") as json_h:
+            json.dump(
+                {
+                    "python_version": python_version,
+                    "handlers": [
+                        {
+                            "handler_path": str(handler_report.handler_path.relative_to(REPO_ROOT)),
+                            "import_time_ms": handler_report.import_time_ms,
+                            "budget_ms": handler_report.budget_ms,
+                            "import_error": handler_report.import_error,
+                            "top_imports": {
+                                entry_iter.module_name: entry_iter.cumulative_us / 1000
+                                for entry_iter in handler_report.top_imports
+                            },
+                        }
+                        for handler_report in handler_reports
+                    ]
+                },
+                json_h,
+                indent=2
+            )
+            json_h.write("\n")
+
+    if any(map(lambda report_iter: report_iter.over_budget, handler_reports)):
+        sys.exit(1)
+    if not args.allow_import_errors and any(map(lambda report_iter: report_iter.import_error is not None, handler_reports)):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()